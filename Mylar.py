@@ -123,12 +123,13 @@ def main():
     parser_maintenance.add_argument('-st', '--importstatus', action='store_true', help='Provide current maintenance status')
     parser_maintenance.add_argument('-u', '--update', action='store_true', help='force mylar to perform an update as if in GUI')
     parser_maintenance.add_argument('-fs', '--fixslashes', action='store_true', help='remove double-slashes from within paths in db')
+    parser_maintenance.add_argument('-qp', '--queryplan', action='store_true', help='check that the main queries are index-backed (exits non-zero on a full table scan)')
     #parser_maintenance.add_argument('-it', '--importtext', action='store', help='Import a specified text file into current db')
 
     args = parser.parse_args()
 
     if args.maintenance:
-        if all([args.exportjson is None, args.importdatabase is None, args.importjson is None, args.importstatus is False, args.update is False, args.fixslashes is False]):
+        if all([args.exportjson is None, args.importdatabase is None, args.importjson is None, args.importstatus is False, args.update is False, args.fixslashes is False, args.queryplan is False]):
             print('Expecting subcommand with the maintenance positional argumeent')
             sys.exit()
         mylar.MAINTENANCE = True
@@ -260,7 +261,7 @@ def main():
     if mylar.DAEMON:
         mylar.daemonize()
 
-    if mylar.MAINTENANCE is True and any([args.exportjson, args.importjson, args.update is True, args.importstatus is True, args.fixslashes is True]):
+    if mylar.MAINTENANCE is True and any([args.exportjson, args.importjson, args.update is True, args.importstatus is True, args.fixslashes is True, args.queryplan is True]):
         loggermode = '[MAINTENANCE-MODE]'
         if args.importstatus: #mylar.MAINTENANCE is True:
             cs = maintenance.Maintenance('status')
@@ -304,6 +305,12 @@ def main():
                 logger.info('%s method indicated as fix slashes' % loggermode)
                 fs = maintenance.Maintenance('fixslashes')
                 j = fs.fix_slashes()
+            elif args.queryplan:
+                #for checking the hot queries still hit an index
+                logger.info('%s method indicated as query plan check' % loggermode)
+                qp = maintenance.Maintenance('queryplan')
+                if qp.query_plan_check() is False:
+                    sys.exit(1)
             else:
                 logger.info('%s Not a valid command: %s' % (loggermode, maintenance_info))
                 sys.exit()
@@ -29,7 +29,7 @@ import sys
 from xml.dom.minidom import parseString
 
 
-from mylar import logger, db, helpers, updater, notifiers, filechecker, weeklypull, getimage
+from mylar import logger, db, helpers, updater, notifiers, filechecker, weeklypull, getimage, watchindex
 
 class PostProcessor(object):
     """
@@ -45,7 +45,7 @@ class PostProcessor(object):
     FOLDER_NAME = 2
     FILE_NAME = 3
 
-    def __init__(self, nzb_name, nzb_folder, issueid=None, module=None, queue=None, comicid=None, apicall=False, ddl=False):
+    def __init__(self, nzb_name, nzb_folder, issueid=None, module=None, queue=None, comicid=None, apicall=False, ddl=False, pooled=False):
         """
         Creates a new post processor with the given file path and optionally an NZB name.
 
@@ -63,12 +63,8 @@ class PostProcessor(object):
         if queue:
             self.queue = queue
 
-        if mylar.APILOCK is True:
-            return {'status':  'IN PROGRESS'}
-
         if apicall is True:
             self.apicall = True
-            mylar.APILOCK = True
         else:
             self.apicall = False
 
@@ -77,6 +73,9 @@ class PostProcessor(object):
         else:
             self.ddl = False
 
+        #pooled: run by the post-processing queue, which already holds this series in mylar.PP_GATE.
+        self.pooled = pooled
+
         if mylar.CONFIG.FILE_OPTS == 'copy':
             self.fileop = shutil.copy
         else:
@@ -358,6 +357,14 @@ class PostProcessor(object):
 
 
     def Process(self):
+        #a run from outside the post-processing queue (manual / folder monitor / script / api) can touch any series,
+        #so it waits for the queue's workers to finish what they're on and holds them off until it's done.
+        if self.pooled is True:
+            return self._process()
+        with mylar.PP_GATE.exclusive():
+            return self._process()
+
+    def _process(self):
             module = self.module
             self._log('nzb name: %s' % self.nzb_name)
             self._log('nzb folder: %s' % self.nzb_folder)
@@ -454,16 +461,9 @@ class PostProcessor(object):
                         filelist = {}
                         filelist['comiclist'] =  []
                         filelist['comiccount'] = 0
-                #preload the entire ALT list in here.
-                alt_list = []
-                alt_db = myDB.select("SELECT * FROM Comics WHERE AlternateSearch != 'None'")
-                if alt_db is not None:
-                    for aldb in alt_db:
-                        as_d = filechecker.FileChecker(AlternateSearch=aldb['AlternateSearch']) #helpers.conversion(aldb['AlternateSearch']))
-                        as_dinfo = as_d.altcheck()
-                        alt_list.append({'AS_Alt':   as_dinfo['AS_Alt'],
-                                         'AS_Tuple': as_dinfo['AS_Tuple'],
-                                         'AS_DyComicName': aldb['DynamicComicName']})
+                #series / alternate names on the watchlist, and the issue rows of whatever series get matched.
+                watchlist = watchindex.get()
+                issuerows = watchindex.IssueRows()
 
                 manual_arclist = []
                 oneoff_issuelist = []
@@ -491,14 +491,9 @@ class PostProcessor(object):
                         if not any(re.sub('[\|\s]', '', mod_altseriesname).lower() == x for x in loopchk):
                             loopchk.append(re.sub('[\|\s]', '', mod_altseriesname.lower()))
 
-                    for x in alt_list:
-                        cname = x['AS_DyComicName']
-                        for ab in x['AS_Alt']:
-                            tmp_ab = re.sub(' ', '', ab)
-                            tmp_mod_seriesname = re.sub(' ', '', mod_seriesname)
-                            if re.sub('\|', '', tmp_mod_seriesname.lower()).strip() == re.sub('\|', '', tmp_ab.lower()).strip():
-                                if not any(re.sub('[\|\s]', '', cname.lower()) == x for x in loopchk):
-                                    loopchk.append(re.sub('[\|\s]', '', cname.lower()))
+                    for cname in watchlist.alternate_names(mod_seriesname):
+                        if cname not in loopchk:
+                            loopchk.append(cname)
 
                     if all([mylar.CONFIG.ANNUALS_ON, 'annual' in mod_seriesname.lower()]) or all([mylar.CONFIG.ANNUALS_ON, 'special' in mod_seriesname.lower()]):
                         mod_seriesname = re.sub('2021annual', '', mod_seriesname, flags=re.I).strip()
@@ -553,15 +548,13 @@ class PostProcessor(object):
                             logger.info('manual_list: %s' % manual_list)
                             continue
                         else:
-                            tmpsql = "SELECT * FROM comics WHERE DynamicComicName IN ({seq}) COLLATE NOCASE".format(seq=','.join('?' * len(loopchk)))
-                            comicseries = myDB.select(tmpsql, tuple(loopchk))
+                            comicseries = watchlist.series(loopchk)
 
                     if not comicseries or orig_seriesname != mod_seriesname:
                         if any(['special' in orig_seriesname.lower(), 'annual' in orig_seriesname.lower()]) and all([mylar.CONFIG.ANNUALS_ON, orig_seriesname != mod_seriesname]):
                             if not any(re.sub('[\|\s]', '', orig_seriesname).lower() == x for x in loopchk):
                                 loopchk.append(re.sub('[\|\s]', '', orig_seriesname.lower()))
-                                tmpsql = "SELECT * FROM comics WHERE DynamicComicName IN ({seq}) COLLATE NOCASE".format(seq=','.join('?' * len(loopchk)))
-                                comicseries = myDB.select(tmpsql, tuple(loopchk))
+                                comicseries = watchlist.series(loopchk)
                                 #if not comicseries:
                                 #    logger.error('[%s][%s] No Series named %s - checking against Story Arcs (just in case). If I do not find anything, maybe you should be running Import?' % (module, fl['comicfilename'], fl['series_name']))
                                 #    continue
@@ -572,14 +565,14 @@ class PostProcessor(object):
                         #check for Paused status /
                         #check for Ended status and 100% completion of issues.
                         if any([wv['Status'] == 'Paused', bool(wv['ForceContinuing']) is True]) or (wv['Have'] == wv['Total'] and not any(['Present' in wv['ComicPublished'], helpers.now()[:4] in wv['ComicPublished']])):
-                            dbcheck = myDB.selectone('SELECT Status FROM issues WHERE ComicID=? and Int_IssueNumber=?', [wv['ComicID'], helpers.issuedigits(fl['issue_number'])]).fetchone()
+                            dbcheck = issuerows.issues(wv['ComicID'], helpers.issuedigits(fl['issue_number']))
                             if not dbcheck and mylar.CONFIG.ANNUALS_ON:
-                                dbcheck = myDB.selectone('SELECT Status FROM annuals WHERE ComicID=? and Int_IssueNumber=?', [wv['ComicID'], helpers.issuedigits(fl['issue_number'])]).fetchone()
+                                dbcheck = issuerows.annuals(wv['ComicID'], helpers.issuedigits(fl['issue_number']))
                             if dbcheck:
-                                if any([dbcheck[0] == 'Wanted', dbcheck[0] == 'Snatched']):
-                                    logger.fdebug('Series is 100%s complete, but specific issue %s matched up to a %s status. Let\'s Go!' % ('%', fl['issue_number'], dbcheck[0]))
+                                if any([dbcheck[0]['Status'] == 'Wanted', dbcheck[0]['Status'] == 'Snatched']):
+                                    logger.fdebug('Series is 100%s complete, but specific issue %s matched up to a %s status. Let\'s Go!' % ('%', fl['issue_number'], dbcheck[0]['Status']))
                                 else:
-                                    logger.fdebug('Series is 100%s complete, however status is not Wanted (or Snatche), but %s. Set to Wanted for this to post-process on the next run.' % ('%', dbcheck[0]))
+                                    logger.fdebug('Series is 100%s complete, however status is not Wanted (or Snatche), but %s. Set to Wanted for this to post-process on the next run.' % ('%', dbcheck[0]['Status']))
                                     continue
                             else:
                                 logger.warn('%s [%s] is either Paused or in an Ended status with 100%s completion. Ignoring for match.' % (wv['ComicName'], wv['ComicYear'], '%'))
@@ -606,10 +599,10 @@ class PostProcessor(object):
                             logger.fdebug('Queuing to Check: %s [%s] -- %s' % (wv['ComicName'], wv['ComicYear'], wv['ComicID']))
 
                         #force it to use the Publication Date of the latest issue instead of the Latest Date (which could be anything)
-                        ld_check = myDB.selectone('SELECT ReleaseDate, Issue_Number, Int_IssueNumber from issues WHERE ComicID=? order by ReleaseDate DESC', [wv['ComicID']]).fetchone()
+                        ld_check = issuerows.latest(wv['ComicID'])
                         if ld_check:
                             if mylar.CONFIG.ANNUALS_ON:
-                                ld_check_ann = myDB.selectone('SELECT ReleaseDate, Issue_Number, Int_IssueNumber from annuals WHERE ComicID=? order by ReleaseDate DESC', [wv['ComicID']]).fetchone()
+                                ld_check_ann = issuerows.latest(wv['ComicID'], 'annuals')
                                 if ld_check_ann:
                                     if all([ld_check_ann[0] != '0000-00-00', ld_check_ann[0] is not None]):
                                         if int(re.sub('-', '', ld_check_ann[0]).strip()) > int(re.sub('-', '', ld_check[0]).strip()):
@@ -645,8 +638,9 @@ class PostProcessor(object):
                         if latestdate == '0000-00-00' or latestdate == 'None' or latestdate is None:
                             logger.fdebug('Forcing a refresh of series: %s as it appears to have incomplete issue dates.' % wv_comicname)
                             updater.dbUpdate([wv_comicid])
+                            issuerows.forget(wv_comicid)
                             logger.fdebug('Refresh complete for %s. Rechecking issue dates for completion.' % wv_comicname)
-                            ld_check = myDB.selectone('SELECT ReleaseDate, Issue_Number, Int_IssueNumber from issues WHERE ComicID=? order by ReleaseDate DESC', [wv['ComicID']]).fetchone()
+                            ld_check = issuerows.latest(wv['ComicID'])
                             if ld_check:
                                 #tmplatestdate = latestdate[0]
                                 if ld_check[0][:4] != wv['LatestDate'][:4]:
@@ -752,15 +746,15 @@ class PostProcessor(object):
                                         fcdigit = helpers.issuedigits(re.sub('special', '', str(temploc.lower())).strip())
                                     logger.fdebug('%s Annual/Special detected [%s]. ComicID assigned as %s' % (module, fcdigit, cs['ComicID']))
                                 annchk = "yes"
-                                issuechk = myDB.select("SELECT * from annuals WHERE ComicID=? AND Int_IssueNumber=? AND NOT Deleted", [cs['ComicID'], fcdigit])
+                                issuechk = issuerows.annuals(cs['ComicID'], fcdigit)
                             else:
                                 annchk = "no"
                                 if temploc is not None:
                                     fcdigit = helpers.issuedigits(temploc)
-                                    issuechk = myDB.select("SELECT * from issues WHERE ComicID=? AND Int_IssueNumber=?", [cs['ComicID'], fcdigit])
+                                    issuechk = issuerows.issues(cs['ComicID'], fcdigit)
                                 else:
                                     fcdigit = None
-                                    issuechk = myDB.select("SELECT * from issues WHERE ComicID=?", [cs['ComicID']])
+                                    issuechk = issuerows.issues(cs['ComicID'])
 
                             if not issuechk:
                                 try:
@@ -787,10 +781,11 @@ class PostProcessor(object):
                                     logger.error('%s %s failed to update comic.' % (module, cs['ComicName']))
                                     continue
 
+                                issuerows.forget(cs['ComicID'])
                                 if annchk == 'yes':
-                                    issuechk = myDB.select("SELECT * from annuals WHERE ComicID=? AND Int_IssueNumber=? AND NOT Deleted", [cs['ComicID'], fcdigit])
+                                    issuechk = issuerows.annuals(cs['ComicID'], fcdigit)
                                 else:
-                                    issuechk = myDB.select("SELECT * from issues WHERE ComicID=? AND Int_IssueNumber=?", [cs['ComicID'], fcdigit])
+                                    issuechk = issuerows.issues(cs['ComicID'], fcdigit)
                                 if not issuechk:
                                     logger.fdebug('%s No corresponding issue #%s found for %s even after refreshing. It might not have the information available as of yet...' % (module, temploc, cs['ComicID']))
                                     continue
@@ -897,10 +892,7 @@ class PostProcessor(object):
                                             tmpseriesname = re.sub('special', '', tmpseriesname, flags=re.I).strip()
                                         dynamic_seriesname = re.sub('[\|\s]','', tmpseriesname.lower()).strip()
 
-                                        alts = []
-                                        for x in alt_list:
-                                            if x['AS_DyComicName'] == cs['DynamicName']:
-                                                alts = x['AS_Alt']
+                                        alts = watchlist.alternates_of(cs['DynamicName'])
                                         alt_listing = [True if x.lower() == dynamic_seriesname else False for x in alts]
 
                                         if any([cs['DynamicName'] == dynamic_seriesname, alt_listing]) and all([cs['WatchValues']['Type'] != 'TPB', cs['WatchValues']['Type'] != 'GN', cs['WatchValues']['Type'] != 'HC', cs['WatchValues']['Type'] != 'One-Shot']):
@@ -1872,15 +1864,11 @@ class PostProcessor(object):
                 if len(manual_list) == 0 and len(manual_arclist) == 0:
                     if self.nzb_name == 'Manual Run':
                         logger.info('%s No matches for Manual Run ... exiting.' % module)
-                    if mylar.APILOCK is True:
-                        mylar.APILOCK = False
                     self.valreturn.append({"self.log": self.log,
                                            "mode": 'stop'})
                     return self.queue.put(self.valreturn)
                 elif len(manual_arclist) > 0 and len(manual_list) == 0:
                     logger.info('%s Manual post-processing completed for %s story-arc issues.' % (module, len(manual_arclist)))
-                    if mylar.APILOCK is True:
-                        mylar.APILOCK = False
                     self.valreturn.append({"self.log": self.log,
                                            "mode": 'stop'})
                     return self.queue.put(self.valreturn)
@@ -1942,8 +1930,6 @@ class PostProcessor(object):
                     else:
                         logger.info('%s Manual post-processing completed for %s issues [FAILED: %s]' % (module, i, self.failed_files))
 
-                if mylar.APILOCK is True:
-                    mylar.APILOCK = False
                 self.valreturn.append({"self.log": self.log,
                                        "mode": 'stop'})
                 return self.queue.put(self.valreturn)
@@ -3161,6 +3147,9 @@ class FolderCheck():
         if mylar.IMPORTLOCK:
             logger.info('There is an import currently running. In order to ensure successful import - deferring this until the import is finished.')
             return
+        if mylar.APILOCK.is_set():
+            logger.info('%s Queued post-processing is currently running - deferring the folder check until the next interval.' % self.module)
+            return
         #monitor a selected folder for 'snatched' files that haven't been processed
         #junk the queue as it's not needed for folder monitoring, but needed for post-processing to run without error.
         helpers.job_management(write=True, job='Folder Monitor', current_run=helpers.utctimestamp(), status='Running')
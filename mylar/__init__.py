@@ -38,7 +38,7 @@ from apscheduler.triggers.interval import IntervalTrigger
 
 import cherrypy
 
-from mylar import logger, versioncheckit, rsscheckit, searchit, weeklypullit, PostProcessor, updater, helpers
+from mylar import logger, versioncheckit, rsscheckit, searchit, weeklypullit, PostProcessor, updater, helpers, db, filechecker, httpclient, jobqueue, runqueue
 
 import mylar.config
 
@@ -130,12 +130,13 @@ DDLPOOL = None
 SNATCHED_QUEUE = queue.Queue()
 NZB_QUEUE = queue.Queue()
 PP_QUEUE = queue.Queue()
-SEARCH_QUEUE = queue.Queue()
+SEARCH_QUEUE = jobqueue.PriorityJobQueue()
 DDL_QUEUE = queue.Queue()
 RETURN_THE_NZBQUEUE = queue.Queue()
 MASS_ADD = None
 ADD_LIST = []
 SEARCH_TIER_DATE = None
+RSSDB_FTS = False
 COMICSORT = None
 PULLBYFILE = False
 CFG = None
@@ -151,9 +152,11 @@ LATEST_VERSION = None
 COMMITS_BEHIND = None
 LOCAL_IP = None
 DOWNLOAD_APIKEY = None
-APILOCK = False
-SEARCHLOCK = False
-DDL_LOCK = False
+APILOCK = jobqueue.BusyFlag('post-processing')
+#one post-processing run per series at a time - see helpers.postprocess_main / PostProcessor.Process.
+PP_GATE = jobqueue.KeyedGate(APILOCK)
+SEARCHLOCK = jobqueue.BusyFlag('search')
+DDL_LOCK = jobqueue.BusyFlag('ddl')
 CMTAGGER_PATH = None
 STATIC_COMICRN_VERSION = "1.01"
 STATIC_APC_VERSION = "2.04"
@@ -408,36 +411,29 @@ def start():
             SCHED_RSS_LAST = monitors['rss']
 
             # Start our scheduled background tasks
+            # anything that's due is lined up SCHED_STAGGER seconds apart (see runqueue.first_run) rather than all
+            # firing at once, and each job waits for a free slot on the resource it uses.
             if UPDATER_STATUS != 'Paused':
                 # we want to run the db updater on every startup regardless of last run
                 # this will ensure we get better coverage, and if nothing has updated it
                 # will just return to the normal dbupdater_interval duration.
-                SCHED.add_job(func=updater.watchlist_updater, id='dbupdater', next_run_time=datetime.datetime.utcnow(), name='DB Updater', args=[None,True], trigger=IntervalTrigger(hours=0, minutes=DBUPDATE_INTERVAL, timezone='UTC'))
-                logger.info('[DB UPDATER] DB Updater scheduled to run immediately.')
+                SCHED.add_job(func=runqueue.scheduled('cv', updater.watchlist_updater, 'DB Updater'), id='dbupdater', next_run_time=runqueue.first_run('DB Updater', DBUPDATE_INTERVAL, SCHED_UPDATER_LAST, force=True), name='DB Updater', args=[None,True], trigger=IntervalTrigger(hours=0, minutes=DBUPDATE_INTERVAL, timezone='UTC'))
+                logger.info('[DB UPDATER] DB Updater scheduled to run on startup.')
 
             #let's do a run at the Wanted issues here (on startup) if enabled.
+            ss = searchit.CurrentSearcher()
             if SEARCH_STATUS != 'Paused':
-                ss = searchit.CurrentSearcher()
-                if CONFIG.NZB_STARTUP_SEARCH:
-                    SCHED.add_job(func=ss.run, id='search', next_run_time=datetime.datetime.utcnow(), name='Auto-Search', trigger=IntervalTrigger(hours=0, minutes=CONFIG.SEARCH_INTERVAL, timezone='UTC'))
+                if SCHED_SEARCH_LAST is not None:
+                    logger.fdebug('[AUTO-SEARCH] Search last run @ %s' % datetime.datetime.utcfromtimestamp(float(SCHED_SEARCH_LAST)))
+                    search_last = SCHED_SEARCH_LAST
                 else:
-                    if SCHED_SEARCH_LAST is not None:
-                        search_timestamp = float(SCHED_SEARCH_LAST)
-                        logger.fdebug('[AUTO-SEARCH] Search last run @ %s' % datetime.datetime.utcfromtimestamp(search_timestamp))
-                    else:
-                        search_timestamp = helpers.utctimestamp() + (int(CONFIG.SEARCH_INTERVAL) *60)
-
-                    duration_diff = (helpers.utctimestamp() - search_timestamp)/60
-                    if duration_diff >= int(CONFIG.SEARCH_INTERVAL):
-                        logger.fdebug('[AUTO-SEARCH]Auto-Search set to an initial delay of 2 minutes before initialization as it has been %s minutes since the last run' % duration_diff)
-                        SCHED.add_job(func=ss.run, id='search', name='Auto-Search', next_run_time=(datetime.datetime.utcnow() + timedelta(minutes=2)), trigger=IntervalTrigger(hours=0, minutes=CONFIG.SEARCH_INTERVAL, timezone='UTC'))
-                    else:
-                        search_diff = datetime.datetime.utcfromtimestamp(helpers.utctimestamp() + ((int(CONFIG.SEARCH_INTERVAL) * 60)  - (duration_diff*60)))
-                        logger.fdebug('[AUTO-SEARCH] Scheduling next run @ %s (every %s minutes)' % (search_diff, CONFIG.SEARCH_INTERVAL))
-                        SCHED.add_job(func=ss.run, id='search', name='Auto-Search', next_run_time=search_diff, trigger=IntervalTrigger(hours=0, minutes=CONFIG.SEARCH_INTERVAL, timezone='UTC'))
+                    #never run - a full interval from now, unless a startup search is wanted.
+                    search_last = helpers.utctimestamp()
+                search_next = runqueue.first_run('Auto-Search', int(CONFIG.SEARCH_INTERVAL), search_last, force=CONFIG.NZB_STARTUP_SEARCH)
+                logger.fdebug('[AUTO-SEARCH] Scheduling next run @ %s (every %s minutes)' % (search_next, CONFIG.SEARCH_INTERVAL))
+                SCHED.add_job(func=runqueue.scheduled('providers', ss.run, 'Auto-Search'), id='search', name='Auto-Search', next_run_time=search_next, trigger=IntervalTrigger(hours=0, minutes=CONFIG.SEARCH_INTERVAL, timezone='UTC'))
             else:
-                ss = searchit.CurrentSearcher()
-                SCHED.add_job(func=ss.run, id='search', name='Auto-Search', next_run_time=None, trigger=IntervalTrigger(hours=0, minutes=CONFIG.SEARCH_INTERVAL, timezone='UTC'))
+                SCHED.add_job(func=runqueue.scheduled('providers', ss.run, 'Auto-Search'), id='search', name='Auto-Search', next_run_time=None, trigger=IntervalTrigger(hours=0, minutes=CONFIG.SEARCH_INTERVAL, timezone='UTC'))
 
             #thread queue control..
             queue_schedule('search_queue', 'start')
@@ -466,47 +462,25 @@ def start():
             logger.info('[WEEKLY] Checking for existance of Weekly Comic listing...')
 
             #now the scheduler (check every 24 hours)
-            weekly_interval = weektimer * 60 * 60
-            try:
-                if SCHED_WEEKLY_LAST:
-                    pass
-            except:
-                SCHED_WEEKLY_LAST = None
-
-            weektimestamp = helpers.utctimestamp()
-            if SCHED_WEEKLY_LAST is not None:
-                weekly_timestamp = float(SCHED_WEEKLY_LAST)
-            else:
-                weekly_timestamp = weektimestamp + weekly_interval
-
             ws = weeklypullit.Weekly()
-            duration_diff = (weektimestamp - weekly_timestamp)/60
-
             if WEEKLY_STATUS != 'Paused':
-                if abs(duration_diff) >= weekly_interval/60:
-                    logger.info('[WEEKLY] Weekly Pull-Update initializing immediately as it has been %s hours since the last run' % abs(duration_diff/60))
-                    SCHED.add_job(func=ws.run, id='weekly', name='Weekly Pullist', next_run_time=datetime.datetime.utcnow(), trigger=IntervalTrigger(hours=weektimer, minutes=0, timezone='UTC'))
-                else:
-                    weekly_diff = datetime.datetime.utcfromtimestamp(weektimestamp + (weekly_interval - (duration_diff * 60)))
-                    logger.fdebug('[WEEKLY] Scheduling next run for @ %s every %s hours' % (weekly_diff, weektimer))
-                    SCHED.add_job(func=ws.run, id='weekly', name='Weekly Pullist', next_run_time=weekly_diff, trigger=IntervalTrigger(hours=weektimer, minutes=0, timezone='UTC'))
+                #a pull-list that's never been fetched is fetched straight away.
+                weekly_next = runqueue.first_run('Weekly Pullist', weektimer * 60, SCHED_WEEKLY_LAST)
+                logger.fdebug('[WEEKLY] Scheduling next run for @ %s every %s hours' % (weekly_next, weektimer))
+                SCHED.add_job(func=runqueue.scheduled('cv', ws.run, 'Weekly Pullist'), id='weekly', name='Weekly Pullist', next_run_time=weekly_next, trigger=IntervalTrigger(hours=weektimer, minutes=0, timezone='UTC'))
 
             #initiate startup rss feeds for torrents/nzbs here...
             rs = rsscheckit.tehMain()
             if CONFIG.ENABLE_RSS is True:
                 logger.info('[RSS-FEEDS] Initiating startup-RSS feed checks.')
                 if SCHED_RSS_LAST is not None:
-                    rss_timestamp = float(SCHED_RSS_LAST)
-                    logger.info('[RSS-FEEDS] RSS last run @ %s' % datetime.datetime.utcfromtimestamp(rss_timestamp))
-                else:
-                    rss_timestamp = helpers.utctimestamp() + (int(CONFIG.RSS_CHECKINTERVAL) *60)
-                duration_diff = (helpers.utctimestamp() - rss_timestamp)/60
-                if duration_diff >= int(CONFIG.RSS_CHECKINTERVAL):
-                    SCHED.add_job(func=rs.run, id='rss', name='RSS Feeds', args=[True], next_run_time=datetime.datetime.utcnow(), trigger=IntervalTrigger(hours=0, minutes=int(CONFIG.RSS_CHECKINTERVAL), timezone='UTC'))
+                    logger.info('[RSS-FEEDS] RSS last run @ %s' % datetime.datetime.utcfromtimestamp(float(SCHED_RSS_LAST)))
+                    rss_last = SCHED_RSS_LAST
                 else:
-                    rss_diff = datetime.datetime.utcfromtimestamp(helpers.utctimestamp() + (int(CONFIG.RSS_CHECKINTERVAL) * 60) - (duration_diff * 60))
-                    logger.fdebug('[RSS-FEEDS] Scheduling next run for @ %s every %s minutes' % (rss_diff, CONFIG.RSS_CHECKINTERVAL))
-                    SCHED.add_job(func=rs.run, id='rss', name='RSS Feeds', args=[True], next_run_time=rss_diff, trigger=IntervalTrigger(hours=0, minutes=int(CONFIG.RSS_CHECKINTERVAL), timezone='UTC'))
+                    rss_last = helpers.utctimestamp()
+                rss_next = runqueue.first_run('RSS Feeds', int(CONFIG.RSS_CHECKINTERVAL), rss_last)
+                logger.fdebug('[RSS-FEEDS] Scheduling next run for @ %s every %s minutes' % (rss_next, CONFIG.RSS_CHECKINTERVAL))
+                SCHED.add_job(func=runqueue.scheduled('providers', rs.run, 'RSS Feeds'), id='rss', name='RSS Feeds', args=[True], next_run_time=rss_next, trigger=IntervalTrigger(hours=0, minutes=int(CONFIG.RSS_CHECKINTERVAL), timezone='UTC'))
             else:
                  RSS_STATUS = 'Paused'
             #    SCHED.add_job(func=rs.run, id='rss', name='RSS Feeds', args=[True], trigger=IntervalTrigger(hours=0, minutes=int(CONFIG.RSS_CHECKINTERVAL), timezone='UTC'))
@@ -514,7 +488,7 @@ def start():
 
             if CONFIG.CHECK_GITHUB:
                 vs = versioncheckit.CheckVersion()
-                SCHED.add_job(func=vs.run, id='version', name='Check Version', trigger=IntervalTrigger(hours=0, minutes=CONFIG.CHECK_GITHUB_INTERVAL, timezone='UTC'))
+                SCHED.add_job(func=runqueue.scheduled('network', vs.run, 'Check Version'), id='version', name='Check Version', next_run_time=runqueue.first_run('Check Version', CONFIG.CHECK_GITHUB_INTERVAL, SCHED_VERSION_LAST or helpers.utctimestamp()), trigger=IntervalTrigger(hours=0, minutes=CONFIG.CHECK_GITHUB_INTERVAL, timezone='UTC'))
             else:
                 VERSION_STATUS = 'Paused'
 
@@ -523,7 +497,7 @@ def start():
                 if CONFIG.DOWNLOAD_SCAN_INTERVAL >0:
                     logger.info('[FOLDER MONITOR] Enabling folder monitor for : ' + str(CONFIG.CHECK_FOLDER) + ' every ' + str(CONFIG.DOWNLOAD_SCAN_INTERVAL) + ' minutes.')
                     fm = PostProcessor.FolderCheck()
-                    SCHED.add_job(func=fm.run, id='monitor', name='Folder Monitor', trigger=IntervalTrigger(hours=0, minutes=int(CONFIG.DOWNLOAD_SCAN_INTERVAL), timezone='UTC'))
+                    SCHED.add_job(func=runqueue.scheduled('disk', fm.run, 'Folder Monitor'), id='monitor', name='Folder Monitor', next_run_time=runqueue.first_run('Folder Monitor', int(CONFIG.DOWNLOAD_SCAN_INTERVAL), SCHED_MONITOR_LAST or helpers.utctimestamp()), trigger=IntervalTrigger(hours=0, minutes=int(CONFIG.DOWNLOAD_SCAN_INTERVAL), timezone='UTC'))
                 else:
                     logger.error('[FOLDER MONITOR] You need to specify a monitoring time for the check folder option to work')
             else:
@@ -718,11 +692,60 @@ def queue_schedule(queuetype, mode):
                    os._exit(0)
 
 
+#versioned index pack - each entry is applied once, tracked via PRAGMA user_version.
+#append new (version, [statements]) entries here rather than editing an existing one.
+DB_INDEX_MIGRATIONS = [
+    (1, ['CREATE INDEX IF NOT EXISTS issues_comicid_intissue on issues(ComicID, Int_IssueNumber)',
+         'CREATE INDEX IF NOT EXISTS issues_status on issues(Status)',
+         'CREATE INDEX IF NOT EXISTS annuals_comicid_deleted on annuals(ComicID, Deleted)',
+         'CREATE INDEX IF NOT EXISTS annuals_issueid on annuals(IssueID)',
+         'CREATE INDEX IF NOT EXISTS annuals_status on annuals(Status)',
+         'CREATE INDEX IF NOT EXISTS storyarcs_issuearcid on storyarcs(IssueArcID)',
+         'CREATE INDEX IF NOT EXISTS storyarcs_storyarcid on storyarcs(StoryArcID)',
+         'CREATE INDEX IF NOT EXISTS storyarcs_cv_arcid on storyarcs(CV_ArcID)',
+         'CREATE INDEX IF NOT EXISTS snatched_issueid on snatched(IssueID)',
+         'CREATE INDEX IF NOT EXISTS nzblog_issueid on nzblog(IssueID)',
+         'CREATE INDEX IF NOT EXISTS weekly_weeknumber_year on weekly(weeknumber, year)',
+         'CREATE INDEX IF NOT EXISTS weekly_issueid on weekly(IssueID)']),
+    (2, ['CREATE INDEX IF NOT EXISTS rssdb_dateadded on rssdb(DateAdded)']),
+    (3, ['CREATE INDEX IF NOT EXISTS fingerprints_digest on fingerprints(Digest)',
+         'CREATE INDEX IF NOT EXISTS fingerprints_pages on fingerprints(Pages)',
+         'CREATE INDEX IF NOT EXISTS fingerprints_issueid on fingerprints(IssueID)']),
+]
+
+def dbindex_upgrade(c):
+    current = c.execute('PRAGMA user_version').fetchone()[0]
+    applied = current
+    for version, statements in DB_INDEX_MIGRATIONS:
+        if version <= current:
+            continue
+        logger.info('[DB-INDEX] Applying index migration v%s (%s indexes)' % (version, len(statements)))
+        failed = False
+        for statement in statements:
+            try:
+                c.execute(statement)
+            except sqlite3.OperationalError as e:
+                logger.warn('[DB-INDEX] Unable to apply %s: %s' % (statement, e))
+                failed = True
+        if failed:
+            #leave user_version short of this one so it's retried next startup (the statements are IF NOT EXISTS,
+            #so the ones that did go through are no-ops then) - and don't run ahead of it with the later ones.
+            logger.warn('[DB-INDEX] Index migration v%s incomplete - it will be retried on the next startup.' % version)
+            break
+        applied = version
+
+    if applied != current:
+        #refresh the planner statistics so the new indexes actually get picked.
+        c.execute('ANALYZE')
+        c.execute('PRAGMA user_version = %d' % applied)
+        logger.info('[DB-INDEX] Index pack now at v%s' % applied)
+
 def sql_db():
     conn = sqlite3.connect(DB_FILE, detect_types=sqlite3.PARSE_DECLTYPES)
     return conn
 
 def dbcheck():
+    global RSSDB_FTS
     conn = sql_db()
     c_error = 'sqlite3.OperationalError'
     c = conn.cursor()
@@ -755,6 +778,12 @@ def dbcheck():
     c.execute('CREATE TABLE IF NOT EXISTS manualresults (provider TEXT, id TEXT, kind TEXT, comicname TEXT, volume TEXT, oneoff TEXT, fullprov TEXT, issuenumber TEXT, modcomicname TEXT, name TEXT, link TEXT, size TEXT, pack_numbers TEXT, pack_issuelist TEXT, comicyear TEXT, issuedate TEXT, tmpprov TEXT, pack TEXT, issueid TEXT, comicid TEXT, sarc TEXT, issuearcid TEXT)')
     c.execute('CREATE TABLE IF NOT EXISTS storyarcs(StoryArcID TEXT, ComicName TEXT, IssueNumber TEXT, SeriesYear TEXT, IssueYEAR TEXT, StoryArc TEXT, TotalIssues TEXT, Status TEXT, inCacheDir TEXT, Location TEXT, IssueArcID TEXT, ReadingOrder INT, IssueID TEXT, ComicID TEXT, ReleaseDate TEXT, IssueDate TEXT, Publisher TEXT, IssuePublisher TEXT, IssueName TEXT, CV_ArcID TEXT, Int_IssueNumber INT, DynamicComicName TEXT, Volume TEXT, Manual TEXT, DateAdded TEXT, DigitalDate TEXT, Type TEXT, Aliases TEXT)')
     c.execute('CREATE TABLE IF NOT EXISTS ddl_info (ID TEXT UNIQUE, series TEXT, year TEXT, filename TEXT, size TEXT, issueid TEXT, comicid TEXT, link TEXT, status TEXT, remote_filesize TEXT, updated_date TEXT, mainlink TEXT, issues TEXT)')
+    c.execute('CREATE TABLE IF NOT EXISTS seriessummary (ComicID TEXT UNIQUE, ComicName TEXT, ComicSortName TEXT, ComicPublisher TEXT, ComicYear TEXT, ComicImage TEXT, LatestIssue TEXT, LatestDate TEXT, ComicVolume TEXT, ComicPublished TEXT, PublisherImprint TEXT, Status TEXT, recentstatus TEXT, percent REAL, totalissues, haveissues INTEGER, DateAdded TEXT, Type TEXT, Corrected_Type TEXT, displaytype TEXT, Stale INTEGER DEFAULT 0, SummaryDate TEXT)')
+    c.execute('CREATE TABLE IF NOT EXISTS parsecache (ParseKey TEXT UNIQUE, Version INTEGER, Result TEXT, DateAdded TEXT)')
+    c.execute('CREATE TABLE IF NOT EXISTS searchcache (QueryKey TEXT UNIQUE, Provider TEXT, Result BLOB, Misses INTEGER DEFAULT 0, Expires REAL)')
+    c.execute('CREATE TABLE IF NOT EXISTS watchindex (ID INTEGER PRIMARY KEY, Version INTEGER)')
+    c.execute('CREATE TABLE IF NOT EXISTS fingerprints (Location TEXT UNIQUE, Size INTEGER, Mtime INTEGER, Digest TEXT, Pages TEXT, ComicID TEXT, IssueID TEXT, DateAdded TEXT)')
+    c.execute('CREATE TABLE IF NOT EXISTS rssfeeds (Feed TEXT UNIQUE, ETag TEXT, LastModified TEXT, SeenGuids TEXT, DateChecked TEXT)')
     c.execute('CREATE TABLE IF NOT EXISTS exceptions_log(date TEXT UNIQUE, comicname TEXT, issuenumber TEXT, seriesyear TEXT, issueid TEXT, comicid TEXT, booktype TEXT, searchmode TEXT, error TEXT, error_text TEXT, filename TEXT, line_num TEXT, func_name TEXT, traceback TEXT)')
     conn.commit
     c.close
@@ -763,9 +792,9 @@ def dbcheck():
     c.execute('CREATE INDEX IF NOT EXISTS issues_id on issues(IssueID)')
     c.execute('CREATE INDEX IF NOT EXISTS comics_id on comics(ComicID)')
 
-    #might enable these at a later date.
-    #c.execute('''PRAGMA synchronous = EXTRA''')
-    #c.execute('''PRAGMA journal_mode = WAL''')
+    #WAL journaling so the pooled reader connections (see db.DBConnection) don't block on the writer.
+    c.execute('''PRAGMA journal_mode = WAL''')
+    c.execute('''PRAGMA synchronous = NORMAL''')
 
     #add in the late players to the game....
     # -- Comics Table --
@@ -1415,6 +1444,41 @@ def dbcheck():
     except sqlite3.OperationalError:
         c.execute('ALTER TABLE comics ADD COLUMN not_updated_db TEXT')
 
+    #rssdb rows are pruned by age (RSS_PRUNE_DAYS) - anything already cached starts its clock now.
+    try:
+        c.execute('SELECT DateAdded from rssdb')
+    except sqlite3.OperationalError:
+        c.execute('ALTER TABLE rssdb ADD COLUMN DateAdded TEXT')
+        c.execute("UPDATE rssdb SET DateAdded=?", [datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')])
+
+    #rss feeds are tracked by the guids seen on them (rsscheck.FeedState) - a feed checked under the old pubdate
+    #mark takes the whole feed once, which the rssdb upsert absorbs.
+    try:
+        c.execute('SELECT SeenGuids from rssfeeds')
+    except sqlite3.OperationalError:
+        c.execute('ALTER TABLE rssfeeds ADD COLUMN SeenGuids TEXT')
+
+    #full-text mirror of rssdb.Title for the rss lookups in rsscheck, kept in step with rssdb by triggers.
+    try:
+        newfts = c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='rssdb_fts'").fetchone() is None
+        c.execute("CREATE VIRTUAL TABLE IF NOT EXISTS rssdb_fts USING fts5(Title, content='rssdb', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2')")
+    except sqlite3.OperationalError as e:
+        logger.warn('[RSS-DB] Full-text search is not available in this SQLite build (%s). RSS lookups will scan the whole rssdb table.' % e)
+        RSSDB_FTS = False
+    else:
+        c.execute("CREATE TRIGGER IF NOT EXISTS rssdb_fts_insert AFTER INSERT ON rssdb BEGIN INSERT INTO rssdb_fts(rowid, Title) VALUES (new.rowid, new.Title); END")
+        c.execute("CREATE TRIGGER IF NOT EXISTS rssdb_fts_delete AFTER DELETE ON rssdb BEGIN INSERT INTO rssdb_fts(rssdb_fts, rowid, Title) VALUES ('delete', old.rowid, old.Title); END")
+        c.execute("CREATE TRIGGER IF NOT EXISTS rssdb_fts_update AFTER UPDATE OF Title ON rssdb BEGIN INSERT INTO rssdb_fts(rssdb_fts, rowid, Title) VALUES ('delete', old.rowid, old.Title); INSERT INTO rssdb_fts(rowid, Title) VALUES (new.rowid, new.Title); END")
+        try:
+            if newfts:
+                raise sqlite3.DatabaseError('new index')
+            #a VACUUM can renumber rssdb's rowids out from under the index.
+            c.execute("INSERT INTO rssdb_fts(rssdb_fts, rank) VALUES ('integrity-check', 1)")
+        except sqlite3.DatabaseError:
+            logger.info('[RSS-DB] Building the full-text index for the RSS cache...')
+            c.execute("INSERT INTO rssdb_fts(rssdb_fts) VALUES ('rebuild')")
+        RSSDB_FTS = True
+
 # -- not implemented just yet ;)
 
     # for metadata...
@@ -1430,6 +1494,34 @@ def dbcheck():
 #    except sqlite3.OperationalError:
 #        c.execute('ALTER TABLE importresults ADD COLUMN MetaData TEXT')
 
+    #indexes go on last so every column they reference has been added above.
+    dbindex_upgrade(c)
+
+    #ANALYZE stats taken while the full-text shadow tables were (near) empty send sqlite's own index upkeep
+    #down a bad plan and slow every rssdb insert right down - the fts tables are better off without any.
+    if RSSDB_FTS is True:
+        try:
+            c.execute("DELETE FROM sqlite_stat1 WHERE tbl LIKE 'rssdb_fts%'")
+        except sqlite3.OperationalError:
+            pass
+
+    #any write to a comics row flags its home page summary for recompute (see helpers.series_summary_sync).
+    c.execute('CREATE TRIGGER IF NOT EXISTS seriessummary_stale AFTER UPDATE ON comics BEGIN UPDATE seriessummary SET Stale=1 WHERE ComicID=old.ComicID; END')
+    c.execute('CREATE TRIGGER IF NOT EXISTS seriessummary_delete AFTER DELETE ON comics BEGIN DELETE FROM seriessummary WHERE ComicID=old.ComicID; END')
+
+    #adding / removing / renaming a series (or editing its alternate names) bumps the version of the in-memory
+    #watchlist index used by post-processing, so it's rebuilt on next use (see watchindex.get).
+    c.execute('INSERT OR IGNORE INTO watchindex (ID, Version) VALUES (1, 0)')
+    c.execute('CREATE TRIGGER IF NOT EXISTS watchindex_insert AFTER INSERT ON comics BEGIN UPDATE watchindex SET Version=Version+1; END')
+    c.execute('CREATE TRIGGER IF NOT EXISTS watchindex_delete AFTER DELETE ON comics BEGIN UPDATE watchindex SET Version=Version+1; END')
+    c.execute('CREATE TRIGGER IF NOT EXISTS watchindex_update AFTER UPDATE OF ComicID, DynamicComicName, AlternateSearch ON comics BEGIN UPDATE watchindex SET Version=Version+1; END')
+
+    #parse results from an older filename parser (or just old) aren't worth keeping around.
+    c.execute("DELETE FROM parsecache WHERE Version != ? OR DateAdded < ?", [filechecker.PARSER_VERSION, (datetime.datetime.now() - datetime.timedelta(days=90)).strftime('%Y-%m-%d %H:%M:%S')])
+
+    #search cache rows are kept a week past expiry - their miss count is what drives the backoff.
+    c.execute("DELETE FROM searchcache WHERE Expires < ?", [time.time() - 7 * 86400])
+
     #let's delete errant comics that are stranded (ie. Comicname = Comic ID: )
     c.execute("DELETE from comics WHERE ComicName='None' OR ComicName LIKE 'Comic ID%' OR ComicName is NULL OR ComicName like '%Fetch%failed%'")
     c.execute("DELETE from issues WHERE ComicName='None' OR ComicName LIKE 'Comic ID%' OR ComicName is NULL")
@@ -1468,6 +1560,9 @@ def halt():
             SCHED.shutdown(wait=False)
 
             queue_schedule('all', 'shutdown')
+            db.WriteOnly.stop()
+            db.close_all()
+            httpclient.reset()
             #if NZBPOOL is not None:
             #    queue_schedule('nzb_queue', 'shutdown')
             #if SNPOOL is not None:
@@ -15,7 +15,8 @@
 #  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
 
 import mylar
-from mylar import db, mb, importer, search, process, versioncheck, logger, webserve, helpers, encrypted, series_metadata
+from mylar import db, mb, importer, search, process, versioncheck, logger, webserve, helpers, encrypted, series_metadata, jobqueue, fingerprint, cvclient
+import threading
 import json
 import cherrypy
 import random
@@ -36,7 +37,8 @@ cmd_list = ['getIndex', 'getComic', 'getUpcoming', 'getWanted', 'getHistory',
             'getComicInfo', 'getIssueInfo', 'getArt', 'downloadIssue',
             'refreshSeriesjson', 'seriesjsonListing',
             'listProviders', 'changeProvider', 'addProvider', 'delProvider',
-            'downloadNZB', 'getReadList', 'getStoryArc', 'addStoryArc']
+            'downloadNZB', 'getReadList', 'getStoryArc', 'addStoryArc', 'getQueueStatus',
+            'getDuplicates']
 
 class Api(object):
 
@@ -391,6 +393,7 @@ class Api(object):
         else:
             self.id = kwargs['id']
 
+        cvclient.invalidate(self.id)
         try:
             importer.addComictoDB(self.id)
         except Exception as e:
@@ -463,6 +466,7 @@ class Api(object):
         else:
             self.id = kwargs['id']
 
+        cvclient.invalidate(self.id)
         try:
             importer.addComictoDB(self.id)
         except Exception as e:
@@ -654,6 +658,19 @@ class Api(object):
             'commits_behind': mylar.COMMITS_BEHIND,
         })
 
+    def _getQueueStatus(self, **kwargs):
+        self.data = self._successResponse(jobqueue.status())
+
+    def _getDuplicates(self, **kwargs):
+        #files on record holding the same issue. Optional: rescan (fingerprint the library first - in the background,
+        #only new / changed files are read), id (ComicID to limit the rescan to), across_series (only report
+        #duplicates spread over more than one series).
+        if 'rescan' in kwargs:
+            threading.Thread(target=fingerprint.scan_library, args=(kwargs.get('id'),), name='FINGERPRINT-SCAN').start()
+            self.data = self._successResponse('Library fingerprint scan started - check back once it has finished.')
+            return
+        self.data = self._successResponse(fingerprint.duplicates(across_series='across_series' in kwargs))
+
     def _checkGithub(self, **kwargs):
         versioncheck.checkGithub()
         self._getVersion()
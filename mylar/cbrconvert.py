@@ -0,0 +1,205 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the
+#  implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public
+#  License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+# cbr -> cbz conversion for the metatagger (cmtagmylar.run).
+# The archive is unpacked by a single unrar (unrar p prints every member, in the order they're stored) and each
+# page is streamed off that pipe straight into a stored (uncompressed - the pages are already compressed images)
+# zip member, so there's no extraction directory and nothing is held in memory beyond the copy buffer. One unrar
+# per book matters for solid archives, where opening the members one at a time would have each of them unpack
+# the solid stream from the start again. Archives that unrar can't simply be read through (passwords, rar5 links,
+# or no unrar and another tool doing the unpacking) go through rarfile a member at a time.
+# The decompressing is done by unrar in its own process, so conversions run in the calling thread - no more than
+# CBR2CBZ_WORKERS at once however many post-processing / metatagging threads are asking (and so only that many
+# partial .cbz's are on disk), the rest wait their turn.
+
+import os
+import time
+import shutil
+import zipfile
+import threading
+import subprocess
+
+import mylar
+from mylar import logger
+from lib.rarfile import rarfile
+
+CHUNK = 1024 * 1024
+
+_slots = None
+_slot_count = None
+_lock = threading.Lock()
+_jobs = {}
+_totals = {'converted': 0, 'failed': 0}
+
+
+def workers():
+    #CBR2CBZ_WORKERS: conversions at once, 0 = one per core.
+    if mylar.CONFIG.CBR2CBZ_WORKERS is None or mylar.CONFIG.CBR2CBZ_WORKERS < 1:
+        return os.cpu_count() or 1
+    return mylar.CONFIG.CBR2CBZ_WORKERS
+
+def cbz_name(rarpath):
+    return os.path.splitext(rarpath)[0] + '.cbz'
+
+def _streamable(rf):
+    #True if the whole archive can be read through one unrar pipe.
+    if rf.needs_password():
+        return False
+    if any(getattr(info, 'file_redir', None) for info in rf.infolist()):
+        return False
+    return rarfile.tool_setup().setup is rarfile.UNRAR_CONFIG
+
+def _unrar(rarpath):
+    #unrar p over the whole archive - the members' data back to back on stdout, nothing else (-inul).
+    cmd = rarfile.tool_setup().open_cmdline(None, rarpath)
+    try:
+        return subprocess.Popen(cmd, bufsize=0, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except OSError as e:
+        raise rarfile.RarCannotExec('Unable to run %s: %s' % (cmd[0], e))
+
+def _copy_exact(src, dst, size, name):
+    #size bytes of src to dst - the next member starts straight after.
+    left = size
+    while left > 0:
+        buf = src.read(min(CHUNK, left))
+        if not buf:
+            raise rarfile.BadRarFile('unrar stopped %s bytes short in %s' % (left, name))
+        dst.write(buf)
+        left -= len(buf)
+
+def _finish(proc):
+    #the pipe has to end where the listing does, and unrar has to be happy with it (crc's included).
+    if proc.stdout.read(1):
+        raise rarfile.BadRarFile('unrar returned more data than the archive lists')
+    rarfile.check_returncode(proc.wait(), b'', rarfile.tool_setup().get_errmap())
+
+def _convert(rarpath, cbzpath):
+    #returns (pages, bytes) - any error is raised back to the caller.
+    partpath = cbzpath + '.part'
+    pages = 0
+    size = 0
+    proc = None
+    try:
+        with rarfile.RarFile(rarpath) as rf:
+            if _streamable(rf):
+                proc = _unrar(rarpath)
+            with zipfile.ZipFile(partpath, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+                for info in rf.infolist():
+                    if info.is_dir():
+                        continue
+                    date_time = info.date_time
+                    if date_time is None or date_time[0] < 1980:
+                        date_time = (1980, 1, 1, 0, 0, 0)
+                    zinfo = zipfile.ZipInfo(info.filename, date_time=tuple(date_time))
+                    zinfo.compress_type = zipfile.ZIP_STORED
+                    zinfo.file_size = info.file_size
+                    with zf.open(zinfo, 'w', force_zip64=info.file_size > zipfile.ZIP64_LIMIT) as dst:
+                        if proc is not None:
+                            _copy_exact(proc.stdout, dst, info.file_size, info.filename)
+                        else:
+                            with rf.open(info) as src:
+                                shutil.copyfileobj(src, dst, CHUNK)
+                    pages += 1
+                    size += info.file_size
+                if rf.comment:
+                    zf.comment = rf.comment.encode('utf-8')
+            if proc is not None:
+                _finish(proc)
+        os.replace(partpath, cbzpath)
+    except BaseException:
+        if os.path.exists(partpath):
+            os.remove(partpath)
+        raise
+    finally:
+        if proc is not None:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            proc.stdout.close()
+    return pages, size
+
+def _get_slots():
+    global _slots, _slot_count
+    count = workers()
+    with _lock:
+        if _slots is None or _slot_count != count:
+            _slots = threading.BoundedSemaphore(count)
+            _slot_count = count
+        return _slots
+
+def _run(job, rarpath, cbzpath):
+    if mylar.CONFIG.UNRAR_CMD is not None:
+        rarfile.UNRAR_TOOL = mylar.CONFIG.UNRAR_CMD
+    with _get_slots():
+        job['state'] = 'converting'
+        job['started'] = time.time()
+        return _convert(rarpath, cbzpath)
+
+def convert(rarpath, delete_rar=False, module=''):
+    #convert rarpath to a .cbz alongside it. Returns the .cbz's path, 'corrupt' if the archive couldn't be read
+    #(bad crc / incomplete), or 'fail' for anything else (no unrar, disk errors) - the rar is left alone unless
+    #it converted and delete_rar is set.
+    module += '[CBR-TO-CBZ]'
+    cbzpath = cbz_name(rarpath)
+    job = {'file': os.path.basename(rarpath), 'state': 'queued', 'queued': time.time(), 'started': None}
+    with _lock:
+        _jobs[rarpath] = job
+    try:
+        try:
+            pages, size = _run(job, rarpath, cbzpath)
+        except rarfile.RarCannotExec as e:
+            logger.warn('%s Unable to run unrar to convert %s: %s' % (module, job['file'], e))
+            _count('failed')
+            return 'fail'
+        except (rarfile.BadRarFile, rarfile.NeedFirstVolume, rarfile.RarExecError) as e:
+            logger.warn('%s %s is not a readable archive: %s' % (module, job['file'], e))
+            _count('failed')
+            return 'corrupt'
+        except Exception as e:
+            logger.warn('%s Unable to convert %s: %s' % (module, job['file'], e))
+            _count('failed')
+            return 'fail'
+
+        _count('converted')
+        with _lock:
+            progress = '%s converting, %s queued' % (sum(1 for j in _jobs.values() if j['state'] == 'converting') - 1,
+                                                     sum(1 for j in _jobs.values() if j['state'] == 'queued'))
+        logger.fdebug('%s Converted %s (%s pages, %sMB) in %ss [%s]' % (module, job['file'], pages, round(size / 1048576.0, 1),
+                                                                         round(time.time() - job['started'], 2), progress))
+        if delete_rar:
+            try:
+                os.remove(rarpath)
+            except OSError as e:
+                logger.warn('%s Unable to remove %s after converting: %s' % (module, rarpath, e))
+        return cbzpath
+    finally:
+        with _lock:
+            _jobs.pop(rarpath, None)
+
+def _count(outcome):
+    with _lock:
+        _totals[outcome] += 1
+
+def status():
+    #what's queued / being converted right now, for jobqueue.status().
+    now = time.time()
+    with _lock:
+        jobs = [{'file':    j['file'],
+                 'state':   j['state'],
+                 'waiting': round((j['started'] or now) - j['queued'], 1),
+                 'running': round(now - j['started'], 1) if j['started'] is not None else None} for j in _jobs.values()]
+        return {'workers':   workers(),
+                'jobs':      jobs,
+                'converted': _totals['converted'],
+                'failed':    _totals['failed']}
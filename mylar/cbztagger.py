@@ -0,0 +1,178 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the
+#  implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public
+#  License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+# In-process version of the comictagger save (-s -o --id <issueid>) that cmtagmylar.run used to shell out for,
+# for archives that are already zips. ComicInfo.xml is appended to the archive (or swapped for the old one) and
+# the ComicBookLover block goes in the zip comment - the image members are never read or recompressed.
+# The issue is looked up on CV once for both tag types, through mylar's CV client (shared request pacing and
+# response cache) rather than a separate urlopen per comictagger run.
+
+import threading
+import zipfile
+
+import mylar
+from mylar import logger, cvclient
+
+from comictaggerlib import main as ctmain
+from comictaggerlib.settings import ComicTaggerSettings
+from comictaggerlib.options import Options
+from comictaggerlib.comicarchive import ComicArchive, MetaDataStyle, ComicInfoXml, GenericMetadata
+from comictaggerlib.comicvinetalker import ComicVineTalker, ComicVineTalkerException
+from comictaggerlib.cbltransformer import CBLTransformer
+
+_settings = None
+_settings_path = None
+_settings_lock = threading.Lock()
+
+
+class MylarCVTalker(ComicVineTalker):
+    #comictagger's CV lookups, sent through cvclient instead of urllib.
+
+    def getUrlContent(self, url):
+        if '/volume/' in url:
+            rtype = 'comic'
+        else:
+            rtype = 'single_issue'
+        try:
+            r = cvclient.get_client().get(url, rtype=rtype)
+        except Exception as e:
+            self.writeLog(str(e))
+            raise ComicVineTalkerException(ComicVineTalkerException.Network, 'Network Error!')
+        if r.status_code != 200:
+            raise ComicVineTalkerException(ComicVineTalkerException.Unknown, 'Error on Comic Vine server [%s]' % r.status_code)
+        return r.content
+
+
+def settings():
+    #the comictagger settings from CT_SETTINGSPATH - loaded once, with the api key / notes format kept in step with
+    #mylar's config the same way the command-line options did.
+    global _settings, _settings_path
+    with _settings_lock:
+        if _settings is None or _settings_path != mylar.CONFIG.CT_SETTINGSPATH:
+            _settings = ComicTaggerSettings(mylar.CONFIG.CT_SETTINGSPATH)
+            _settings_path = mylar.CONFIG.CT_SETTINGSPATH
+            #comictagger's volume cache (ComicVineCacher) looks for its folder here.
+            ctmain.SETTINGS = _settings
+        if all([mylar.CONFIG.COMICVINE_API is not None, mylar.CONFIG.COMICVINE_API != 'None']):
+            _settings.cv_api_key = mylar.CONFIG.COMICVINE_API
+        if any([mylar.CONFIG.CT_NOTES_FORMAT == 'CVDB', mylar.CONFIG.CT_NOTES_FORMAT == 'Issue ID']):
+            _settings.notes_format = mylar.CONFIG.CT_NOTES_FORMAT
+        return _settings
+
+def fetch(issueid, ct_settings, module):
+    talker = MylarCVTalker()
+    talker.setLogFunc(lambda text: logger.fdebug('%s[COMIC-TAGGER] %s' % (module, text.strip())))
+    if ct_settings.cv_api_key:
+        talker.api_key = ct_settings.cv_api_key
+    try:
+        cv_md = talker.fetchIssueDataByIssueID(issueid, ct_settings)
+    except ComicVineTalkerException as e:
+        logger.warn('%s[COMIC-TAGGER] Unable to retrieve issue details for %s from ComicVine: %s' % (module, issueid, e))
+        return None
+    if cv_md is not None and ct_settings.apply_cbl_transform_on_cv_import:
+        cv_md = CBLTransformer(cv_md, ct_settings).apply()
+    return cv_md
+
+def build_metadata(ca, style, overrides, cv_md):
+    #same layering as comictagger's save: existing tags of this type, then the values mylar passes in, then CV.
+    if ca.hasMetadata(style):
+        md = ca.readMetadata(style)
+    else:
+        md = GenericMetadata()
+        md.setDefaultPageList(ca.getNumberOfPages())
+    if overrides is not None:
+        md.overlay(overrides)
+        try:
+            if overrides.storyArc.lower() != cv_md.storyArc.lower():
+                cv_md.storyArc = md.storyArc
+        except Exception:
+            pass
+    md.overlay(cv_md)
+    return md
+
+def drop_member(zf, name):
+    #forget an existing member of a zip opened for append. When it's the last one in the archive (where
+    #comictagger always leaves ComicInfo.xml) its space is written over, otherwise it's just left unreferenced.
+    old = [info for info in zf.filelist if info.filename == name]
+    if not old:
+        return
+    for info in old:
+        zf.filelist.remove(info)
+    zf.NameToInfo.pop(name, None)
+    first = min(info.header_offset for info in old)
+    if all(info.header_offset < first for info in zf.filelist):
+        zf.start_dir = first
+
+def write_cix(path, ca, md):
+    ca.applyArchiveInfoToMetadata(md)
+    #page sizes come from the zip directory instead of reading every page back out of the archive.
+    with zipfile.ZipFile(path, 'r') as zf:
+        sizes = dict((info.filename, info.file_size) for info in zf.infolist())
+    pages = ca.getPageNameList()
+    for p in md.pages:
+        idx = int(p['Image'])
+        if 'ImageSize' not in p and idx < len(pages):
+            p['ImageSize'] = str(sizes.get(pages[idx], 0))
+    cix = ComicInfoXml().stringFromMetadata(md)
+    with zipfile.ZipFile(path, 'a', allowZip64=True) as zf:
+        drop_member(zf, ca.ci_xml_filename)
+        zf.writestr(ca.ci_xml_filename, cix, compress_type=zipfile.ZIP_DEFLATED)
+    ca.resetCache()
+    return True
+
+def tag(filepath, issueid, tline, module):
+    #tag the zip at filepath (the cache copy made by cmtagmylar.run) in place. Returns filepath, or the same
+    #'fail' / 'file not found||' responses cmtagmylar.run gives.
+    styles = []
+    if mylar.CONFIG.CT_TAG_CR:
+        styles.append(MetaDataStyle.CIX)
+    if mylar.CONFIG.CT_TAG_CBL:
+        styles.append(MetaDataStyle.CBI)
+    if not styles:
+        logger.warn(module + ' You have metatagging enabled, but you have not selected the type(s) of metadata to write. Please fix and re-run manually')
+        return "fail"
+
+    ca = ComicArchive(filepath, None, None)
+    if not ca.seemsToBeAComicArchive():
+        logger.warn(module + '[COMIC-TAGGER] Unable to locate file: ' + filepath)
+        return 'file not found||' + filepath
+
+    no_overwrite = all([filepath.endswith('.cbz'), not mylar.CONFIG.CT_CBZ_OVERWRITE])
+    todo = []
+    for style in styles:
+        if no_overwrite and ca.hasMetadata(style):
+            logger.fdebug('%s[COMIC-TAGGER] Already has %s tags. Not overwriting.' % (module, MetaDataStyle.name[style]))
+        else:
+            todo.append(style)
+    if not todo:
+        return filepath
+
+    ct_settings = settings()
+    cv_md = fetch(issueid, ct_settings, module)
+    if cv_md is None:
+        return "fail"
+    overrides = Options().parseMetadataFromString(tline)
+
+    for style in todo:
+        md = build_metadata(ca, style, overrides, cv_md)
+        if style == MetaDataStyle.CIX:
+            written = write_cix(filepath, ca, md)
+        else:
+            written = ca.writeCBI(md)
+        if not written:
+            logger.warn('%s[COMIC-TAGGER] Unable to write %s tags to %s' % (module, MetaDataStyle.name[style], filepath))
+            return "fail"
+        logger.info('%s[COMIC-TAGGER] Successfully wrote %s tagging [%s]' % (module, MetaDataStyle.name[style], filepath))
+
+    return filepath
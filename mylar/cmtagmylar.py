@@ -16,6 +16,7 @@ from subprocess import CalledProcessError, check_output
 import mylar
 
 from mylar import logger
+from lib.rarfile import rarfile
 
 
 def run(dirName, nzbName=None, issueid=None, comversion=None, manual=None, filename=None, module=None, manualmeta=False, readingorder=None, agerating=None):
@@ -123,6 +124,39 @@ def run(dirName, nzbName=None, issueid=None, comversion=None, manual=None, filen
     tline = '%s, %s, %s' % (cvers, rorder, arating)
     tagoptions.extend(["-m", tline])
 
+    #cbr's are converted on the shared conversion pool - if that can't be done comictagger's export has a go below.
+    if all([mylar.CONFIG.CT_INPROCESS, not zipfile.is_zipfile(filepath), rarfile.is_rarfile(filepath)]):
+        from mylar import cbrconvert
+        cv_result = cbrconvert.convert(filepath, delete_rar=True, module=module)
+        if cv_result == 'corrupt':
+            tidyup(og_filepath, new_filepath, new_folder, manualmeta)
+            return 'corrupt'
+        elif cv_result != 'fail':
+            logger.fdebug(module + '[COMIC-TAGGER][CBR-TO-CBZ] New filename: ' + cv_result)
+            filepath = cv_result
+
+    #zips tagged against a known issue are written in-process - the archive is appended to rather than rebuilt.
+    #anything else falls back to running comictagger.
+    if all([mylar.CONFIG.CT_INPROCESS, issueid is not None, zipfile.is_zipfile(filepath)]):
+        if mylar.CONFIG.CBR2CBZ_ONLY:
+            logger.fdebug(module + ' cbz conversion only - not writing any metadata.')
+            return filepath
+        try:
+            from mylar import cbztagger
+            ct_result = cbztagger.tag(filepath, issueid, tline, module)
+        except ImportError as e:
+            logger.warn('%s Unable to load comictagger in-process [%s] - running it externally instead.' % (module, e))
+        except Exception as e:
+            logger.warn('%s Error tagging in-process [%s] - running comictagger externally instead.' % (module, e))
+            if filepath != new_filepath:
+                os.remove(filepath)
+                filepath = new_filepath
+            shutil.copy(og_filepath, filepath)
+        else:
+            if any([ct_result == 'fail', ct_result.startswith('file not found')]):
+                tidyup(og_filepath, new_filepath, new_folder, manualmeta)
+            return ct_result
+
     try:
         #from comictaggerlib import ctversion
         ct_check = subprocess.check_output([sys.executable, comictagger_cmd, "--version"], stderr=subprocess.STDOUT)
@@ -30,7 +30,18 @@ _CONFIG_DEFINITIONS = OrderedDict({
     'LAUNCH_BROWSER' : (bool, 'General', False),
     'WANTED_TAB_OFF': (bool, 'General', False),
     'ENABLE_RSS': (bool, 'General', False),
+    'RSS_PRUNE_DAYS': (int, 'General', 180),
     'SEARCH_DELAY' : (int, 'General', 1),
+    'CONCURRENT_SEARCH': (bool, 'General', False),
+    'SEARCH_TIMEOUT': (int, 'General', 30),
+    'SEARCH_PROVIDER_INTERVAL': (int, 'General', 30),
+    'BACKLOG_BATCH': (bool, 'General', False),
+    'SEARCH_CACHE': (bool, 'General', True),
+    'SEARCH_CACHE_TTL': (int, 'General', 60),
+    'SEARCH_NEGATIVE_TTL': (int, 'General', 360),
+    'SEARCH_CACHE_MAX_TTL': (int, 'General', 2880),
+    'HTTP_RETRIES': (int, 'General', 2),
+    'HTTP_RETRY_BACKOFF': (int, 'General', 1),
     'GRABBAG_DIR': (str, 'General', None),
     'HIGHCOUNT': (int, 'General', 0),
     'MAINTAINSERIESFOLDER': (bool, 'General', False),
@@ -44,6 +55,7 @@ _CONFIG_DEFINITIONS = OrderedDict({
     'NEWCOM_DIR': (str, 'General', None),
     'FFTONEWCOM_DIR': (bool, 'General', False),
     'FOLDER_SCAN_LOG_VERBOSE': (bool, 'General', False),
+    'SCAN_WORKERS': (int, 'General', 1),   #processes parsing filenames on a large scan, 1 = no pool, 0 = one per core
     'INTERFACE': (str, 'General', 'default'),
     'CORRECT_METADATA': (bool, 'General', False),
     'MOVE_FILES': (bool, 'General', False),
@@ -96,6 +108,8 @@ _CONFIG_DEFINITIONS = OrderedDict({
     'DOWNLOAD_SCAN_INTERVAL': (int, 'Scheduler', 5),
     'CHECK_GITHUB_INTERVAL' : (int, 'Scheduler', 360),
     'BLOCKLIST_TIMER': (int, 'Scheduler', 3600),
+    'SCHED_STAGGER': (int, 'Scheduler', 60),   #seconds between jobs that are due at startup
+    'SCHED_JITTER': (int, 'Scheduler', 30),    #up to this many seconds added to each scheduled run
 
     'ALT_PULL' : (int, 'Weekly', 2),
     'PULL_REFRESH': (str, 'Weekly', None),
@@ -135,6 +149,7 @@ _CONFIG_DEFINITIONS = OrderedDict({
     'CV_ONLY': (bool, 'CV', True),
     'CV_ONETIMER': (bool, 'CV', True),
     'CVINFO': (bool, 'CV', False),
+    'CV_CACHE': (bool, 'CV', True),
 
     'LOG_DIR' : (str, 'Logs', None),
     'MAX_LOGSIZE' : (int, 'Logs', 10000000),
@@ -217,6 +232,9 @@ _CONFIG_DEFINITIONS = OrderedDict({
 
     'POST_PROCESSING': (bool, 'PostProcess', False),
     'FILE_OPTS': (str, 'PostProcess', 'move'),
+    'VERIFY_FILE_OPS': (bool, 'PostProcess', True),   #check copies / cross-device moves against a fingerprint of the source
+    'FILEOPS_WORKERS': (int, 'PostProcess', 2),   #copies / cross-device moves running at once
+    'PP_WORKERS': (int, 'PostProcess', 2),
     'SNATCHEDTORRENT_NOTIFY': (bool, 'PostProcess', False),
     'LOCAL_TORRENT_PP': (bool, 'PostProcess', False),
     'POST_PROCESSING_SCRIPT': (str, 'PostProcess', None),
@@ -308,6 +326,8 @@ _CONFIG_DEFINITIONS = OrderedDict({
     'CT_TAG_CR': (bool, 'Metatagging', True),
     'CT_TAG_CBL': (bool, 'Metatagging', True),
     'CT_CBZ_OVERWRITE': (bool, 'Metatagging', False),
+    'CT_INPROCESS': (bool, 'Metatagging', True),   #tag cbz's within mylar instead of running comictagger
+    'CBR2CBZ_WORKERS': (int, 'Metatagging', 0),   #cbr's converted to cbz at once, 0 = one per core
     'UNRAR_CMD': (str, 'Metatagging', None),
     'CT_NOTES_FORMAT': (str, 'Metatagging', 'Issue ID'),
     'CT_SETTINGSPATH': (str, 'Metatagging', None),
@@ -326,6 +346,9 @@ _CONFIG_DEFINITIONS = OrderedDict({
     'ALLOW_PACKS': (bool, 'DDL', False),
     'DDL_LOCATION': (str, 'DDL', None),
     'DDL_AUTORESUME': (bool, 'DDL', True),
+    'DDL_WORKERS': (int, 'DDL', 2),
+    'DDL_HOST_LIMIT': (int, 'DDL', 2),
+    'DDL_SEGMENTS': (int, 'DDL', 3),
 
     'AUTO_SNATCH': (bool, 'AutoSnatch', False),
     'AUTO_SNATCH_SCRIPT': (str, 'AutoSnatch', None),
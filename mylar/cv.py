@@ -18,19 +18,110 @@ import os
 import re
 import time
 import pytz
-from mylar import logger, helpers
+import threading
+from mylar import logger, helpers, cvclient
 import string
 import feedparser
 import mylar
 import platform
 from bs4 import BeautifulSoup as Soup
 from xml.parsers.expat import ExpatError
+from xml.etree import ElementTree
+import io
 import http.client
 import requests
 import datetime
 from operator import itemgetter
 
-def pulldetails(comicid, rtype, issueid=None, offset=1, arclist=None, comicidlist=None, dateinfo=None):
+#the IssuePrefetch open in each thread, if any.
+_prefetch_local = threading.local()
+
+class IssuePrefetch(object):
+    #issue data pulled in bulk for one refresh run, handed out (once) to the getComic(comicid, 'issue') calls
+    #made by the thread that opened it. Every run has its own, and it's dropped as soon as it's closed.
+
+    def __init__(self):
+        self.issues = {}
+        self._outer = getattr(_prefetch_local, 'current', None)
+        _prefetch_local.current = self
+
+    def load(self, comicidlist):
+        #replaces whatever was loaded before - only the batch currently being refreshed is kept in memory.
+        self.issues = getComic(None, 'volume_issues', comicidlist=comicidlist)
+        return len(self.issues)
+
+    def pop(self, comicid):
+        return self.issues.pop(re.sub('4050-', '', str(comicid)), None)
+
+    def close(self):
+        self.issues = {}
+        if getattr(_prefetch_local, 'current', None) is self:
+            _prefetch_local.current = self._outer
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+def prefetch_pop(comicid):
+    current = getattr(_prefetch_local, 'current', None)
+    if current is None:
+        return None
+    return current.pop(comicid)
+
+class IssueStream(object):
+    #walks the <issue> records of a CV issues response as they're parsed (iterparse) instead of building a dom,
+    #clearing each one once it's been read so memory stays flat however long the series is.
+    #total (number_of_total_results) and error are only valid once it's been iterated.
+    FIELDS = {('id',):                   'Issue_ID',
+              ('name',):                 'Issue_Name',
+              ('issue_number',):         'issue_number',
+              ('cover_date',):           'cover_date',
+              ('store_date',):           'store_date',
+              ('description',):          'description',
+              ('volume', 'id'):          'Comic_ID',
+              ('volume', 'name'):        'ComicName',
+              ('image', 'small_url'):    'small_url',
+              ('image', 'medium_url'):   'medium_url'}
+
+    def __init__(self, content):
+        self.content = content
+        self.total = 0
+        self.error = False
+
+    def __iter__(self):
+        path = []
+        results = None
+        record = dict((x, None) for x in self.FIELDS.values())
+        try:
+            for event, elem in ElementTree.iterparse(io.BytesIO(self.content), events=('start', 'end')):
+                if event == 'start':
+                    path.append(elem.tag)
+                    if len(path) == 2 and elem.tag == 'results':
+                        results = elem
+                    continue
+                if len(path) == 2 and elem.tag == 'number_of_total_results':
+                    self.total = int(elem.text or 0)
+                elif len(path) > 3 and path[1] == 'results' and path[2] == 'issue':
+                    field = self.FIELDS.get(tuple(path[3:]))
+                    if field is not None:
+                        record[field] = elem.text
+                elif len(path) == 3 and elem.tag == 'issue':
+                    yield record
+                    record = dict((x, None) for x in self.FIELDS.values())
+                    if results is not None:
+                        results.remove(elem)
+                path.pop()
+        except ElementTree.ParseError as e:
+            logger.warn('[WARNING] ComicVine is not responding correctly at the moment (%s). This is usually due to some problems on their end. If you re-try things again in a few moments, things might work' % e)
+            mylar.BACKENDSTATUS_CV = 'down'
+            self.error = True
+        self.content = None
+
+def pulldetails(comicid, rtype, issueid=None, offset=1, arclist=None, comicidlist=None, dateinfo=None, raw=False):
+    #raw=True hands back the undecoded response body (for IssueStream) instead of a parsed dom.
     #import easy to use xml parser called minidom:
     from xml.dom.minidom import parseString
 
@@ -65,24 +156,27 @@ def pulldetails(comicid, rtype, issueid=None, offset=1, arclist=None, comicidlis
         PULLURL = mylar.CVURL + 'issues/?api_key=' + str(comicapi) + '&format=xml&filter=id:' + (comicidlist) + '&field_list=cover_date,id,issue_number,name,date_last_updated,store_date,volume' + '&offset=' + str(offset)
     elif rtype == 'update_dates':
         PULLURL = mylar.CVURL + 'issues/?api_key=' + str(comicapi) + '&format=xml&filter=id:' + (comicidlist)+ '&field_list=date_last_updated, id, issue_number, store_date, cover_date, name, volume ' + '&offset=' + str(offset)
+    elif rtype == 'volume_updates':
+        #bulk change check - up to 100 volume ids per hit, only what's needed to tell if a series changed.
+        PULLURL = mylar.CVURL + 'volumes/?api_key=' + str(comicapi) + '&format=json&filter=id:' + (comicidlist) + '&field_list=id,date_last_updated,count_of_issues&offset=' + str(offset)
+    elif rtype == 'volume_issues':
+        #bulk issue pull for up to 100 volumes at once (same fields as the CV_ONLY issue pull + the volume to split them back out).
+        PULLURL = mylar.CVURL + 'issues/?api_key=' + str(comicapi) + '&format=xml&filter=volume:' + (comicidlist) + '&field_list=cover_date,description,id,image,issue_number,name,date_last_updated,store_date,volume&sort=id:asc&offset=' + str(offset)
     elif rtype == 'single_issue':
         #this is used for retrieving single issue metadata for use when displaying metadata information for a selected issue.
         PULLURL = mylar.CVURL + 'issue/4000-' + str(issueid) + '?api_key=' + str(comicapi) + '&format=json'
     elif rtype == 'db_updater':
         PULLURL = mylar.CVURL + 'issues/?api_key=' + str(comicapi) + '&format=json&filter=date_last_updated:'+dateinfo['start_date']+'|'+dateinfo['end_date']+'&field_list=date_last_updated,id,volume,issue_number&sort=date_last_updated:asc&offset=' + str(offset)
     #logger.info('CV.PULLURL: ' + PULLURL)
-    #new CV API restriction - one api request / second.
-    if mylar.CONFIG.CVAPI_RATE is None or mylar.CONFIG.CVAPI_RATE < 2:
-        time.sleep(2)
+    #new CV API restriction - one api request / second (paced by the shared client's token bucket).
+    #cached responses are tagged with the ComicID so a CV-side change can invalidate them.
+    if rtype in ('comic', 'issue') and arclist is None:
+        cachetag = re.sub('4050-', '', str(comicid))
     else:
-        time.sleep(mylar.CONFIG.CVAPI_RATE)
-
-    #download the file:
-    #set payload to None for now...
-    payload = None
+        cachetag = rtype
 
     try:
-        r = requests.get(PULLURL, params=payload, verify=mylar.CONFIG.CV_VERIFY, headers=mylar.CV_HEADERS)
+        r = cvclient.get_client().get(PULLURL, rtype=rtype, tag=cachetag)
     except Exception as e:
         logger.warn('Error fetching data from ComicVine: %s' % (e))
         if all(['Expecting value: line 1 column 1' not in str(e), rtype != 'db_updater']):
@@ -94,8 +188,14 @@ def pulldetails(comicid, rtype, issueid=None, offset=1, arclist=None, comicidlis
     mylar.BACKENDSTATUS_CV = 'up'
     #logger.fdebug('cv status code : ' + str(r.status_code))
     #logger.fdebug('rtype: %s' % rtype)
+    if raw is True:
+        if b'<title>Abnormal Traffic Detected' in r.content:
+            logger.error('ComicVine has banned this server\'s IP address because it exceeded the API rate limit.')
+            return
+        return r.content
+
     try:
-        if any([rtype == 'single_issue', rtype == 'db_updater']):
+        if any([rtype == 'single_issue', rtype == 'db_updater', rtype == 'volume_updates']):
             dom = r.json()
             #logger.info('cv_data returned: %s' % dom)
         else:
@@ -142,23 +242,35 @@ def getComic(comicid, rtype, issueid=None, arc=None, arcid=None, arclist=None, c
         else:
             id = comicid
             islist = None
-        searched = pulldetails(id, 'issue', None, 0, islist)
-        if searched is None:
-            return False
-        totalResults = searched.getElementsByTagName('number_of_total_results')[0].firstChild.wholeText
-        logger.fdebug("there are " + str(totalResults) + " search results...")
-        if not totalResults:
-            return False
+            #a bulk refresh may have already pulled this series' issues in with a batch of others.
+            prefetched = prefetch_pop(comicid)
+            if prefetched is not None:
+                return prefetched
         countResults = 0
-        while (countResults < int(totalResults)):
-            logger.fdebug('Querying & compiling from %s - %s out of %s results'
+        totalResults = 1
+        while (countResults < totalResults):
+            #new api - have to change to page # instead of offset count
+            if mylar.CONFIG.CV_ONLY:
+                searched = pulldetails(id, 'issue', None, countResults, islist, raw=True)
+                if searched is None:
+                    return False
+                searched = IssueStream(searched)
+            else:
+                searched = pulldetails(id, 'issue', None, countResults, islist)
+                if searched is None:
+                    return False
+            issuechoice, tmpdate = GetIssuesInfo(id, searched, arcid)
+            if mylar.CONFIG.CV_ONLY and searched.error is True:
+                return False
+            if countResults == 0:
+                if mylar.CONFIG.CV_ONLY:
+                    totalResults = searched.total
+                else:
+                    totalResults = int(searched.getElementsByTagName('number_of_total_results')[0].firstChild.wholeText)
+                logger.fdebug("there are " + str(totalResults) + " search results...")
+            logger.fdebug('Compiled %s - %s out of %s results'
                 % (countResults, countResults + 100, totalResults)
             )
-            if countResults > 0:
-                #new api - have to change to page # instead of offset count
-                offsetcount = countResults
-                searched = pulldetails(id, 'issue', None, offsetcount, islist)
-            issuechoice, tmpdate = GetIssuesInfo(id, searched, arcid)
             if tmpdate < firstdate:
                 firstdate = tmpdate
             ndic = ndic + issuechoice
@@ -222,6 +334,51 @@ def getComic(comicid, rtype, issueid=None, arc=None, arcid=None, arclist=None, c
 
         return import_list
 
+    elif rtype == 'volume_updates':
+        #used by the bulk refresh to see which series have actually changed on CV since they were last refreshed.
+        #returns {comicid: {'date_last_updated', 'count_of_issues'}} - any id missing from the result should be treated as changed.
+        volume_list = {}
+        for id_count in range(0, len(comicidlist), 100):
+            tmpidlist = '|'.join([str(x) for x in comicidlist[id_count:id_count+100]])
+            searched = pulldetails(None, 'volume_updates', offset=0, comicidlist=tmpidlist)
+            if not searched:
+                continue
+            for vol in searched['results']:
+                volume_list[str(vol['id'])] = {'date_last_updated': vol['date_last_updated'],
+                                               'count_of_issues':   vol['count_of_issues']}
+        return volume_list
+
+    elif rtype == 'volume_issues':
+        #pulls the issues for a batch of volumes (100 volume ids per hit, paged 100 issues at a time) and splits them back
+        #out per volume into the same {'issuechoice', 'firstdate'} that rtype='issue' returns.
+        volume_issues = {}
+        for id_count in range(0, len(comicidlist), 100):
+            idchunk = [str(x) for x in comicidlist[id_count:id_count+100]]
+            tracks = dict((x, []) for x in idchunk)
+            countResults = 0
+            totalResults = 1
+            while countResults < totalResults:
+                searched = pulldetails(None, 'volume_issues', offset=countResults, comicidlist='|'.join(idchunk), raw=True)
+                if searched is None:
+                    break
+                searched = IssueStream(searched)
+                for record in searched:
+                    if record['Comic_ID'] in tracks:
+                        tracks[record['Comic_ID']].append(record)
+                if searched.error is True:
+                    break
+                totalResults = searched.total
+                countResults += 100
+            if countResults < totalResults:
+                #incomplete batch - leave these to the normal per-series pull rather than store partial issue lists.
+                logger.warn('[BULK-REFRESH] Unable to retrieve all issues for a batch of %s series. They will be refreshed individually.' % len(idchunk))
+                continue
+            for volid, records in tracks.items():
+                issuechoice, firstdate = GetIssuesInfo(volid, records)
+                volume_issues[volid] = {'issuechoice': issuechoice,
+                                        'firstdate':   firstdate}
+        return volume_issues
+
     elif rtype == 'update_dates':
         dom = pulldetails(None, 'update_dates', offset=1, comicidlist=comicidlist)
         return UpdateDates(dom)
@@ -343,25 +500,24 @@ def GetComicInfo(comicid, dom, safechk=None, series=False):
     # where [0] denotes the number of the name field(s)
     # where nodeName denotes the parentNode : ComicName = results, publisher = publisher, issues = issue
     try:
-        names = len(dom.getElementsByTagName('name'))
-        n = 0
+        #walk the name nodes once - a volume with 900+ issues has 900+ <name> nodes.
+        namenodes = dom.getElementsByTagName('name')
         comic['ComicPublisher'] = 'Unknown'   #set this to a default value here so that it will carry through properly
-        while (n < names):
-            if dom.getElementsByTagName('name')[n].parentNode.nodeName == 'results':
+        for namenode in namenodes:
+            if namenode.parentNode.nodeName == 'results':
                 try:
-                    comic['ComicName'] = dom.getElementsByTagName('name')[n].firstChild.wholeText
+                    comic['ComicName'] = namenode.firstChild.wholeText
                     comic['ComicName'] = comic['ComicName'].rstrip()
                 except:
                     logger.error('There was a problem retrieving the given data from ComicVine. Ensure that www.comicvine.com is accessible AND that you have provided your OWN ComicVine API key.')
                     return
 
-            elif dom.getElementsByTagName('name')[n].parentNode.nodeName == 'publisher':
+            elif namenode.parentNode.nodeName == 'publisher':
                 try:
-                    comic['ComicPublisher'] = dom.getElementsByTagName('name')[n].firstChild.wholeText
+                    comic['ComicPublisher'] = namenode.firstChild.wholeText
                 except Exception as e:
                     logger.error('error encountered: %s' % e)
                     comic['ComicPublisher'] = "Unknown"
-            n += 1
     except:
         logger.warn('Something went wrong retrieving from ComicVine. Ensure your API is up-to-date and that comicvine is accessible')
         return
@@ -781,8 +937,9 @@ def GetComicInfo(comicid, dom, safechk=None, series=False):
     return comic
 
 def GetIssuesInfo(comicid, dom, arcid=None):
-    subtracks = dom.getElementsByTagName('issue')
+    #with CV_ONLY, dom is an IssueStream (or a list of its records) rather than a minidom document.
     if not mylar.CONFIG.CV_ONLY:
+        subtracks = dom.getElementsByTagName('issue')
         cntiss = dom.getElementsByTagName('count_of_issues')[0].firstChild.wholeText
         logger.fdebug("issues I've counted: " + str(len(subtracks)))
         logger.fdebug("issues CV says it has: " + str(int(cntiss)))
@@ -793,7 +950,8 @@ def GetIssuesInfo(comicid, dom, arcid=None):
         cntiss = int(cntiss)
         n = cntiss -1
     else:
-        n = int(len(subtracks))
+        subtracks = dom
+        n = 0
     tempissue = {}
     issuech = []
     firstdate = '2099-00-00'
@@ -813,70 +971,28 @@ def GetIssuesInfo(comicid, dom, arcid=None):
                 'Issue_Name':              issue['Issue_Name']
                 })
         else:
-            try:
-                totnames = len(subtrack.getElementsByTagName('name'))
-                tot = 0
-                while (tot < totnames):
-                    if subtrack.getElementsByTagName('name')[tot].parentNode.nodeName == 'volume':
-                        tempissue['ComicName'] = subtrack.getElementsByTagName('name')[tot].firstChild.wholeText
-                    elif subtrack.getElementsByTagName('name')[tot].parentNode.nodeName == 'issue':
-                        try:
-                            tempissue['Issue_Name'] = subtrack.getElementsByTagName('name')[tot].firstChild.wholeText
-                        except:
-                            tempissue['Issue_Name'] = None
-                    tot += 1
-            except:
-                tempissue['ComicName'] = 'None'
-
-            try:
-                totids = len(subtrack.getElementsByTagName('id'))
-                idt = 0
-                while (idt < totids):
-                    if subtrack.getElementsByTagName('id')[idt].parentNode.nodeName == 'volume':
-                        tempissue['Comic_ID'] = subtrack.getElementsByTagName('id')[idt].firstChild.wholeText
-                    elif subtrack.getElementsByTagName('id')[idt].parentNode.nodeName == 'issue':
-                        tempissue['Issue_ID'] = subtrack.getElementsByTagName('id')[idt].firstChild.wholeText
-                    idt += 1
-            except:
-                tempissue['Issue_Name'] = 'None'
-
-            try:
-                tempissue['CoverDate'] = subtrack.getElementsByTagName('cover_date')[0].firstChild.wholeText
-            except:
-                tempissue['CoverDate'] = '0000-00-00'
-            try:
-                tempissue['StoreDate'] = subtrack.getElementsByTagName('store_date')[0].firstChild.wholeText
-            except:
-                tempissue['StoreDate'] = '0000-00-00'
-            try:
-                digital_desc = subtrack.getElementsByTagName('description')[0].firstChild.wholeText
-            except:
-                tempissue['DigitalDate'] = '0000-00-00'
-            else:
-                tempissue['DigitalDate'] = '0000-00-00'
-                if all(['digital' in digital_desc.lower()[-90:], 'print' in digital_desc.lower()[-90:]]):
-                    #get the digital date of issue here...
-                    mff = mylar.filechecker.FileChecker()
-                    vlddate = mff.checkthedate(digital_desc[-90:], fulldate=True)
-                    #logger.fdebug('vlddate: %s' % vlddate)
-                    if vlddate:
-                        tempissue['DigitalDate'] = vlddate
-            try:
-                tempissue['Issue_Number'] = subtrack.getElementsByTagName('issue_number')[0].firstChild.wholeText
-            except:
+            tempissue['ComicName'] = subtrack['ComicName']
+            tempissue['Comic_ID'] = subtrack['Comic_ID']
+            tempissue['Issue_ID'] = subtrack['Issue_ID']
+            tempissue['Issue_Name'] = subtrack['Issue_Name']
+            tempissue['CoverDate'] = subtrack['cover_date'] or '0000-00-00'
+            tempissue['StoreDate'] = subtrack['store_date'] or '0000-00-00'
+            digital_desc = subtrack['description']
+            tempissue['DigitalDate'] = '0000-00-00'
+            if digital_desc is not None and all(['digital' in digital_desc.lower()[-90:], 'print' in digital_desc.lower()[-90:]]):
+                #get the digital date of issue here...
+                mff = mylar.filechecker.FileChecker()
+                vlddate = mff.checkthedate(digital_desc[-90:], fulldate=True)
+                #logger.fdebug('vlddate: %s' % vlddate)
+                if vlddate:
+                    tempissue['DigitalDate'] = vlddate
+            if subtrack['issue_number'] is None:
                 logger.fdebug('No Issue Number available - Trade Paperbacks, Graphic Novels and Compendiums are not supported as of yet.')
             else:
-                tempissue['Issue_Number'] = tempissue['Issue_Number'].strip()
+                tempissue['Issue_Number'] = subtrack['issue_number'].strip()
 
-            try:
-                tempissue['ComicImage'] = subtrack.getElementsByTagName('small_url')[0].firstChild.wholeText
-            except:
-                tempissue['ComicImage'] = 'None'
-
-            try:
-                tempissue['ComicImageALT'] = subtrack.getElementsByTagName('medium_url')[0].firstChild.wholeText
-            except:
-                tempissue['ComicImageALT'] = 'None'
+            tempissue['ComicImage'] = subtrack['small_url'] or 'None'
+            tempissue['ComicImageALT'] = subtrack['medium_url'] or 'None'
 
             if arcid is None:
                 issuech.append({
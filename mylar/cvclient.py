@@ -0,0 +1,203 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the
+#  implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public
+#  License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+# Shared ComicVine client - every CV API call should go through get_client().get() so that
+# all of them share one rate budget, one pooled connection and the on-disk response cache.
+
+import os
+import re
+import glob
+import json
+import time
+import hashlib
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import mylar
+from mylar import logger, runqueue
+
+#seconds a cached response stays valid, per pulldetails rtype. 0 = never cached.
+#update_dates / db_updater are the change feeds used to decide what to refresh, so they are always live.
+CACHE_TTL = {'comic':           86400,
+             'issue':           86400,
+             'firstissue':      604800,
+             'image':           604800,
+             'imprints_first':  604800,
+             'storyarc':        86400,
+             'comicyears':      86400,
+             'import':          86400,
+             'single_issue':    86400,
+             'search':          3600,
+             'arc':             86400,
+             'update_dates':    0,
+             'db_updater':      0,
+             'volume_updates':  0,
+             'volume_issues':   0}
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = CVClient()
+            _client.prune()
+        return _client
+
+def invalidate(comicid):
+    #drop every cached response tagged with this ComicID (ie. CV reported the volume changed, or the user asked
+    #for a refresh).
+    return get_client().invalidate(re.sub('4050-', '', str(comicid)).strip())
+
+
+class TokenBucket(object):
+    #allows a short burst, then paces requests at 1 per CVAPI_RATE seconds - it only sleeps once the budget is spent.
+    #Callers queue up by priority, so an interactive lookup goes ahead of a background refresh that's waiting.
+
+    def __init__(self, capacity=1):
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.time()
+        self.lock = runqueue.PriorityGate('cv-api')
+        self.waited = 0.0
+
+    def rate(self):
+        if mylar.CONFIG.CVAPI_RATE is None or mylar.CONFIG.CVAPI_RATE < 2:
+            return 1.0 / 2
+        return 1.0 / mylar.CONFIG.CVAPI_RATE
+
+    def consume(self):
+        with self.lock.slot():
+            rate = self.rate()
+            now = time.time()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * rate)
+            self.updated = now
+            if self.tokens < 1:
+                delay = (1 - self.tokens) / rate
+                self.waited += delay
+                time.sleep(delay)
+                self.tokens = 1
+                self.updated = time.time()
+            self.tokens -= 1
+
+
+class CachedResponse(object):
+    #just enough of a requests.Response for the cv/mb parsers.
+
+    def __init__(self, content, status_code=200):
+        self.content = content
+        self.status_code = status_code
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', 'replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        pass
+
+
+class CVClient(object):
+
+    def __init__(self):
+        self.bucket = TokenBucket()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=10)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.cache_dir = os.path.join(mylar.CONFIG.CACHE_DIR, 'cv_cache')
+        self.stats = {'requests': 0, 'cache_hits': 0, 'cache_misses': 0}
+
+    def cache_key(self, url):
+        #the api_key is per-user and rotates, so it must never be part of the key.
+        return hashlib.sha1(re.sub(r'api_key=[^&]*&?', '', url).encode('utf-8')).hexdigest()
+
+    def cache_path(self, url, tag=None):
+        if tag is None:
+            tag = 'none'
+        return os.path.join(self.cache_dir, '%s_%s.json' % (re.sub(r'[^\w\-]', '', str(tag)), self.cache_key(url)))
+
+    def cache_read(self, url, ttl, tag=None):
+        path = self.cache_path(url, tag)
+        try:
+            if time.time() - os.path.getmtime(path) > ttl:
+                os.remove(path)
+                return None
+            with open(path, 'rb') as f:
+                return CachedResponse(f.read())
+        except (OSError, IOError):
+            return None
+
+    def cache_write(self, url, content, tag=None):
+        #only ever cache a clean CV answer - errors / bans / bad api keys need to be retried.
+        if not any([b'<status_code>1</status_code>' in content, b'"status_code":1' in content, b'"status_code": 1' in content]):
+            return
+        path = self.cache_path(url, tag)
+        tmppath = path + '.tmp'
+        try:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir)
+            with open(tmppath, 'wb') as f:
+                f.write(content)
+            os.replace(tmppath, path)
+        except (OSError, IOError) as e:
+            logger.fdebug('[CV-CLIENT] Unable to write response to cache: %s' % e)
+
+    def invalidate(self, tag):
+        removed = 0
+        for path in glob.glob(os.path.join(self.cache_dir, '%s_*.json' % re.sub(r'[^\w\-]', '', str(tag)))):
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def prune(self):
+        #clear out anything past the longest TTL so the cache dir doesn't grow forever.
+        maxttl = max(CACHE_TTL.values())
+        for path in glob.glob(os.path.join(self.cache_dir, '*.json')):
+            try:
+                if time.time() - os.path.getmtime(path) > maxttl:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def ttl(self, rtype):
+        if mylar.CONFIG.CV_CACHE is False or rtype is None:
+            return 0
+        return CACHE_TTL.get(rtype, 0)
+
+    def get(self, url, rtype=None, tag=None, stream=False):
+        #rtype selects the cache TTL (see CACHE_TTL), tag groups cache entries for invalidate().
+        ttl = self.ttl(rtype)
+        if ttl > 0 and stream is False:
+            cached = self.cache_read(url, ttl, tag)
+            if cached is not None:
+                self.stats['cache_hits'] += 1
+                return cached
+            self.stats['cache_misses'] += 1
+
+        self.bucket.consume()
+        self.stats['requests'] += 1
+        r = self.session.get(url, verify=mylar.CONFIG.CV_VERIFY, headers=mylar.CV_HEADERS, stream=stream)
+
+        if ttl > 0 and stream is False and r.status_code == 200:
+            self.cache_write(url, r.content, tag)
+        return r
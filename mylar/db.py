@@ -28,90 +28,341 @@ import queue
 import mylar
 from . import logger
 
-db_lock = threading.Lock()
+db_lock = threading.RLock()
 mylarQueue = queue.Queue()
 
+#connection pool - one sqlite connection per (thread, db file), reused for the life of the thread.
+_pool = {}
+_pool_lock = threading.Lock()
+
+#lock wait counters for the single-writer db_lock.
+_lock_stats = {'acquired': 0,
+               'waited': 0,
+               'wait_total': 0.0,
+               'wait_max': 0.0,
+               'connections_opened': 0}
+
 def dbFilename(filename="mylar.db"):
 
     return os.path.join(mylar.DATA_DIR, filename)
 
+def _connect(filename):
+    conn = sqlite3.connect(dbFilename(filename), timeout=20, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    try:
+        #WAL lets readers run concurrently with the (single) writer.
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+    except sqlite3.DatabaseError as e:
+        logger.warn('Unable to enable WAL journaling on %s: %s' % (filename, e))
+    return conn
+
+def get_connection(filename="mylar.db"):
+    #return the pooled connection for the calling thread, opening one if needed.
+    key = (threading.get_ident(), filename)
+    with _pool_lock:
+        conn = _pool.get(key)
+        if conn is None:
+            _prune()
+            conn = _connect(filename)
+            _pool[key] = conn
+            _lock_stats['connections_opened'] += 1
+    return conn
+
+def _prune():
+    #close connections belonging to threads that have since exited (_pool_lock must be held).
+    alive = set([t.ident for t in threading.enumerate()])
+    for key in [k for k in _pool if k[0] not in alive]:
+        try:
+            _pool.pop(key).close()
+        except Exception:
+            pass
+
+def close_all():
+    with _pool_lock:
+        for key in list(_pool):
+            try:
+                _pool.pop(key).close()
+            except Exception:
+                pass
+
+class write_lock(object):
+    #acquire the writer lock, recording how long the caller had to wait for it.
+
+    def __enter__(self):
+        start = time.time()
+        if not db_lock.acquire(blocking=False):
+            db_lock.acquire()
+            waited = time.time() - start
+            _lock_stats['waited'] += 1
+            _lock_stats['wait_total'] += waited
+            if waited > _lock_stats['wait_max']:
+                _lock_stats['wait_max'] = waited
+        _lock_stats['acquired'] += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        db_lock.release()
+        return False
+
+def db_stats():
+    with _pool_lock:
+        pooled = len(_pool)
+    stats = dict(_lock_stats)
+    stats['pooled_connections'] = pooled
+    if stats['waited'] > 0:
+        stats['wait_avg'] = stats['wait_total'] / stats['waited']
+    else:
+        stats['wait_avg'] = 0.0
+    return stats
+
+#write-behind tuning: flush once this many upserts are pending, or once the oldest has waited this long.
+WRITE_BATCH_SIZE = 500
+WRITE_BATCH_DEADLINE = 0.5
+#seconds a WriteBatch waits for its writes before giving up on them.
+WRITE_WAIT_TIMEOUT = 120
+
+_FLUSH = 'flush'
+_EXIT = 'exit'
+
+class WriteTimeout(Exception):
+    pass
+
+class WriteTicket(object):
+    #handed back for every queued upsert so the caller can wait until it is durable.
+
+    def __init__(self):
+        self.error = None
+        self._done = threading.Event()
+
+    def set(self, error=None):
+        self.error = error
+        self._done.set()
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        if not self._done.wait(timeout):
+            return False
+        if self.error is not None:
+            raise self.error
+        return True
+
 class WriteOnly:
+    #write-behind service - drains mylarQueue, grouping pending upserts into one transaction per table.
+
+    _instance = None
+    _instance_lock = threading.Lock()
 
     def __init__(self):
-        t = threading.Thread(target=self.worker, name="DB-WRITER")
-        t.daemon = True
-        t.start()
+        self.queue = mylarQueue
+        self.thread = threading.Thread(target=self.worker, name="DB-WRITER")
+        self.thread.daemon = True
+        self.thread.start()
         logger.fdebug('Thread WriteOnly initialized.')
 
+    @classmethod
+    def instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None or not cls._instance.thread.is_alive():
+                cls._instance = cls()
+            return cls._instance
+
+    @classmethod
+    def stop(cls, timeout=10):
+        with cls._instance_lock:
+            if cls._instance is None or not cls._instance.thread.is_alive():
+                return
+            cls._instance.queue.put(_EXIT)
+            cls._instance.thread.join(timeout)
+            cls._instance = None
+
+    def put(self, tableName, valueDict, keyDict):
+        ticket = WriteTicket()
+        #copy the dicts - callers regularly mutate them again straight after an upsert.
+        self.queue.put((tableName, dict(valueDict), dict(keyDict), ticket))
+        return ticket
+
+    def flush(self):
+        #ask the worker to write out what it has now instead of waiting for the deadline.
+        self.queue.put(_FLUSH)
+
     def worker(self):
         myDB = DBConnection()
-        #this should be in it's own thread somewhere, constantly polling the queue and sending them to the writer.
         logger.fdebug('worker started.')
-        while True:
-            thisthread = threading.currentThread().name
-            if not mylarQueue.empty():
-    # Rename the main thread
-                logger.fdebug('[' + str(thisthread) + '] queue is not empty yet...')
-                (QtableName, QvalueDict, QkeyDict) = mylarQueue.get(block=True, timeout=None)
-                logger.fdebug('[REQUEUE] Table: ' + str(QtableName) + ' values: ' + str(QvalueDict) + ' keys: ' + str(QkeyDict))
-                sqlResult = myDB.upsert(QtableName, QvalueDict, QkeyDict)
-                if sqlResult:
-                    mylarQueue.task_done()
-                    return sqlResult
+        running = True
+        while running:
+            item = self.queue.get(block=True, timeout=None)
+            pending = []
+            deadline = time.time() + WRITE_BATCH_DEADLINE
+            while True:
+                if item == _EXIT:
+                    running = False
+                    break
+                elif item != _FLUSH:
+                    pending.append(item)
+                if item == _FLUSH or len(pending) >= WRITE_BATCH_SIZE:
+                    break
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(block=True, timeout=remaining)
+                except queue.Empty:
+                    break
+
+            if running is False:
+                #drain anything left behind so nothing queued before shutdown is lost.
+                while True:
+                    try:
+                        item = self.queue.get(block=False)
+                    except queue.Empty:
+                        break
+                    if item not in (_EXIT, _FLUSH):
+                        pending.append(item)
+
+            if pending:
+                try:
+                    self.write(myDB, pending)
+                except Exception as e:
+                    #never leave anyone waiting on a write that isn't going to happen.
+                    logger.error('[DB-WRITER] Unable to write %s queued upserts: %s' % (len(pending), e))
+                    for tableName, valueDict, keyDict, ticket in pending:
+                        if not ticket.done():
+                            ticket.set(e)
+
+    def write(self, myDB, pending):
+        tables = {}
+        for tableName, valueDict, keyDict, ticket in pending:
+            tables.setdefault(tableName, []).append((valueDict, keyDict, ticket))
+
+        for tableName, rows in tables.items():
+            try:
+                myDB.upsert_many(tableName, [(v, k) for v, k, t in rows])
+            except Exception as e:
+                #one bad row shouldn't sink everyone else's writes - retry them individually.
+                logger.warn('[DB-WRITER] Batched write of %s rows to %s failed (%s). Retrying individually.' % (len(rows), tableName, e))
+                for valueDict, keyDict, ticket in rows:
+                    try:
+                        myDB.upsert(tableName, valueDict, keyDict)
+                    except Exception as e:
+                        logger.error('[DB-WRITER] Unable to write to %s [%s]: %s' % (tableName, keyDict, e))
+                        ticket.set(e)
+                    else:
+                        ticket.set()
             else:
-                time.sleep(1)
-                #logger.fdebug('[' + str(thisthread) + '] sleeping until active.')
+                for valueDict, keyDict, ticket in rows:
+                    ticket.set()
+            logger.fdebug('[DB-WRITER] Committed %s upserts to %s' % (len(rows), tableName))
+
+class WriteBatch(object):
+    #queue upserts through the write-behind service and, on exit, wait until all of them are durable.
+    #  with db.WriteBatch() as batch:
+    #      batch.upsert("issues", newValueDict, controlValueDict)
+
+    def __init__(self, timeout=WRITE_WAIT_TIMEOUT):
+        self.timeout = timeout
+        self.tickets = []
+        self.writer = WriteOnly.instance()
+
+    def upsert(self, tableName, valueDict, keyDict):
+        ticket = self.writer.put(tableName, valueDict, keyDict)
+        self.tickets.append(ticket)
+        return ticket
+
+    def wait(self):
+        #True once everything queued is written. The first failed write is raised, and WriteTimeout if they
+        #aren't all written within the timeout (None waits for as long as it takes).
+        if not self.tickets:
+            return True
+        self.writer.flush()
+        deadline = time.time() + self.timeout if self.timeout is not None else None
+        error = None
+        for ticket in self.tickets:
+            try:
+                while not ticket.wait(1):
+                    if not self.writer.thread.is_alive():
+                        #stopped or died with writes still queued - start another to take them over.
+                        self.writer = WriteOnly.instance()
+                        self.writer.flush()
+                    if deadline is not None and time.time() > deadline:
+                        pending = sum(1 for t in self.tickets if not t.done())
+                        self.tickets = []
+                        logger.error('[DB-WRITER] Timed out after %ss waiting for %s queued writes to complete.' % (self.timeout, pending))
+                        raise WriteTimeout('%s queued writes not completed after %ss' % (pending, self.timeout))
+            except WriteTimeout:
+                raise
+            except Exception as e:
+                if error is None:
+                    error = e
+        self.tickets = []
+        if error is not None:
+            raise error
+        return True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is None:
+            self.wait()
+        else:
+            #still let what was queued land, but don't mask the original exception.
+            try:
+                self.wait()
+            except Exception:
+                pass
+        return False
 
 class DBConnection:
 
     def __init__(self, filename="mylar.db"):
 
         self.filename = filename
-        self.connection = sqlite3.connect(dbFilename(filename), timeout=20)
-        self.connection.row_factory = sqlite3.Row
+        self.connection = get_connection(filename)
         self.queue = mylarQueue
 
     def fetch(self, query, args=None):
 
-        with db_lock:
-
-            if query == None:
-                return
-
-            sqlResult = None
-            attempt = 0
-
-            while attempt < 5:
-                try:
-                    if args == None:
-                        #logger.fdebug("[FETCH] : " + query)
-                        cursor = self.connection.cursor()
-                        sqlResult = cursor.execute(query)
-                    else:
-                        #logger.fdebug("[FETCH] : " + query + " with args " + str(args))
-                        cursor = self.connection.cursor()
-                        sqlResult = cursor.execute(query, args)
-                    # get out of the connection attempt loop since we were successful
-                    break
-                except sqlite3.OperationalError as e:
-                    if any(['unable to open database file' in e.args[0], 'database is locked' in e.args[0]]):
-                        logger.warn('Database Error: %s' % e)
-                        attempt += 1
-                        time.sleep(1)
-                    else:
-                        logger.warn('DB error: %s' % e)
-                        raise
-                except sqlite3.DatabaseError as e:
-                    logger.error('Fatal error executing query: %s' % e)
+        #reads don't take the writer lock - WAL gives each connection a consistent snapshot.
+        if query == None:
+            return
+
+        sqlResult = None
+        attempt = 0
+
+        while attempt < 5:
+            try:
+                if args == None:
+                    #logger.fdebug("[FETCH] : " + query)
+                    cursor = self.connection.cursor()
+                    sqlResult = cursor.execute(query)
+                else:
+                    #logger.fdebug("[FETCH] : " + query + " with args " + str(args))
+                    cursor = self.connection.cursor()
+                    sqlResult = cursor.execute(query, args)
+                # get out of the connection attempt loop since we were successful
+                break
+            except sqlite3.OperationalError as e:
+                if any(['unable to open database file' in e.args[0], 'database is locked' in e.args[0]]):
+                    logger.warn('Database Error: %s' % e)
+                    attempt += 1
+                    time.sleep(1)
+                else:
+                    logger.warn('DB error: %s' % e)
                     raise
+            except sqlite3.DatabaseError as e:
+                logger.error('Fatal error executing query: %s' % e)
+                raise
 
-            return sqlResult
+        return sqlResult
 
 
 
     def action(self, query, args=None, executemany=False):
 
-        with db_lock:
+        with write_lock():
             if query == None:
                 return
 
@@ -140,9 +391,20 @@ class DBConnection:
                         time.sleep(1)
                     else:
                         logger.error('Database error executing %s :: %s' % (query, e))
+                        self._rollback()
                         raise
+                except sqlite3.DatabaseError:
+                    self._rollback()
+                    raise
             return sqlResult
 
+    def _rollback(self):
+        #the connection is pooled, so never leave a failed write's transaction open on it.
+        try:
+            self.connection.rollback()
+        except sqlite3.Error:
+            pass
+
     def select(self, query, args=None):
 
         sqlResults = self.fetch(query, args).fetchall()
@@ -164,19 +426,21 @@ class DBConnection:
     def upsert(self, tableName, valueDict, keyDict):
         thisthread = threading.currentThread().name
 
-        changesBefore = self.connection.total_changes
-
         genParams = lambda myDict: [x + " = ?" for x in list(myDict.keys())]
 
         query = "UPDATE " + tableName + " SET " + ", ".join(genParams(valueDict)) + " WHERE " + " AND ".join(genParams(keyDict))
 
-        self.action(query, list(valueDict.values()) + list(keyDict.values()))
+        #hold the writer lock across both statements so another thread can't slip an insert in between.
+        with write_lock():
+            changesBefore = self.connection.total_changes
 
-        if self.connection.total_changes == changesBefore:
-            query = "INSERT INTO " +tableName +" (" + ", ".join(list(valueDict.keys()) + list(keyDict.keys())) + ")" + \
-                        " VALUES (" + ", ".join(["?"] * len(list(valueDict.keys()) + list(keyDict.keys()))) + ")"
             self.action(query, list(valueDict.values()) + list(keyDict.values()))
 
+            if self.connection.total_changes == changesBefore:
+                query = "INSERT INTO " +tableName +" (" + ", ".join(list(valueDict.keys()) + list(keyDict.keys())) + ")" + \
+                            " VALUES (" + ", ".join(["?"] * len(list(valueDict.keys()) + list(keyDict.keys()))) + ")"
+                self.action(query, list(valueDict.values()) + list(keyDict.values()))
+
 
         #else:
         #    logger.info('[' + str(thisthread) + '] db is currently locked for writing. Queuing this action until it is free')
@@ -185,3 +449,24 @@ class DBConnection:
         #    #assuming this is coming in from a seperate thread, so loop it until it's free to write.
         #    #self.queuesend()
 
+    def upsert_many(self, tableName, rows):
+        #upsert a list of (valueDict, keyDict) pairs against one table inside a single transaction.
+        if not rows:
+            return
+
+        genParams = lambda myDict: [x + " = ?" for x in list(myDict.keys())]
+
+        with write_lock():
+            try:
+                for valueDict, keyDict in rows:
+                    changesBefore = self.connection.total_changes
+                    query = "UPDATE " + tableName + " SET " + ", ".join(genParams(valueDict)) + " WHERE " + " AND ".join(genParams(keyDict))
+                    self.connection.execute(query, list(valueDict.values()) + list(keyDict.values()))
+                    if self.connection.total_changes == changesBefore:
+                        query = "INSERT INTO " +tableName +" (" + ", ".join(list(valueDict.keys()) + list(keyDict.keys())) + ")" + \
+                                    " VALUES (" + ", ".join(["?"] * len(list(valueDict.keys()) + list(keyDict.keys()))) + ")"
+                        self.connection.execute(query, list(valueDict.values()) + list(keyDict.values()))
+                self.connection.commit()
+            except Exception:
+                self._rollback()
+                raise
@@ -0,0 +1,212 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the
+#  implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public
+#  License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+# Transfer side of the DDL queue (getcomics.GC.downloadit / helpers.ddl_downloader).
+# Files are written in 1MB chunks, and anything big enough on a server that takes Range requests is split
+# into DDL_SEGMENTS parts that are fetched side by side. Each part is kept in its own <file>.partN until
+# the download completes, so a resumed download only fetches whatever each part is still missing.
+# Live progress / throughput for every running download is kept here for the DDL queue page.
+
+import os
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import mylar
+from mylar import logger
+
+CHUNK_SIZE = 1024 * 1024
+
+#smaller files aren't worth splitting.
+SEGMENT_MIN = 16 * 1024 * 1024
+
+_transfers = {}
+_transfers_lock = threading.Lock()
+
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+
+def workers():
+    if mylar.CONFIG.DDL_WORKERS is None or mylar.CONFIG.DDL_WORKERS < 1:
+        return 1
+    return mylar.CONFIG.DDL_WORKERS
+
+def segments():
+    if mylar.CONFIG.DDL_SEGMENTS is None or mylar.CONFIG.DDL_SEGMENTS < 1:
+        return 1
+    return mylar.CONFIG.DDL_SEGMENTS
+
+def host_limit():
+    if mylar.CONFIG.DDL_HOST_LIMIT is None or mylar.CONFIG.DDL_HOST_LIMIT < 1:
+        return 1
+    return mylar.CONFIG.DDL_HOST_LIMIT
+
+def host_slot(url):
+    #caps how many downloads run against one host at a time, whatever DDL_WORKERS is set to.
+    host = urlsplit(url).netloc.lower()
+    with _host_slots_lock:
+        if host not in _host_slots:
+            _host_slots[host] = threading.BoundedSemaphore(host_limit())
+        return _host_slots[host]
+
+def reset():
+    #new host caps are picked up once the current downloads are done.
+    with _host_slots_lock:
+        _host_slots.clear()
+
+def total_size(response):
+    #the size of the whole file - for a ranged (206) response Content-Length is only what's left of it.
+    crange = response.headers.get('Content-Range')
+    if crange is not None:
+        m = re.match(r'bytes\s+\d+-\d+/(\d+)', crange)
+        if m:
+            return int(m.group(1))
+    return int(response.headers['Content-length'])
+
+def can_segment(response, total):
+    if segments() < 2 or total is None or total < SEGMENT_MIN:
+        return False
+    return response.status_code == 206 or response.headers.get('Accept-Ranges', '').lower() == 'bytes'
+
+def part_paths(path):
+    #an interrupted download keeps the split it was started with, even if DDL_SEGMENTS has changed since.
+    count = 0
+    while os.path.exists('%s.part%s' % (path, count)):
+        count += 1
+    if count == 0:
+        count = segments()
+    return ['%s.part%s' % (path, i) for i in range(count)]
+
+def has_parts(path):
+    return os.path.exists('%s.part0' % path)
+
+def remove_parts(path):
+    for part in part_paths(path):
+        if os.path.exists(part):
+            os.remove(part)
+
+
+class RangeRefused(IOError):
+    pass
+
+
+class Transfer(object):
+
+    def __init__(self, id, filename, total, received=0):
+        self.id = id
+        self.filename = filename
+        self.total = total
+        self.received = received
+        self.resumed = received
+        self.segments = 1
+        self.started = time.time()
+        self.lock = threading.Lock()
+
+    def add(self, size):
+        with self.lock:
+            self.received += size
+
+    def status(self):
+        elapsed = time.time() - self.started
+        rate = (self.received - self.resumed) / elapsed if elapsed > 0 else 0
+        if self.total:
+            percent = min(int(self.received * 100 / self.total), 100)
+        else:
+            percent = 0
+        return {'id':       self.id,
+                'filename': self.filename,
+                'received': self.received,
+                'total':    self.total,
+                'percent':  percent,
+                'rate':     int(rate),
+                'segments': self.segments,
+                'eta':      int((self.total - self.received) / rate) if all([rate > 0, self.total]) else None}
+
+
+def start(id, filename, total, received=0):
+    transfer = Transfer(id, filename, total, received)
+    with _transfers_lock:
+        _transfers[id] = transfer
+    return transfer
+
+def finish(id):
+    with _transfers_lock:
+        _transfers.pop(id, None)
+
+def active():
+    with _transfers_lock:
+        return [t.status() for t in _transfers.values()]
+
+def human_rate(rate):
+    for unit in ('B', 'KB', 'MB'):
+        if rate < 1024:
+            return '%.1f %s/s' % (rate, unit)
+        rate /= 1024.0
+    return '%.1f GB/s' % rate
+
+def stream(response, path, transfer, append=False):
+    with open(path, 'ab' if append else 'wb') as f:
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            if chunk:
+                f.write(chunk)
+                transfer.add(len(chunk))
+
+def segmented(session, url, path, total, transfer, **kwargs):
+    #fetch total bytes of url as segments() ranged requests into path. kwargs are passed on to session.get.
+    parts = part_paths(path)
+    size = -(-total // len(parts))
+    ranges = [(i * size, min(total, (i + 1) * size) - 1) for i in range(len(parts))]
+    transfer.segments = len(parts)
+    have = 0
+    for part in parts:
+        if os.path.exists(part):
+            have += os.path.getsize(part)
+        else:
+            open(part, 'wb').close()
+    if have:
+        logger.info('[DDL-RESUME] Resuming segmented download of %s from %s bytes' % (os.path.basename(path), have))
+    transfer.received = transfer.resumed = have
+
+    def fetch(i):
+        first, last = ranges[i]
+        expected = last - first + 1
+        done = os.path.getsize(parts[i]) if os.path.exists(parts[i]) else 0
+        if done >= expected:
+            return
+        headers = dict(kwargs.get('headers') or {})
+        headers['Range'] = 'bytes=%d-%d' % (first + done, last)
+        r = session.get(url, headers=headers, stream=True, timeout=30, cookies=kwargs.get('cookies'), verify=True)
+        try:
+            if r.status_code != 206:
+                raise RangeRefused('Range request for segment %s was refused [%s]' % (i, r.status_code))
+            stream(r, parts[i], transfer, append=True)
+        finally:
+            r.close()
+        if os.path.getsize(parts[i]) != expected:
+            raise IOError('Segment %s is incomplete - %s of %s bytes' % (i, os.path.getsize(parts[i]), expected))
+
+    with ThreadPoolExecutor(max_workers=len(parts), thread_name_prefix='DDL-SEGMENT') as pool:
+        #list() so the first failed segment is raised here.
+        list(pool.map(fetch, range(len(parts))))
+
+    with open(path, 'wb') as out:
+        for part in parts:
+            with open(part, 'rb') as f:
+                shutil.copyfileobj(f, out, CHUNK_SIZE)
+    for part in parts:
+        os.remove(part)
@@ -31,9 +31,166 @@ import datetime as dt
 import subprocess
 from subprocess import CalledProcessError, check_output
 
+import json
+import hashlib
+import threading
+import functools
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
 import mylar
 from mylar import logger, helpers
 
+#parse results per directory, keyed on the directory + the name/size/mtime of every comic in it and
+#whatever the parse depends on (series being matched, alternate names...). An unchanged folder skips parseit.
+DIRCACHE_SIZE = 5000
+_dircache = OrderedDict()
+_dircache_lock = threading.Lock()
+
+#below this many files to parse a pool costs more than it saves.
+PARSE_POOL_MIN = 200
+
+#the patterns used on every file / every word of a filename, compiled once instead of going through re's
+#pattern cache on each call (utilities/parse_benchmark.py shows the difference). Plain literal swaps (the
+#c11/f11/g11/h11 placeholders, spaces, pipes) use str.replace instead.
+RE_UNICODE_DASH = re.compile(r'[\u2014|\u2013|\u2e3a|\u2e3b]')
+RE_UNICODE_QUOTE = re.compile(r'\u2019')
+RE_NOT_PARENS = re.compile('[^()]+')
+RE_PARENS = re.compile('[\(\)]')
+RE_PARENS_COMMA = re.compile('[\(\)\,]')
+RE_SLASH_PARENS = re.compile('[/(/)]')
+RE_GROUPING = re.compile('''\( [^\)]* \) |\[ [^\]]* \] |\[ [^\#]* \]|\S+''', re.VERBOSE)
+RE_SPLIT_FILE = re.compile('(?imu)\([\w\s-]+\)|[-+]?\d*\.\d+|\d+[\s]COVERS+|\d+[(\s|\-)]PAGE+|\d{4}-\d{2}-\d{2}|\d+[(th|nd|rd|st)]+|[\(^\)+]|\[.*?\]|\d+|[\w-]+|#?\d\.\d+|#[\.-]\w+|#[\d*\.\d+|\w+\d+]+|#(?<![\w\d])XCV(?![\w\d])+|#[\w+]|\)', re.UNICODE)
+RE_SPLIT_FILE_NODASH = re.compile('(?imu)\([\w\s-]+\)|[-+]?\d*\.\d+|\d+|[\w-]+|#?\d\.\d+|#(?<![\w\d])XCV(?![\w\d])+|\)', re.UNICODE)
+RE_OF_COUNT = re.compile('(?<=\sof\s)\d+(?=\s)', re.IGNORECASE)
+RE_OF_COUNT_PARENS = re.compile('(?<=\(of\s)\d+(?=\))', re.IGNORECASE)
+RE_COVERS = re.compile('(\d+[\s])covers', re.IGNORECASE)
+RE_NON_DIGIT = re.compile('[^0-9]')
+RE_TPB = re.compile('tpb', re.I)
+RE_ANNUAL = re.compile('annual', re.I)
+RE_SPECIAL = re.compile('special', re.I)
+RE_PIPE_SPACE = re.compile('[\|\s]')
+RE_DYNAMIC_SEP = re.compile('[\s\s+\_\.]')
+RE_MULTI_PIPE = re.compile('\|+')
+RE_PERCENT_DOLLAR = re.compile('[\%\$]+')
+
+DATE_FORMATS = ('%Y','%Y-', '%b %d, %Y','%B %d, %Y','%B %d %Y','%m/%d/%Y','%m/%d/%y','(%m/%d/%Y)','%b %Y','%B%Y','%b %d,%Y','%m-%Y','%B %Y','%Y-%m-%d','%Y-%m','%Y%m','%Y-%m-00')
+
+@functools.lru_cache(maxsize=4096)
+def _strptime(txt):
+    #first of DATE_FORMATS that txt parses as - (fmt, datetime) or None. Every word that looks like it could be
+    #a year goes through here, and a miss means raising/catching a ValueError for each of the formats.
+    if not any(c.isdigit() for c in txt):
+        return None
+    for fmt in DATE_FORMATS:
+        try:
+            return (fmt, dt.datetime.strptime(txt, fmt))
+        except ValueError:
+            pass
+    return None
+
+def _dircache_get(key):
+    with _dircache_lock:
+        results = _dircache.get(key)
+        if results is not None:
+            _dircache.move_to_end(key)
+        return results
+
+def _dircache_put(key, results):
+    with _dircache_lock:
+        _dircache[key] = results
+        _dircache.move_to_end(key)
+        while len(_dircache) > DIRCACHE_SIZE:
+            _dircache.popitem(last=False)
+
+#parse results per filename (see FileChecker.parse_key) - an LRU in memory backed by the parsecache table.
+#bump PARSER_VERSION whenever parseit / matchIT change what they return so remembered results are dropped.
+PARSER_VERSION = 1
+PARSE_MEMO_SIZE = 20000
+_parsememo = OrderedDict()
+_parsememo_lock = threading.Lock()
+_parse_stats = {'hits': 0, 'disk_hits': 0, 'misses': 0}
+_parsememo_disk = True
+
+def parse_memo_get(key):
+    with _parsememo_lock:
+        runresults = _parsememo.get(key)
+        if runresults is not None:
+            _parsememo.move_to_end(key)
+            _parse_stats['hits'] += 1
+            return runresults
+    if _parsememo_disk is True:
+        try:
+            from mylar import db
+            row = db.DBConnection().selectone('SELECT Result FROM parsecache WHERE ParseKey=? AND Version=?', [key, PARSER_VERSION]).fetchone()
+        except Exception as e:
+            logger.fdebug('[FILECHECKER] Unable to read the parse cache: %s' % e)
+            row = None
+        if row is not None:
+            runresults = json.loads(row['Result'])
+            with _parsememo_lock:
+                _parse_stats['disk_hits'] += 1
+                _parsememo_store(key, runresults)
+            return runresults
+    with _parsememo_lock:
+        _parse_stats['misses'] += 1
+    return None
+
+def parse_memo_put(key, runresults):
+    if runresults is None:
+        return
+    with _parsememo_lock:
+        _parsememo_store(key, dict(runresults))
+    if _parsememo_disk is True:
+        try:
+            from mylar import db
+            db.WriteOnly.instance().put('parsecache', {'Version':    PARSER_VERSION,
+                                                       'Result':     json.dumps(runresults),
+                                                       'DateAdded':  helpers.now()},
+                                                      {'ParseKey':   key})
+        except Exception as e:
+            logger.fdebug('[FILECHECKER] Unable to write to the parse cache: %s' % e)
+
+def _parsememo_store(key, runresults):
+    _parsememo[key] = runresults
+    _parsememo.move_to_end(key)
+    while len(_parsememo) > PARSE_MEMO_SIZE:
+        _parsememo.popitem(last=False)
+
+def parse_stats():
+    with _parsememo_lock:
+        stats = dict(_parse_stats)
+        stats['size'] = len(_parsememo)
+    total = stats['hits'] + stats['disk_hits'] + stats['misses']
+    if total > 0:
+        stats['hitrate'] = round(float(stats['hits'] + stats['disk_hits']) / total * 100, 1)
+    else:
+        stats['hitrate'] = 0.0
+    return stats
+
+_pool_checker = None
+
+def _parse_pool_init(checker):
+    global _pool_checker, _parsememo_disk
+    _pool_checker = checker
+    #forked workers mustn't touch the parent's sqlite connections - the parent memoizes what they hand back.
+    _parsememo_disk = False
+
+def _parse_pool_worker(job):
+    filename, filedir = job
+    return _pool_checker.parse_filename(_pool_checker.dir, filename, filedir)
+
+def scan_workers():
+    #SCAN_WORKERS: 1 (the default) = parse serially, 0 = one process per core. The pool is opt-in: it relies on
+    #fork so the workers inherit the loaded config, and forking the threaded server can leave a child stuck on a
+    #lock another thread held at the time - platforms without fork always parse serially.
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return 1
+    if mylar.CONFIG.SCAN_WORKERS is None or mylar.CONFIG.SCAN_WORKERS < 1:
+        return os.cpu_count() or 1
+    return mylar.CONFIG.SCAN_WORKERS
+
 class FileChecker(object):
 
     def __init__(self, dir=None, watchcomic=None, Publisher=None, AlternateSearch=None, manual=None, sarc=None, justparse=None, file=None, pp_mode=False):
@@ -46,10 +203,10 @@ class FileChecker(object):
         if watchcomic:
             #watchcomic = unicode name of series that is being searched against
             self.og_watchcomic = watchcomic
-            self.watchcomic = re.sub('\?', '', watchcomic).strip()  #strip the ? seperate since it affects the regex.
+            self.watchcomic = watchcomic.replace('?', '').strip()  #strip the ? seperate since it affects the regex.
             #replace variations of unicode dashes with a normal - because this world is f'd up enough to have something like that.
-            self.watchcomic = re.sub(r'[\u2014|\u2013|\u2e3a|\u2e3b]', ' - ', self.watchcomic).strip()
-            self.watchcomic = re.sub(r'\u2019', " ' ", self.watchcomic).strip()  #replace the \u2019 with a normal ' because again, people are dumb.
+            self.watchcomic = RE_UNICODE_DASH.sub(' - ', self.watchcomic).strip()
+            self.watchcomic = RE_UNICODE_QUOTE.sub(" ' ", self.watchcomic).strip()  #replace the \u2019 with a normal ' because again, people are dumb.
             if type(self.watchcomic) != str:
                 self.watchcomic = unicodedata.normalize('NFKD', self.watchcomic).encode('ASCII', 'ignore')
         else:
@@ -134,19 +291,9 @@ class FileChecker(object):
                     }
         else:
             filelist = self.traverse_directories(self.dir)
+            parsed = self.parse_filelist(filelist)
 
-            for files in filelist:
-                filedir = files['directory']
-                filename = files['filename']
-                filesize = files['comicsize']
-                if filename.startswith('.'):
-                    if all([self.watchcomic is not None, self.watchcomic.startswith('.')]):
-                        pass
-                    else:
-                        continue
-
-                logger.debug('[FILENAME]: %s' % filename)
-                runresults = self.parseit(self.dir, filename, filedir)
+            for files, runresults in zip(filelist, parsed):
                 if runresults:
                     try:
                         if runresults['parse_status']:
@@ -218,14 +365,92 @@ class FileChecker(object):
 
         return watchmatch
 
-    def parseit(self, path, filename, subpath=None):
+    def parse_context(self):
+        #everything besides the filename that changes what parseit returns.
+        return (self.og_watchcomic if self.watchcomic is not None else None, self.publisher, repr(self.AlternateSearch),
+                repr(self.manual), self.sarc, self.justparse, mylar.CONFIG.ANNUALS_ON, mylar.CONFIG.READ2FILENAME)
+
+    def cache_signature(self):
+        return (self.dir,) + self.parse_context()
+
+    def parse_key(self, filename):
+        return hashlib.sha1(repr((PARSER_VERSION, filename) + self.parse_context()).encode('utf-8')).hexdigest()
+
+    def parse_filelist(self, filelist):
+        #returns the parseit() result for each entry of filelist (same order), reusing the cached results for
+        #any directory whose contents haven't changed since the last scan and fanning the rest out to a
+        #process pool when there are enough of them.
+        results = [None] * len(filelist)
+        directories = OrderedDict()
+        for idx, files in enumerate(filelist):
+            if files['filename'].startswith('.') and not (self.watchcomic is not None and self.watchcomic.startswith('.')):
+                continue
+            directories.setdefault(files['directory'], []).append(idx)
+
+        #post-processing folders are transient and filtered against the snatched crc's, so never cache those.
+        usecache = self.pp_mode is False
+        signature = self.cache_signature()
+        jobs = []
+        for direc, idxs in directories.items():
+            if usecache:
+                key = (signature, direc, tuple((filelist[i]['filename'], filelist[i]['comicsize'], filelist[i]['mtime']) for i in idxs))
+                cached = _dircache_get(key)
+                if cached is not None:
+                    for i, runresults in zip(idxs, cached):
+                        results[i] = runresults
+                    continue
+            jobs.extend(idxs)
+
+        #anything parsed before under the same name (wherever it was) only needs relocating.
+        parsejobs = []
+        for i in jobs:
+            runresults = parse_memo_get(self.parse_key(filelist[i]['filename']))
+            if runresults is not None:
+                results[i] = self.relocate(runresults, self.dir, filelist[i]['directory'])
+            else:
+                parsejobs.append(i)
 
+        if len(parsejobs) > 0:
+            workers = scan_workers()
+            parsed = None
+            if all([workers > 1, len(parsejobs) >= PARSE_POOL_MIN]):
+                logger.fdebug('[FILECHECKER] Parsing %s files across %s processes' % (len(parsejobs), workers))
+                try:
+                    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'),
+                                             initializer=_parse_pool_init, initargs=(self,)) as executor:
+                        parsed = list(executor.map(_parse_pool_worker, [(filelist[i]['filename'], filelist[i]['directory']) for i in parsejobs],
+                                                   chunksize=max(1, len(parsejobs) // (workers * 4))))
+                except Exception as e:
+                    logger.warn('[FILECHECKER] Unable to parse in parallel (%s) - falling back to a serial parse.' % e)
+                    parsed = None
+            if parsed is None:
+                parsed = []
+                for i in parsejobs:
+                    logger.debug('[FILENAME]: %s' % filelist[i]['filename'])
+                    parsed.append(self.parse_filename(self.dir, filelist[i]['filename'], filelist[i]['directory']))
+            for i, runresults in zip(parsejobs, parsed):
+                results[i] = runresults
+                parse_memo_put(self.parse_key(filelist[i]['filename']), runresults)
+
+        if usecache and len(jobs) > 0:
+            jobset = set(jobs)
+            for direc, idxs in directories.items():
+                if idxs[0] in jobset:
+                    key = (signature, direc, tuple((filelist[i]['filename'], filelist[i]['comicsize'], filelist[i]['mtime']) for i in idxs))
+                    _dircache_put(key, [results[i] for i in idxs])
+
+        return results
+
+    def relocate(self, runresults, path, subpath=None):
+        #a remembered parse with sub / comiclocation pointed at where this copy of the file sits.
+        runresults = dict(runresults)
+        runresults['sub'] = self.sub_path(path, subpath)
+        runresults['comiclocation'] = self.dir
+        return runresults
+
+    def sub_path(self, path, subpath=None):
         path_list = None
-        if subpath is None:
-            subpath = path
-            tmppath = None
-            path_list = None
-        else:
+        if subpath is not None:
             logger.fdebug('[CORRECTION] Sub-directory found. Altering path configuration.')
             #basepath the sub if it exists to get the parent folder.
             logger.fdebug('[SUB-PATH] Checking Folder Name for more information.')
@@ -245,7 +470,22 @@ class FileChecker(object):
                 #need to remove any leading slashes so the os join can properly join the components
                 path_list = path_list[1:]
             logger.fdebug('[SUB-PATH] subpath set to : %s' % path_list)
+        return path_list
 
+    def parseit(self, path, filename, subpath=None):
+        #memoized on the filename + parse_context(). Where the file sits only changes sub / comiclocation,
+        #so a remembered result just gets those filled back in.
+        key = self.parse_key(filename)
+        runresults = parse_memo_get(key)
+        if runresults is not None:
+            return self.relocate(runresults, path, subpath)
+        runresults = self.parse_filename(path, filename, subpath)
+        parse_memo_put(key, runresults)
+        return runresults
+
+    def parse_filename(self, path, filename, subpath=None):
+
+        path_list = self.sub_path(path, subpath)
 
         #parse out the extension for type
         comic_ext = ('.cbr','.cbz','.cb7','.pdf')
@@ -278,7 +518,7 @@ class FileChecker(object):
             modspacer = '.'
         else:
             modspacer = ' '
-        m = re.findall('[^()]+', modfilename)
+        m = RE_NOT_PARENS.findall(modfilename)
         cnt = 1
         #2019-12-24----fixed to accomodate naming convention like Amazing Mary Jane (2019) 002.cbr, and to account for brackets properly
         try:
@@ -301,7 +541,7 @@ class FileChecker(object):
         if rippers:
             #it's always possible that this could grab something else since tags aren't unique. Try and figure it out.
             if len(rippers) > 0:
-                m = re.findall('[^()]+', modfilename)
+                m = RE_NOT_PARENS.findall(modfilename)
                 #--2019-11-30  needed for Glorith naming conventions when it's an nzb name with all formatting removed.
                 if len(m) == 1:
                     spf30 = re.compile(r"[^.]+", re.UNICODE)
@@ -325,7 +565,7 @@ class FileChecker(object):
                         if m[cnt] == ' ':
                             pass
                         elif rp.lower() in m[cnt].lower():
-                            scangroup = re.sub('[\(\)]', '', m[cnt]).strip()
+                            scangroup = RE_PARENS.sub('', m[cnt]).strip()
                             logger.fdebug('Scanner group tag discovered: %s' % scangroup)
                             modfilename = modfilename.replace(m[cnt],'').strip()
                             break
@@ -373,7 +613,7 @@ class FileChecker(object):
 
         ret_sf2 = ' '.join(split_file3)
 
-        sf = re.findall('''\( [^\)]* \) |\[ [^\]]* \] |\[ [^\#]* \]|\S+''', ret_sf2, re.VERBOSE)
+        sf = RE_GROUPING.findall(ret_sf2)
         #sf = re.findall('''\( [^\)]* \) |\[ [^\]]* \] |\S+''', ret_sf2, re.VERBOSE)
 
         ret_sf1 = ' '.join(sf)
@@ -383,15 +623,15 @@ class FileChecker(object):
         #c11 = '\+'
         #f11 = '\&'
         #g11 = '\''
-        ret_sf1 = re.sub('\+', 'c11', ret_sf1).strip()
-        ret_sf1 = re.sub('\&', 'f11', ret_sf1).strip()
-        ret_sf1 = re.sub('\'', 'g11', ret_sf1).strip()
-        ret_sf1 = re.sub('\@', 'h11', ret_sf1).strip()
+        ret_sf1 = ret_sf1.replace('+', 'c11').strip()
+        ret_sf1 = ret_sf1.replace('&', 'f11').strip()
+        ret_sf1 = ret_sf1.replace('\'', 'g11').strip()
+        ret_sf1 = ret_sf1.replace('@', 'h11').strip()
 
         #split_file = re.findall('(?imu)\([\w\s-]+\)|[-+]?\d*\.\d+|\d+[\s]COVERS+|\d{4}-\d{2}-\d{2}|\d+[(th|nd|rd|st)]+|[\(^\)+]|\d+|[\w-]+|#?\d\.\d+|#[\.-]\w+|#[\d*\.\d+|\w+\d+]+|#(?<![\w\d])XCV(?![\w\d])+|#[\w+]|\)', ret_sf1, re.UNICODE)
 
         #updated to keep words within square brackets together.
-        split_file = re.findall('(?imu)\([\w\s-]+\)|[-+]?\d*\.\d+|\d+[\s]COVERS+|\d+[(\s|\-)]PAGE+|\d{4}-\d{2}-\d{2}|\d+[(th|nd|rd|st)]+|[\(^\)+]|\[.*?\]|\d+|[\w-]+|#?\d\.\d+|#[\.-]\w+|#[\d*\.\d+|\w+\d+]+|#(?<![\w\d])XCV(?![\w\d])+|#[\w+]|\)', ret_sf1, re.UNICODE)
+        split_file = RE_SPLIT_FILE.findall(ret_sf1)
 
         #10-20-2018 ---START -- attempt to detect '01 (of 7.3)'
         #10-20-2018          -- attempt to detect '36p ctc' as one element
@@ -448,8 +688,8 @@ class FileChecker(object):
 
         if len(split_file) == 1:
             logger.fdebug('Improperly formatted filename - there is no seperation using appropriate characters between wording.')
-            ret_sf1 = re.sub('\-',' ', ret_sf1).strip()
-            split_file = re.findall('(?imu)\([\w\s-]+\)|[-+]?\d*\.\d+|\d+|[\w-]+|#?\d\.\d+|#(?<![\w\d])XCV(?![\w\d])+|\)', ret_sf1, re.UNICODE)
+            ret_sf1 = ret_sf1.replace('-', ' ').strip()
+            split_file = RE_SPLIT_FILE_NODASH.findall(ret_sf1)
 
 
         possible_issuenumbers = []
@@ -470,7 +710,7 @@ class FileChecker(object):
             current_pos +=1
             #the series title will always be first and be AT LEAST one word.
             if split_file.index(sf) >= 0 and not volumeprior:
-                dtcheck = re.sub('[\(\)\,]', '', sf).strip()
+                dtcheck = RE_PARENS_COMMA.sub('', sf).strip()
                 #if there's more than one date, assume the right-most date is the actual issue date.
                 if any(['19' in dtcheck, '20' in dtcheck]) and not any([dtcheck.lower().startswith('v19'), dtcheck.lower().startswith('v20')]) and len(dtcheck) >=4:
                     logger.fdebug('checking date : %s' % dtcheck)
@@ -487,7 +727,7 @@ class FileChecker(object):
                                           'mod_position': self.char_file_position(modfilename, sf, lastmod_position)})
 
             #this handles the exceptions list in the match for alpha-numerics
-            if re.sub('g11', "\'", sf.lower()) == "director's":
+            if sf.lower().replace('g11', "'") == "director's":
                 try:
                     tmp_test = split_file.index(sf)+1
                 except Exeption as e:
@@ -502,7 +742,7 @@ class FileChecker(object):
             else:
                 test_exception = ''.join([i for i in sf if not i.isdigit()])
 
-            if any(ext == test_exception.upper() for ext in mylar.ISSUE_EXCEPTIONS):
+            if test_exception.upper() in mylar.ISSUE_EXCEPTIONS:
                 logger.fdebug('Exception match: %s' % test_exception)
                 if lastissue_label is not None:
                     if lastissue_position == (split_file.index(sf) -1):
@@ -556,14 +796,14 @@ class FileChecker(object):
             count = None
             found = False
 
-            match = re.search('(?<=\sof\s)\d+(?=\s)', sf, re.IGNORECASE)
+            match = RE_OF_COUNT.search(sf)
             if match:
                 logger.fdebug('match')
                 count = match.group()
                 found = True
 
             if found is False:
-                match = re.search('(?<=\(of\s)\d+(?=\))', sf,  re.IGNORECASE)
+                match = RE_OF_COUNT_PARENS.search(sf)
                 if match:
                     count = match.group()
                     found = True
@@ -577,9 +817,9 @@ class FileChecker(object):
                 logger.fdebug('Issue Number SHOULD BE: %s' % lastissue_label)
                 validcountchk = True
 
-            match2 = re.search('(\d+[\s])covers', sf, re.IGNORECASE)
+            match2 = RE_COVERS.search(sf)
             if match2:
-                num_covers = re.sub('[^0-9]', '', match2.group()).strip()
+                num_covers = RE_NON_DIGIT.sub('', match2.group()).strip()
                 #logger.fdebug('%s covers detected within filename' % num_covers)
                 continue
 
@@ -670,12 +910,13 @@ class FileChecker(object):
                                               'validcountchk': validcountchk})
 
             #now we try to find the series title &/or volume lablel.
-            if any( [sf.lower().startswith('v'), sf.lower().startswith('vol'), volumeprior == True, 'volume' in sf.lower(), 'vol' in sf.lower(), 'part' in sf.lower()] ) and sf.lower() not in {'one','two','three','four','five','six'}:
+            sf_lower = sf.lower()
+            if any( [sf_lower.startswith('v'), sf_lower.startswith('vol'), volumeprior == True, 'volume' in sf_lower, 'vol' in sf_lower, 'part' in sf_lower] ) and sf_lower not in {'one','two','three','four','five','six'}:
                 if any([ split_file[split_file.index(sf)].isdigit(), split_file[split_file.index(sf)][3:].isdigit(), split_file[split_file.index(sf)][1:].isdigit() ]):
                     if all(identifier in sf for identifier in ['.', 'v']):
                         volume = sf.split('.')[0]
                     else:
-                        volume = re.sub("[^0-9]", "", sf)
+                        volume = RE_NON_DIGIT.sub('', sf)
                     if volumeprior:
                         try:
                             volume_found['position'] = split_file.index(volumeprior_label, current_pos -1) #if this passes, then we're ok, otherwise will try exception
@@ -710,7 +951,7 @@ class FileChecker(object):
                     logger.fdebug('volume label detected, but vol. number is not adjacent, adjusting scope to include number.')
                 elif 'volume' in sf.lower() or all(['part' in sf.lower(), len(sf) == 4]):
                     if self.watchcomic is not None and 'part' not in self.watchcomic.lower():
-                        volume = re.sub("[^0-9]", "", sf)
+                        volume = RE_NON_DIGIT.sub('', sf)
                         if volume.isdigit():
                             volume_found['volume'] = volume
                             volume_found['position'] = split_file.index(sf)
@@ -792,7 +1033,7 @@ class FileChecker(object):
                         elif sf.lower() == 'of' and lastissue_label is not None and lastissue_position == int(split_file.index(sf))-1:
                             logger.fdebug('MINI-SERIES DETECTED')
                         else:
-                            if any([re.sub('[\(\)]', '', sf.lower()).strip() == 'tpb', re.sub('[\(\)]', '', sf.lower()).strip() == 'digital tpb']):
+                            if RE_PARENS.sub('', sf.lower()).strip() in ('tpb', 'digital tpb'):
                                 logger.fdebug('TRADE PAPERBACK DETECTED. NOT DETECTING ISSUE NUMBER - ASSUMING VOLUME')
                                 booktype = 'TPB'
                                 try:
@@ -900,7 +1141,7 @@ class FileChecker(object):
                 #logger.fdebug('split_file: %s' % split_file[issposs])
                 if '(' and ')' in split_file[issposs]:
                     new_issuenumber = split_file[issposs]
-                possible_issuenumbers.append({'number':        re.sub('[/(/)]', '', split_file[issposs]).strip(),
+                possible_issuenumbers.append({'number':        RE_SLASH_PARENS.sub('', split_file[issposs]).strip(),
                                               'position':      split_file.index(new_issuenumber, yearposition),
                                               'mod_position':  self.char_file_position(modfilename, new_issuenumber, yearmodposition),
                                               'validcountchk': False})
@@ -969,7 +1210,7 @@ class FileChecker(object):
                 if highest_series_pos > possible_issuenumbers[0]['position']: highest_series_pos = possible_issuenumbers[0]['position']
 
         if issue_number:
-            issue_number = re.sub('#', '', issue_number).strip()
+            issue_number = issue_number.replace('#', '').strip()
         else:
             if len(dash_numbers) > 0 and finddash !=-1 :
                 #there are numbers after a dash, which was incorrectly accounted for.
@@ -1187,20 +1428,20 @@ class FileChecker(object):
                     if 'XCV' in alt_issue:
                         alt_issue = re.sub('XCV', x, alt_issue,1)
 
-        series_name = re.sub('c11', '+', series_name)
-        series_name = re.sub('f11', '&', series_name)
-        series_name = re.sub('g11', '\'', series_name)
-        series_name = re.sub('h11', '@', series_name)
+        series_name = series_name.replace('c11', '+')
+        series_name = series_name.replace('f11', '&')
+        series_name = series_name.replace('g11', '\'')
+        series_name = series_name.replace('h11', '@')
         if alt_series is not None:
-            alt_series = re.sub('c11', '+', alt_series)
-            alt_series = re.sub('f11', '&', alt_series)
-            alt_series = re.sub('g11', '\'', alt_series)
-            alt_series = re.sub('h11', '@', alt_series)
+            alt_series = alt_series.replace('c11', '+')
+            alt_series = alt_series.replace('f11', '&')
+            alt_series = alt_series.replace('g11', '\'')
+            alt_series = alt_series.replace('h11', '@')
 
         if series_name.endswith('-'): 
             series_name = series_name[:-1].strip()
         if '\?' in series_name:
-            series_name = re.sub('\?', '', series_name).strip()
+            series_name = series_name.replace('?', '').strip()
 
         logger.fdebug('series title possibly: %s' % series_name)
         if splitvalue is not None:
@@ -1208,13 +1449,13 @@ class FileChecker(object):
             alt_series = '%s %s' % (series_name, splitvalue)
             if booktype != 'issue':
                 if alt_issue is not None:
-                    alt_issue =  re.sub('tpb', '', splitvalue, flags=re.I).strip()
+                    alt_issue =  RE_TPB.sub('', splitvalue).strip()
                 if alt_series is not None:
-                    alt_series = re.sub('tpb', '', alt_series, flags=re.I).strip()
+                    alt_series = RE_TPB.sub('', alt_series).strip()
         if alt_series is not None:
             if booktype != 'issue':
                 if alt_series is not None:
-                    alt_series = re.sub('tpb', '', alt_series, flags=re.I).strip()
+                    alt_series = RE_TPB.sub('', alt_series).strip()
             logger.fdebug('Alternate series / issue title: %s [%s]' % (alt_series, alt_issue))
 
         #if the filename is unicoded, it won't match due to the unicode translation. Keep the unicode as well as the decoded.
@@ -1227,16 +1468,16 @@ class FileChecker(object):
                     issue_number = '%s %s' % (isn, issue_number)
                 else:
                     issue_number = isn
-                series_name = re.sub('annual', '', series_name, flags=re.I).strip()
-                series_name_decoded = re.sub('annual', '', series_name_decoded, flags=re.I).strip()
+                series_name = RE_ANNUAL.sub('', series_name).strip()
+                series_name_decoded = RE_ANNUAL.sub('', series_name_decoded).strip()
             elif 'special' in series_name.lower():
                 isn = 'Special'
                 if issue_number is not None:
                     issue_number = '%s %s' % (isn, issue_number)
                 else:
                     issue_number = isn
-                series_name = re.sub('special', '', series_name, flags=re.I).strip()
-                series_name_decoded = re.sub('special', '', series_name_decoded, flags=re.I).strip()
+                series_name = RE_SPECIAL.sub('', series_name).strip()
+                series_name_decoded = RE_SPECIAL.sub('', series_name_decoded).strip()
 
         if (any([issue_number is None, series_name is None]) and booktype == 'issue'):
 
@@ -1271,7 +1512,7 @@ class FileChecker(object):
 
         if self.justparse:
             return {'parse_status':           'success',
-                    'type':                   re.sub('\.','', filetype).strip(),
+                    'type':                   filetype.replace('.', '').strip(),
                     'sub':                    path_list,
                     'comicfilename':          filename,
                     'comiclocation':          self.dir,
@@ -1290,7 +1531,7 @@ class FileChecker(object):
 
         series_info = {}
         series_info = {'sub':                    path_list,
-                       'type':                   re.sub('\.','', filetype).strip(),
+                       'type':                   filetype.replace('.', '').strip(),
                        'comicfilename':          filename,
                        'comiclocation':          self.dir,
                        'series_name':            series_name,
@@ -1331,14 +1572,14 @@ class FileChecker(object):
         mod_watchname_decoded = mod_watch_decoded['mod_watchcomic']
 
         #remove the spaces...
-        nspace_seriesname = re.sub(' ', '', mod_seriesname)
-        nspace_watchcomic = re.sub(' ', '', mod_watchcomic)
+        nspace_seriesname = mod_seriesname.replace(' ', '')
+        nspace_watchcomic = mod_watchcomic.replace(' ', '')
         nspace_altseriesname = None
         if mod_altseriesname is not None:
-            nspace_altseriesname = re.sub(' ', '', mod_altseriesname)
-            nspace_altseriesname_decoded = re.sub(' ', '', mod_altseriesname_decoded)
-        nspace_seriesname_decoded = re.sub(' ', '', mod_seriesname_decoded)
-        nspace_watchname_decoded = re.sub(' ', '', mod_watchname_decoded)
+            nspace_altseriesname = mod_altseriesname.replace(' ', '')
+            nspace_altseriesname_decoded = mod_altseriesname_decoded.replace(' ', '')
+        nspace_seriesname_decoded = mod_seriesname_decoded.replace(' ', '')
+        nspace_watchname_decoded = mod_watchname_decoded.replace(' ', '')
         try:
             if self.AS_ALT[0] != '127372873872871091383 abdkhjhskjhkjdhakajhf':
                 logger.fdebug('Possible Alternate Names to match against (if necessary): %s' % self.AS_Alt)
@@ -1351,44 +1592,44 @@ class FileChecker(object):
                 justthedigits = 'Annual'
                 if series_info['issue_number'] is not None:
                     justthedigits += ' %s' % series_info['issue_number']
-                nspace_seriesname = re.sub('2021annual', '', nspace_seriesname.lower()).strip()
-                nspace_seriesname = re.sub('annual', '', nspace_seriesname.lower()).strip()
-                nspace_seriesname_decoded = re.sub('2021annual', '', nspace_seriesname_decoded.lower()).strip()
-                nspace_seriesname_decoded = re.sub('annual', '', nspace_seriesname_decoded.lower()).strip()
+                nspace_seriesname = nspace_seriesname.lower().replace('2021annual', '').strip()
+                nspace_seriesname = nspace_seriesname.lower().replace('annual', '').strip()
+                nspace_seriesname_decoded = nspace_seriesname_decoded.lower().replace('2021annual', '').strip()
+                nspace_seriesname_decoded = nspace_seriesname_decoded.lower().replace('annual', '').strip()
             if alt_series is not None and 'annual' in alt_series.lower():
-                nspace_altseriesname = re.sub('2021annual', '', nspace_altseriesname.lower()).strip()
-                nspace_altseriesname = re.sub('annual', '', nspace_altseriesname.lower()).strip()
-                nspace_altseriesname_decoded = re.sub('2021annual', '', nspace_altseriesname_decoded.lower()).strip()
-                nspace_altseriesname_decoded = re.sub('annual', '', nspace_altseriesname_decoded.lower()).strip()
+                nspace_altseriesname = nspace_altseriesname.lower().replace('2021annual', '').strip()
+                nspace_altseriesname = nspace_altseriesname.lower().replace('annual', '').strip()
+                nspace_altseriesname_decoded = nspace_altseriesname_decoded.lower().replace('2021annual', '').strip()
+                nspace_altseriesname_decoded = nspace_altseriesname_decoded.lower().replace('annual', '').strip()
         if mylar.CONFIG.ANNUALS_ON and 'special' not in nspace_watchcomic.lower():
             if 'special' in series_name.lower():
                 justthedigits = 'Special'
                 if series_info['issue_number'] is not None:
                     justthedigits += ' %s' % series_info['issue_number']
-                nspace_seriesname = re.sub('special', '', nspace_seriesname.lower()).strip()
-                nspace_seriesname_decoded = re.sub('special', '', nspace_seriesname_decoded.lower()).strip()
+                nspace_seriesname = nspace_seriesname.lower().replace('special', '').strip()
+                nspace_seriesname_decoded = nspace_seriesname_decoded.lower().replace('special', '').strip()
             if alt_series is not None and 'special' in alt_series.lower():
-                nspace_altseriesname = re.sub('special', '', nspace_altseriesname.lower()).strip()
-                nspace_altseriesname_decoded = re.sub('special', '', nspace_altseriesname_decoded.lower()).strip()
+                nspace_altseriesname = nspace_altseriesname.lower().replace('special', '').strip()
+                nspace_altseriesname_decoded = nspace_altseriesname_decoded.lower().replace('special', '').strip()
 
         seriesalt = False
         if nspace_altseriesname is not None:
-            if re.sub('\|','', nspace_altseriesname.lower()).strip() == re.sub('\|', '', nspace_watchcomic.lower()).strip():
+            if nspace_altseriesname.lower().replace('|', '').strip() == nspace_watchcomic.lower().replace('|', '').strip():
                 seriesalt = True
                 qmatch_chk = 'alt_match'
 
-        if any([seriesalt is True, re.sub('\|','', nspace_seriesname.lower()).strip() == re.sub('\|', '', nspace_watchcomic.lower()).strip(), re.sub('\|','', nspace_seriesname_decoded.lower()).strip() == re.sub('\|', '', nspace_watchname_decoded.lower()).strip()]) or any(re.sub('[\|\s]','', x.lower()).strip() == re.sub('[\|\s]','', nspace_seriesname.lower()).strip() for x in self.AS_Alt):
+        if any([seriesalt is True, nspace_seriesname.lower().replace('|', '').strip() == nspace_watchcomic.lower().replace('|', '').strip(), nspace_seriesname_decoded.lower().replace('|', '').strip() == nspace_watchname_decoded.lower().replace('|', '').strip()]) or any(RE_PIPE_SPACE.sub('', x.lower()).strip() == RE_PIPE_SPACE.sub('', nspace_seriesname.lower()).strip() for x in self.AS_Alt):
             if qmatch_chk is None:
                 qmatch_chk = 'match'
         if qmatch_chk is not None:
             #logger.fdebug('[MATCH: ' + series_info['series_name'] + '] ' + filename)
             enable_annual = False
             annual_comicid = None
-            if any(re.sub('[\|\s]','', x.lower()).strip() == re.sub('[\|\s]','', nspace_seriesname.lower()).strip() for x in self.AS_Alt):
+            if any(RE_PIPE_SPACE.sub('', x.lower()).strip() == RE_PIPE_SPACE.sub('', nspace_seriesname.lower()).strip() for x in self.AS_Alt):
                 #if the alternate search name is almost identical, it won't match up because it will hit the 'normal' first.
                 #not important for series' matches, but for annuals, etc it is very important.
                 #loop through the Alternates picking out the ones that match and then do an overall loop.
-                loopchk = [x for x in self.AS_Alt if re.sub('[\|\s]','', x.lower()).strip() == re.sub('[\|\s]','', nspace_seriesname.lower()).strip()]
+                loopchk = [x for x in self.AS_Alt if RE_PIPE_SPACE.sub('', x.lower()).strip() == RE_PIPE_SPACE.sub('', nspace_seriesname.lower()).strip()]
                 if len(loopchk) > 0 and loopchk[0] != '':
                     if mylar.CONFIG.FOLDER_SCAN_LOG_VERBOSE:
                         logger.fdebug('[FILECHECKER] This should be an alternate: %s' % loopchk)
@@ -1402,24 +1643,24 @@ class FileChecker(object):
                     #logger.info('loopchk: ' + str(loopchk))
 
                 #if the names match up, and enable annuals isn't turned on - keep it all together.
-                if re.sub('\|', '', nspace_watchcomic.lower()).strip() == re.sub('\|', '', nspace_seriesname.lower()).strip() and enable_annual == False:
+                if nspace_watchcomic.lower().replace('|', '').strip() == nspace_seriesname.lower().replace('|', '').strip() and enable_annual == False:
                     loopchk.append(nspace_watchcomic)
                     if any(['annual' in nspace_seriesname.lower(), 'special' in nspace_seriesname.lower()]):
                         if 'biannual' in nspace_seriesname.lower():
                             if mylar.CONFIG.FOLDER_SCAN_LOG_VERBOSE:
                                 logger.fdebug('[FILECHECKER] BiAnnual detected - wouldn\'t Deadpool be proud?')
-                            nspace_seriesname = re.sub('biannual', '', nspace_seriesname).strip()
+                            nspace_seriesname = nspace_seriesname.replace('biannual', '').strip()
                             enable_annual = True
                         elif 'annual' in nspace_seriesname.lower():
                             if mylar.CONFIG.FOLDER_SCAN_LOG_VERBOSE:
                                 logger.fdebug('[FILECHECKER] Annual detected - proceeding cautiously.')
-                            nspace_seriesname = re.sub('2021annual', '', nspace_seriesname).strip()
-                            nspace_seriesname = re.sub('annual', '', nspace_seriesname).strip()
+                            nspace_seriesname = nspace_seriesname.replace('2021annual', '').strip()
+                            nspace_seriesname = nspace_seriesname.replace('annual', '').strip()
                             enable_annual = False
                         elif 'special' in nspace_seriesname.lower():
                             if mylar.CONFIG.FOLDER_SCAN_LOG_VERBOSE:
                                 logger.fdebug('[FILECHECKER] Special detected - proceeding cautiously.')
-                            nspace_seriesname = re.sub('special', '', nspace_seriesname).strip()
+                            nspace_seriesname = nspace_seriesname.replace('special', '').strip()
                             enable_annual = False
 
                 if mylar.CONFIG.FOLDER_SCAN_LOG_VERBOSE:
@@ -1433,7 +1674,7 @@ class FileChecker(object):
                         for ATS in self.AS_Tuple:
                             if mylar.CONFIG.FOLDER_SCAN_LOG_VERBOSE:
                                 logger.fdebug('[FILECHECKER] %s comparing to %s' % (ATS['AS_Alternate'], nspace_seriesname))
-                            if re.sub('\|','', ATS['AS_Alternate'].lower()).strip() == re.sub('\|','', nspace_seriesname.lower()).strip():
+                            if ATS['AS_Alternate'].lower().replace('|', '').strip() == nspace_seriesname.lower().replace('|', '').strip():
                                 if mylar.CONFIG.FOLDER_SCAN_LOG_VERBOSE:
                                     logger.fdebug('[FILECHECKER] Associating ComiciD : %s' % ATS['ComicID'])
                                 annual_comicid = str(ATS['ComicID'])
@@ -1507,36 +1748,53 @@ class FileChecker(object):
                 pp_crclist.append({'IssueID':   pp['IssueID'],
                                    'crc':       pp['crc']})
 
-        for dirname, subs, files in os.walk(dir):
+        #scandir hands back the stat info with each entry, so sizes / mtimes come without an extra stat per file.
+        pending = [dir]
+        while pending:
+            dirname = pending.pop(0)
+            if dirname == dir:
+                direc = None
+            else:
+                direc = dirname
+                if '.AppleDouble' in direc:
+                    #Ignoring MAC OS Finder directory of cached files (/.AppleDouble/<name of file(s)>)
+                    continue
+            try:
+                entries = sorted(os.scandir(dirname), key=lambda x: x.name)
+            except OSError as e:
+                logger.warn('error: %s' % e)
+                continue
 
-            for fname in files:
-                if dirname == dir:
-                    direc = None
-                else:
-                    direc = dirname
-                    if '.AppleDouble' in direc:
-                        #Ignoring MAC OS Finder directory of cached files (/.AppleDouble/<name of file(s)>)
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        #same as os.walk - symlinked folders aren't followed.
+                        if not entry.is_symlink():
+                            pending.append(entry.path)
                         continue
+                except OSError:
+                    continue
+
+                fname = entry.name
+                if not os.path.splitext(fname)[1].lower().endswith(comic_ext):
+                    continue
 
                 if all([mylar.CONFIG.ENABLE_TORRENTS is True, self.pp_mode is True]):
-                    tcrc = helpers.crc(os.path.join(dirname, fname))
+                    tcrc = helpers.crc(entry.path)
                     crcchk = [x for x in pp_crclist if tcrc == x['crc']]
                     if crcchk:
-                        #logger.fdebug('[FILECHECKEER] Already post-processed this item %s - Ignoring' % fname)
+                        #logger.fdebug('[FILECHEKER] Already post-processed this item %s - Ignoring' % fname)
                         continue
 
-                filename = fname
-                if os.path.splitext(filename)[1].lower().endswith(comic_ext):
-                    if direc is None:
-                        try:
-                            comicsize = os.path.getsize(os.path.join(dir, filename))
-                        except Exception as e:
-                            logger.warn('error: %s' % e)
-                    else:
-                        comicsize = os.path.getsize(os.path.join(dir, direc, fname))
-                    filelist.append({'directory':  direc,   #subdirectory if it exists
-                                     'filename':   filename,
-                                     'comicsize':  comicsize})
+                try:
+                    st = entry.stat()
+                except OSError as e:
+                    logger.warn('error: %s' % e)
+                    continue
+                filelist.append({'directory':  direc,   #subdirectory if it exists
+                                 'filename':   fname,
+                                 'comicsize':  st.st_size,
+                                 'mtime':      st.st_mtime})
 
         logger.info('there are %s files.' % len(filelist))
 
@@ -1546,12 +1804,13 @@ class FileChecker(object):
         mod_watchcomic = None
 
         if self.watchcomic:
-            watchdynamic_handlers_match = [x for x in self.dynamic_handlers if x.lower() in self.watchcomic.lower()]
+            watchcomic_lower = self.watchcomic.lower()
+            watchdynamic_handlers_match = [x for x in self.dynamic_handlers if x.lower() in watchcomic_lower]
             #logger.fdebug('watch dynamic handlers recognized : ' + str(watchdynamic_handlers_match))
-            watchdynamic_replacements_match = [x for x in self.dynamic_replacements if x.lower() in self.watchcomic.lower()]
+            watchdynamic_replacements_match = [x for x in self.dynamic_replacements if x.lower() in watchcomic_lower]
             #logger.fdebug('watch dynamic replacements recognized : ' + str(watchdynamic_replacements_match))
-            mod_watchcomic = re.sub('[\s\s+\_\.]', '%$', self.watchcomic)
-            mod_watchcomic = re.sub('[\#]', '', mod_watchcomic)
+            mod_watchcomic = RE_DYNAMIC_SEP.sub('%$', self.watchcomic)
+            mod_watchcomic = mod_watchcomic.replace('#', '')
             mod_find = []
             wdrm_find = []
             if any([watchdynamic_handlers_match, watchdynamic_replacements_match]):
@@ -1575,14 +1834,15 @@ class FileChecker(object):
                                 spacer+='|'
                             mod_watchcomic = mod_watchcomic[:wd] + spacer + mod_watchcomic[wd+len(wdrm):]
 
-        series_name = re.sub(r'[\u2014|\u2013|\u2e3a|\u2e3b]', ' - ', series_name)
-        series_name = re.sub('\u2019', " ' ", series_name)
-        seriesdynamic_handlers_match = [x for x in self.dynamic_handlers if x.lower() in series_name.lower()]
+        series_name = RE_UNICODE_DASH.sub(' - ', series_name)
+        series_name = RE_UNICODE_QUOTE.sub(" ' ", series_name)
+        series_name_lower = series_name.lower()
+        seriesdynamic_handlers_match = [x for x in self.dynamic_handlers if x.lower() in series_name_lower]
         #logger.fdebug('series dynamic handlers recognized : ' + str(seriesdynamic_handlers_match))
-        seriesdynamic_replacements_match = [x for x in self.dynamic_replacements if x.lower() in series_name.lower()]
+        seriesdynamic_replacements_match = [x for x in self.dynamic_replacements if x.lower() in series_name_lower]
         #logger.fdebug('series dynamic replacements recognized : ' + str(seriesdynamic_replacements_match))
-        mod_seriesname = re.sub('[\s\s+\_\.]', '%$', series_name)
-        mod_seriesname = re.sub('[\#]', '', mod_seriesname)
+        mod_seriesname = RE_DYNAMIC_SEP.sub('%$', series_name)
+        mod_seriesname = mod_seriesname.replace('#', '')
         ser_find = []
         sdrm_find = []
         if any([seriesdynamic_handlers_match, seriesdynamic_replacements_match]):
@@ -1606,15 +1866,15 @@ class FileChecker(object):
                         mod_seriesname = mod_seriesname[:sd] + spacer + mod_seriesname[sd+len(sdrm):]
 
         if mod_watchcomic:
-            mod_watchcomic = re.sub('\|+', '|', mod_watchcomic)
+            mod_watchcomic = RE_MULTI_PIPE.sub('|', mod_watchcomic)
             if mod_watchcomic.endswith('|'):
                 mod_watchcomic = mod_watchcomic[:-1]
-            mod_watchcomic = re.sub('[\%\$]+', '', mod_watchcomic)
+            mod_watchcomic = RE_PERCENT_DOLLAR.sub('', mod_watchcomic)
 
-        mod_seriesname = re.sub('\|+', '|', mod_seriesname)
+        mod_seriesname = RE_MULTI_PIPE.sub('|', mod_seriesname)
         if mod_seriesname.endswith('|'):
             mod_seriesname = mod_seriesname[:-1]
-        mod_seriesname = re.sub('[\%\$]+', '', mod_seriesname)
+        mod_seriesname = RE_PERCENT_DOLLAR.sub('', mod_seriesname)
 
         return {'mod_watchcomic':  mod_watchcomic,
                 'mod_seriesname':  mod_seriesname}
@@ -1678,19 +1938,14 @@ class FileChecker(object):
     #    Jan 1990
     #    January1990'''
 
-        fmts = ('%Y','%Y-', '%b %d, %Y','%B %d, %Y','%B %d %Y','%m/%d/%Y','%m/%d/%y','(%m/%d/%Y)','%b %Y','%B%Y','%b %d,%Y','%m-%Y','%B %Y','%Y-%m-%d','%Y-%m','%Y%m','%Y-%m-00')
         mnths = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
         parsed=[]
 
         if fulldate is False:
             for e in txt.splitlines():
-                for fmt in fmts:
-                    try:
-                        t = dt.datetime.strptime(e, fmt)
-                        parsed.append((e, fmt, t)) 
-                        break
-                    except ValueError as err:
-                        pass
+                t = _strptime(e)
+                if t is not None:
+                    parsed.append((e, t[0], t[1]))
         else:
             for e in txt.split():
                 if cnt == 0:
@@ -1718,13 +1973,9 @@ class FileChecker(object):
 
 
                 if cnt <= 0:
-                    for fmt in fmts:
-                        try:
-                            t = dt.datetime.strptime(e, fmt)
-                            parsed.append((e, fmt, t))
-                            break
-                        except ValueError as err:
-                            pass
+                    t = _strptime(e)
+                    if t is not None:
+                        parsed.append((e, t[0], t[1]))
         # check that all the cases are handled
         success={t[0] for t in parsed}
         for e in txt.splitlines():
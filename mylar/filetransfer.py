@@ -0,0 +1,200 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the
+#  implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public
+#  License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+# The copying behind helpers.file_ops (copies and moves across devices).
+# The data is left to the kernel wherever it'll take it: a reflink first (btrfs / xfs / zfs and friends just share
+# the blocks), then copy_file_range (in-kernel - and server-side on nfs / smb), then sendfile, and only if none of
+# those work on the two files is it read through python.
+# No more than FILEOPS_WORKERS transfers run at once across every thread that asks - the rest wait their turn
+# rather than having the disks seek between all of them. What's running (and how far along) is in status().
+
+import os
+import time
+import errno
+import shutil
+import threading
+
+import mylar
+from mylar import logger
+
+#linux _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+CHUNK = 64 * 1024 * 1024
+BUFFER = 4 * 1024 * 1024
+#errors from copy_file_range / sendfile that mean 'not between these two files', not that the copy went wrong.
+UNSUPPORTED = (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EBADF, errno.ETXTBSY)
+
+_lock = threading.Lock()
+_slots = None
+_slot_count = None
+_active = {}
+_totals = {'transfers': 0, 'bytes': 0}
+
+
+def workers():
+    if mylar.CONFIG.FILEOPS_WORKERS is None or mylar.CONFIG.FILEOPS_WORKERS < 1:
+        return 1
+    return mylar.CONFIG.FILEOPS_WORKERS
+
+def _get_slots():
+    global _slots, _slot_count
+    count = workers()
+    with _lock:
+        if _slots is None or _slot_count != count:
+            _slots = threading.BoundedSemaphore(count)
+            _slot_count = count
+        return _slots
+
+def same_device(src, dst):
+    #True if dst (a file or directory, existing or not) would be on the same filesystem as src.
+    target = dst if os.path.isdir(dst) else (os.path.dirname(dst) or '.')
+    try:
+        return os.stat(src).st_dev == os.stat(target).st_dev
+    except OSError:
+        return False
+
+def _reflink(src_fd, dst_fd):
+    try:
+        import fcntl
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+    except (ImportError, OSError):
+        return False
+    return True
+
+def _rewind(src_fd, dst_fd, job):
+    #back to an empty destination after a kernel copy gave up part way.
+    os.ftruncate(dst_fd, 0)
+    os.lseek(dst_fd, 0, os.SEEK_SET)
+    os.lseek(src_fd, 0, os.SEEK_SET)
+    job['done'] = 0
+
+def _kernel_copy(src_fd, dst_fd, size, job):
+    #copy_file_range, then sendfile. False if neither can copy between these two files - including one that stops
+    #short of size (some filesystems report success and copy nothing), which is undone so the next one starts clean.
+    for method in ('copy_file_range', 'sendfile'):
+        if not hasattr(os, method):
+            continue
+        offset = 0
+        try:
+            while offset < size:
+                if method == 'copy_file_range':
+                    n = os.copy_file_range(src_fd, dst_fd, min(CHUNK, size - offset), offset, offset)
+                else:
+                    n = os.sendfile(dst_fd, src_fd, offset, min(CHUNK, size - offset))
+                if n == 0:
+                    break
+                offset += n
+                job['done'] = offset
+        except OSError as e:
+            if offset == 0 and e.errno in UNSUPPORTED:
+                continue
+            raise
+        if offset != size:
+            logger.fdebug('[FILE-TRANSFER] %s stopped at %s of %s bytes - trying the next method.' % (method, offset, size))
+            _rewind(src_fd, dst_fd, job)
+            continue
+        job['method'] = method
+        return True
+    return False
+
+def _user_copy(src_fd, dst_fd, job, digest=None):
+    buf = bytearray(BUFFER)
+    view = memoryview(buf)
+    while True:
+        n = os.readv(src_fd, [buf])
+        if not n:
+            break
+        if digest is not None:
+            digest.update(view[:n])
+        written = 0
+        while written < n:
+            written += os.write(dst_fd, view[written:n])
+        job['done'] += n
+    job['method'] = 'read/write'
+
+def copy(src, dst, keep_stat=False, digest=None):
+    #copy the file src to dst (a file path, or a directory to copy into) - the same as shutil.copy, or shutil.copy2
+    #with keep_stat. Returns the path written. A partial copy is removed before the error is raised.
+    #digest (a hashlib object) is fed the source as it's copied - the data has to come through python for that,
+    #so the reflink / kernel copies are skipped, but the source is only read the once.
+    if os.path.isdir(dst):
+        dst = os.path.join(dst, os.path.basename(src))
+    #opening dst would truncate src (and the clean-up below would then remove it) - refuse, as shutil.copy does.
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        raise shutil.SameFileError('%s and %s are the same file' % (src, dst))
+    size = os.path.getsize(src)
+    job = {'src': src, 'dst': dst, 'size': size, 'done': 0, 'method': None, 'state': 'waiting', 'started': None}
+    key = (src, dst, threading.get_ident())
+    with _lock:
+        _active[key] = job
+    try:
+        with _get_slots():
+            job['state'] = 'copying'
+            job['started'] = time.time()
+            try:
+                with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                    if digest is not None:
+                        _user_copy(fsrc.fileno(), fdst.fileno(), job, digest)
+                    elif size > 0 and _reflink(fsrc.fileno(), fdst.fileno()):
+                        job['done'] = size
+                        job['method'] = 'reflink'
+                    elif size == 0 or not _kernel_copy(fsrc.fileno(), fdst.fileno(), size, job):
+                        _user_copy(fsrc.fileno(), fdst.fileno(), job)
+                    written = os.fstat(fdst.fileno()).st_size
+                    if written != size:
+                        raise IOError(errno.EIO, 'copied %s of %s bytes' % (written, size), dst)
+                if keep_stat:
+                    shutil.copystat(src, dst)
+                else:
+                    shutil.copymode(src, dst)
+            except BaseException:
+                try:
+                    os.remove(dst)
+                except OSError:
+                    pass
+                raise
+            finally:
+                job['state'] = 'done'
+        elapsed = time.time() - job['started']
+        with _lock:
+            _totals['transfers'] += 1
+            _totals['bytes'] += size
+        logger.fdebug('[FILE-TRANSFER] %s -> %s (%sMB via %s in %ss%s)' % (src, dst, round(size / 1048576.0, 1), job['method'], round(elapsed, 2),
+                                                                          ', %sMB/s' % round(size / 1048576.0 / elapsed, 1) if elapsed > 0.5 else ''))
+        return dst
+    finally:
+        with _lock:
+            _active.pop(key, None)
+
+def status():
+    #transfers waiting for / holding a slot, for jobqueue.status().
+    now = time.time()
+    with _lock:
+        jobs = []
+        for job in _active.values():
+            if job['state'] == 'done':
+                continue
+            running = now - job['started'] if job['started'] is not None else None
+            jobs.append({'file':     os.path.basename(job['src']),
+                         'dst':      os.path.dirname(job['dst']),
+                         'state':    job['state'],
+                         'size':     job['size'],
+                         'done':     job['done'],
+                         'percent':  round(100.0 * job['done'] / job['size'], 1) if job['size'] else 100.0,
+                         'rate':     round(job['done'] / running) if running else None,
+                         'method':   job['method']})
+        return {'workers':   workers(),
+                'jobs':      jobs,
+                'transfers': _totals['transfers'],
+                'bytes':     _totals['bytes']}
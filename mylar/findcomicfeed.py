@@ -3,10 +3,9 @@
 import os
 import sys
 import time
-import requests
 import feedparser
 import re
-from . import logger
+from . import logger, httpclient
 import mylar
 import unicodedata
 import urllib.request, urllib.parse, urllib.error
@@ -125,7 +124,7 @@ def Startit(searchName, searchIssue, searchYear, ComicVersion, IssDateFix, bookt
 
     time.sleep(timerdelay)
     try:
-        r = requests.get(mylar.EXPURL + 'search/rss', params=url_params, verify=True, headers=headers)
+        r = httpclient.get(mylar.EXPURL + 'search/rss', params=url_params, verify=True, headers=headers)
     except Exception as e:
         logger.warn('[EXPERIMENTAL][ERROR] %s' % e)
         return "no results"
@@ -0,0 +1,278 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the
+#  implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public
+#  License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+# Content fingerprints of the files in the library (the fingerprints table).
+# Digest is a blake2b of the whole file, streamed in large blocks - it's what a copy / move is checked against.
+# Pages is a blake2b of the crc / size of every page in the archive as recorded in its directory (zip central
+# directory / rar headers, so it costs no decompression), leaving out the metadata - two files with the same
+# pages are the same issue whatever tags or comment were written to them, or whether it's the cbr or the cbz.
+# Rows are keyed on the file's location and only trusted while its size and mtime are unchanged, so a rescan
+# of the library only reads the files that are new or have been modified since.
+
+import os
+import time
+import zipfile
+import hashlib
+import datetime
+
+from mylar import db, logger
+from lib.rarfile import rarfile
+
+BLOCK = 4 * 1024 * 1024
+METADATA = ('comicinfo.xml', 'comet.xml')
+
+
+def new_digest():
+    #the hash file_digest takes - for a copy that hashes the file on its way through (filetransfer.copy).
+    return hashlib.blake2b(digest_size=20)
+
+def file_digest(path):
+    h = new_digest()
+    buf = bytearray(BLOCK)
+    view = memoryview(buf)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+    return h.hexdigest()
+
+def pages_digest(path):
+    #None when it's not an archive that can be read (or there's nothing in it but metadata).
+    members = []
+    try:
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as zf:
+                for info in zf.infolist():
+                    if not info.is_dir() and os.path.basename(info.filename).lower() not in METADATA:
+                        members.append((info.CRC, info.file_size))
+        elif rarfile.is_rarfile(path):
+            with rarfile.RarFile(path) as rf:
+                for info in rf.infolist():
+                    if not info.is_dir() and info.CRC is not None and os.path.basename(info.filename).lower() not in METADATA:
+                        members.append((info.CRC, info.file_size))
+    except Exception as e:
+        logger.fdebug('[FINGERPRINT] Unable to read the archive directory of %s: %s' % (path, e))
+        return None
+    if not members:
+        return None
+    h = hashlib.blake2b(digest_size=20)
+    for crc, size in sorted(members):
+        h.update(b'%d:%d;' % (crc, size))
+    return h.hexdigest()
+
+def _stored(path):
+    return db.DBConnection().selectone('SELECT * FROM fingerprints WHERE Location=?', [path]).fetchone()
+
+def _current(row, st):
+    return row is not None and row['Size'] == st.st_size and row['Mtime'] == st.st_mtime_ns
+
+def _values(path, st, comicid, issueid):
+    return {'Size':      st.st_size,
+            'Mtime':     st.st_mtime_ns,
+            'Digest':    file_digest(path),
+            'Pages':     pages_digest(path),
+            'ComicID':   comicid,
+            'IssueID':   issueid,
+            'DateAdded': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+
+def cached(path):
+    #the recorded fingerprint of path if it's still current, without reading the file. None if there isn't one.
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    row = _stored(path)
+    if not _current(row, st):
+        return None
+    return dict(row)
+
+def from_digest(path, st, digest, comicid=None, issueid=None):
+    #the fingerprint of path (as it was at st) from a digest already taken of its contents - nothing is recorded.
+    return {'Location':  path,
+            'Size':      st.st_size,
+            'Mtime':     st.st_mtime_ns,
+            'Digest':    digest.hexdigest(),
+            'Pages':     pages_digest(path),
+            'ComicID':   comicid,
+            'IssueID':   issueid,
+            'DateAdded': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+
+def get(path, comicid=None, issueid=None, store=True):
+    #the fingerprint of the file at path (a dict of the fingerprints columns), hashing it only if it's new or has
+    #changed since it was last looked at. None if the file can't be read.
+    #store=False is for files that are only passing through (the download folder, the cache dir) - they're hashed
+    #if need be but not recorded, so the table only holds library locations.
+    return _fingerprint(path, comicid, issueid, store)[0]
+
+def _fingerprint(path, comicid, issueid, store=True):
+    #(fingerprint, True if the file had to be read)
+    try:
+        st = os.stat(path)
+    except OSError as e:
+        logger.fdebug('[FINGERPRINT] Unable to stat %s: %s' % (path, e))
+        return None, False
+    row = _stored(path)
+    if _current(row, st):
+        row = dict(row)
+        if store and any([comicid is not None and row['ComicID'] != comicid, issueid is not None and row['IssueID'] != issueid]):
+            row['ComicID'] = comicid if comicid is not None else row['ComicID']
+            row['IssueID'] = issueid if issueid is not None else row['IssueID']
+            db.DBConnection().upsert('fingerprints', {'ComicID': row['ComicID'], 'IssueID': row['IssueID']}, {'Location': path})
+        return row, False
+    try:
+        values = _values(path, st, comicid if comicid is not None else (row['ComicID'] if row is not None else None),
+                                   issueid if issueid is not None else (row['IssueID'] if row is not None else None))
+    except (IOError, OSError) as e:
+        logger.warn('[FINGERPRINT] Unable to read %s: %s' % (path, e))
+        return None, False
+    if store:
+        db.DBConnection().upsert('fingerprints', values, {'Location': path})
+    values['Location'] = path
+    return values, True
+
+def identical(a, b):
+    #two fingerprints of byte for byte the same file.
+    if a is None or b is None:
+        return False
+    return a['Digest'] == b['Digest']
+
+def same_content(a, b):
+    #two fingerprints of the same issue - identical files, or the same pages with different tags / container.
+    if a is None or b is None:
+        return False
+    if a['Digest'] == b['Digest']:
+        return True
+    return a['Pages'] is not None and a['Pages'] == b['Pages']
+
+def matches(fp):
+    #other files on record holding the same issue as the fingerprint fp.
+    if fp is None:
+        return []
+    if fp['Pages'] is not None:
+        rows = db.DBConnection().select('SELECT * FROM fingerprints WHERE (Pages=? OR Digest=?) AND Location != ?', [fp['Pages'], fp['Digest'], fp['Location']])
+    else:
+        rows = db.DBConnection().select('SELECT * FROM fingerprints WHERE Digest=? AND Location != ?', [fp['Digest'], fp['Location']])
+    return [dict(r) for r in rows]
+
+def verify(src, dst):
+    #after a copy / move: True if dst is byte for byte the file src (a fingerprint taken beforehand) was.
+    #The destination is recorded under its new location (with src's ids), the old location is dropped
+    #if the file's no longer there.
+    if src is None:
+        return True
+    try:
+        st = os.stat(dst)
+    except OSError as e:
+        logger.warn('[FINGERPRINT] %s is not there after the file operation: %s' % (dst, e))
+        return False
+    if st.st_size != src['Size']:
+        logger.warn('[FINGERPRINT] %s is %s bytes - expected %s' % (dst, st.st_size, src['Size']))
+        return False
+    digest = file_digest(dst)
+    if digest != src['Digest']:
+        logger.warn('[FINGERPRINT] %s does not match its source (%s / %s)' % (dst, digest, src['Digest']))
+        return False
+    relocated(src, dst, st)
+    return True
+
+def relocated(src, dst, st=None):
+    #the file src was fingerprinted at is now (also) at dst - carry the fingerprint over without rehashing it.
+    if src is None:
+        return
+    if st is None:
+        try:
+            st = os.stat(dst)
+        except OSError:
+            return
+    myDB = db.DBConnection()
+    myDB.upsert('fingerprints', {'Size':      st.st_size,
+                                 'Mtime':     st.st_mtime_ns,
+                                 'Digest':    src['Digest'],
+                                 'Pages':     src['Pages'],
+                                 'ComicID':   src['ComicID'],
+                                 'IssueID':   src['IssueID'],
+                                 'DateAdded': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')},
+                                {'Location': dst})
+    if src['Location'] != dst and not os.path.exists(src['Location']):
+        forget(src['Location'])
+
+def forget(path):
+    db.DBConnection().action('DELETE FROM fingerprints WHERE Location=?', [path])
+
+def moved(src_path, dst_path):
+    #a rename - the file itself (and so its size / mtime) is untouched, so any fingerprint just changes location.
+    myDB = db.DBConnection()
+    if myDB.selectone('SELECT 1 FROM fingerprints WHERE Location=?', [src_path]).fetchone() is None:
+        return
+    myDB.action('DELETE FROM fingerprints WHERE Location=?', [dst_path])
+    myDB.action('UPDATE fingerprints SET Location=? WHERE Location=?', [dst_path, src_path])
+
+def duplicates(across_series=False):
+    #sets of files holding the same issue (same pages - or the same bytes for anything that isn't a readable
+    #archive). With across_series only the sets spread over more than one series are returned.
+    myDB = db.DBConnection()
+    having = 'COUNT(DISTINCT ComicID) > 1' if across_series else 'COUNT(*) > 1'
+    groups = []
+    for key in ('Pages', 'Digest'):
+        if key == 'Pages':
+            where = 'Pages IS NOT NULL'
+        else:
+            where = 'Pages IS NULL'
+        dupes = myDB.select('SELECT %s FROM fingerprints WHERE %s GROUP BY %s HAVING %s' % (key, where, key, having))
+        for dupe in dupes:
+            rows = myDB.select('SELECT Location, Size, ComicID, IssueID FROM fingerprints WHERE %s=? ORDER BY Location' % key, [dupe[key]])
+            groups.append({'key':   dupe[key],
+                           'files': [dict(r) for r in rows]})
+    return groups
+
+def scan_library(comicid=None):
+    #fingerprint every issue / annual on file (of one series, or the whole watchlist), then return the duplicates.
+    #Files that haven't changed since they were last seen are skipped, so only the first pass reads everything.
+    myDB = db.DBConnection()
+    start = time.time()
+    files = []
+    for table in ('issues', 'annuals'):
+        sql = 'SELECT a.ComicID, a.IssueID, a.Location, b.ComicLocation FROM %s AS a INNER JOIN comics AS b ON a.ComicID=b.ComicID WHERE a.Location IS NOT NULL' % table
+        args = []
+        if comicid is not None:
+            sql += ' AND a.ComicID=?'
+            args.append(comicid)
+        for row in myDB.select(sql, args):
+            if row['ComicLocation'] is None:
+                continue
+            files.append((os.path.join(row['ComicLocation'], row['Location']), row['ComicID'], row['IssueID']))
+
+    hashed = 0
+    for cnt, (path, cid, iid) in enumerate(files, 1):
+        if not os.path.isfile(path):
+            continue
+        if _fingerprint(path, cid, iid)[1]:
+            hashed += 1
+        if cnt % 500 == 0:
+            logger.info('[FINGERPRINT] %s/%s files checked (%s hashed) in %ss' % (cnt, len(files), hashed, round(time.time() - start, 1)))
+
+    prune()
+    dupes = duplicates()
+    logger.info('[FINGERPRINT] Library scan complete - %s files (%s hashed) in %ss, %s sets of duplicates.' % (len(files), hashed, round(time.time() - start, 1), len(dupes)))
+    return dupes
+
+def prune():
+    #drop the fingerprints of files that aren't there anymore.
+    myDB = db.DBConnection()
+    gone = [row['Location'] for row in myDB.select('SELECT Location FROM fingerprints') if not os.path.exists(row['Location'])]
+    for location in gone:
+        myDB.action('DELETE FROM fingerprints WHERE Location=?', [location])
+    return len(gone)
@@ -28,7 +28,7 @@ from bs4 import BeautifulSoup
 import cfscrape
 import zipfile
 import mylar
-from mylar import db, logger, helpers
+from mylar import db, logger, helpers, ddltransfer
 
 
 class GC(object):
@@ -596,15 +596,6 @@ class GC(object):
 
     def downloadit(self, id, link, mainlink, resume=None):
         # logger.info('[%s] %s -- mainlink: %s' % (id, link, mainlink))
-        if mylar.DDL_LOCK is True:
-            logger.fdebug(
-                '[DDL] Another item is currently downloading via DDL. Only one item can'
-                ' be downloaded at a time using DDL. Patience.'
-            )
-            return
-        else:
-            mylar.DDL_LOCK = True
-
         myDB = db.DBConnection()
         filename = None
         try:
@@ -638,7 +629,7 @@ class GC(object):
                     filename = re.sub('GetComics.INFO', '', filename, re.I).strip()
 
                 try:
-                    remote_filesize = int(t.headers['Content-length'])
+                    remote_filesize = ddltransfer.total_size(t)
                     logger.fdebug('remote filesize: %s' % remote_filesize)
                 except Exception as e:
                     if 'run.php-urls' not in link:
@@ -660,7 +651,7 @@ class GC(object):
                                 'GetComics.INFO', '', filename, re.I
                             ).strip()
                         try:
-                            remote_filesize = int(t.headers['Content-length'])
+                            remote_filesize = ddltransfer.total_size(t)
                             logger.fdebug('remote filesize: %s' % remote_filesize)
                         except Exception as e:
                             logger.warn(
@@ -673,7 +664,6 @@ class GC(object):
                                 ' invalid and will ignore this result.'
                             )
                             remote_filesize = 0
-                            mylar.DDL_LOCK = False
                             return {
                                 "success": False,
                                 "filename": filename,
@@ -691,7 +681,6 @@ class GC(object):
                             ' and will ignore this result.'
                         )
                         remote_filesize = 0
-                        mylar.DDL_LOCK = False
                         return {"success": False, "filename": filename, "path": None}
 
                 # write the filename to the db for tracking purposes...
@@ -720,27 +709,47 @@ class GC(object):
                 #    buf = StringIO(t.content)
                 #    f = gzip.GzipFile(fileobj=buf)
 
-                if resume is not None:
-                    with open(path, 'ab') as f:
-                        for chunk in t.iter_content(chunk_size=1024):
-                            if chunk:
-                                f.write(chunk)
-                                f.flush()
-
+                if all([resume is not None, t.status_code == 206, not ddltransfer.has_parts(path)]):
+                    received = resume
                 else:
-                    with open(path, 'wb') as f:
-                        for chunk in t.iter_content(chunk_size=1024):
-                            if chunk:
-                                f.write(chunk)
-                                f.flush()
+                    #the server ignored the range (or this is a fresh start) - the whole file is coming back.
+                    resume = None
+                    received = 0
+                if resume is None and ddltransfer.has_parts(path) and t.status_code != 206:
+                    #a restart, not a resume - drop whatever an earlier segmented attempt left behind.
+                    ddltransfer.remove_parts(path)
+                transfer = ddltransfer.start(id, filename, remote_filesize, received)
+                try:
+                    segmented = False
+                    if ddltransfer.can_segment(t, remote_filesize) and (resume is None or ddltransfer.has_parts(path)):
+                        segmented = True
+                        t.close()
+                        seg_headers = dict(self.headers)
+                        seg_headers.pop('Range', None)
+                        try:
+                            ddltransfer.segmented(s, t.url, path, remote_filesize, transfer, headers=seg_headers, cookies=cf_cookievalue)
+                        except ddltransfer.RangeRefused as e:
+                            logger.fdebug('[DDL] %s - downloading as a single stream instead.' % e)
+                            ddltransfer.remove_parts(path)
+                            segmented = False
+                            transfer = ddltransfer.start(id, filename, remote_filesize)
+                            self.headers.pop('Range', None)
+                            t = s.get(t.url, verify=True, cookies=cf_cookievalue, headers=self.headers, stream=True, timeout=30)
+
+                    if segmented is False:
+                        ddltransfer.stream(t, path, transfer, append=resume is not None)
+                finally:
+                    ddltransfer.finish(id)
+
+                if remote_filesize and os.path.getsize(path) != remote_filesize:
+                    logger.warn('[DDL] Download of %s is incomplete - %s of %s bytes. Resume it from the DDL queue.' % (filename, os.path.getsize(path), remote_filesize))
+                    return {"success": False, "filename": filename, "path": None}
 
         except Exception as e:
             logger.error('[ERROR] %s' % e)
-            mylar.DDL_LOCK = False
             return {"success": False, "filename": filename, "path": None}
 
         else:
-            mylar.DDL_LOCK = False
             if os.path.isfile(path):
                 if path.endswith('.zip'):
                     new_path = os.path.join(
@@ -15,7 +15,6 @@
 #  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
 
 from lib.rarfile import rarfile
-import requests
 import zipfile
 from io import BytesIO
 
@@ -35,7 +34,7 @@ import base64
 from operator import itemgetter
 
 import mylar
-from mylar import logger, helpers
+from mylar import logger, helpers, httpclient
 
 def open_archive(location):
     if location.endswith(".cbz"):
@@ -189,7 +188,7 @@ def extract_image(location, single=False, imquality=None, comicname=None):
 
 def retrieve_image(url):
     try:
-        r = requests.get(url, params=None, verify=mylar.CONFIG.CV_VERIFY, headers=mylar.CV_HEADERS)
+        r = httpclient.get(url, params=None, verify=mylar.CONFIG.CV_VERIFY, headers=mylar.CV_HEADERS)
     except Exception as e:
         logger.warn('[ERROR: %s] Unable to download image from CV URL link: %s' % (e, url))
         ComicImage = None
@@ -32,6 +32,7 @@ import itertools
 import shutil
 import hashlib
 import gzip
+from concurrent.futures import ThreadPoolExecutor
 import os, errno
 import urllib
 from urllib.parse import urljoin
@@ -40,7 +41,7 @@ from apscheduler.triggers.interval import IntervalTrigger
 
 import mylar
 from . import logger
-from mylar import db, sabnzbd, nzbget, process, getcomics, getimage
+from mylar import db, sabnzbd, nzbget, process, getcomics, getimage, cvclient, jobqueue, ddltransfer, runqueue, fingerprint, filetransfer
 
 def multikeysort(items, columns):
 
@@ -1379,148 +1380,167 @@ def LoadAlternateSearchNames(seriesname_alt, comicid):
 def havetotals(refreshit=None):
         #import db
 
-        comics = []
         myDB = db.DBConnection()
 
         if refreshit is None:
-            if mylar.CONFIG.ANNUALS_ON:
-                comiclist = myDB.select('SELECT comics.*, COUNT(totalAnnuals.IssueID) AS TotalAnnuals FROM comics LEFT JOIN annuals as totalAnnuals on totalAnnuals.ComicID = comics.ComicID GROUP BY comics.ComicID order by comics.ComicSortName COLLATE NOCASE')
-            else:
-                comiclist = myDB.select('SELECT * FROM comics GROUP BY ComicID order by ComicSortName COLLATE NOCASE')
+            #the per-series status/percent is materialized in seriessummary - only stale rows get recomputed.
+            series_summary_sync()
+            return [dict(x) for x in myDB.select('SELECT * FROM seriessummary ORDER BY ComicSortName COLLATE NOCASE')]
+
+        comicref = myDB.selectone('SELECT comics.ComicID AS ComicID, comics.Have AS Have, comics.Total as Total, COUNT(totalAnnuals.IssueID) AS TotalAnnuals FROM comics LEFT JOIN annuals as totalAnnuals on totalAnnuals.ComicID = comics.ComicID WHERE comics.ComicID=? GROUP BY comics.ComicID', [refreshit]).fetchone()
+        #refreshit is the ComicID passed from the Refresh Series to force/check numerical have totals
+        totalissues = comicref['Total']
+        haveissues = comicref['Have']
+        if not haveissues:
+            haveissues = 0
+
+        if haveissues > totalissues:
+            return True   # if it's 5/4, send back to updater and don't restore previous status'
         else:
-            comiclist = []
-            comicref = myDB.selectone('SELECT comics.ComicID AS ComicID, comics.Have AS Have, comics.Total as Total, COUNT(totalAnnuals.IssueID) AS TotalAnnuals FROM comics LEFT JOIN annuals as totalAnnuals on totalAnnuals.ComicID = comics.ComicID WHERE comics.ComicID=? GROUP BY comics.ComicID', [refreshit]).fetchone()
-            #refreshit is the ComicID passed from the Refresh Series to force/check numerical have totals
-            comiclist.append({"ComicID":      comicref['ComicID'],
-                              "Have":         comicref['Have'],
-                              "Total":        comicref['Total'],
-                              "TotalAnnuals": comicref['TotalAnnuals']})
-
-        for comic in comiclist:
-            #--not sure about this part
-            #if comic['Total'] is None:
-            #    if refreshit is not None:
-            #        logger.fdebug(str(comic['ComicID']) + ' has no issuedata available. Forcing complete Refresh/Rescan')
-            #        return True
-            #    else:
-            #        continue
-            try:
-                totalissues = comic['Total']
-#                if mylar.CONFIG.ANNUALS_ON:
-#                    totalissues += comic['TotalAnnuals']
-                haveissues = comic['Have']
-            except TypeError:
-                logger.warning('[Warning] ComicID: ' + str(comic['ComicID']) + ' is incomplete - Removing from DB. You should try to re-add the series.')
-                myDB.action("DELETE from COMICS WHERE ComicID=? AND ComicName LIKE 'Comic ID%'", [comic['ComicID']])
-                myDB.action("DELETE from ISSUES WHERE ComicID=? AND ComicName LIKE 'Comic ID%'", [comic['ComicID']])
-                continue
+            return False  # if it's 5/5 or 4/5, send back to updater and restore previous status'
 
-            if not haveissues:
-                haveissues = 0
+def series_summary_sync(ComicID=None):
+    #bring seriessummary up to date with comics. With a ComicID only that series is recomputed, otherwise
+    #every row that is missing, flagged Stale by the comics triggers, or was computed on a previous day is.
+    myDB = db.DBConnection()
+    summary_date = today()
 
-            if refreshit is not None:
-                if haveissues > totalissues:
-                    return True   # if it's 5/4, send back to updater and don't restore previous status'
-                else:
-                    return False  # if it's 5/5 or 4/5, send back to updater and restore previous status'
+    if ComicID is not None:
+        comiclist = myDB.select('SELECT * FROM comics WHERE ComicID=?', [ComicID])
+        if not comiclist:
+            myDB.action('DELETE FROM seriessummary WHERE ComicID=?', [ComicID])
+            return
+    else:
+        comiclist = myDB.select('SELECT comics.* FROM comics LEFT JOIN seriessummary AS s ON s.ComicID = comics.ComicID'
+                                ' WHERE s.ComicID IS NULL OR s.Stale OR s.SummaryDate IS NOT ?', [summary_date])
 
-            if any([haveissues == 'None', haveissues is None]):
-                haveissues = 0
-            if any([totalissues == 'None', totalissues is None]):
-                totalissues = 0
+    rows = []
+    for comic in comiclist:
+        summary = series_summary_row(comic)
+        if summary is None:
+            continue
+        summary['Stale'] = 0
+        summary['SummaryDate'] = summary_date
+        controlValue = {'ComicID': summary.pop('ComicID')}
+        rows.append((summary, controlValue))
 
-            try:
-                percent = (haveissues *100.0) /totalissues
-                if percent > 100:
-                    percent = 101
-            except (ZeroDivisionError, TypeError):
-                percent = 0
-                totalissues = '?'
-
-            if comic['LatestDate'] is None:
-                logger.warn(comic['ComicName'] + ' has not finished loading. Nulling some values so things display properly until they can populate.')
-                recentstatus = 'Loading'
-            elif comic['ComicPublished'] is None or comic['ComicPublished'] == '' or comic['LatestDate'] is None:
-                recentstatus = 'Unknown'
-            elif comic['ForceContinuing'] == 1:
+    if rows:
+        myDB.upsert_many('seriessummary', rows)
+        logger.fdebug('[SERIES-SUMMARY] Recomputed home page summary for %s series' % len(rows))
+
+def series_summary_row(comic):
+    #compute the home page status/percent for a single comics row.
+    myDB = db.DBConnection()
+    try:
+        totalissues = comic['Total']
+#        if mylar.CONFIG.ANNUALS_ON:
+#            totalissues += comic['TotalAnnuals']
+        haveissues = comic['Have']
+    except TypeError:
+        logger.warning('[Warning] ComicID: ' + str(comic['ComicID']) + ' is incomplete - Removing from DB. You should try to re-add the series.')
+        myDB.action("DELETE from COMICS WHERE ComicID=? AND ComicName LIKE 'Comic ID%'", [comic['ComicID']])
+        myDB.action("DELETE from ISSUES WHERE ComicID=? AND ComicName LIKE 'Comic ID%'", [comic['ComicID']])
+        return None
+
+    if not haveissues:
+        haveissues = 0
+
+    if any([haveissues == 'None', haveissues is None]):
+        haveissues = 0
+    if any([totalissues == 'None', totalissues is None]):
+        totalissues = 0
+
+    try:
+        percent = (haveissues *100.0) /totalissues
+        if percent > 100:
+            percent = 101
+    except (ZeroDivisionError, TypeError):
+        percent = 0
+        totalissues = '?'
+
+    if comic['LatestDate'] is None:
+        logger.warn(comic['ComicName'] + ' has not finished loading. Nulling some values so things display properly until they can populate.')
+        recentstatus = 'Loading'
+    elif comic['ComicPublished'] is None or comic['ComicPublished'] == '' or comic['LatestDate'] is None:
+        recentstatus = 'Unknown'
+    elif comic['ForceContinuing'] == 1:
+        recentstatus = 'Continuing'
+    elif 'present' in comic['ComicPublished'].lower() or (today()[:4] in comic['LatestDate']):
+        latestdate = comic['LatestDate']
+        #pull-list f'd up the date by putting '15' instead of '2015' causing 500 server errors
+        if '-' in latestdate[:3]:
+            st_date = latestdate.find('-')
+            st_remainder = latestdate[st_date+1:]
+            st_year = latestdate[:st_date]
+            year = '20' + st_year
+            latestdate = str(year) + '-' + str(st_remainder)
+            #logger.fdebug('year set to: ' + latestdate)
+        c_date = datetime.date(int(latestdate[:4]), int(latestdate[5:7]), 1)
+        n_date = datetime.date.today()
+        recentchk = (n_date - c_date).days
+        if comic['NewPublish'] is True:
+            recentstatus = 'Continuing'
+        else:
+            #do this just incase and as an extra measure of accuracy hopefully.
+            if recentchk < 55:
                 recentstatus = 'Continuing'
-            elif 'present' in comic['ComicPublished'].lower() or (today()[:4] in comic['LatestDate']):
-                latestdate = comic['LatestDate']
-                #pull-list f'd up the date by putting '15' instead of '2015' causing 500 server errors
-                if '-' in latestdate[:3]:
-                    st_date = latestdate.find('-')
-                    st_remainder = latestdate[st_date+1:]
-                    st_year = latestdate[:st_date]
-                    year = '20' + st_year
-                    latestdate = str(year) + '-' + str(st_remainder)
-                    #logger.fdebug('year set to: ' + latestdate)
-                c_date = datetime.date(int(latestdate[:4]), int(latestdate[5:7]), 1)
-                n_date = datetime.date.today()
-                recentchk = (n_date - c_date).days
-                if comic['NewPublish'] is True:
-                    recentstatus = 'Continuing'
-                else:
-                    #do this just incase and as an extra measure of accuracy hopefully.
-                    if recentchk < 55:
-                        recentstatus = 'Continuing'
-                    else:
-                        recentstatus = 'Ended'
             else:
                 recentstatus = 'Ended'
+    else:
+        recentstatus = 'Ended'
 
-            if recentstatus == 'Loading':
-                cpub = comic['ComicPublished']
-            else:
-                try:
-                    cpub = re.sub('(N)', '', comic['ComicPublished']).strip()
-                except Exception as e:
-                    logger.warn('[Error: %s] No Publisher found for %s - you probably want to Refresh the series when you get a chance.' % (e, comic['ComicName']))
-                    cpub = None
-
-            comictype = comic['Type']
-            try:
-                if (any([comictype == 'None', comictype is None, comictype == 'Print']) and all([comic['Corrected_Type'] != 'TPB', comic['Corrected_Type'] != 'GN', comic['Corrected_Type'] != 'HC'])) or all([comic['Corrected_Type'] is not None, comic['Corrected_Type'] == 'Print']):
-                    comictype = None
-                else:
-                    if comic['Corrected_Type'] is not None:
-                        comictype = comic['Corrected_Type']
-                    else:
-                        comictype = comictype
-            except:
-                comictype = None
+    if recentstatus == 'Loading':
+        cpub = comic['ComicPublished']
+    else:
+        try:
+            cpub = re.sub('(N)', '', comic['ComicPublished']).strip()
+        except Exception as e:
+            logger.warn('[Error: %s] No Publisher found for %s - you probably want to Refresh the series when you get a chance.' % (e, comic['ComicName']))
+            cpub = None
 
-            if any([comic['ComicVersion'] == None, comic['ComicVersion'] == 'None', comic['ComicVersion'] == '']):
-                cversion = None
+    comictype = comic['Type']
+    try:
+        if (any([comictype == 'None', comictype is None, comictype == 'Print']) and all([comic['Corrected_Type'] != 'TPB', comic['Corrected_Type'] != 'GN', comic['Corrected_Type'] != 'HC'])) or all([comic['Corrected_Type'] is not None, comic['Corrected_Type'] == 'Print']):
+            comictype = None
+        else:
+            if comic['Corrected_Type'] is not None:
+                comictype = comic['Corrected_Type']
             else:
-                cversion = comic['ComicVersion']
+                comictype = comictype
+    except:
+        comictype = None
 
-            if comic['ComicImage'] is None:
-                comicImage = 'cache/%s.jpg' % comic['ComicID']
-            else:
-                comicImage = comic['ComicImage']
-
-
-            comics.append({"ComicID":         comic['ComicID'],
-                           "ComicName":       comic['ComicName'],
-                           "ComicSortName":   comic['ComicSortName'],
-                           "ComicPublisher":  comic['ComicPublisher'],
-                           "ComicYear":       comic['ComicYear'],
-                           "ComicImage":      comicImage,
-                           "LatestIssue":     comic['LatestIssue'],
-                           "LatestDate":      comic['LatestDate'],
-                           "ComicVolume":     cversion,
-                           "ComicPublished":  cpub,
-                           "PublisherImprint": comic['PublisherImprint'],
-                           "Status":          comic['Status'],
-                           "recentstatus":    recentstatus,
-                           "percent":         percent,
-                           "totalissues":     totalissues,
-                           "haveissues":      haveissues,
-                           "DateAdded":       comic['LastUpdated'],
-                           "Type":            comic['Type'],
-                           "Corrected_Type":  comic['Corrected_Type'],
-                           "displaytype":     comictype})
-        return comics
+    if any([comic['ComicVersion'] == None, comic['ComicVersion'] == 'None', comic['ComicVersion'] == '']):
+        cversion = None
+    else:
+        cversion = comic['ComicVersion']
+
+    if comic['ComicImage'] is None:
+        comicImage = 'cache/%s.jpg' % comic['ComicID']
+    else:
+        comicImage = comic['ComicImage']
+
+
+    return {"ComicID":         comic['ComicID'],
+            "ComicName":       comic['ComicName'],
+            "ComicSortName":   comic['ComicSortName'],
+            "ComicPublisher":  comic['ComicPublisher'],
+            "ComicYear":       comic['ComicYear'],
+            "ComicImage":      comicImage,
+            "LatestIssue":     comic['LatestIssue'],
+            "LatestDate":      comic['LatestDate'],
+            "ComicVolume":     cversion,
+            "ComicPublished":  cpub,
+            "PublisherImprint": comic['PublisherImprint'],
+            "Status":          comic['Status'],
+            "recentstatus":    recentstatus,
+            "percent":         percent,
+            "totalissues":     totalissues,
+            "haveissues":      haveissues,
+            "DateAdded":       comic['LastUpdated'],
+            "Type":            comic['Type'],
+            "Corrected_Type":  comic['Corrected_Type'],
+            "displaytype":     comictype}
 
 def filesafe(comic):
     import unicodedata
@@ -2156,6 +2176,12 @@ def duplicate_filecheck(filename, ComicID=None, IssueID=None, StoryArcID=None, r
 
     series = myDB.selectone("SELECT * FROM comics WHERE ComicID=?", [dupchk['ComicID']]).fetchone()
 
+    #the same content filed under a different issue (or series) is worth a mention, but it's not what decides this.
+    new_fp = fingerprint.get(filename, store=False)
+    for match in fingerprint.matches(new_fp):
+        if all([match['IssueID'] is not None, match['IssueID'] != IssueID, os.path.isfile(match['Location'])]):
+            logger.warn('[DUPECHECK] %s has the same content as %s (ComicID: %s / IssueID: %s) which is already in the library.' % (filename, match['Location'], match['ComicID'], match['IssueID']))
+
     #if it's a retry and the file was already snatched, the status is Snatched and won't hit the dupecheck.
     #rtnval will be one of 3: 
     #'write' - write new file
@@ -2200,6 +2226,18 @@ def duplicate_filecheck(filename, ComicID=None, IssueID=None, StoryArcID=None, r
         else:
             logger.info('[DUPECHECK] Existing file within db :' + dupchk['Location'] + ' has a filesize of : ' + str(dupsize) + ' bytes.')
 
+            #byte for byte the same file - nothing to gain from the new one. The same pages in a different container
+            #or with different tags is still left to the duplication preferences below (cbr / cbz, filesize).
+            existing = os.path.join(series['ComicLocation'], dupchk['Location'])
+            if all([int(dupsize) != 0, os.path.isfile(existing)]):
+                existing_fp = fingerprint.get(existing, comicid=dupchk['ComicID'], issueid=dupchk['IssueID'])
+                if fingerprint.identical(new_fp, existing_fp):
+                    logger.info('[DUPECHECK] [#' + dupchk['Issue_Number'] + '] Newly scanned in file is identical to the existing file - retaining : ' + dupchk['Location'])
+                    return {'action':  "dupe_file",
+                            'to_dupe': filename}
+                elif fingerprint.same_content(new_fp, existing_fp):
+                    logger.info('[DUPECHECK] [#' + dupchk['Issue_Number'] + '] Newly scanned in file has the same pages as the existing file (different tags / container) - deciding on the duplication preferences.')
+
             #keywords to force keep / delete
             #this will be eventually user-controlled via the GUI once the options are enabled.
 
@@ -2443,6 +2481,8 @@ def crc(filename):
 
     #speed in lieu of memory (file into memory entirely)
     #return "%X" % (zlib.crc32(open(filename, "rb").read()) & 0xFFFFFFFF)
+
+    #this identifies the path (it's what snatched.crc is matched against) - content fingerprints are in mylar.fingerprint.
     try:
        filename = filename.encode(mylar.SYS_ENCODING)
     except UnicodeEncodeError:
@@ -2619,6 +2659,7 @@ def updatearc_locs(storyarcid, issues):
     tmpsql = "SELECT a.comicid, a.comiclocation, b.comicid, b.status, b.issueid, b.location FROM comics as a INNER JOIN issues as b ON a.comicid = b.comicid WHERE b.issueid in ({seq})".format(seq=','.join(['?'] *(len(issuelist))))
     chkthis = myDB.select(tmpsql, issuelist)
     update_iss = []
+    transfers = []
     if chkthis is None:
         return
     else:
@@ -2685,15 +2726,9 @@ def updatearc_locs(storyarcid, issues):
 
                     if not os.path.isfile(pathdst):
                         logger.info('[' + mylar.CONFIG.ARC_FILEOPS.upper() + '] ' + pathsrc + ' into directory : ' + pathdst)
-
-                        try:
-                            #need to ensure that src is pointing to the series in order to do a soft/hard-link properly
-                            fileoperation = file_ops(pathsrc, pathdst, arc=True)
-                            if not fileoperation:
-                                raise OSError
-                        except (OSError, IOError):
-                            logger.fdebug('[' + mylar.CONFIG.ARC_FILEOPS.upper() + '] Failure ' + pathsrc + ' - check directories and manually re-run.')
-                            continue
+                        #need to ensure that src is pointing to the series in order to do a soft/hard-link properly
+                        transfers.append((pathsrc, pathdst, chk['IssueID']))
+                        continue
                     updateloc = pathdst
                 else:
                     updateloc = pathsrc
@@ -2701,6 +2736,15 @@ def updatearc_locs(storyarcid, issues):
                 update_iss.append({'IssueID':    chk['IssueID'],
                                    'Location':   updateloc})
 
+    #the arc's files are copied / linked side by side once everything's been worked out.
+    results = file_ops_many([(pathsrc, pathdst) for pathsrc, pathdst, issueid in transfers], arc=True)
+    for (pathsrc, pathdst, issueid), fileoperation in zip(transfers, results):
+        if not fileoperation:
+            logger.fdebug('[' + mylar.CONFIG.ARC_FILEOPS.upper() + '] Failure ' + pathsrc + ' - check directories and manually re-run.')
+            continue
+        update_iss.append({'IssueID':    issueid,
+                           'Location':   pathdst})
+
     for ui in update_iss:
         logger.info(ui['IssueID'] + ' to update location to: ' + ui['Location'])
         myDB.upsert("storyarcs", {'Location': ui['Location']}, {'IssueID': ui['IssueID'], 'StoryArcID': storyarcid})
@@ -3118,204 +3162,256 @@ def latestissue_update():
                 continue
 
 def ddl_downloader(queue):
-    myDB = db.DBConnection()
+    #dispatches the DDL queue onto DDL_WORKERS downloaders, with at most DDL_HOST_LIMIT of them on any one host.
+    worker = jobqueue.register('DDL-QUEUE', queue)
+    gate = jobqueue.KeyedGate(mylar.DDL_LOCK)
+    pool = ThreadPoolExecutor(max_workers=ddltransfer.workers(), thread_name_prefix='DDL')
     while True:
-        if mylar.DDL_LOCK is True:
-            time.sleep(5)
-
-        elif mylar.DDL_LOCK is False and queue.qsize() >= 1:
-            item = queue.get(True)
-            if item == 'exit':
-                logger.info('Cleaning up workers for shutdown')
-                break
-            logger.info('Now loading request from DDL queue: %s' % item['series'])
-
-            #write this to the table so we have a record of what's going on.
-            ctrlval = {'id':      item['id']}
-            val = {'status':       'Downloading',
-                   'updated_date': datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}
-            myDB.upsert('ddl_info', val, ctrlval)
-
-            ddz = getcomics.GC()
-            ddzstat = ddz.downloadit(item['id'], item['link'], item['mainlink'], item['resume'])
-
-            if ddzstat['success'] is True:
-                tdnow = datetime.datetime.now()
-                nval = {'status':  'Completed',
-                        'updated_date': tdnow.strftime('%Y-%m-%d %H:%M')}
-                myDB.upsert('ddl_info', nval, ctrlval)
-
-            if all([ddzstat['success'] is True, mylar.CONFIG.POST_PROCESSING is True]):
-                try:
-                    if ddzstat['filename'] is None:
-                        logger.info('%s successfully downloaded - now initiating post-processing for %s.' % (os.path.basename(ddzstat['path']), ddzstat['path']))
-                        mylar.PP_QUEUE.put({'nzb_name':     os.path.basename(ddzstat['path']),
-                                            'nzb_folder':   ddzstat['path'],
-                                            'failed':       False,
-                                            'issueid':      None,
-                                            'comicid':      item['comicid'],
-                                            'apicall':      True,
-                                            'ddl':          True,
-                                            'download_info': {'provider': 'DDL', 'id': item['id']}})
-                    else:
-                        logger.info('%s successfully downloaded - now initiating post-processing for %s' % (ddzstat['filename'], ddzstat['path']))
-                        mylar.PP_QUEUE.put({'nzb_name':     ddzstat['filename'],
-                                            'nzb_folder':   ddzstat['path'],
-                                            'failed':       False,
-                                            'issueid':      item['issueid'],
-                                            'comicid':      item['comicid'],
-                                            'apicall':      True,
-                                            'ddl':          True,
-                                            'download_info': {'provider': 'DDL', 'id': item['id']}})
-                except Exception as e:
-                    logger.error('process error: %s [%s]' %(e, ddzstat))
-            elif all([ddzstat['success'] is True, mylar.CONFIG.POST_PROCESSING is False]):
-                logger.info('File successfully downloaded. Post Processing is not enabled - item retained here: %s' % os.path.join(ddzstat['path'],ddzstat['filename']))
+        item = worker.get()
+        if item == 'exit':
+            logger.info('Cleaning up workers for shutdown')
+            break
+        #the same queue entry twice (eg. resumed while it's still running) waits for the first to finish.
+        if gate.claim(item['id'], item):
+            pool.submit(ddl_download_item, gate, item)
+    pool.shutdown(wait=False)
+
+def ddl_download_item(gate, item):
+    key = item['id']
+    while item is not None:
+        try:
+            with ddltransfer.host_slot(item['link']):
+                ddl_download(item)
+        except Exception as e:
+            logger.error('[DDL-QUEUE] Error downloading %s: %s' % (item['series'], e))
+        finally:
+            item = gate.release(key)
+
+def ddl_download(item):
+    myDB = db.DBConnection()
+    logger.info('Now loading request from DDL queue: %s' % item['series'])
+
+    #write this to the table so we have a record of what's going on.
+    ctrlval = {'id':      item['id']}
+    val = {'status':       'Downloading',
+           'updated_date': datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}
+    myDB.upsert('ddl_info', val, ctrlval)
+
+    ddz = getcomics.GC()
+    ddzstat = ddz.downloadit(item['id'], item['link'], item['mainlink'], item['resume'])
+
+    if ddzstat['success'] is True:
+        tdnow = datetime.datetime.now()
+        nval = {'status':  'Completed',
+                'updated_date': tdnow.strftime('%Y-%m-%d %H:%M')}
+        myDB.upsert('ddl_info', nval, ctrlval)
+
+    if all([ddzstat['success'] is True, mylar.CONFIG.POST_PROCESSING is True]):
+        try:
+            if ddzstat['filename'] is None:
+                logger.info('%s successfully downloaded - now initiating post-processing for %s.' % (os.path.basename(ddzstat['path']), ddzstat['path']))
+                mylar.PP_QUEUE.put({'nzb_name':     os.path.basename(ddzstat['path']),
+                                    'nzb_folder':   ddzstat['path'],
+                                    'failed':       False,
+                                    'issueid':      None,
+                                    'comicid':      item['comicid'],
+                                    'apicall':      True,
+                                    'ddl':          True,
+                                    'download_info': {'provider': 'DDL', 'id': item['id']}})
             else:
-                logger.info('[Status: %s] Failed to download: %s ' % (ddzstat['success'], ddzstat))
-                nval = {'status':  'Failed',
-                        'updated_date': datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}
-                myDB.upsert('ddl_info', nval, ctrlval)
+                logger.info('%s successfully downloaded - now initiating post-processing for %s' % (ddzstat['filename'], ddzstat['path']))
+                mylar.PP_QUEUE.put({'nzb_name':     ddzstat['filename'],
+                                    'nzb_folder':   ddzstat['path'],
+                                    'failed':       False,
+                                    'issueid':      item['issueid'],
+                                    'comicid':      item['comicid'],
+                                    'apicall':      True,
+                                    'ddl':          True,
+                                    'download_info': {'provider': 'DDL', 'id': item['id']}})
+        except Exception as e:
+            logger.error('process error: %s [%s]' %(e, ddzstat))
+    elif all([ddzstat['success'] is True, mylar.CONFIG.POST_PROCESSING is False]):
+        logger.info('File successfully downloaded. Post Processing is not enabled - item retained here: %s' % os.path.join(ddzstat['path'],ddzstat['filename']))
+    else:
+        logger.info('[Status: %s] Failed to download: %s ' % (ddzstat['success'], ddzstat))
+        nval = {'status':  'Failed',
+                'updated_date': datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}
+        myDB.upsert('ddl_info', nval, ctrlval)
+
+def pp_workers():
+    if mylar.CONFIG.PP_WORKERS is None or mylar.CONFIG.PP_WORKERS < 1:
+        return 1
+    return mylar.CONFIG.PP_WORKERS
+
+def pp_series_key(item):
+    #items for the same series are never post-processed side by side (they'd race on the ComicLocation and the
+    #issues rows), so each item is keyed on the series it belongs to - the same DynamicComicName the
+    #post-processor matches files against.
+    myDB = db.DBConnection()
+    dynamic_name = None
+    if item.get('comicid') is not None:
+        chk = myDB.selectone('SELECT DynamicComicName FROM comics WHERE ComicID=?', [item['comicid']]).fetchone()
+        if chk is not None:
+            dynamic_name = chk['DynamicComicName']
+    if dynamic_name is None and item.get('issueid') is not None:
+        chk = myDB.selectone('SELECT c.DynamicComicName FROM issues AS i INNER JOIN comics AS c ON i.ComicID = c.ComicID WHERE i.IssueID=?', [item['issueid']]).fetchone()
+        if chk is not None:
+            dynamic_name = chk['DynamicComicName']
+    if dynamic_name is None and item.get('nzb_name') is not None:
+        try:
+            parsedinfo = mylar.filechecker.FileChecker(justparse=True, file=item['nzb_name']).listFiles()
+        except Exception as e:
+            logger.fdebug('[POST-PROCESS-QUEUE] Unable to parse %s for the series name: %s' % (item['nzb_name'], e))
         else:
-            time.sleep(5)
+            if parsedinfo['parse_status'] == 'success':
+                dynamic_name = parsedinfo['dynamic_name']
+    if dynamic_name is None:
+        #nothing to go on - it can only clash with itself.
+        return 'folder:%s' % os.path.join(item.get('nzb_folder') or '', item.get('nzb_name') or '')
+    return 'series:%s' % re.sub('[\|\s]', '', dynamic_name.lower()).strip()
 
 def postprocess_main(queue):
+    #dispatches the post-processing queue onto a pool of PP_WORKERS post-processors - different series are run
+    #in parallel, items for a series that's already being processed wait for it and then run in queued order.
+    worker = jobqueue.register('POST-PROCESS-QUEUE', queue)
+    gate = mylar.PP_GATE
+    pool = ThreadPoolExecutor(max_workers=pp_workers(), thread_name_prefix='POST-PROCESS')
+    logger.info('[POST-PROCESS-QUEUE] Post-processing with %s worker(s)' % pp_workers())
     while True:
-        if mylar.APILOCK is True:
-            time.sleep(5)
-
-        elif mylar.APILOCK is False and queue.qsize() >= 1: #len(queue) > 1:
-            pp = None
-            item = queue.get(True)
-            logger.info('Now loading from post-processing queue: %s' % item)
-            if item == 'exit':
-                logger.info('Cleaning up workers for shutdown')
-                break
-
-            if mylar.APILOCK is False:
-                try:
-                    pprocess = process.Process(item['nzb_name'], item['nzb_folder'], item['failed'], item['issueid'], item['comicid'], item['apicall'], item['ddl'], item['download_info'])
-                except:
-                    pprocess = process.Process(item['nzb_name'], item['nzb_folder'], item['failed'], item['issueid'], item['comicid'], item['apicall'])
-                pp = pprocess.post_process()
-                time.sleep(5) #arbitrary sleep to let the process attempt to finish pp'ing
-
-            if pp is not None:
-                if pp['mode'] == 'stop':
-                    #reset the lock so any subsequent items can pp and not keep the queue locked up.
-                    mylar.APILOCK = False
-
-            if mylar.APILOCK is True:
-                logger.info('Another item is post-processing still...')
-                time.sleep(15)
-                #mylar.PP_QUEUE.put(item)
+        item = worker.get()
+        logger.info('Now loading from post-processing queue: %s' % item)
+        if item == 'exit':
+            logger.info('Cleaning up workers for shutdown')
+            break
+
+        key = pp_series_key(item)
+        if gate.claim(key, item):
+            pool.submit(postprocess_series, gate, key, item)
         else:
-            time.sleep(5)
+            logger.info('[POST-PROCESS-QUEUE] Another item for this series is post-processing still - %s will follow it.' % item['nzb_name'])
+    #anything already handed to the pool is left to finish.
+    pool.shutdown(wait=False)
+
+def postprocess_series(gate, key, item):
+    while item is not None:
+        try:
+            try:
+                pprocess = process.Process(item['nzb_name'], item['nzb_folder'], item['failed'], item['issueid'], item['comicid'], item['apicall'], item['ddl'], item['download_info'], wait=True, pooled=True)
+            except KeyError:
+                pprocess = process.Process(item['nzb_name'], item['nzb_folder'], item['failed'], item['issueid'], item['comicid'], item['apicall'], wait=True, pooled=True)
+            pprocess.post_process()
+        except Exception as e:
+            logger.error('[POST-PROCESS-QUEUE] Error post-processing %s: %s' % (item, e))
+        finally:
+            item = gate.release(key)
 
 def search_queue(queue):
+    worker = jobqueue.register('SEARCH-QUEUE', queue, mylar.SEARCHLOCK)
     while True:
-        if mylar.SEARCHLOCK is True:
-            time.sleep(5)
-
-        elif mylar.SEARCHLOCK is False and queue.qsize() >= 1: #len(queue) > 1:
-            item = queue.get(True)
-            if item == 'exit':
-                logger.info('[SEARCH-QUEUE] Cleaning up workers for shutdown')
-                break
-
-            logger.info('[SEARCH-QUEUE] Now loading item from search queue: %s' % item)
-            if mylar.SEARCHLOCK is False:
-                ss_queue = mylar.search.searchforissue(item['issueid'])
-                time.sleep(5) #arbitrary sleep to let the process attempt to finish pp'ing
-
-            if mylar.SEARCHLOCK is True:
-                logger.fdebug('[SEARCH-QUEUE] Another item is currently being searched....')
-                time.sleep(15)
+        item = worker.get()
+        if item == 'exit':
+            logger.info('[SEARCH-QUEUE] Cleaning up workers for shutdown')
+            break
+
+        logger.info('[SEARCH-QUEUE] Now loading item from search queue: %s' % item)
+        #searches queued by the scheduled sweep give way to interactive ones (eg. on the CV request pacing).
+        runqueue.set_priority(runqueue.SCHEDULED if item.get('scheduled') else runqueue.INTERACTIVE)
+        if item.get('backlog'):
+            ss_queue = mylar.search.search_backlog(item)
         else:
-            time.sleep(5)
+            ss_queue = mylar.search.searchforissue(item['issueid'], cached=item.get('scheduled', False))
+            if isinstance(ss_queue, dict) and ss_queue.get('status') == 'IN PROGRESS':
+                #an rss scan grabbed the search lock first - the worker waits for it to clear before trying again.
+                queue.put(item)
 
 
 def worker_main(queue):
+    worker = jobqueue.register('AUTO-SNATCHER', queue)
     while True:
-        if queue.qsize() >= 1:
-            item = queue.get(True)
-            logger.info('Now loading from queue: %s' % item)
-            if item == 'exit':
-                logger.info('Cleaning up workers for shutdown')
-                break
-            snstat = torrentinfo(torrent_hash=item['hash'], download=True)
-            if snstat['snatch_status'] == 'IN PROGRESS':
-                logger.info('Still downloading in client....let us try again momentarily.')
-                time.sleep(30)
-                mylar.SNATCHED_QUEUE.put(item)
-            elif any([snstat['snatch_status'] == 'MONITOR FAIL', snstat['snatch_status'] == 'MONITOR COMPLETE']):
-                logger.info('File copied for post-processing - submitting as a direct pp.')
-                mylar.PP_QUEUE.put({'nzb_name':     os.path.basename(snstat['copied_filepath']),
-                                    'nzb_folder':   snstat['copied_filepath'], #os.path.abspath(os.path.join(snstat['copied_filepath'], os.pardir)),
-                                    'failed':       False,
-                                    'issueid':      item['issueid'],
-                                    'comicid':      item['comicid'],
-                                    'apicall':      True,
-                                    'ddl':          False,
-                                    'download_info': None})
-                #threading.Thread(target=self.checkFolder, args=[os.path.abspath(os.path.join(snstat['copied_filepath'], os.pardir))]).start()
-        else:
-            time.sleep(15)
+        item = worker.get()
+        logger.info('Now loading from queue: %s' % item)
+        if item == 'exit':
+            logger.info('Cleaning up workers for shutdown')
+            break
+        snstat = torrentinfo(torrent_hash=item['hash'], download=True)
+        if snstat['snatch_status'] == 'IN PROGRESS':
+            logger.info('Still downloading in client....let us try again momentarily.')
+            #the recheck is left to the timer so any other completed torrent isn't held up behind this one.
+            jobqueue.requeue_later(mylar.SNATCHED_QUEUE, item, 30)
+        elif any([snstat['snatch_status'] == 'MONITOR FAIL', snstat['snatch_status'] == 'MONITOR COMPLETE']):
+            logger.info('File copied for post-processing - submitting as a direct pp.')
+            mylar.PP_QUEUE.put({'nzb_name':     os.path.basename(snstat['copied_filepath']),
+                                'nzb_folder':   snstat['copied_filepath'], #os.path.abspath(os.path.join(snstat['copied_filepath'], os.pardir)),
+                                'failed':       False,
+                                'issueid':      item['issueid'],
+                                'comicid':      item['comicid'],
+                                'apicall':      True,
+                                'ddl':          False,
+                                'download_info': None})
+            #threading.Thread(target=self.checkFolder, args=[os.path.abspath(os.path.join(snstat['copied_filepath'], os.pardir))]).start()
+
+#queued on the nzb monitor by the timer whenever RETURN_THE_NZBQUEUE has items waiting on SABnzbd.
+NZB_RECHECK = 'recheck-paused'
 
 def nzb_monitor(queue):
+    worker = jobqueue.register('AUTO-COMPLETE-NZB', queue)
     while True:
-        if mylar.RETURN_THE_NZBQUEUE.qsize() >= 1:
-            if mylar.USE_SABNZBD is True:
-                # this checks the sabnzbd queue to see if it's paused / unpaused.
-                sab_params = {
-                    'apikey': mylar.CONFIG.SAB_APIKEY,
-                    'mode': 'queue',
-                    'start': 0,
-                    'limit': 5,
-                    'search': None,
-                    'output': 'json',
-                }
-                s = sabnzbd.SABnzbd(params=sab_params)
-                sabresponse = s.sender(chkstatus=True)
-                # response will be: Paused = True, UnPaused = False
-                if sabresponse['status'] is False:
-                    while True:
-                        if mylar.RETURN_THE_NZBQUEUE.qsize() >= 1:
-                            qu_retrieve = mylar.RETURN_THE_NZBQUEUE.get(True)
-                            try:
-                                nzstat = s.historycheck(qu_retrieve)
-                                cdh_monitor(queue, qu_retrieve, nzstat, readd=True)
-                            except Exception as e:
-                                logger.error('Exception occured trying to re-add %s to queue: %s' % (qu_retrieve, e))
-                            time.sleep(5)
-                        else:
-                            break
-
-        if queue.qsize() >= 1:
-            item = queue.get(True)
-            if item == 'exit':
-                logger.info('Cleaning up workers for shutdown')
-                break
-            try:
-                tmp_apikey = item['queue'].pop('apikey')
-                logger.info('Now loading from queue: %s' % item)
-            except Exception:
-                #nzbget doesn't pass the queue field. So just let it fly.
-                logger.info('Now loading from queue: %s' % item)
-            else:
-                item['queue']['apikey'] = tmp_apikey
-            if all([mylar.USE_SABNZBD is True, mylar.CONFIG.SAB_CLIENT_POST_PROCESSING is True]):
-                nz = sabnzbd.SABnzbd(item)
-                nzstat = nz.processor()
-            elif all([mylar.USE_NZBGET is True, mylar.CONFIG.NZBGET_CLIENT_POST_PROCESSING is True]):
-                nz = nzbget.NZBGet()
-                nzstat = nz.processor(item)
-            else:
-                logger.warn('There are no NZB Completed Download handlers enabled. Not sending item to completed download handling...')
-                break
-            cdh_monitor(queue, item, nzstat)
+        item = worker.get()
+        if item == 'exit':
+            logger.info('Cleaning up workers for shutdown')
+            break
+        if item == NZB_RECHECK:
+            return_the_nzbqueue(queue)
+            continue
+        try:
+            tmp_apikey = item['queue'].pop('apikey')
+            logger.info('Now loading from queue: %s' % item)
+        except Exception:
+            #nzbget doesn't pass the queue field. So just let it fly.
+            logger.info('Now loading from queue: %s' % item)
         else:
-            time.sleep(5)
+            item['queue']['apikey'] = tmp_apikey
+        if all([mylar.USE_SABNZBD is True, mylar.CONFIG.SAB_CLIENT_POST_PROCESSING is True]):
+            nz = sabnzbd.SABnzbd(item)
+            nzstat = nz.processor()
+        elif all([mylar.USE_NZBGET is True, mylar.CONFIG.NZBGET_CLIENT_POST_PROCESSING is True]):
+            nz = nzbget.NZBGet()
+            nzstat = nz.processor(item)
+        else:
+            logger.warn('There are no NZB Completed Download handlers enabled. Not sending item to completed download handling...')
+            break
+        cdh_monitor(queue, item, nzstat)
+
+def return_the_nzbqueue(queue):
+    if mylar.RETURN_THE_NZBQUEUE.qsize() < 1:
+        return
+    if mylar.USE_SABNZBD is True:
+        # this checks the sabnzbd queue to see if it's paused / unpaused.
+        sab_params = {
+            'apikey': mylar.CONFIG.SAB_APIKEY,
+            'mode': 'queue',
+            'start': 0,
+            'limit': 5,
+            'search': None,
+            'output': 'json',
+        }
+        s = sabnzbd.SABnzbd(params=sab_params)
+        sabresponse = s.sender(chkstatus=True)
+        # response will be: Paused = True, UnPaused = False
+        if sabresponse['status'] is False:
+            #only what's waiting right now - anything re-added while in staging gets another look on the next recheck.
+            for x in range(mylar.RETURN_THE_NZBQUEUE.qsize()):
+                qu_retrieve = mylar.RETURN_THE_NZBQUEUE.get(True)
+                try:
+                    nzstat = s.historycheck(qu_retrieve)
+                    cdh_monitor(queue, qu_retrieve, nzstat, readd=True)
+                except Exception as e:
+                    logger.error('Exception occured trying to re-add %s to queue: %s' % (qu_retrieve, e))
+            if mylar.RETURN_THE_NZBQUEUE.qsize() >= 1:
+                jobqueue.requeue_later(queue, NZB_RECHECK, 5, key=NZB_RECHECK)
+            return
+    if mylar.RETURN_THE_NZBQUEUE.qsize() >= 1:
+        jobqueue.requeue_later(queue, NZB_RECHECK, 30, key=NZB_RECHECK)
 
 
 def cdh_monitor(queue, item, nzstat, readd=False):
@@ -3338,11 +3434,10 @@ def cdh_monitor(queue, item, nzstat, readd=False):
         if mylar.USE_SABNZBD is True:
             logger.info('[PAUSED_SAB_QUEUE] adding %s to a temporary queue that will fire off when SABnzbd is unpaused' % item)
             mylar.RETURN_THE_NZBQUEUE.put(item)
+            jobqueue.requeue_later(queue, NZB_RECHECK, 30, key=NZB_RECHECK)
     elif nzstat['status'] is False:
         logger.info('Download %s failed. Requeue NZB to check later...' % known_nzb_id)
-        time.sleep(5)
-        if item not in queue.queue:
-            mylar.NZB_QUEUE.put(item)
+        jobqueue.call_later(5, requeue_nzb, queue, item)
     elif nzstat['status'] is True:
         if nzstat['failed'] is False:
             logger.info('File successfully downloaded - now initiating completed downloading handling.')
@@ -3361,6 +3456,10 @@ def cdh_monitor(queue, item, nzstat, readd=False):
             logger.error('process error: %s' % e)
     return
 
+def requeue_nzb(queue, item):
+    if item not in queue.queue:
+        mylar.NZB_QUEUE.put(item)
+
 def script_env(mode, vars):
     #mode = on-snatch, pre-postprocess, post-postprocess
     #var = dictionary containing variables to pass
@@ -3719,15 +3818,15 @@ def job_management(write=False, job=None, last_run_completed=None, current_run=N
                                         % (mylar.CONFIG.BACKFILL_TIMESPAN)
                                     )
                                 else:
-                                    nextrun_stamp = utctimestamp() + (int(mylar.DBUPDATE_INTERVAL) * 60)
+                                    nextrun_stamp = runqueue.next_run(int(mylar.DBUPDATE_INTERVAL))
                                 jobstore = jbst
                                 break
                             elif job == 'Auto-Search' and 'search' in jb.lower():
-                                nextrun_stamp = utctimestamp() + (mylar.CONFIG.SEARCH_INTERVAL * 60)
+                                nextrun_stamp = runqueue.next_run(mylar.CONFIG.SEARCH_INTERVAL)
                                 jobstore = jbst
                                 break
                             elif job == 'RSS Feeds' and 'rss' in jb.lower():
-                                nextrun_stamp = utctimestamp() + (int(mylar.CONFIG.RSS_CHECKINTERVAL) * 60)
+                                nextrun_stamp = runqueue.next_run(int(mylar.CONFIG.RSS_CHECKINTERVAL))
                                 mylar.SCHED_RSS_LAST = last_run_completed
                                 jobstore = jbst
                                 break
@@ -3736,16 +3835,16 @@ def job_management(write=False, job=None, last_run_completed=None, current_run=N
                                     wkt = 4
                                 else:
                                     wkt = 24
-                                nextrun_stamp = utctimestamp() + (wkt * 60 * 60)
+                                nextrun_stamp = runqueue.next_run(wkt * 60)
                                 mylar.SCHED_WEEKLY_LAST = last_run_completed
                                 jobstore = jbst
                                 break
                             elif job == 'Check Version' and 'version' in jb.lower():
-                                nextrun_stamp = utctimestamp() + (mylar.CONFIG.CHECK_GITHUB_INTERVAL * 60)
+                                nextrun_stamp = runqueue.next_run(mylar.CONFIG.CHECK_GITHUB_INTERVAL)
                                 jobstore = jbst
                                 break
                             elif job == 'Folder Monitor' and 'monitor' in jb.lower():
-                                nextrun_stamp = utctimestamp() + (int(mylar.CONFIG.DOWNLOAD_SCAN_INTERVAL) * 60)
+                                nextrun_stamp = runqueue.next_run(int(mylar.CONFIG.DOWNLOAD_SCAN_INTERVAL))
                                 jobstore = jbst
                                 break
 
@@ -3902,15 +4001,9 @@ def getImage(comicid, url, issueid=None, thumbnail_path=None):
 
     #if cover has '+' in url it's malformed, we need to replace '+' with '%20' to retrieve properly.
 
-    #new CV API restriction - one api request / second.(probably unecessary here, but it doesn't hurt)
-    if mylar.CONFIG.CVAPI_RATE is None or mylar.CONFIG.CVAPI_RATE < 2:
-        time.sleep(2)
-    else:
-        time.sleep(mylar.CONFIG.CVAPI_RATE)
-
     logger.info('Attempting to retrieve the comic image for series')
     try:
-        r = requests.get(url, params=None, stream=True, verify=mylar.CONFIG.CV_VERIFY, headers=mylar.CV_HEADERS)
+        r = cvclient.get_client().get(url, stream=True)
     except Exception as e:
         logger.warn('[ERROR: %s] Unable to download image from CV URL link: %s' % (e, url))
         coversize = 0
@@ -4291,15 +4384,69 @@ def statusChange(status_from, status_to, comicid=None, bulk=False, api=True):
     #upto.execute("UPDATE issues SET Status = ? WHERE (?)", [status_to, tmpsql])
 
 
+def verified_copy(path, dst_file, keep_stat=False, op='COPY'):
+    #copy path to dst_file (see filetransfer.copy) and, with VERIFY_FILE_OPS, check the copy against a fingerprint
+    #of the source - a copy that doesn't match is removed.
+    #a recorded fingerprint that's still current is used as is (and the copy can go through the kernel), otherwise
+    #the source is hashed while it's copied - either way the source is read once and the copy once.
+    #the size is checked whether or not VERIFY_FILE_OPS is on - a move removes the source on the strength of it.
+    try:
+        src_size = os.path.getsize(path)
+        src_fp = None
+        digest = None
+        if mylar.CONFIG.VERIFY_FILE_OPS:
+            src_fp = fingerprint.cached(path)
+            if src_fp is None:
+                src_st = os.stat(path)
+                digest = fingerprint.new_digest()
+        filetransfer.copy(path, dst_file, keep_stat=keep_stat, digest=digest)
+        if digest is not None:
+            src_fp = fingerprint.from_digest(path, src_st, digest)
+        dst_size = os.path.getsize(dst_file)
+    except Exception as e:
+        logger.error('[%s] error : %s' % (op, e))
+        return False
+    if dst_size != src_size:
+        logger.error('[%s] %s is %s bytes after copying - expected %s. Removing the bad copy.' % (op, dst_file, dst_size, src_size))
+        try:
+            os.remove(dst_file)
+        except OSError:
+            pass
+        return False
+    if not fingerprint.verify(src_fp, dst_file):
+        logger.error('[%s] %s did not copy over intact to %s - removing the bad copy.' % (op, path, dst_file))
+        try:
+            os.remove(dst_file)
+        except OSError:
+            pass
+        return False
+    return True
+
+def file_ops_many(pairs, arc=False, one_off=False):
+    #file_ops over a list of (path, dst) pairs, FILEOPS_WORKERS at a time. Returns the results in the same order.
+    if len(pairs) <= 1 or filetransfer.workers() <= 1:
+        return [file_ops(path, dst, arc=arc, one_off=one_off) for path, dst in pairs]
+    with ThreadPoolExecutor(max_workers=min(filetransfer.workers(), len(pairs)), thread_name_prefix='FILE-OPS') as executor:
+        return list(executor.map(lambda pair: file_ops(pair[0], pair[1], arc=arc, one_off=one_off), pairs))
+
 def file_ops(path,dst,arc=False,one_off=False):
 #    # path = source path + filename
 #    # dst = destination path + filename
 #    # arc = to denote if the file_operation is being performed as part of a story arc or not where the series exists on the watchlist already
 #    # one-off = if the file_operation is being performed where it is either going into the grabbab_dst or story arc folder
 
-#    #get the crc of the file prior to the operation and then compare after to ensure it's complete.
-#    crc_check = mylar.filechecker.crc(path)
-#    #will be either copy / move
+    #copies and cross-device moves are checked against a fingerprint of the file taken beforehand, so an
+    #incomplete transfer isn't mistaken for a good one (and on a move the source is only removed once it's checked).
+    if os.path.isdir(dst):
+        dst_file = os.path.join(dst, os.path.basename(path))
+    else:
+        dst_file = dst
+
+    #the source is already the destination (or a hardlink of it) - nothing to copy / move / link, and a copy would
+    #truncate the very file it's reading.
+    if os.path.exists(dst_file) and os.path.samefile(path, dst_file):
+        logger.warn('[FILE-OPS] %s and %s are the same file - leaving it as it is.' % (path, dst_file))
+        return False
 
     softlink_type = 'absolute'
 
@@ -4311,28 +4458,39 @@ def file_ops(path,dst,arc=False,one_off=False):
         action_op = mylar.CONFIG.FILE_OPTS
 
     if action_op == 'copy' or (arc is True and any([action_op == 'copy', action_op == 'move'])):
-        try:
-            shutil.copy( path , dst )
-#        if crc_check == mylar.filechecker.crc(dst):
-        except Exception as e:
-            logger.error('[%s] error : %s' % (action_op, e))
-            return False
-        return True
+        return verified_copy(path, dst_file, op=action_op)
 
     elif action_op == 'move':
         try:
-            shutil.move( path , dst )
-#        if crc_check == mylar.filechecker.crc(dst):
+            if filetransfer.same_device(path, dst_file):
+                shutil.move( path , dst )
+                fingerprint.moved(path, dst_file)
+                return True
         except Exception as e:
             logger.error('[MOVE] error : %s' % e)
             return False
+        #across filesystems it's a copy - the original is only removed once the copy's been checked.
+        if not verified_copy(path, dst_file, keep_stat=True, op='MOVE'):
+            logger.error('[MOVE] Leaving the original where it is: %s' % path)
+            return False
+        try:
+            os.remove( path )
+        except OSError as e:
+            logger.warn('[MOVE] Copied to %s but unable to remove the original: %s' % (dst_file, e))
+        fingerprint.forget(path)
         return True
 
     elif any([action_op == 'hardlink', action_op == 'softlink']):
         if 'windows' not in mylar.OS_DETECT.lower():
             # if it's an arc, then in needs to go reverse since we want to keep the src files (in the series directory)
             if action_op == 'hardlink':
-                import sys
+                #a hardlink can't cross filesystems - go straight to a copy for this file rather than waiting on the error.
+                if not filetransfer.same_device(path, dst_file):
+                    logger.fdebug('[HARDLINK] %s is on a different filesystem to %s - copying instead.' % (path, dst_file))
+                    if verified_copy(path, dst_file):
+                        logger.fdebug('Successfully copied file to : ' + dst)
+                        return True
+                    return False
 
                 # Open a file
                 try:
@@ -4345,13 +4503,10 @@ def file_ops(path,dst,arc=False,one_off=False):
                 except OSError as e:
                     if e.errno == errno.EXDEV:
                         logger.warn('[' + str(e) + '] Hardlinking failure. Could not create hardlink - dropping down to copy mode so that this operation can complete. Intervention is required if you wish to continue using hardlinks.')
-                        try:
-                            shutil.copy( path, dst )
-                            logger.fdebug('Successfully copied file to : ' + dst) 
+                        if verified_copy(path, dst_file):
+                            logger.fdebug('Successfully copied file to : ' + dst)
                             return True
-                        except Exception as e:
-                            logger.error('[COPY] error : %s' % e)
-                            return False
+                        return False
                     else:
                         logger.warn('[' + str(e) + '] Hardlinking failure. Could not create hardlink - Intervention is required if you wish to continue using hardlinks.')
                         return False
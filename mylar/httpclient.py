@@ -0,0 +1,124 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the
+#  implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public
+#  License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+# Shared http sessions for the outbound integrations (indexers, rss feeds, SABnzbd, pull-lists).
+# get() / post() are drop-in replacements for requests.get / requests.post - same arguments, same
+# responses and exceptions - but every host gets its own long-lived session, so connections are kept
+# alive between calls instead of paying for a new TCP/TLS handshake on every request.
+# ComicVine has its own pooled session in cvclient.
+
+import time
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import mylar
+from mylar import logger
+
+#matches the concurrent search fan-out (searchpool.POOL_SIZE) so a busy provider never has to open extra sockets.
+POOL_SIZE = 10
+
+_sessions = {}
+_metrics = {}
+_lock = threading.Lock()
+
+def _host(url):
+    parts = urlsplit(url)
+    return '%s://%s' % (parts.scheme.lower(), parts.netloc.lower())
+
+def retries():
+    if mylar.CONFIG.HTTP_RETRIES is None or mylar.CONFIG.HTTP_RETRIES < 0:
+        return 0
+    return mylar.CONFIG.HTTP_RETRIES
+
+def backoff():
+    if mylar.CONFIG.HTTP_RETRY_BACKOFF is None or mylar.CONFIG.HTTP_RETRY_BACKOFF < 0:
+        return 0
+    return mylar.CONFIG.HTTP_RETRY_BACKOFF
+
+def get_session(url):
+    host = _host(url)
+    with _lock:
+        if host not in _sessions:
+            #only connection failures / dropped reads are retried - status codes are left to the caller, as the
+            #callers already act on them (eg. disabling an indexer that returns a 503). urllib3 never retries a
+            #read on a non-idempotent method, so a POST can't be sent twice.
+            retry = Retry(total=retries(), connect=retries(), read=retries(), status=0, backoff_factor=backoff(), raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _sessions[host] = session
+            _metrics[host] = {'requests': 0, 'errors': 0, 'time': 0.0, 'slowest': 0.0, 'last_error': None}
+        return _sessions[host]
+
+def _record(host, elapsed, error=None):
+    with _lock:
+        m = _metrics.get(host)
+        if m is None:
+            return
+        m['requests'] += 1
+        m['time'] += elapsed
+        if elapsed > m['slowest']:
+            m['slowest'] = elapsed
+        if error is not None:
+            m['errors'] += 1
+            m['last_error'] = error
+
+def request(method, url, **kwargs):
+    session = get_session(url)
+    host = _host(url)
+    start = time.time()
+    try:
+        r = session.request(method, url, **kwargs)
+    except requests.exceptions.RequestException as e:
+        _record(host, time.time() - start, error=str(e))
+        raise
+    if r.status_code >= 500:
+        _record(host, time.time() - start, error='HTTP %s' % r.status_code)
+    else:
+        _record(host, time.time() - start)
+    return r
+
+def get(url, params=None, **kwargs):
+    return request('GET', url, params=params, **kwargs)
+
+def post(url, data=None, **kwargs):
+    return request('POST', url, data=data, **kwargs)
+
+def stats():
+    #per host: request / error counts and latency (seconds) - time-to-response, not including a streamed body.
+    with _lock:
+        results = {}
+        for host, m in _metrics.items():
+            results[host] = {'requests':   m['requests'],
+                             'errors':     m['errors'],
+                             'avg':        round(m['time'] / m['requests'], 3) if m['requests'] else 0,
+                             'slowest':    round(m['slowest'], 3),
+                             'last_error': m['last_error']}
+        return results
+
+def reset():
+    #drop every pooled connection - new sessions pick up any change to the retry settings.
+    with _lock:
+        for session in _sessions.values():
+            try:
+                session.close()
+            except Exception as e:
+                logger.fdebug('[HTTP-CLIENT] Error closing session: %s' % e)
+        _sessions.clear()
+        _metrics.clear()
@@ -32,7 +32,7 @@ import requests
 import threading
 
 import mylar
-from mylar import logger, filers, helpers, db, mb, cv, parseit, filechecker, search, updater, moveit, comicbookdb, series_metadata
+from mylar import logger, filers, helpers, db, mb, cv, parseit, filechecker, search, updater, moveit, comicbookdb, series_metadata, cvclient
 
 
 def is_exists(comicid):
@@ -761,11 +761,8 @@ def GCDimport(gcomicid, pullupd=None, imported=None, ogcname=None):
 
     coverfile = os.path.join(mylar.CONFIG.CACHE_DIR, str(gcomicid) + ".jpg")
 
-    #new CV API restriction - one api request / second.
-    if mylar.CONFIG.CVAPI_RATE is None or mylar.CONFIG.CVAPI_RATE < 2:
-        time.sleep(2)
-    else:
-        time.sleep(mylar.CONFIG.CVAPI_RATE)
+    #new CV API restriction - shares the rate budget with every other CV call.
+    cvclient.get_client().bucket.consume()
 
     urllib.request.urlretrieve(str(ComicImage), str(coverfile))
     try:
@@ -983,6 +980,8 @@ def issue_collection(issuedata, nostatus, serieslast_updated=None):
             if any([lastchkdate is None, lastchkdate == '0000-00-00']):
                 lastchkdate = isslastdate['ReleaseDate']
 
+        #every issue row is queued to the write-behind service and committed as a single transaction.
+        batch = db.WriteBatch()
         for issue in issuedata:
 
 
@@ -1050,13 +1049,19 @@ def issue_collection(issuedata, nostatus, serieslast_updated=None):
                 #logger.fdebug("Not changing the status at this time - reverting to previous module after to re-append existing status")
                 pass #newValueDict['Status'] = "Skipped"
 
-            try:
-                myDB.upsert(dbwrite, newValueDict, controlValueDict)
-            except sqlite3.InterfaceError as e:
-                #raise sqlite3.InterfaceError(e)
-                logger.error('Something went wrong - I cannot add the issue information into my DB.')
-                myDB.action("DELETE FROM comics WHERE ComicID=?", [issue['ComicID']])
-                return
+            batch.upsert(dbwrite, newValueDict, controlValueDict)
+
+        try:
+            batch.wait()
+        except sqlite3.InterfaceError as e:
+            #raise sqlite3.InterfaceError(e)
+            logger.error('Something went wrong - I cannot add the issue information into my DB.')
+            myDB.action("DELETE FROM comics WHERE ComicID=?", [issuedata[0]['ComicID']])
+            return
+        except db.WriteTimeout:
+            #the writes may still land - leave the series be so the next refresh can finish it off.
+            logger.error('Timed out writing the issue information for %s into my DB.' % issuedata[0]['ComicID'])
+            return
 
 
 def manualAnnual(manual_comicid=None, comicname=None, comicyear=None, comicid=None, annchk=None, manualupd=False, deleted=False):
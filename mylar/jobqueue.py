@@ -0,0 +1,293 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the
+#  implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public
+#  License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+# Plumbing for the background queue workers in helpers (post-processing, search, DDL, auto-snatch, nzb monitor).
+# Workers block on their queue and on the busy flag they care about instead of sleeping and re-checking,
+# so an item is picked up the moment it's queued and the moment the flag is cleared. Anything that has to be
+# looked at again later (a torrent still downloading, a paused SABnzbd queue) is handed to the timer thread
+# rather than holding the worker up.
+
+import collections
+import contextlib
+import heapq
+import itertools
+import queue
+import threading
+import time
+
+import mylar
+from mylar import logger, runqueue, cbrconvert, filetransfer
+
+_workers = {}
+_workers_lock = threading.Lock()
+
+_timers = []
+_timer_keys = set()
+_timer_seq = itertools.count()
+_timer_cond = threading.Condition()
+_timer_thread = None
+
+
+class BusyFlag(object):
+    #replaces the old True/False lock globals (APILOCK, SEARCHLOCK, DDL_LOCK) - same meaning, but anyone waiting
+    #on it is woken up as soon as it's cleared.
+
+    def __init__(self, name):
+        self.name = name
+        self.since = None
+        self._busy = False
+        self._cond = threading.Condition()
+
+    def is_set(self):
+        return self._busy
+
+    def set(self):
+        with self._cond:
+            self._busy = True
+            self.since = time.time()
+
+    def acquire(self):
+        #set the flag only if nobody else has - returns False if it was already set.
+        with self._cond:
+            if self._busy:
+                return False
+            self._busy = True
+            self.since = time.time()
+            return True
+
+    def clear(self):
+        with self._cond:
+            self._busy = False
+            self.since = None
+            self._cond.notify_all()
+
+    def wait_clear(self, timeout=None):
+        #True once the flag is clear, False if the timeout ran out first.
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._busy, timeout)
+
+    def __repr__(self):
+        return '<BusyFlag %s: %s>' % (self.name, 'busy' if self._busy else 'clear')
+
+
+class PriorityJobQueue(queue.Queue):
+    #a drop-in queue.Queue that hands out interactive items before anything queued by a scheduled job
+    #('scheduled': True), and otherwise keeps queued order. 'exit' always goes to the front.
+
+    def _init(self, maxsize):
+        self.queue = []
+        self._seq = itertools.count()
+
+    def _qsize(self):
+        return len(self.queue)
+
+    def _put(self, item):
+        if item == 'exit':
+            prio = -1
+        elif isinstance(item, dict) and item.get('scheduled'):
+            prio = runqueue.SCHEDULED
+        else:
+            prio = runqueue.INTERACTIVE
+        heapq.heappush(self.queue, (prio, next(self._seq), item))
+
+    def _get(self):
+        return heapq.heappop(self.queue)[2]
+
+
+class Worker(object):
+    #the state of one queue worker - what it's doing and how much it's done, for status().
+
+    def __init__(self, name, queue, flag=None):
+        self.name = name
+        self.queue = queue
+        self.flag = flag
+        self.state = 'starting'
+        self.item = None
+        self.started = None
+        self.processed = 0
+        self.errors = 0
+
+    def get(self):
+        #blocks until there's an item, then until the worker's busy flag is clear. 'exit' is always handed
+        #back straight away so a shutdown is never held up by a stuck flag.
+        if self.item is not None:
+            self.processed += 1
+        self.state = 'idle'
+        self.item = None
+        self.started = None
+        item = self.queue.get(True)
+        if item == 'exit':
+            self.state = 'stopped'
+            return item
+        self.item = item
+        if self.flag is not None and self.flag.is_set():
+            self.state = 'waiting'
+            self.flag.wait_clear()
+        self.state = 'working'
+        self.started = time.time()
+        return item
+
+    def failed(self):
+        self.errors += 1
+
+    def status(self):
+        return {'name':      self.name,
+                'state':     self.state,
+                'queued':    self.queue.qsize(),
+                'item':      _describe(self.item),
+                'running':   round(time.time() - self.started, 1) if self.started is not None else None,
+                'processed': self.processed,
+                'errors':    self.errors,
+                'flag':      self.flag.name if self.flag is not None else None}
+
+
+class KeyedGate(object):
+    #one job per key at a time. A job for a key that's already running is parked and handed over to whoever
+    #holds the key once they're done, so jobs for the same key still run in the order they were queued.
+    #exclusive() is for work that could touch any key - it waits for every key to be released and holds off any
+    #new claim until it's done. The optional busy flag is kept set for as long as anything is held.
+
+    def __init__(self, flag=None):
+        self.flag = flag
+        self._cond = threading.Condition()
+        self._held = {}
+        self._exclusive = False
+        self._exclusive_waiting = 0
+
+    def claim(self, key, job):
+        #True if the caller now holds the key and should run the job - False if it was parked. Blocks while
+        #anything exclusive is running or waiting to.
+        with self._cond:
+            self._cond.wait_for(lambda: not self._exclusive and not self._exclusive_waiting)
+            if key in self._held:
+                self._held[key].append(job)
+                return False
+            self._held[key] = collections.deque()
+            if self.flag is not None:
+                self.flag.set()
+            return True
+
+    def release(self, key):
+        #the next parked job for the key (the caller keeps holding it), or None once there's nothing left.
+        with self._cond:
+            parked = self._held.get(key)
+            if parked:
+                return parked.popleft()
+            self._held.pop(key, None)
+            self._idle()
+            return None
+
+    @contextlib.contextmanager
+    def exclusive(self):
+        with self._cond:
+            self._exclusive_waiting += 1
+            try:
+                self._cond.wait_for(lambda: not self._held and not self._exclusive)
+            finally:
+                self._exclusive_waiting -= 1
+            self._exclusive = True
+            if self.flag is not None:
+                self.flag.set()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._exclusive = False
+                self._idle()
+
+    def _idle(self):
+        #with _cond held.
+        if not self._held and not self._exclusive:
+            if self.flag is not None:
+                self.flag.clear()
+        self._cond.notify_all()
+
+    def active(self):
+        with self._cond:
+            return len(self._held) + (1 if self._exclusive else 0)
+
+    def parked(self):
+        with self._cond:
+            return sum(len(p) for p in self._held.values())
+
+
+def _describe(item):
+    if item is None:
+        return None
+    if isinstance(item, dict):
+        for k in ('nzb_name', 'series', 'issueid', 'hash', 'nzo_id', 'NZBID'):
+            if item.get(k) is not None:
+                return str(item[k])
+    return str(item)
+
+def register(name, queue, flag=None):
+    #called at the top of each worker loop - a restarted worker replaces the old entry.
+    worker = Worker(name, queue, flag)
+    with _workers_lock:
+        _workers[name] = worker
+    return worker
+
+def call_later(delay, func, *args, **kwargs):
+    #run func(*args) on the timer thread after delay seconds. If key is given and a call with the same key
+    #is already pending, nothing is scheduled and False is returned.
+    global _timer_thread
+    key = kwargs.pop('key', None)
+    with _timer_cond:
+        if key is not None:
+            if key in _timer_keys:
+                return False
+            _timer_keys.add(key)
+        heapq.heappush(_timers, (time.time() + max(delay, 0), next(_timer_seq), key, func, args))
+        if _timer_thread is None or not _timer_thread.is_alive():
+            _timer_thread = threading.Thread(target=_run_timers, name='JOB-TIMER')
+            _timer_thread.daemon = True
+            _timer_thread.start()
+        _timer_cond.notify()
+    return True
+
+def requeue_later(queue, item, delay, key=None):
+    return call_later(delay, queue.put, item, key=key)
+
+def _run_timers():
+    while True:
+        with _timer_cond:
+            while not _timers:
+                _timer_cond.wait()
+            when, seq, key, func, args = _timers[0]
+            remaining = when - time.time()
+            if remaining > 0:
+                _timer_cond.wait(remaining)
+                continue
+            heapq.heappop(_timers)
+            _timer_keys.discard(key)
+        try:
+            func(*args)
+        except Exception as e:
+            logger.error('[JOB-QUEUE] Error running scheduled job %s: %s' % (getattr(func, '__name__', func), e))
+
+def status():
+    with _workers_lock:
+        workers = [w.status() for w in _workers.values()]
+    with _timer_cond:
+        scheduled = len(_timers)
+    flags = {}
+    for flag in (mylar.APILOCK, mylar.SEARCHLOCK, mylar.DDL_LOCK):
+        flags[flag.name] = {'busy':  flag.is_set(),
+                            'since': round(time.time() - flag.since, 1) if flag.since is not None else None}
+    return {'workers':     workers,
+            'flags':       flags,
+            'scheduled':   scheduled,
+            'resources':   runqueue.status(),
+            'conversions': cbrconvert.status(),
+            'transfers':   filetransfer.status()}
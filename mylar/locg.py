@@ -18,7 +18,7 @@ from bs4 import BeautifulSoup, UnicodeDammit
 import datetime
 import re
 import mylar
-from mylar import logger, db
+from mylar import logger, db, httpclient
 
 def locg(pulldate=None,weeknumber=None,year=None):
 
@@ -53,7 +53,7 @@ def locg(pulldate=None,weeknumber=None,year=None):
         url = 'https://walksoftly.itsaninja.party/newcomics.php'
 
         try:
-            r = requests.get(url, params=params, verify=True, headers={'User-Agent': mylar.USER_AGENT[:mylar.USER_AGENT.find('/')+7] + mylar.USER_AGENT[mylar.USER_AGENT.find('(')+1]})
+            r = httpclient.get(url, params=params, verify=True, headers={'User-Agent': mylar.USER_AGENT[:mylar.USER_AGENT.find('/')+7] + mylar.USER_AGENT[mylar.USER_AGENT.find('(')+1]})
         except requests.exceptions.RequestException as e:
             logger.warn('[PULL-LIST] Error encountered retrieving pull-list: %s' % (e,))
             mylar.BACKENDSTATUS_WS = 'down'
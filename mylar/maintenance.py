@@ -23,6 +23,27 @@ import json
 import mylar
 from mylar import logger, importer
 
+def query_plan_checks():
+    #(module, query) for every hot query webserve/search/updater declare in HOT_QUERIES - the same strings they run,
+    #so the queryplan maintenance mode checks what's actually executed. Imported here rather than at the top as
+    #webserve pulls in the whole web stack (and search / updater import back into mylar).
+    from mylar import webserve, search, updater
+    checks = []
+    for module in (webserve, search, updater):
+        name = module.__name__.rsplit('.', 1)[-1]
+        for query in module.HOT_QUERIES:
+            checks.append((name, query))
+    return checks
+
+def full_scans(plan):
+    #return the plan lines that walk an entire table rather than searching an index.
+    scans = []
+    for row in plan:
+        detail = row[-1]
+        if detail.startswith('SCAN') and 'USING' not in detail and 'CONSTANT ROW' not in detail and 'SUBQUERY' not in detail:
+            scans.append(detail)
+    return scans
+
 class Maintenance(object):
 
     def __init__(self, mode, file=None, output=None):
@@ -112,6 +133,34 @@ class Maintenance(object):
         else:
             logger.info('[MAINTENANCE-MODE][%s] No series found with incorrect slashes in the path' % self.mode.upper())
 
+    def query_plan_check(self):
+        #returns True if every hot query is index-backed, False if any fall back to a full table scan.
+        self.sql_attachmylar()
+
+        checks = query_plan_checks()
+        failures = []
+        for module, query in checks:
+            try:
+                plan = self.dbmylar.execute('EXPLAIN QUERY PLAN ' + query, [None] * query.count('?')).fetchall()
+            except sqlite3.OperationalError as e:
+                logger.warn('[MAINTENANCE-MODE][%s] Unable to explain [%s] %s: %s' % (self.mode.upper(), module, query, e))
+                failures.append((module, query, [str(e)]))
+                continue
+            scans = full_scans(plan)
+            if scans:
+                failures.append((module, query, scans))
+                logger.warn('[MAINTENANCE-MODE][%s] FULL SCAN [%s] %s -> %s' % (self.mode.upper(), module, query, ', '.join(scans)))
+            else:
+                logger.fdebug('[MAINTENANCE-MODE][%s] OK [%s] %s' % (self.mode.upper(), module, query))
+
+        self.sql_closemylar()
+
+        if failures:
+            logger.warn('[MAINTENANCE-MODE][%s] %s of %s queries fall back to a full table scan.' % (self.mode.upper(), len(failures), len(checks)))
+            return False
+        logger.info('[MAINTENANCE-MODE][%s] All %s queries are index-backed.' % (self.mode.upper(), len(checks)))
+        return True
+
     def check_status(self):
         try:
             found = False
@@ -26,7 +26,7 @@ from xml.parsers.expat import ExpatError
 import requests
 
 import mylar
-from mylar import logger, db, cv
+from mylar import logger, db, cv, cvclient
 from mylar.helpers import multikeysort, replace_all, cleanName, listLibrary, listStoryArcs
 import http.client
 
@@ -61,17 +61,9 @@ def pullsearch(comicapi, comicquery, offset, search_type):
     #all these imports are standard on most modern python implementations
     #logger.info('MB.PULLURL:' + PULLURL)
 
-    #new CV API restriction - one api request / second.
-    if mylar.CONFIG.CVAPI_RATE is None or mylar.CONFIG.CVAPI_RATE < 2:
-        time.sleep(2)
-    else:
-        time.sleep(mylar.CONFIG.CVAPI_RATE)
-
-    #download the file:
-    payload = None
-
+    #download the file (cvclient handles the CV api rate limit):
     try:
-        r = requests.get(PULLURL, params=payload, verify=mylar.CONFIG.CV_VERIFY, headers=mylar.CV_HEADERS)
+        r = cvclient.get_client().get(PULLURL, rtype='search')
     except Exception as e:
         logger.warn('Error fetching data from ComicVine: %s' % e)
         return
@@ -471,17 +463,9 @@ def storyarcinfo(xmlid):
     ARCPULL_URL = mylar.CVURL + 'story_arc/4045-' + str(xmlid) + '/?api_key=' + str(comicapi) + '&field_list=issues,publisher,name,first_appeared_in_issue,deck,image&format=xml&offset=0'
     #logger.fdebug('arcpull_url:' + str(ARCPULL_URL))
 
-    #new CV API restriction - one api request / second.
-    if mylar.CONFIG.CVAPI_RATE is None or mylar.CONFIG.CVAPI_RATE < 2:
-        time.sleep(2)
-    else:
-        time.sleep(mylar.CONFIG.CVAPI_RATE)
-
-    #download the file:
-    payload = None
-
+    #download the file (cvclient handles the CV api rate limit):
     try:
-        r = requests.get(ARCPULL_URL, params=payload, verify=mylar.CONFIG.CV_VERIFY, headers=mylar.CV_HEADERS)
+        r = cvclient.get_client().get(ARCPULL_URL, rtype='arc', tag='arc')
     except Exception as e:
         logger.warn('While parsing data from ComicVine, got exception: %s' % e)
         return
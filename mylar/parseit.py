@@ -25,6 +25,12 @@ from decimal import Decimal
 from time import strptime
 import mylar
 
+#used once per scraped result / issue row.
+RE_CLEAN_NAME = re.compile('[\,\.\:\;\'\[\]\(\)\!\@\#\$\%\^\&\*\-\_\+\=\?\/]')
+RE_NOT_BRACKETS = re.compile('[^\[\]]+')
+RE_NON_DIGIT = re.compile('[^0-9]')
+RE_WHITESPACE = re.compile('\s')
+
 def GCDScraper(ComicName, ComicYear, Total, ComicID, quickmatch=None):
     NOWyr = datetime.date.today().year
     if datetime.date.today().month == 12:
@@ -83,10 +89,10 @@ def GCDScraper(ComicName, ComicYear, Total, ComicID, quickmatch=None):
         resultIssues[n] = resultIssues[n].replace(' ', '')
         #print ( "Year: " + str(resultYear[n]) )
         #print ( "Issues: " + str(resultIssues[n]) )
-        CleanComicName = re.sub('[\,\.\:\;\'\[\]\(\)\!\@\#\$\%\^\&\*\-\_\+\=\?\/]', '', comicnm)
-        CleanComicName = re.sub(' ', '', CleanComicName).lower()
-        CleanResultName = re.sub('[\,\.\:\;\'\[\]\(\)\!\@\#\$\%\^\&\*\-\_\+\=\?\/]', '', resultName[n])
-        CleanResultName = re.sub(' ', '', CleanResultName).lower()
+        CleanComicName = RE_CLEAN_NAME.sub('', comicnm)
+        CleanComicName = CleanComicName.replace(' ', '').lower()
+        CleanResultName = RE_CLEAN_NAME.sub('', resultName[n])
+        CleanResultName = CleanResultName.replace(' ', '').lower()
         #print ("CleanComicName: " + str(CleanComicName))
         #print ("CleanResultName: " + str(CleanResultName))
         if CleanResultName == CleanComicName or CleanResultName[3:] == CleanComicName:
@@ -286,10 +292,10 @@ def GCDdetails(comseries, resultURL, vari_loop, ComicID, TotalIssues, issvariati
             resultGID = fid['href']
             resultID = resultGID[7:-1]
 
-            if ',' in ParseIssue: ParseIssue = re.sub("\,", "", ParseIssue)
+            if ',' in ParseIssue: ParseIssue = ParseIssue.replace(',', '')
             variant="no"
             if 'Vol' in ParseIssue or '[' in ParseIssue or 'a' in ParseIssue or 'b' in ParseIssue or 'c' in ParseIssue:
-                m = re.findall('[^\[\]]+', ParseIssue)
+                m = RE_NOT_BRACKETS.findall(ParseIssue)
                 # ^^ takes care of []
                 # if it's a decimal - variant ...whoo-boy is messed.
                 if '.' in m[0]:
@@ -298,16 +304,16 @@ def GCDdetails(comseries, resultURL, vari_loop, ComicID, TotalIssues, issvariati
                     dec_st = dec_chk.find('.')
                     dec_b4 = dec_chk[:dec_st]
                     dec_ad = dec_chk[dec_st +1:]
-                    dec_ad = re.sub("\s", "", dec_ad)
+                    dec_ad = RE_WHITESPACE.sub('', dec_ad)
                     if dec_b4.isdigit() and dec_ad.isdigit():
                         #logger.fdebug("Alternate decimal issue...*Whew* glad I caught that")
                         ParseIssue = dec_b4 + "." + dec_ad
                     else:
                         #logger.fdebug("it's a decimal, but there's no digits before or after decimal")
                         #not a decimal issue, drop it down to the regex below.
-                        ParseIssue = re.sub("[^0-9]", " ", dec_chk)
+                        ParseIssue = RE_NON_DIGIT.sub(' ', dec_chk)
                 else:
-                    ParseIssue = re.sub("[^0-9]", " ", m[0])
+                    ParseIssue = RE_NON_DIGIT.sub(' ', m[0])
                     # ^^ removes everything but the digits from the remaining non-brackets
 
                 logger.fdebug("variant cover detected : " + str(ParseIssue))
@@ -327,7 +333,7 @@ def GCDdetails(comseries, resultURL, vari_loop, ComicID, TotalIssues, issvariati
                 #let's use the FIRST record, and ignore all other covers for the given issue.
                 isschk = ParseIssue[:isslen]
             #logger.fdebug("Parsed Issue#: " + str(isschk))
-            ParseIssue = re.sub("\s", "", ParseIssue)
+            ParseIssue = RE_WHITESPACE.sub('', ParseIssue)
             #check if decimal or '1/2' exists or not, and store decimal results
             halfchk = "no"
             if '.' in isschk:
@@ -764,11 +770,11 @@ def annualCheck(gcomicid, comicid, comicname, comicyear):
         resultIssues[n] = resultIssues[n].replace(' ', '')
         print(("Year: " + str(resultYear[n])))
         print(("Issues: " + str(resultIssues[n])))
-        CleanComicName = re.sub('[\,\.\:\;\'\[\]\(\)\!\@\#\$\%\^\&\*\-\_\+\=\?\/]', '', comicnm)
+        CleanComicName = RE_CLEAN_NAME.sub('', comicnm)
 
-        CleanComicName = re.sub(' ', '', CleanComicName).lower()
-        CleanResultName = re.sub('[\,\.\:\;\'\[\]\(\)\!\@\#\$\%\^\&\*\-\_\+\=\?\/]', '', resultName[n])
-        CleanResultName = re.sub(' ', '', CleanResultName).lower()
+        CleanComicName = CleanComicName.replace(' ', '').lower()
+        CleanResultName = RE_CLEAN_NAME.sub('', resultName[n])
+        CleanResultName = CleanResultName.replace(' ', '').lower()
         print(("CleanComicName: " + str(CleanComicName)))
         print(("CleanResultName: " + str(CleanResultName)))
         if CleanResultName == CleanComicName or CleanResultName[3:] == CleanComicName:
@@ -21,7 +21,7 @@ from . import logger
 
 class Process(object):
 
-    def __init__(self, nzb_name, nzb_folder, failed=False, issueid=None, comicid=None, apicall=False, ddl=False, download_info=None):
+    def __init__(self, nzb_name, nzb_folder, failed=False, issueid=None, comicid=None, apicall=False, ddl=False, download_info=None, wait=False, pooled=False):
         self.nzb_name = nzb_name
         self.nzb_folder = nzb_folder
         self.failed = failed
@@ -30,6 +30,10 @@ class Process(object):
         self.apicall = apicall
         self.ddl = ddl
         self.download_info = download_info
+        #wait=True: don't return until the post-processing has finished (the post-processing queue workers).
+        self.wait = wait
+        #pooled=True: already holding its series in mylar.PP_GATE (the post-processing queue workers).
+        self.pooled = pooled
 
     def post_process(self):
         if self.failed == '0':
@@ -41,9 +45,12 @@ class Process(object):
         retry_outside = False
 
         if self.failed is False:
-            PostProcess = mylar.PostProcessor.PostProcessor(self.nzb_name, self.nzb_folder, self.issueid, queue=ppqueue, comicid=self.comicid, apicall=self.apicall, ddl=self.ddl)
+            PostProcess = mylar.PostProcessor.PostProcessor(self.nzb_name, self.nzb_folder, self.issueid, queue=ppqueue, comicid=self.comicid, apicall=self.apicall, ddl=self.ddl, pooled=self.pooled)
             if any([self.nzb_name == 'Manual Run', self.nzb_name == 'Manual+Run', self.apicall is True, self.issueid is not None]):
-                threading.Thread(target=PostProcess.Process).start()
+                thread_ = threading.Thread(target=PostProcess.Process, name="Post-Processing")
+                thread_.start()
+                if self.wait is True:
+                    thread_.join()
             else:
                 thread_ = threading.Thread(target=PostProcess.Process, name="Post-Processing")
                 thread_.start()
@@ -94,7 +101,7 @@ class Process(object):
                 logger.warn('Failed Download Handling is not enabled. Leaving Failed Download as-is.')
 
         if retry_outside:
-            PostProcess = mylar.PostProcessor.PostProcessor('Manual Run', self.nzb_folder, queue=ppqueue)
+            PostProcess = mylar.PostProcessor.PostProcessor('Manual Run', self.nzb_folder, queue=ppqueue, pooled=self.pooled)
             thread_ = threading.Thread(target=PostProcess.Process, name="Post-Processing")
             thread_.start()
             thread_.join()
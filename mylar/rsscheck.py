@@ -23,19 +23,98 @@ from . import ftpsshup
 from datetime import datetime, timedelta
 import gzip
 import time
+import json
 import random
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
 from io import StringIO
 from pkg_resources import parse_version
 
 import mylar
-from mylar import db, logger, ftpsshup, helpers, auth32p, utorrent, helpers
+from mylar import db, logger, ftpsshup, helpers, auth32p, utorrent, helpers, httpclient
 from mylar.torrent.clients import transmission
 from mylar.torrent.clients import  deluge as deluge
 from mylar.torrent.clients import qbittorrent as qbittorrent
 
 REDIRECT_STATUS_CODES = (301, 302, 303, 307, 308)
 
+#torrentdbsearch - building the LIKE pattern and normalizing every cached title it returns.
+RE_AND = re.compile("\\band\\b")
+RE_THE = re.compile("\\bthe\\b")
+RE_SPACES = re.compile('\s+')
+RE_TSEARCH_CHARS = re.compile('[\'\!\@\#\$\%\:\-\;\/\\=\?\&\.\s\,]')
+RE_TSEARCH_ALT_CHARS = re.compile('[\_\#\,\/\:\;\.\-\!\$\%\+\'\&\?\@\s]')
+RE_TSEARCH_ALT_STRIP = re.compile('[\'\!\@\#\$\%\:\;\/\\=\?\.\,]')
+RE_FORMATREM_SERIES = re.compile('[\'\!\@\#\$\%\:\;\=\?\.\,]')
+RE_FORMATREM_TITLE = re.compile('[\'\!\@\#\$\%\:\;\\=\?\.\,]')
+
+#nzbs - how many feeds are fetched at once.
+FEED_WORKERS = 10
+#FeedState - how many of a feed's most recent guids are remembered between checks.
+FEED_SEEN_GUIDS = 1000
+
+#rssdb_select - the words of a series name, as the rssdb_fts tokenizer splits them.
+RE_FTS_WORDS = re.compile('[^\W_]+')
+FTS_STOPWORDS = ('and', 'the')
+
+class FeedState(object):
+    #what was seen on the last check of one feed (the rssfeeds table) - the ETag / Last-Modified validators
+    #for a conditional GET, and the guids of the entries seen most recently so only ones that haven't been seen
+    #before get turned into rssdb rows. That's by guid rather than by date, as a newznab feed is in the order the
+    #indexer added things but dated by the usenet post - something newly indexed can be older than the last check.
+    #A forced RSS check ignores both and takes the whole feed.
+
+    def __init__(self, name, force=False):
+        self.name = name
+        self.etag = None
+        self.modified = None
+        self.seen = []
+        if force is False:
+            row = db.DBConnection().selectone('SELECT * FROM rssfeeds WHERE Feed=?', [name]).fetchone()
+            if row is not None:
+                self.etag = row['ETag']
+                self.modified = row['LastModified']
+                if row['SeenGuids']:
+                    try:
+                        self.seen = json.loads(row['SeenGuids'])
+                    except ValueError:
+                        self.seen = []
+
+    def headers(self, headers):
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.modified:
+            headers['If-Modified-Since'] = self.modified
+        return headers
+
+    @staticmethod
+    def _guid(entry):
+        return entry.get('id') or entry.get('link')
+
+    def new_entries(self, entries):
+        if not self.seen:
+            return list(entries)
+        seen = set(self.seen)
+        return [entry for entry in entries if self._guid(entry) is None or self._guid(entry) not in seen]
+
+    def save(self, r, entries):
+        #only once the entries have been stored - if that failed they're picked up again next time.
+        #The feed's current guids go first, then the ones remembered from before - up to FEED_SEEN_GUIDS of them
+        #(or the whole feed, if it's longer than that).
+        current = []
+        for entry in entries:
+            guid = self._guid(entry)
+            if guid is not None and guid not in current:
+                current.append(guid)
+        currentset = set(current)
+        seen = current + [guid for guid in self.seen if guid not in currentset]
+        seen = seen[:max(FEED_SEEN_GUIDS, len(current))]
+        db.DBConnection().upsert('rssfeeds', {'ETag':         r.headers.get('ETag'),
+                                              'LastModified': r.headers.get('Last-Modified'),
+                                              'SeenGuids':    json.dumps(seen),
+                                              'DateChecked':  datetime.now().strftime('%Y-%m-%d %H:%M:%S')},
+                                             {'Feed':         self.name})
+
 def _start_newznab_attr(self, attrsD):
     context = self._getContext()
 
@@ -55,7 +134,7 @@ if parse_version(feedparser.__version__) < parse_version('6.0.0'):
 else:
     feedparser.mixin._FeedParserMixin._start_newznab_attr = _start_newznab_attr
 
-def torrents(pickfeed=None, seriesname=None, issue=None, feedinfo=None):
+def torrents(pickfeed=None, seriesname=None, issue=None, feedinfo=None, forcerss=False):
     if pickfeed is None:
         return
 
@@ -93,6 +172,7 @@ def torrents(pickfeed=None, seriesname=None, issue=None, feedinfo=None):
     torthetpse = []
     torthe32p = []
     torinfo = {}
+    feedstates = []
 
     while (lp < loopit):
         if lp == 0 and loopit == 2:
@@ -165,10 +245,19 @@ def torrents(pickfeed=None, seriesname=None, issue=None, feedinfo=None):
             ddos_protection = round(random.uniform(0,15),2)
             time.sleep(ddos_protection)
 
+            state = None
+            if not seriesname:
+                if int(pickfeed) > 7:
+                    state = FeedState('32P-%s' % feedinfo['feedname'], force=forcerss)
+                else:
+                    state = FeedState(picksite, force=forcerss)
+
             logger.info('Now retrieving feed from %s' % picksite)
             try:
                 headers = {'Accept-encoding': 'gzip',
                            'User-Agent':       mylar.CV_HEADERS['User-Agent']}
+                if state is not None:
+                    headers = state.headers(headers)
                 cf_cookievalue = None
                 scraper = cfscrape.create_scraper()
                 if pickfeed == '999':
@@ -193,8 +282,16 @@ def torrents(pickfeed=None, seriesname=None, issue=None, feedinfo=None):
                 lp+=1
                 continue
 
-            feedme = feedparser.parse(r.content)
-            #logger.info(feedme)   #<-- uncomment this to see what Mylar is retrieving from the feed
+            if r.status_code == 304:
+                logger.fdebug('[RSS] (%s) Feed has not changed since the last check.' % picksite)
+                feedme = feedparser.FeedParserDict(entries=[])
+            else:
+                feedme = feedparser.parse(r.content)
+                #logger.info(feedme)   #<-- uncomment this to see what Mylar is retrieving from the feed
+                if state is not None:
+                    #only what's newer than the last check gets indexed.
+                    feedstates.append((state, r, feedme.entries))
+                    feedme['entries'] = state.new_entries(feedme.entries)
 
         i = 0
 
@@ -382,6 +479,8 @@ def torrents(pickfeed=None, seriesname=None, issue=None, feedinfo=None):
     if not seriesname:
         #rss search results
         rssdbupdate(feeddata, totalcount, 'torrent')
+        for state, r, entries in feedstates:
+            state.save(r, entries)
     else:
         #backlog (parsing) search results
         if pickfeed == '4':
@@ -394,12 +493,17 @@ def torrents(pickfeed=None, seriesname=None, issue=None, feedinfo=None):
 def ddl(forcerss=False):
     headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 6.1; WOW64; rv:40.0) Gecko/20100101 Firefox/40.1'}
     ddl_feed = 'https://getcomics.info/feed/'
+    state = FeedState('DDL', force=forcerss)
     try:
-        r = requests.get(ddl_feed, verify=True, headers=headers)
+        r = httpclient.get(ddl_feed, verify=True, headers=state.headers(headers))
     except Exception as e:
         logger.warn('Error fetching RSS Feed Data from DDL: %s' % (e))
         return False
     else:
+        if r.status_code == 304:
+            logger.fdebug('[RSS][DDL] Feed has not changed since the last check.')
+            return
+
         if r.status_code != 200:
             #typically 403 will not return results, but just catch anything other than a 200
             if r.status_code == 503:
@@ -410,7 +514,7 @@ def ddl(forcerss=False):
 
         feedme = feedparser.parse(r.content)
         results = []
-        for entry in feedme.entries:
+        for entry in state.new_entries(feedme.entries):
             soup = BeautifulSoup(entry.summary, 'html.parser')
             orig_find = soup.find("p", {"style": "text-align: center;"})
             i = 0
@@ -460,6 +564,7 @@ def ddl(forcerss=False):
         if len(results) >0:
             logger.info('[RSS][DDL] %s entries have been indexed and are now going to be stored for caching.' % len(results))
             rssdbupdate(results, len(results), 'ddl')
+        state.save(r, feedme.entries)
 
     return
 
@@ -467,20 +572,29 @@ def nzbs(provider=None, forcerss=False):
 
     feedthis = []
 
-    def _parse_feed(site, url, verify, payload=None):
+    def _parse_feed(site, url, verify, payload=None, apifallback=None):
+        #runs on the feed pool. Returns 'disable' if the site looks to be down.
         logger.fdebug('[RSS] Fetching items from ' + site)
-        headers = {'User-Agent':      str(mylar.USER_AGENT)}
+        state = FeedState(site, force=forcerss)
+        headers = state.headers({'User-Agent':      str(mylar.USER_AGENT)})
 
         try:
-            r = requests.get(url, params=payload, verify=verify, headers=headers)
+            r = httpclient.get(url, params=payload, verify=verify, headers=headers)
         except Exception as e:
             logger.warn('Error fetching RSS Feed Data from %s: %s' % (site, e))
             return
 
+        if r.status_code == 304:
+            logger.fdebug('[RSS] (%s) Feed has not changed since the last check.' % site)
+            return
+
         if r.status_code != 200:
             #typically 403 will not return results, but just catch anything other than a 200
             if r.status_code == 403:
-                return False
+                if apifallback is not None:
+                    logger.fdebug('RSS url returning 403 error. Attempting to use API to get most recent items in lieu of RSS feed')
+                    return _parse_feed(site, apifallback[0], verify, apifallback[1])
+                return
             else:
                 logger.warn('[%s] Status code returned: %s' % (site, r.status_code))
                 if r.status_code == 503:
@@ -491,8 +605,11 @@ def nzbs(provider=None, forcerss=False):
 
         feedme = feedparser.parse(r.content)
 
-        feedthis.append({"site": site,
-                         "feed": feedme})
+        return {"site":     site,
+                "feed":     feedme,
+                "entries":  state.new_entries(feedme.entries),
+                "state":    state,
+                "response": r}
 
     newznab_hosts = []
 
@@ -505,14 +622,15 @@ def nzbs(provider=None, forcerss=False):
     logger.fdebug('[RSS] You have enabled ' + str(providercount) + ' NZB RSS search providers.')
 
     if providercount > 0:
+        #(site, url, verify, params, api fallback) - fetched all at once below.
+        feeds = []
+
         if mylar.CONFIG.EXPERIMENTAL == 1:
             max_entries = "250" if forcerss else "50"
             params = {'sort': 'agedesc',
                       'max':   max_entries,
                       'more':  '1'}
-            check = _parse_feed('experimental', 'http://nzbindex.nl/rss/alt.binaries.comics.dcp', False, params)
-            if check == 'disable':
-                helpers.disable_provider(site)
+            feeds.append(('experimental', 'http://nzbindex.nl/rss/alt.binaries.comics.dcp', False, params, None))
 
         if mylar.CONFIG.NZBSU == 1:
             num_items = "&num=100" if forcerss else ""  # default is 25
@@ -521,9 +639,7 @@ def nzbs(provider=None, forcerss=False):
                       'i':         mylar.CONFIG.NZBSU_UID,
                       'r':         mylar.CONFIG.NZBSU_APIKEY,
                       'num_items': num_items}
-            check = _parse_feed('nzb.su', 'https://api.nzb.su/rss', mylar.CONFIG.NZBSU_VERIFY, params)
-            if check == 'disable':
-                helpers.disable_provider(site)
+            feeds.append(('nzb.su', 'https://api.nzb.su/rss', mylar.CONFIG.NZBSU_VERIFY, params, None))
 
         if mylar.CONFIG.DOGNZB == 1:
             #default is 100
@@ -533,9 +649,7 @@ def nzbs(provider=None, forcerss=False):
                       't':          'search',
                       'dl':         '1'}
 
-            check = _parse_feed('dognzb', 'https://api.dognzb.cr/api', mylar.CONFIG.DOGNZB_VERIFY, params)
-            if check == 'disable':
-                helpers.disable_provider(site)
+            feeds.append(('dognzb', 'https://api.dognzb.cr/api', mylar.CONFIG.DOGNZB_VERIFY, params, None))
 
         for newznab_host in newznab_hosts:
             site = newznab_host[0].rstrip()
@@ -543,35 +657,33 @@ def nzbs(provider=None, forcerss=False):
             newznabuid = newznabuid or '1'
             newznabcat = newznabcat or '7030'
 
+            apiparams = {'t':         'search',
+                         'cat':       str(newznabcat),
+                         'dl':        '1',
+                         'apikey':    newznab_host[3].rstrip(),
+                         'num':       '100'}
+
             if site[-10:] == '[nzbhydra]':
                 #to allow nzbhydra to do category search by most recent (ie. rss)
-                url = newznab_host[1].rstrip() + '/api'
-                params = {'t':         'search',
-                          'cat':       str(newznabcat),
-                          'dl':        '1',
-                          'apikey':    newznab_host[3].rstrip(),
-                          'num':       '100'}
-                check = _parse_feed(site, url, bool(newznab_host[2]), params)
+                feeds.append((site, newznab_host[1].rstrip() + '/api', bool(newznab_host[2]), apiparams, None))
             else:
-                url = newznab_host[1].rstrip() + '/rss'
                 params = {'t':         str(newznabcat),
                           'dl':        '1',
                           'i':         str(newznabuid),
                           'r':         newznab_host[3].rstrip(),
                           'num':       '100'}
+                feeds.append((site, newznab_host[1].rstrip() + '/rss', bool(newznab_host[2]), params, (newznab_host[1].rstrip() + '/api', apiparams)))
 
-                check = _parse_feed(site, url, bool(newznab_host[2]), params)
-                if check is False and 'rss' in url[-3:]:
-                    logger.fdebug('RSS url returning 403 error. Attempting to use API to get most recent items in lieu of RSS feed')
-                    url = newznab_host[1].rstrip() + '/api'
-                    params = {'t':         'search',
-                              'cat':       str(newznabcat),
-                              'dl':        '1',
-                              'apikey':    newznab_host[3].rstrip(),
-                              'num':       '100'}
-                    check = _parse_feed(site, url, bool(newznab_host[2]), params)
-                if check == 'disable':
-                    helpers.disable_provider(site)
+        checks = []
+        if feeds:
+            with ThreadPoolExecutor(max_workers=min(len(feeds), FEED_WORKERS), thread_name_prefix='RSS-FEED') as pool:
+                checks = list(pool.map(lambda x: _parse_feed(*x), feeds))
+
+        for feed, check in zip(feeds, checks):
+            if check == 'disable':
+                helpers.disable_provider(feed[0])
+            elif check is not None:
+                feedthis.append(check)
 
         feeddata = []
 
@@ -579,7 +691,7 @@ def nzbs(provider=None, forcerss=False):
             site = ft['site']
             logger.fdebug('[RSS] (' + site + ') now being updated...')
 
-            for entry in ft['feed'].entries:
+            for entry in ft['entries']:
 
                 if site == 'dognzb':
                     #because the rss of dog doesn't carry the enclosure item, we'll use the newznab size value
@@ -609,22 +721,27 @@ def nzbs(provider=None, forcerss=False):
                                  'Pubdate': entry.updated,
                                  'Size': size})
 
-            logger.info('[RSS] (' + site + ') ' + str(len(ft['feed'].entries)) + ' entries indexed.')
+            logger.info('[RSS] (' + site + ') ' + str(len(ft['entries'])) + ' new entries indexed (' + str(len(ft['feed'].entries)) + ' in the feed).')
 
         i = len(feeddata)
         if i:
             logger.info('[RSS] ' + str(i) + ' entries have been indexed and are now going to be stored for caching.')
             rssdbupdate(feeddata, i, 'usenet')
 
+        for ft in feedthis:
+            ft['state'].save(ft['response'], ft['feed'].entries)
+
     return
 
 def rssdbupdate(feeddata, i, type):
     rsschktime = 15
-    myDB = db.DBConnection()
 
     #let's add the entries into the db so as to save on searches
     #also to build up the ID's ;)
 
+    #queued through the write-behind service so the whole feed lands in one commit.
+    batch = db.WriteBatch()
+    dateadded = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     for dataval in feeddata:
 
         if type == 'torrent':
@@ -633,7 +750,8 @@ def rssdbupdate(feeddata, i, type):
             newVal = {"Link":      dataval['link'],
                       "Pubdate":   dataval['pubdate'],
                       "Site":      dataval['site'],
-                      "Size":      dataval['size']}
+                      "Size":      dataval['size'],
+                      "DateAdded": dateadded}
             ctrlVal = {"Title":    dataval['title']}
 
         else:
@@ -641,14 +759,53 @@ def rssdbupdate(feeddata, i, type):
             newVal = {"Link":      newlink,
                       "Pubdate":   dataval['Pubdate'],
                       "Site":      dataval['Site'],
-                      "Size":      dataval['Size']}
+                      "Size":      dataval['Size'],
+                      "DateAdded": dateadded}
             ctrlVal = {"Title":    dataval['Title']}
 
-        myDB.upsert("rssdb", newVal, ctrlVal)
+        batch.upsert("rssdb", newVal, ctrlVal)
+
+    try:
+        batch.wait()
+    except Exception as e:
+        logger.warn('Unable to write some entries to the RSS DB: %s' % e)
+
+    rssdb_prune()
 
     logger.fdebug('Completed adding new data to RSS DB. Next add in ' + str(mylar.CONFIG.RSS_CHECKINTERVAL) + ' minutes')
     return
 
+def rssdb_prune():
+    if mylar.CONFIG.RSS_PRUNE_DAYS is None or mylar.CONFIG.RSS_PRUNE_DAYS <= 0:
+        return
+    cutoff = (datetime.now() - timedelta(days=mylar.CONFIG.RSS_PRUNE_DAYS)).strftime('%Y-%m-%d %H:%M:%S')
+    myDB = db.DBConnection()
+    myDB.action("DELETE FROM rssdb WHERE DateAdded < ?", [cutoff])
+
+def rssdb_select(seriesname, pattern, where, args):
+    #rssdb rows whose title is LIKE pattern. With the rssdb_fts index, only the rows with a word starting with the
+    #longest word of the series name are checked against the pattern instead of all of them. The index has to find
+    #everything the LIKE would, so a name with a word the tokenizer splits (spider-man, bob's, x-men - which the
+    #pattern also matches as spiderman / bobs / xmen) isn't looked up through it at all.
+    myDB = db.DBConnection()
+    word = fts_word(seriesname)
+    if mylar.RSSDB_FTS is True and word is not None:
+        return myDB.select("SELECT * FROM rssdb WHERE rowid IN (SELECT rowid FROM rssdb_fts WHERE rssdb_fts MATCH ?) AND Title like ? AND " + where, ['"%s"*' % word, pattern] + args)
+    return myDB.select("SELECT * FROM rssdb WHERE Title like ? AND " + where, [pattern] + args)
+
+def fts_word(seriesname):
+    #the word of seriesname to prefilter the rssdb_fts lookup on - None if it can't be used safely.
+    words = []
+    for chunk in seriesname.lower().split():
+        tokens = RE_FTS_WORDS.findall(chunk)
+        if len(tokens) > 1:
+            return None
+        if tokens and tokens[0] not in FTS_STOPWORDS:
+            words.append(tokens[0])
+    if not words:
+        return None
+    return max(words, key=len)
+
 def ddl_dbsearch(seriesname, issue, comicid=None, nzbprov=None, oneoff=False):
     myDB = db.DBConnection()
     seriesname_alt = None
@@ -668,7 +825,7 @@ def ddl_dbsearch(seriesname, issue, comicid=None, nzbprov=None, oneoff=False):
     dsearch_removed = re.sub('\s+', ' ', dsearch_rem2)
     dsearch_seriesname = re.sub('[\'\!\@\#\$\%\:\-\;\/\\=\?\&\.\s\,]', '%', dsearch_removed)
     dsearch = '%' + dsearch_seriesname + '%'
-    dresults = myDB.select("SELECT * FROM rssdb WHERE Title like ? AND Site='DDL'", [dsearch])
+    dresults = rssdb_select(seriesname, dsearch, "Site='DDL'", [])
     ddltheinfo = []
     ddlinfo = {}
     if not dresults:
@@ -703,10 +860,10 @@ def torrentdbsearch(seriesname, issue, comicid=None, nzbprov=None, oneoff=False)
             seriesname_alt = snm['AlternateSearch']
 
     #remove 'and' and 'the':
-    tsearch_rem1 = re.sub("\\band\\b", "%", seriesname.lower())
-    tsearch_rem2 = re.sub("\\bthe\\b", "%", tsearch_rem1.lower())
-    tsearch_removed = re.sub('\s+', ' ', tsearch_rem2)
-    tsearch_seriesname = re.sub('[\'\!\@\#\$\%\:\-\;\/\\=\?\&\.\s\,]', '%', tsearch_removed)
+    tsearch_rem1 = RE_AND.sub("%", seriesname.lower())
+    tsearch_rem2 = RE_THE.sub("%", tsearch_rem1.lower())
+    tsearch_removed = RE_SPACES.sub(' ', tsearch_rem2)
+    tsearch_seriesname = RE_TSEARCH_CHARS.sub('%', tsearch_removed)
     if mylar.CONFIG.PREFERRED_QUALITY == 0:
         tsearch = tsearch_seriesname + "%"
     elif mylar.CONFIG.PREFERRED_QUALITY == 1:
@@ -728,9 +885,9 @@ def torrentdbsearch(seriesname, issue, comicid=None, nzbprov=None, oneoff=False)
     tsearch = '%' + tsearch
 
     if mylar.CONFIG.ENABLE_32P and nzbprov == '32P':
-        tresults = myDB.select("SELECT * FROM rssdb WHERE Title like ? AND Site='32P'", [tsearch])
+        tresults = rssdb_select(seriesname, tsearch, "Site='32P'", [])
     if mylar.CONFIG.ENABLE_PUBLIC and nzbprov == 'Public Torrents':
-        tresults += myDB.select("SELECT * FROM rssdb WHERE Title like ? AND (Site='DEM' OR Site='WWT')", [tsearch])
+        tresults += rssdb_select(seriesname, tsearch, "(Site='DEM' OR Site='WWT')", [])
 
     #logger.fdebug('seriesname_alt:' + str(seriesname_alt))
     if seriesname_alt is None or seriesname_alt == 'None':
@@ -745,14 +902,14 @@ def torrentdbsearch(seriesname, issue, comicid=None, nzbprov=None, oneoff=False)
         for calt in chkthealt:
             AS_Alter = re.sub('##', '', calt)
             u_altsearchcomic = AS_Alter #.encode('ascii', 'ignore').strip()
-            AS_Altrem = re.sub("\\band\\b", "", u_altsearchcomic.lower())
-            AS_Altrem = re.sub("\\bthe\\b", "", AS_Altrem.lower())
+            AS_Altrem = RE_AND.sub("", u_altsearchcomic.lower())
+            AS_Altrem = RE_THE.sub("", AS_Altrem.lower())
 
-            AS_Alternate = re.sub('[\_\#\,\/\:\;\.\-\!\$\%\+\'\&\?\@\s]', '%', AS_Altrem)
+            AS_Alternate = RE_TSEARCH_ALT_CHARS.sub('%', AS_Altrem)
 
-            AS_Altrem_mod = re.sub('[\&]', ' ', AS_Altrem)
-            AS_formatrem_seriesname = re.sub('[\'\!\@\#\$\%\:\;\/\\=\?\.\,]', '', AS_Altrem_mod)
-            AS_formatrem_seriesname = re.sub('\s+', ' ', AS_formatrem_seriesname)
+            AS_Altrem_mod = AS_Altrem.replace('&', ' ')
+            AS_formatrem_seriesname = RE_TSEARCH_ALT_STRIP.sub('', AS_Altrem_mod)
+            AS_formatrem_seriesname = RE_SPACES.sub(' ', AS_formatrem_seriesname)
             if AS_formatrem_seriesname[:1] == ' ': AS_formatrem_seriesname = AS_formatrem_seriesname[1:]
             AS_Alt.append(AS_formatrem_seriesname)
 
@@ -767,9 +924,9 @@ def torrentdbsearch(seriesname, issue, comicid=None, nzbprov=None, oneoff=False)
 
             AS_Alternate = '%' + AS_Alternate
             if mylar.CONFIG.ENABLE_32P and nzbprov == '32P':
-                tresults += myDB.select("SELECT * FROM rssdb WHERE Title like ? AND Site='32P'", [AS_Alternate])
+                tresults += rssdb_select(AS_Alter, AS_Alternate, "Site='32P'", [])
             if mylar.CONFIG.ENABLE_PUBLIC and nzbprov == 'Public Torrents':
-                tresults += myDB.select("SELECT * FROM rssdb WHERE Title like ? AND (Site='DEM' OR Site='WWT')", [AS_Alternate])
+                tresults += rssdb_select(AS_Alter, AS_Alternate, "(Site='DEM' OR Site='WWT')", [])
 
     if not tresults:
         logger.fdebug('torrent search returned no results for %s' % seriesname)
@@ -779,10 +936,22 @@ def torrentdbsearch(seriesname, issue, comicid=None, nzbprov=None, oneoff=False)
     tortheinfo = []
     torinfo = {}
 
+    #the series side of the comparison is the same for every result, so normalize it once.
+    seriesname_mod = RE_AND.sub(" ", seriesname.lower())
+    seriesname_mod = RE_THE.sub(" ", seriesname_mod.lower())
+    seriesname_mod = seriesname_mod.replace('&', ' ')
+
+    formatrem_seriesname = RE_FORMATREM_SERIES.sub('', seriesname_mod)
+    formatrem_seriesname = formatrem_seriesname.replace('-', ' ')
+    formatrem_seriesname = formatrem_seriesname.replace('/', ' ')  #not necessary since seriesname in a torrent file won't have /
+    formatrem_seriesname = RE_SPACES.sub(' ', formatrem_seriesname)
+    if formatrem_seriesname[:1] == ' ': formatrem_seriesname = formatrem_seriesname[1:]
+    AS_Alt_lower = [x.lower() for x in AS_Alt]
+
     for tor in tresults:
         #&amp; have been brought into the title field incorretly occassionally - patched now, but to include those entries already in the 
         #cache db that have the incorrect entry, we'll adjust.
-        torTITLE = re.sub('&amp;', '&', tor['Title']).strip()
+        torTITLE = tor['Title'].replace('&amp;', '&').strip()
 
         #torsplit = torTITLE.split(' ')
         if mylar.CONFIG.PREFERRED_QUALITY == 1:
@@ -802,38 +971,28 @@ def torrentdbsearch(seriesname, issue, comicid=None, nzbprov=None, oneoff=False)
                 continue
         #0 holds the title/issue and format-type.
 
-        seriesname_mod = seriesname
         foundname_mod = torTITLE #torsplit[0]
-        seriesname_mod = re.sub("\\band\\b", " ", seriesname_mod.lower())
-        foundname_mod = re.sub("\\band\\b", " ", foundname_mod.lower())
-        seriesname_mod = re.sub("\\bthe\\b", " ", seriesname_mod.lower())
-        foundname_mod = re.sub("\\bthe\\b", " ", foundname_mod.lower())
-
-        seriesname_mod = re.sub('[\&]', ' ', seriesname_mod)
-        foundname_mod = re.sub('[\&]', ' ', foundname_mod)
-
-        formatrem_seriesname = re.sub('[\'\!\@\#\$\%\:\;\=\?\.\,]', '', seriesname_mod)
-        formatrem_seriesname = re.sub('[\-]', ' ', formatrem_seriesname)
-        formatrem_seriesname = re.sub('[\/]', ' ', formatrem_seriesname)  #not necessary since seriesname in a torrent file won't have /
-        formatrem_seriesname = re.sub('\s+', ' ', formatrem_seriesname)
-        if formatrem_seriesname[:1] == ' ': formatrem_seriesname = formatrem_seriesname[1:]
-
-        formatrem_torsplit = re.sub('[\'\!\@\#\$\%\:\;\\=\?\.\,]', '', foundname_mod)
-        formatrem_torsplit = re.sub('[\-]', ' ', formatrem_torsplit)  #we replace the - with space so we'll get hits if differnces
-        formatrem_torsplit = re.sub('[\/]', ' ', formatrem_torsplit)  #not necessary since if has a /, should be removed in above line
-        formatrem_torsplit = re.sub('\s+', ' ', formatrem_torsplit)
+        foundname_mod = RE_AND.sub(" ", foundname_mod.lower())
+        foundname_mod = RE_THE.sub(" ", foundname_mod.lower())
+        foundname_mod = foundname_mod.replace('&', ' ')
+
+        formatrem_torsplit = RE_FORMATREM_TITLE.sub('', foundname_mod)
+        formatrem_torsplit = formatrem_torsplit.replace('-', ' ')  #we replace the - with space so we'll get hits if differnces
+        formatrem_torsplit = formatrem_torsplit.replace('/', ' ')  #not necessary since if has a /, should be removed in above line
+        formatrem_torsplit = RE_SPACES.sub(' ', formatrem_torsplit)
         #logger.fdebug(str(len(formatrem_torsplit)) + ' - formatrem_torsplit : ' + formatrem_torsplit.lower())
         #logger.fdebug(str(len(formatrem_seriesname)) + ' - formatrem_seriesname :' + formatrem_seriesname.lower())
 
-        if formatrem_seriesname.lower() in formatrem_torsplit.lower() or any(x.lower() in formatrem_torsplit.lower() for x in AS_Alt):
+        formatrem_torsplit_lower = formatrem_torsplit.lower()
+        if formatrem_seriesname.lower() in formatrem_torsplit_lower or any(x in formatrem_torsplit_lower for x in AS_Alt_lower):
             #logger.fdebug('matched to : ' + torTITLE)
             #logger.fdebug('matched on series title: ' + seriesname)
             titleend = formatrem_torsplit[len(formatrem_seriesname):]
-            titleend = re.sub('\-', '', titleend)   #remove the '-' which is unnecessary
+            titleend = titleend.replace('-', '')   #remove the '-' which is unnecessary
             #remove extensions
-            titleend = re.sub('cbr', '', titleend)
-            titleend = re.sub('cbz', '', titleend)
-            titleend = re.sub('none', '', titleend)
+            titleend = titleend.replace('cbr', '')
+            titleend = titleend.replace('cbz', '')
+            titleend = titleend.replace('none', '')
             #logger.fdebug('titleend: ' + titleend)
 
             sptitle = titleend.split()
@@ -870,7 +1029,7 @@ def nzbdbsearch(seriesname, issue, comicid=None, nzbprov=None, searchYear=None,
 
     nsearch = '%' + nsearch_seriesname + "%"
 
-    nresults = myDB.select("SELECT * FROM rssdb WHERE Title like ? AND Site=?", [nsearch, nzbprov])
+    nresults = rssdb_select(seriesname, nsearch, "Site=?", [nzbprov])
     if nresults is None:
         logger.fdebug('nzb search returned no results for ' + seriesname)
         if seriesname_alt is None:
@@ -882,8 +1041,7 @@ def nzbdbsearch(seriesname, issue, comicid=None, nzbprov=None, searchYear=None,
                 AS_Alternate = AlternateSearch
             for calt in chkthealt:
                 AS_Alternate = re.sub('##', '', calt)
-                AS_Alternate = '%' + AS_Alternate + "%"
-                nresults += myDB.select("SELECT * FROM rssdb WHERE Title like ? AND Site=?", [AS_Alternate, nzbprov])
+                nresults += rssdb_select(AS_Alternate, '%' + AS_Alternate + "%", "Site=?", [nzbprov])
             if nresults is None:
                 logger.fdebug('nzb alternate name search returned no results.')
                 return "no results"
@@ -1172,7 +1330,7 @@ def torsend2client(seriesname, issue, seriesyear, linkit, site, pubhash=None):
                     url = helpers.torrent_create(site, linkit, True)
                     logger.fdebug('Trying alternate url: ' + str(url))
                     try:
-                        r = requests.get(url, params=payload, verify=verify, stream=True, headers=headers)
+                        r = httpclient.get(url, params=payload, verify=verify, stream=True, headers=headers)
 
                     except Exception as e:
                         return "fail"
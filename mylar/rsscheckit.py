@@ -17,6 +17,7 @@
 
 import datetime
 import threading
+from concurrent.futures import ThreadPoolExecutor
 import mylar
 from mylar import logger, rsscheck, helpers, auth32p
 
@@ -50,11 +51,13 @@ class tehMain():
             #logger.fdebug('[RSS-FEEDS] Updated RSS Run time to : ' + str(mylar.SCHED_RSS_LAST))
 
             #function for looping through nzbs/torrent feeds
+            #every feed is queued up here and then all of them are fetched at once - they don't depend on each other.
+            feedjobs = []
             if mylar.CONFIG.ENABLE_TORRENT_SEARCH:
                 logger.info('[RSS-FEEDS] Initiating Torrent RSS Check.')
                 if mylar.CONFIG.ENABLE_PUBLIC:
                     logger.info('[RSS-FEEDS] Initiating Torrent RSS Feed Check on Demonoid / WorldWideTorrents.')
-                    rsscheck.torrents(pickfeed='Public')    #TPSE = DEM RSS Check + WWT RSS Check
+                    feedjobs.append((rsscheck.torrents, {'pickfeed': 'Public', 'forcerss': forcerss}))    #TPSE = DEM RSS Check + WWT RSS Check
                 if mylar.CONFIG.ENABLE_32P is True:
                     logger.info('[RSS-FEEDS] Initiating Torrent RSS Feed Check on 32P.')
                     if mylar.CONFIG.MODE_32P is False:
@@ -62,7 +65,7 @@ class tehMain():
                         if any([mylar.CONFIG.PASSKEY_32P is None, mylar.CONFIG.PASSKEY_32P == '', mylar.CONFIG.RSSFEED_32P is None, mylar.CONFIG.RSSFEED_32P == '']):
                             logger.error('[RSS-FEEDS] Unable to validate information from provided RSS Feed. Verify that the feed provided is a current one.')
                         else:
-                            rsscheck.torrents(pickfeed='1', feedinfo=mylar.KEYS_32P)
+                            feedjobs.append((rsscheck.torrents, {'pickfeed': '1', 'feedinfo': mylar.KEYS_32P, 'forcerss': forcerss}))
                     else:
                         continue_search = True
                         logger.fdebug('[RSS-FEEDS] 32P mode set to Auth mode. Monitoring all personal notification feeds & New Releases feed')
@@ -91,19 +94,29 @@ class tehMain():
                                 if feedinfo is None or all([len(feedinfo) == 0 , feedinfo['status'] is False]):
                                     logger.error('[RSS-FEEDS] Unable to retrieve any information from 32P for RSS Feeds. Skipping for now.')
                                 else:
-                                    rsscheck.torrents(pickfeed='1', feedinfo=mylar.KEYS_32P)
+                                    feedjobs.append((rsscheck.torrents, {'pickfeed': '1', 'feedinfo': mylar.KEYS_32P, 'forcerss': forcerss}))
                                     x = 0
                                     #assign personal feeds for 32p > +8
                                     for fi in feeds:
                                         x+=1
                                         pfeed_32p = str(7 + x)
-                                        rsscheck.torrents(pickfeed=pfeed_32p, feedinfo=fi)
+                                        feedjobs.append((rsscheck.torrents, {'pickfeed': pfeed_32p, 'feedinfo': fi, 'forcerss': forcerss}))
 
             logger.info('[RSS-FEEDS] Initiating RSS Feed Check for NZB Providers.')
-            rsscheck.nzbs(forcerss=forcerss)
+            feedjobs.append((rsscheck.nzbs, {'forcerss': forcerss}))
             if mylar.CONFIG.ENABLE_DDL is True:
                 logger.info('[RSS-FEEDS] Initiating RSS Feed Check for DDL Provider.')
-                rsscheck.ddl(forcerss=forcerss)
+                feedjobs.append((rsscheck.ddl, {'forcerss': forcerss}))
+
+            feed_start = datetime.datetime.now()
+            with ThreadPoolExecutor(max_workers=len(feedjobs), thread_name_prefix='RSS-FEEDS') as pool:
+                jobs = [pool.submit(func, **kwargs) for func, kwargs in feedjobs]
+                for job in jobs:
+                    try:
+                        job.result()
+                    except Exception as e:
+                        logger.warn('[RSS-FEEDS] Error while checking feeds: %s' % e)
+            logger.fdebug('[RSS-FEEDS] Feed fetching took: %s' % (datetime.datetime.now() - feed_start))
             logger.info('[RSS-FEEDS] RSS Feed Check/Update Complete')
             logger.info('[RSS-FEEDS] Watchlist Check for new Releases')
             rss_start = datetime.datetime.now()
@@ -0,0 +1,167 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the
+#  implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public
+#  License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+# Priorities and resource limits for the background scheduler (mylar.SCHED).
+# Every scheduled job runs inside scheduled(), which marks its thread as background work and makes it wait
+# for a slot on the resource it leans on (ComicVine, the search providers, the disk) - so the DB updater and
+# the weekly pull don't hammer CV at the same time. Anything that isn't marked is interactive, and the shared
+# gates (the resource slots, the CV request pacing, the search queue) always serve interactive waiters first.
+# first_run() spreads the jobs out after a restart, using the jobhistory table to tell what's actually due.
+
+import heapq
+import itertools
+import random
+import threading
+import time
+import datetime
+
+import mylar
+from mylar import logger
+
+INTERACTIVE = 0
+SCHEDULED = 10
+
+#how many scheduled jobs can run against each resource at once.
+RESOURCE_LIMITS = {'cv':        1,
+                   'providers': 1,
+                   'disk':      1,
+                   'network':   2}
+
+_local = threading.local()
+_gates = {}
+_gates_lock = threading.Lock()
+_startup_slots = itertools.count()
+
+
+def priority():
+    return getattr(_local, 'priority', INTERACTIVE)
+
+def set_priority(value):
+    _local.priority = value
+
+
+class PriorityGate(object):
+    #a counting semaphore that hands a free slot to the most urgent waiter (then the longest waiting one),
+    #rather than to whichever thread happens to wake up first.
+
+    def __init__(self, name, slots=1):
+        self.name = name
+        self.slots = slots
+        self.in_use = 0
+        self.holders = {}
+        self._waiters = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def acquire(self, prio=None, holder=None):
+        if prio is None:
+            prio = priority()
+        with self._cond:
+            ticket = (prio, next(self._seq))
+            heapq.heappush(self._waiters, ticket)
+            self._cond.wait_for(lambda: self.in_use < self.slots and self._waiters[0] == ticket)
+            heapq.heappop(self._waiters)
+            self.in_use += 1
+            if holder is not None:
+                self.holders[holder] = time.time()
+            #another slot may still be free for the next waiter in line.
+            self._cond.notify_all()
+
+    def release(self, holder=None):
+        with self._cond:
+            self.in_use -= 1
+            self.holders.pop(holder, None)
+            self._cond.notify_all()
+
+    def slot(self, prio=None, holder=None):
+        return _Slot(self, prio, holder)
+
+    def status(self):
+        with self._cond:
+            return {'slots':   self.slots,
+                    'in_use':  self.in_use,
+                    'waiting': len(self._waiters),
+                    'running': list(self.holders.keys())}
+
+
+class _Slot(object):
+
+    def __init__(self, gate, prio, holder):
+        self.gate = gate
+        self.prio = prio
+        self.holder = holder
+
+    def __enter__(self):
+        self.gate.acquire(self.prio, self.holder)
+        return self
+
+    def __exit__(self, *exc):
+        self.gate.release(self.holder)
+        return False
+
+
+def gate(resource):
+    with _gates_lock:
+        if resource not in _gates:
+            _gates[resource] = PriorityGate(resource, RESOURCE_LIMITS.get(resource, 1))
+        return _gates[resource]
+
+def scheduled(resource, func, name=None):
+    #wrap a job for mylar.SCHED - it runs as background work, once its resource has a free slot.
+    name = name or getattr(func, '__name__', str(func))
+    def run(*args, **kwargs):
+        set_priority(SCHEDULED)
+        try:
+            g = gate(resource)
+            if g.in_use >= g.slots:
+                logger.fdebug('[SCHEDULER] %s is waiting for the %s slot (held by: %s)' % (name, resource, ', '.join(g.holders.keys())))
+            with g.slot(SCHEDULED, name):
+                return func(*args, **kwargs)
+        finally:
+            set_priority(INTERACTIVE)
+    run.__name__ = name
+    return run
+
+def jitter():
+    if mylar.CONFIG.SCHED_JITTER is None or mylar.CONFIG.SCHED_JITTER < 0:
+        return 0
+    return mylar.CONFIG.SCHED_JITTER
+
+def stagger():
+    if mylar.CONFIG.SCHED_STAGGER is None or mylar.CONFIG.SCHED_STAGGER < 0:
+        return 0
+    return mylar.CONFIG.SCHED_STAGGER
+
+def first_run(job, interval, last_run, force=False):
+    #when a job should first fire after startup. interval is in minutes, last_run the jobhistory timestamp.
+    #A job that isn't due yet keeps its place in the cycle. Anything due (or forced) is lined up behind the
+    #other due jobs, SCHED_STAGGER seconds apart, instead of everything firing the moment the scheduler starts.
+    now = time.time()
+    if all([force is False, last_run is not None]):
+        due = float(last_run) + interval * 60
+        if due > now:
+            logger.fdebug('[SCHEDULER] %s last ran @ %s - next run as normal @ %s' % (job, datetime.datetime.utcfromtimestamp(float(last_run)).replace(microsecond=0), datetime.datetime.utcfromtimestamp(due).replace(microsecond=0)))
+            return datetime.datetime.utcfromtimestamp(due)
+    delay = next(_startup_slots) * stagger() + random.uniform(0, jitter())
+    logger.fdebug('[SCHEDULER] %s is due - catching up in %ss' % (job, int(delay)))
+    return datetime.datetime.utcfromtimestamp(now + delay)
+
+def next_run(interval):
+    #the next run time (utc timestamp) once a job has completed - jittered so repeating jobs drift apart.
+    return time.time() + interval * 60 + random.uniform(0, jitter())
+
+def status():
+    with _gates_lock:
+        gates = dict(_gates)
+    return dict((name, g.status()) for name, g in gates.items())
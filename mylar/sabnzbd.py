@@ -15,7 +15,6 @@
 #  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
 
 import urllib.request, urllib.parse, urllib.error
-import requests
 import ntpath
 import os
 import sys
@@ -23,7 +22,7 @@ import re
 import time
 from pkg_resources import parse_version
 import mylar
-from mylar import logger
+from mylar import logger, httpclient
 
 class SABnzbd(object):
     def __init__(self, params):
@@ -39,13 +38,13 @@ class SABnzbd(object):
 
         try:
             if chkstatus is True:
-                sendit = requests.get(self.sab_url, params=self.params, verify=False)
+                sendit = httpclient.get(self.sab_url, params=self.params, verify=False)
             else:
                 tmp_apikey = self.params.pop('apikey')
                 logger.fdebug('parameters set to %s' % self.params)
                 self.params['apikey'] = tmp_apikey
                 logger.fdebug('sending now to %s' % self.sab_url)
-                sendit = requests.post(self.sab_url, data=self.params, verify=False)
+                sendit = httpclient.post(self.sab_url, data=self.params, verify=False)
         except Exception as e:
             logger.warn('Failed to send to client. Error returned: %s' % e)
             return {'status': False}
@@ -82,7 +81,7 @@ class SABnzbd(object):
             logger.fdebug('parameters set to %s' % self.params)
             self.params['queue']['apikey'] = tmp_apikey
             time.sleep(5)   #pause 5 seconds before monitoring just so it hits the queue
-            h = requests.get(self.sab_url, params=self.params['queue'], verify=False)
+            h = httpclient.get(self.sab_url, params=self.params['queue'], verify=False)
         except Exception as e:
             logger.fdebug('uh-oh: %s' % e)
             return self.historycheck(self.params)
@@ -105,7 +104,7 @@ class SABnzbd(object):
                     #    return {'status': 'double-pp', 'failed': False}
 
                     #logger.fdebug('queue_params: %s' % self.params['queue'])
-                    queue_resp = requests.get(self.sab_url, params=self.params['queue'], verify=False)
+                    queue_resp = httpclient.get(self.sab_url, params=self.params['queue'], verify=False)
                     queueresp = queue_resp.json()
                     queueinfo = queueresp['queue']
                     logger.fdebug('status: %s' % queueinfo['status'])
@@ -158,7 +157,7 @@ class SABnzbd(object):
                 logger.warn('[SABNZBD-VERSION-CHECK] Exception encountered trying to compare installed version [%s] to [%s]. Setting history length to last 200 items. (error: %s)' % (mylar.CONFIG.SAB_VERSION, min_sab ,e))
                 hist_params['limit'] = 200
 
-        hist = requests.get(self.sab_url, params=hist_params, verify=False)
+        hist = httpclient.get(self.sab_url, params=hist_params, verify=False)
         historyresponse = hist.json()
         #logger.info(historyresponse)
         histqueue = historyresponse['history']
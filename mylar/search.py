@@ -30,6 +30,9 @@ from mylar import (
     nzbget,
     wwt,
     getcomics,
+    searchpool,
+    searchcache,
+    httpclient,
 )
 
 import feedparser
@@ -50,6 +53,25 @@ from operator import itemgetter
 from wsgiref.handlers import format_date_time
 import traceback
 
+#the lookups every search makes (and the Wanted sweep) - also run through EXPLAIN QUERY PLAN by the queryplan
+#maintenance mode, so keep HOT_QUERIES in step with what's used below.
+SQL_ISSUE = 'SELECT * FROM issues WHERE IssueID=?'
+SQL_ANNUAL = 'SELECT * FROM annuals WHERE IssueID=? AND NOT Deleted'
+SQL_ARC_ISSUE = 'SELECT * FROM storyarcs WHERE IssueArcID=?'
+SQL_WEEKLY_ISSUE = 'SELECT * FROM weekly WHERE IssueID=?'
+SQL_COMIC = 'SELECT * FROM comics WHERE ComicID=?'
+SQL_WANTED_ISSUES = 'SELECT * from issues WHERE Status="Wanted"'
+SQL_WANTED_FAILED_ISSUES = 'SELECT * from issues WHERE Status="Wanted" OR Status="Failed"'
+HOT_QUERIES = (
+    SQL_ISSUE,
+    SQL_ANNUAL,
+    SQL_ARC_ISSUE,
+    SQL_WEEKLY_ISSUE,
+    SQL_COMIC,
+    SQL_WANTED_ISSUES,
+    SQL_WANTED_FAILED_ISSUES,
+)
+
 
 def search_init(
     ComicName,
@@ -77,6 +99,8 @@ def search_init(
     digitaldate=None,
     booktype=None,
     ignore_booktype=False,
+    backlog=None,
+    cached=False,
 ):
 
     mylar.COMICINFO = []
@@ -369,6 +393,73 @@ def search_init(
                 tmp_IssueNumber = None
             else:
                 tmp_IssueNumber = IssueNumber
+
+            prefetch = None
+            if searchmode == 'api' and backlog is not None:
+                prefetch = backlog
+            elif all(
+                [
+                    searchmode == 'api',
+                    searchpool.concurrent_enabled(),
+                    len(prov_order) > 1,
+                ]
+            ):
+                # fire off this pass's query to every api provider at once - the
+                # provider loop below then works through the responses in order.
+                prefetch = searchpool.ProviderPrefetch()
+                for fcnt, prov in enumerate(prov_order):
+                    if prov in checked_once or helpers.block_provider_check(prov):
+                        continue
+                    fprov, fnewznab_host, ftorznab_host = provider_search_info(
+                        prov, newznab_info, torznab_info
+                    )
+                    if any(
+                        [
+                            fprov not in searchpool.FANOUT_PROVIDERS,
+                            fprov in checked_once,
+                            fprov == 'dognzb' and mylar.CONFIG.DOGNZB == 0,
+                            fprov == 'newznab' and fnewznab_host is None,
+                            fprov == 'torznab' and ftorznab_host is None,
+                        ]
+                    ):
+                        continue
+                    NZB_SEARCH(
+                        ComicName,
+                        tmp_IssueNumber,
+                        ComicYear,
+                        SeriesYear,
+                        Publisher,
+                        IssueDate,
+                        StoreDate,
+                        fprov,
+                        tmp_prov_count - fcnt,
+                        IssDateFix,
+                        IssueID,
+                        UseFuzzy,
+                        fnewznab_host,
+                        ComicVersion=ComicVersion,
+                        SARC=SARC,
+                        IssueArcID=IssueArcID,
+                        RSS="no",
+                        ComicID=ComicID,
+                        issuetitle=issuetitle,
+                        unaltered_ComicName=unaltered_ComicName,
+                        allow_packs=allow_packs,
+                        oneoff=oneoff,
+                        cmloopit=cmloopit,
+                        manual=manual,
+                        torznab_host=ftorznab_host,
+                        torrentid_32p=torrentid_32p,
+                        digitaldate=digitaldate,
+                        booktype=booktype,
+                        chktpb=chktpb,
+                        ignore_booktype=ignore_booktype,
+                        smode=smode,
+                        prefetch=prefetch,
+                        use_cache=cached,
+                    )
+                prefetch.collecting = False
+
             searchprov = None
             while tmp_prov_count > prov_count:
                 if checked_once:
@@ -381,46 +472,9 @@ def search_init(
                     prov_count += 1
                     continue
                 send_prov_count = tmp_prov_count - prov_count
-                newznab_host = None
-                torznab_host = None
-                if prov_order[prov_count] == 'DDL' and not provider_blocked:
-                    searchprov = 'DDL'
-                elif prov_order[prov_count] == '32p' and not provider_blocked:
-                    searchprov = '32P'
-                elif (
-                    prov_order[prov_count] == 'public torrents' and not provider_blocked
-                ):
-                    searchprov = 'Public Torrents'
-                elif 'torznab' in prov_order[prov_count]:
-                    searchprov = 'torznab'
-                    for nninfo in torznab_info:
-                        if (
-                            nninfo['provider'] == prov_order[prov_count]
-                            and not provider_blocked
-                        ):
-                            torznab_host = nninfo['info']
-                    if torznab_host is None:
-                        logger.fdebug(
-                            'there was an error - torznab information was blank and'
-                            ' it should not be.'
-                        )
-                elif 'newznab' in prov_order[prov_count]:
-                    searchprov = 'newznab'
-                    for nninfo in newznab_info:
-                        if (
-                            nninfo['provider'] == prov_order[prov_count]
-                            and not provider_blocked
-                        ):
-                            newznab_host = nninfo['info']
-                    if newznab_host is None:
-                        logger.fdebug(
-                            'there was an error - newznab information was blank and it'
-                            ' should not be.'
-                        )
-                else:
-                    newznab_host = None
-                    torznab_host = None
-                    searchprov = prov_order[prov_count].lower()
+                searchprov, newznab_host, torznab_host = provider_search_info(
+                    prov_order[prov_count], newznab_info, torznab_info
+                )
 
                 if searchprov == 'dognzb' and any(
                     [mylar.CONFIG.DOGNZB == 0, provider_blocked]
@@ -554,6 +608,8 @@ def search_init(
                         chktpb=chktpb,
                         ignore_booktype=ignore_booktype,
                         smode=smode,
+                        prefetch=prefetch,
+                        use_cache=cached,
                     )
                     if all(
                            [
@@ -610,6 +666,8 @@ def search_init(
                                     chktpb=chktpb,
                                     ignore_booktype=ignore_booktype,
                                     smode=smode,
+                                    prefetch=prefetch,
+                                    use_cache=cached,
                                 )
                                 if findit['status'] is True:
                                     break
@@ -656,6 +714,9 @@ def search_init(
                         )
                 prov_count += 1
 
+            if prefetch is not None and prefetch is not backlog:
+                prefetch.close()
+
             if findit['status'] is True:
                 if searchprov == 'newznab':
                     searchprov = newznab_host[0].rstrip() + ' (newznab)'
@@ -663,8 +724,17 @@ def search_init(
                     searchprov = torznab_host[0].rstrip() + ' (torznab)'
                 srchloop = 4
                 break
-            elif srchloop == 2 and (cmloopit - 1 >= 1) and searchprov not in checked_once:
+            elif (
+                srchloop == 2
+                and (cmloopit - 1 >= 1)
+                and searchprov not in checked_once
+                and prefetch is None
+            ):
+                # with concurrent search each provider is paced by its own budget instead.
                 time.sleep(30)  # pause for 30s to not hammmer api's
+            elif prefetch is not None and prefetch is backlog:
+                # the series-level query doesn't change with the issue number padding.
+                break
 
             cmloopit -= 1
 
@@ -708,6 +778,42 @@ def search_init(
     return findit, 'None'
 
 
+def provider_search_info(provider, newznab_info, torznab_info):
+    # map an entry of the provider_sequence order to the searchprov / host that
+    # NZB_SEARCH expects.
+    newznab_host = None
+    torznab_host = None
+    if provider == 'DDL':
+        searchprov = 'DDL'
+    elif provider == '32p':
+        searchprov = '32P'
+    elif provider == 'public torrents':
+        searchprov = 'Public Torrents'
+    elif 'torznab' in provider:
+        searchprov = 'torznab'
+        for nninfo in torznab_info:
+            if nninfo['provider'] == provider:
+                torznab_host = nninfo['info']
+        if torznab_host is None:
+            logger.fdebug(
+                'there was an error - torznab information was blank and'
+                ' it should not be.'
+            )
+    elif 'newznab' in provider:
+        searchprov = 'newznab'
+        for nninfo in newznab_info:
+            if nninfo['provider'] == provider:
+                newznab_host = nninfo['info']
+        if newznab_host is None:
+            logger.fdebug(
+                'there was an error - newznab information was blank and it'
+                ' should not be.'
+            )
+    else:
+        searchprov = provider.lower()
+    return searchprov, newznab_host, torznab_host
+
+
 def NZB_SEARCH(
     ComicName,
     IssueNumber,
@@ -739,7 +845,9 @@ def NZB_SEARCH(
     booktype=None,
     chktpb=0,
     ignore_booktype=False,
-    smode=None
+    smode=None,
+    prefetch=None,
+    use_cache=False
 ):
 
     if any([allow_packs == 1, allow_packs == '1']) and all(
@@ -806,18 +914,23 @@ def NZB_SEARCH(
             tmpprov = '%s (%s)' % (name_torznab, nzbprov)
         else:
             tmpprov = nzbprov
+    # a prefetch pass only queues the provider query, the real pass does the talking.
+    collecting = prefetch is not None and prefetch.collecting
     if cmloopit == 4:
         issuedisplay = None
-        logger.info(
-            'Shhh be very quiet...I\'m looking for %s (%s) using %s.'
-            % (ComicName, ComicYear, tmpprov)
-        )
+        if not collecting:
+            logger.info(
+                'Shhh be very quiet...I\'m looking for %s (%s) using %s.'
+                % (ComicName, ComicYear, tmpprov)
+            )
     elif IssueNumber is not None:
         issuedisplay = IssueNumber
     else:
         issuedisplay = StoreDate[5:]
 
-    if '0-Day Comics Pack' in ComicName:
+    if collecting:
+        logger.fdebug('[SEARCH-POOL] Queueing query to %s' % tmpprov)
+    elif '0-Day Comics Pack' in ComicName:
         logger.info(
             'Shhh be very quiet...I\'m looking for %s using %s.' % (ComicName, tmpprov)
         )
@@ -871,6 +984,8 @@ def NZB_SEARCH(
     findcount = 1  # this could be a loop in the future possibly
 
     findloop = 0
+    # fresh provider responses this search looked at - backed off in the search cache if nothing matched.
+    cachequeries = []
     foundcomic = []
     foundc = {}
     foundc['status'] = False
@@ -931,6 +1046,15 @@ def NZB_SEARCH(
                 comsearch = StoreDate
                 mod_isssearch = StoreDate
 
+        if (
+            prefetch is not None
+            and prefetch.series_level
+            and IssueNumber is not None
+            and RSS == "no"
+        ):
+            # batched backlog - ask for the series, the issue is matched locally.
+            comsearch = comsrc
+
         if nzbprov == 'DDL' and RSS == "no":
             cmname = re.sub("%20", " ", str(comsrc))
             logger.fdebug(
@@ -944,7 +1068,14 @@ def NZB_SEARCH(
                      'issue':     isssearch,
                      'year':      comyear}
             b = getcomics.GC(query=fline)
-            bb = b.search()
+            ddlkey = ('DDL', findcomic, isssearch, comyear)
+            if collecting:
+                prefetch.submit(nzbprov, ddlkey, b.search)
+                return foundc
+            elif prefetch is not None:
+                bb = prefetch.get(nzbprov, ddlkey, b.search)
+            else:
+                bb = b.search()
         elif RSS == "yes":
             if nzbprov == 'DDL':
                 logger.fdebug(
@@ -1141,7 +1272,7 @@ def NZB_SEARCH(
                             )
                             localbypass = True
 
-                    if localbypass is False:
+                    if localbypass is False and not collecting:
                         logger.info(
                             'Pausing for %s seconds before continuing to'
                             ' avoid hammering.' % pause_the_search
@@ -1169,10 +1300,42 @@ def NZB_SEARCH(
                     # logger.fdebug('[SSL: ' + str(verify) + '] Search URL: ' + findurl)
                     logger.fdebug('[SSL: %s] Search URL: %s' % (verify, logsearch))
 
+                    cached = None
+                    if use_cache is True:
+                        cached = searchcache.lookup(tmpprov, findurl)
+
+                    if collecting:
+                        if cached is None:
+                            prefetch.submit(
+                                tmpprov,
+                                findurl,
+                                httpclient.get,
+                                findurl,
+                                params=payload,
+                                verify=verify,
+                                headers=headers,
+                                timeout=searchpool.timeout(),
+                            )
+                        return foundc
+
                     try:
-                        r = requests.get(
-                            findurl, params=payload, verify=verify, headers=headers
-                        )
+                        if cached is not None:
+                            r = cached
+                        elif prefetch is not None:
+                            r = prefetch.get(
+                                tmpprov,
+                                findurl,
+                                httpclient.get,
+                                findurl,
+                                params=payload,
+                                verify=verify,
+                                headers=headers,
+                                timeout=searchpool.timeout(),
+                            )
+                        else:
+                            r = httpclient.get(
+                                findurl, params=payload, verify=verify, headers=headers
+                            )
                         r.raise_for_status()
                     except requests.exceptions.Timeout as e:
                         logger.warn(
@@ -1281,6 +1444,10 @@ def NZB_SEARCH(
                     except Exception:
                         logger.fdebug('no errors on data retrieval...proceeding')
                         pass
+
+                    if use_cache is True and cached is None:
+                        searchcache.store(tmpprov, findurl, data)
+                        cachequeries.append((tmpprov, findurl))
             elif nzbprov == 'experimental':
                 logger.info('sending %s to experimental search' % findcomic)
                 bb = findcomicfeed.Startit(
@@ -1294,6 +1461,10 @@ def NZB_SEARCH(
                 # lets force the exit after
                 cmloopit == 1
 
+        if collecting:
+            # nothing to queue for this provider (disabled / blank entry) - the real pass will report it.
+            return foundc
+
         done = False
         log2file = ""
         pack0day = False
@@ -2677,6 +2848,10 @@ def NZB_SEARCH(
 
     else:
         foundcomic.append("no")
+        if prefetch is None or not prefetch.series_level:
+            # a series-level response is shared by the other wanted issues, so it isn't backed off.
+            for cprov, curl in cachequeries:
+                searchcache.miss(cprov, curl)
         # if IssDateFix == "no":
         #     logger.info('Could not find Issue ' + str(IssueNumber) + ' of '
         #     + ComicName + '(' + str(comyear) + ') using ' + str(tmpprov) '
@@ -2685,16 +2860,13 @@ def NZB_SEARCH(
     return foundc
 
 
-def searchforissue(issueid=None, new=False, rsscheck=None, manual=False):
+def searchforissue(issueid=None, new=False, rsscheck=None, manual=False, backlog=None, cached=False, scheduled=False):
+    # scheduled: a Wanted sweep started by the scheduler - what it queues is searched at
+    # background priority and may be answered from the search cache. A forced sweep isn't.
     if rsscheck == 'yes':
-        while mylar.SEARCHLOCK is True:
-           # logger.info(
-           #     'A search is currently in progress....queueing this up again to try'
-           #     ' in a bit.'
-           # )
-            time.sleep(5)
-
-    if mylar.SEARCHLOCK is True:
+        mylar.SEARCHLOCK.wait_clear()
+
+    if mylar.SEARCHLOCK.is_set():
         logger.info(
             'A search is currently in progress....queueing this up again to try'
             ' in a bit.'
@@ -2741,7 +2913,7 @@ def searchforissue(issueid=None, new=False, rsscheck=None, manual=False):
                     'Initiating RSS Search Scan at the scheduled interval of %s minutes'
                     % mylar.CONFIG.RSS_CHECKINTERVAL
                 )
-                mylar.SEARCHLOCK = True
+                mylar.SEARCHLOCK.set()
             else:
                 logger.info('Initiating check to add Wanted items to Search Queue....')
 
@@ -2758,14 +2930,9 @@ def searchforissue(issueid=None, new=False, rsscheck=None, manual=False):
                         mylar.CONFIG.FAILED_DOWNLOAD_HANDLING
                         and mylar.CONFIG.FAILED_AUTO
                     ):
-                        issues_1 = myDB.select(
-                            'SELECT * from issues WHERE Status="Wanted" OR'
-                            ' Status="Failed"'
-                        )
+                        issues_1 = myDB.select(SQL_WANTED_FAILED_ISSUES)
                     else:
-                        issues_1 = myDB.select(
-                            'SELECT * from issues WHERE Status="Wanted"'
-                        )
+                        issues_1 = myDB.select(SQL_WANTED_ISSUES)
                     for iss in issues_1:
                         results.append(
                             {
@@ -2851,6 +3018,10 @@ def searchforissue(issueid=None, new=False, rsscheck=None, manual=False):
 
             # to-do: re-order the results list so it's most recent to least recent.
 
+            # with BACKLOG_BATCH the wanted issues of a series are queued as one item
+            # so the providers get asked once for the series, not once per issue.
+            backlog = {}
+
             for result in sorted(results, key=itemgetter('StoreDate'), reverse=True):
 
                 try:
@@ -3007,16 +3178,26 @@ def searchforissue(issueid=None, new=False, rsscheck=None, manual=False):
                                 'adding: ComicID:%s  IssueiD: %s'
                                 % (result['ComicID'], result['IssueID'])
                             )
-                            mylar.SEARCH_QUEUE.put(
-                                {
-                                    'comicname': comicname,
-                                    'seriesyear': SeriesYear,
-                                    'issuenumber': result['Issue_Number'],
-                                    'issueid': result['IssueID'],
-                                    'comicid': result['ComicID'],
-                                    'booktype': booktype,
-                                }
-                            )
+                            queue_item = {
+                                'comicname': comicname,
+                                'seriesyear': SeriesYear,
+                                'issuenumber': result['Issue_Number'],
+                                'issueid': result['IssueID'],
+                                'comicid': result['ComicID'],
+                                'booktype': booktype,
+                                'scheduled': scheduled,
+                            }
+                            if all(
+                                [
+                                    mylar.CONFIG.BACKLOG_BATCH is True,
+                                    result['mode'] in ('want', 'want_ann'),
+                                ]
+                            ):
+                                backlog.setdefault(
+                                    (result['ComicID'], comicname), []
+                                ).append(queue_item)
+                            else:
+                                mylar.SEARCH_QUEUE.put(queue_item)
                         continue
 
                     smode = result['mode']
@@ -3088,34 +3269,43 @@ def searchforissue(issueid=None, new=False, rsscheck=None, manual=False):
                     logger.exception(tracebackline)
                     continue
 
+            for (comicid, comicname), queue_items in backlog.items():
+                if len(queue_items) == 1:
+                    mylar.SEARCH_QUEUE.put(queue_items[0])
+                else:
+                    mylar.SEARCH_QUEUE.put(
+                        {
+                            'comicname': comicname,
+                            'seriesyear': queue_items[0]['seriesyear'],
+                            'issuenumber': [x['issuenumber'] for x in queue_items],
+                            'issueid': None,
+                            'comicid': comicid,
+                            'booktype': queue_items[0]['booktype'],
+                            'backlog': queue_items,
+                            'scheduled': scheduled,
+                        }
+                    )
+
             if rsscheck:
                 logger.info('Completed RSS Search scan')
-                mylar.SEARCHLOCK = False
+                mylar.SEARCHLOCK.clear()
             else:
                 logger.info('Completed Queueing API Search scan')
         else:
             try:
-                mylar.SEARCHLOCK = True
-                result = myDB.selectone(
-                    'SELECT * FROM issues where IssueID=?', [issueid]
-                ).fetchone()
+                mylar.SEARCHLOCK.set()
+                result = myDB.selectone(SQL_ISSUE, [issueid]).fetchone()
                 smode = 'want'
                 oneoff = False
                 if result is None:
-                    result = myDB.selectone(
-                        'SELECT * FROM annuals where IssueID=? AND NOT Deleted', [issueid]
-                    ).fetchone()
+                    result = myDB.selectone(SQL_ANNUAL, [issueid]).fetchone()
                     smode = 'want_ann'
                     if result is None:
-                        result = myDB.selectone(
-                            'SELECT * FROM storyarcs where IssueArcID=?', [issueid]
-                        ).fetchone()
+                        result = myDB.selectone(SQL_ARC_ISSUE, [issueid]).fetchone()
                         smode = 'story_arc'
                         oneoff = True
                         if result is None:
-                            result = myDB.selectone(
-                                'SELECT * FROM weekly where IssueID=?', [issueid]
-                            ).fetchone()
+                            result = myDB.selectone(SQL_WEEKLY_ISSUE, [issueid]).fetchone()
                             smode = 'pullwant'
                             oneoff = True
                             if result is None:
@@ -3123,7 +3313,7 @@ def searchforissue(issueid=None, new=False, rsscheck=None, manual=False):
                                     'Unable to locate IssueID - you probably should'
                                     ' delete/refresh the series.'
                                 )
-                                mylar.SEARCHLOCK = False
+                                mylar.SEARCHLOCK.clear()
                                 return
 
                 allow_packs = False
@@ -3165,9 +3355,7 @@ def searchforissue(issueid=None, new=False, rsscheck=None, manual=False):
                     booktype = result['format']
                     ignore_booktype = False
                 else:
-                    comic = myDB.selectone(
-                        'SELECT * FROM comics where ComicID=?', [ComicID]
-                    ).fetchone()
+                    comic = myDB.selectone(SQL_COMIC, [ComicID]).fetchone()
                     if smode == 'want_ann':
                         ComicName = result['ReleaseComicName']
                         Comicname_filesafe = None
@@ -3228,12 +3416,14 @@ def searchforissue(issueid=None, new=False, rsscheck=None, manual=False):
                     digitaldate=DigitalDate,
                     booktype=booktype,
                     ignore_booktype=ignore_booktype,
+                    backlog=backlog,
+                    cached=cached,
                 )
                 if manual is True:
-                    mylar.SEARCHLOCK = False
+                    mylar.SEARCHLOCK.clear()
                     return foundNZB
                 if foundNZB['status'] is True:
-                    mylar.SEARCHLOCK = False
+                    mylar.SEARCHLOCK.clear()
                     logger.fdebug('I found %s #%s' % (ComicName, IssueNumber))
                     updater.foundsearch(
                         ComicID,
@@ -3278,7 +3468,7 @@ def searchforissue(issueid=None, new=False, rsscheck=None, manual=False):
                 logger.exception(tracebackline)
 
             finally:
-                mylar.SEARCHLOCK = False
+                mylar.SEARCHLOCK.clear()
     else:
         if rsscheck:
             logger.warn(
@@ -3293,6 +3483,61 @@ def searchforissue(issueid=None, new=False, rsscheck=None, manual=False):
     return
 
 
+def search_backlog(item):
+    # a batched backlog item (see searchforissue) - every wanted issue of the series
+    # shares one SeriesFeed, so each api provider is only asked for the series once
+    # and the issues are all matched against that same response.
+    feed = searchpool.SeriesFeed()
+    found = 0
+    remaining = []
+    logger.info(
+        '[BACKLOG] Searching for %s wanted issues of %s in one pass'
+        % (len(item['backlog']), item['comicname'])
+    )
+    for cnt, queue_item in enumerate(item['backlog']):
+        if helpers.issue_status(queue_item['issueid']) is True:
+            continue
+        foundNZB = searchforissue(
+            queue_item['issueid'], backlog=feed, cached=queue_item.get('scheduled', False)
+        )
+        if isinstance(foundNZB, dict) and foundNZB.get('status') == 'IN PROGRESS':
+            # an rss scan grabbed the search lock first - the issues not searched yet
+            # go back on the queue (still batched), same as a single item would.
+            unsearched = item['backlog'][cnt:]
+            logger.info(
+                '[BACKLOG] A search is in progress - requeueing the %s unsearched'
+                ' issues of %s.' % (len(unsearched), item['comicname'])
+            )
+            if len(unsearched) == 1:
+                mylar.SEARCH_QUEUE.put(unsearched[0])
+            else:
+                requeue = dict(item)
+                requeue['backlog'] = unsearched
+                requeue['issuenumber'] = [x['issuenumber'] for x in unsearched]
+                mylar.SEARCH_QUEUE.put(requeue)
+            break
+        if isinstance(foundNZB, dict) and foundNZB.get('status') is True:
+            found += 1
+        else:
+            remaining.append(queue_item)
+
+    logger.info(
+        '[BACKLOG] %s : found %s of %s wanted issues using %s provider queries'
+        % (item['comicname'], found, len(item['backlog']), feed.queries)
+    )
+    if feed.truncated and remaining:
+        # a provider returned a full page for the series, so older issues may simply
+        # not have made the cut - give those the usual per-issue search.
+        logger.info(
+            '[BACKLOG] Provider results for %s were capped - queueing the %s'
+            ' remaining issues for individual searches.'
+            % (item['comicname'], len(remaining))
+        )
+        for queue_item in remaining:
+            mylar.SEARCH_QUEUE.put(queue_item)
+    return {'status': found > 0}
+
+
 def searchIssueIDList(issuelist):
     myDB = db.DBConnection()
     ens = [x for x in mylar.CONFIG.EXTRA_NEWZNABS if x[5] == '1']
@@ -3328,17 +3573,11 @@ def searchIssueIDList(issuelist):
     ):
         for issueid in issuelist:
             comicname = None
-            issue = myDB.selectone(
-                'SELECT * from issues WHERE IssueID=?', [issueid]
-            ).fetchone()
+            issue = myDB.selectone(SQL_ISSUE, [issueid]).fetchone()
             if issue is None:
-                issue = myDB.selectone(
-                    'SELECT * from annuals WHERE IssueID=? AND NOT Deleted', [issueid]
-                ).fetchone()
+                issue = myDB.selectone(SQL_ANNUAL, [issueid]).fetchone()
                 if issue is None:
-                    issue = myDB.selectone(
-                        'SELECT * from storyarcs WHERE IssueArcID=?', [issueid]
-                    ).fetchone()
+                    issue = myDB.selectone(SQL_ARC_ISSUE, [issueid]).fetchone()
                     if issue is not None:
                         comicname = issue['ComicName']
                         seriesyear = issue['SeriesYear']
@@ -3361,9 +3600,7 @@ def searchIssueIDList(issuelist):
                 continue
 
             if comicname is None:
-                comic = myDB.selectone(
-                    'SELECT * from comics WHERE ComicID=?', [issue['ComicID']]
-                ).fetchone()
+                comic = myDB.selectone(SQL_COMIC, [issue['ComicID']]).fetchone()
                 comicname = comic['ComicName']
                 seriesyear = comic['ComicYear']
                 booktype = comic['Type']
@@ -3806,7 +4043,7 @@ def searcher(
                 )
 
         try:
-            r = requests.get(down_url, params=payload, verify=verify, headers=headers)
+            r = httpclient.get(down_url, params=payload, verify=verify, headers=headers)
 
         except Exception as e:
             logger.warn('Error fetching data from %s: %s' % (tmpprov, e))
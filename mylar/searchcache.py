@@ -0,0 +1,90 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the
+#  implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public
+#  License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+# Provider response cache for NZB_SEARCH (the searchcache table).
+# Every api response is kept for SEARCH_CACHE_TTL minutes. A query that keeps coming back without a match
+# is held back for SEARCH_NEGATIVE_TTL minutes, doubling with each miss up to SEARCH_CACHE_MAX_TTL - new
+# releases are still picked up by the RSS checks in the meantime.
+# Only the scheduled Wanted sweep reads from the cache; searches started by the user always go to the provider.
+
+import re
+import time
+import hashlib
+
+import mylar
+from mylar import db, logger
+from mylar.cvclient import CachedResponse
+
+_stats = {'hits': 0, 'misses': 0, 'stored': 0}
+
+def enabled():
+    return mylar.CONFIG.SEARCH_CACHE is True
+
+def query_key(url):
+    #the api key is per-user and can be changed, so it's never part of the key.
+    url = re.sub(r'(?i)([?&])(apikey|r|i)=[^&]*', r'\1', url)
+    return hashlib.sha1(url.lower().encode('utf-8')).hexdigest()
+
+def ttl(misses):
+    if misses <= 0:
+        return max(mylar.CONFIG.SEARCH_CACHE_TTL, 0) * 60
+    backoff = max(mylar.CONFIG.SEARCH_NEGATIVE_TTL, 0) * 60 * (2 ** min(misses - 1, 16))
+    return min(backoff, max(mylar.CONFIG.SEARCH_CACHE_MAX_TTL, 0) * 60)
+
+def _row(key):
+    return db.DBConnection().selectone('SELECT * FROM searchcache WHERE QueryKey=?', [key]).fetchone()
+
+def lookup(provider, url):
+    #a still-valid cached response for this query, or None.
+    if not enabled():
+        return None
+    row = _row(query_key(url))
+    if row is None or row['Expires'] is None or row['Expires'] < time.time() or row['Result'] is None:
+        return None
+    _stats['hits'] += 1
+    logger.fdebug('[SEARCH-CACHE] Using cached %s response (%s misses so far, valid for another %ss)' % (provider, row['Misses'], int(row['Expires'] - time.time())))
+    return CachedResponse(bytes(row['Result']))
+
+def store(provider, url, content):
+    #a fresh provider response. Keeps the miss count, so a re-fetch of a query that keeps missing stays backed off.
+    if not enabled():
+        return
+    key = query_key(url)
+    row = _row(key)
+    misses = row['Misses'] if row is not None and row['Misses'] is not None else 0
+    db.DBConnection().upsert('searchcache', {'Provider': provider,
+                                             'Result':   content,
+                                             'Misses':   misses,
+                                             'Expires':  time.time() + ttl(misses)},
+                                            {'QueryKey': key})
+    _stats['stored'] += 1
+
+def miss(provider, url):
+    #nothing in the response matched - back the query off.
+    if not enabled():
+        return
+    key = query_key(url)
+    row = _row(key)
+    if row is None:
+        return
+    misses = (row['Misses'] or 0) + 1
+    expires = time.time() + ttl(misses)
+    db.DBConnection().upsert('searchcache', {'Misses':  misses,
+                                             'Expires': expires},
+                                            {'QueryKey': key})
+    _stats['misses'] += 1
+    logger.fdebug('[SEARCH-CACHE] No match from %s (%s in a row) - not asking again for %s minutes' % (provider, misses, int(ttl(misses) / 60)))
+
+def stats():
+    return dict(_stats)
@@ -15,10 +15,18 @@
 
 
 
+import threading
+
 import mylar
 
 from mylar import logger, helpers
 
+#set when the next run has been forced from the ui rather than coming round on the interval.
+_forced = threading.Event()
+
+def force():
+    _forced.set()
+
 class CurrentSearcher():
     def __init__(self, **kwargs):
         pass
@@ -28,7 +36,10 @@ class CurrentSearcher():
         logger.info('[SEARCH] Running Search for Wanted.')
         helpers.job_management(write=True, job='Auto-Search', current_run=helpers.utctimestamp(), status='Running')
         mylar.SEARCH_STATUS = 'Running'
-        mylar.search.searchforissue()
+        #only a sweep the scheduler started is searched as background work (and from the search cache).
+        scheduled = not _forced.is_set()
+        _forced.clear()
+        mylar.search.searchforissue(scheduled=scheduled)
         helpers.job_management(write=True, job='Auto-Search', last_run_completed=helpers.utctimestamp(), status='Waiting')
         mylar.SEARCH_STATUS = 'Waiting'
         #mylar.SCHED_SEARCH_LAST = helpers.now()
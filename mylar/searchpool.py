@@ -0,0 +1,148 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the
+#  implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public
+#  License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+# Concurrent provider fan-out for search.search_init (CONCURRENT_SEARCH).
+# The provider queries for a search pass are all fired off at once, then search_init evaluates the
+# responses in the configured provider order - so the order ranks the results instead of deciding
+# which provider gets asked first, and a pass takes as long as the slowest provider instead of all of them.
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import mylar
+from mylar import logger
+
+#providers that are queried over their own http api and so can be fanned out.
+FANOUT_PROVIDERS = ('newznab', 'torznab', 'dognzb', 'nzb.su', 'DDL')
+POOL_SIZE = 10
+
+#newznab api default page size - a series-level response this big may be missing older issues.
+FEED_LIMIT = 100
+
+_budgets = {}
+_budgets_lock = threading.Lock()
+
+def concurrent_enabled():
+    return mylar.CONFIG.CONCURRENT_SEARCH is True
+
+def timeout():
+    if mylar.CONFIG.SEARCH_TIMEOUT is None or mylar.CONFIG.SEARCH_TIMEOUT < 1:
+        return 30
+    return mylar.CONFIG.SEARCH_TIMEOUT
+
+def budget(provider):
+    with _budgets_lock:
+        if provider not in _budgets:
+            _budgets[provider] = ProviderBudget(provider)
+        return _budgets[provider]
+
+
+class ProviderBudget(object):
+    #per-provider pacing - takes the place of the global 30s pause between search passes, so a slow or
+    #strict indexer only ever holds up its own queries.
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.last = 0
+        self.lock = threading.Lock()
+
+    def interval(self):
+        if mylar.CONFIG.SEARCH_PROVIDER_INTERVAL is None or mylar.CONFIG.SEARCH_PROVIDER_INTERVAL < 0:
+            return 30
+        return mylar.CONFIG.SEARCH_PROVIDER_INTERVAL
+
+    def consume(self):
+        with self.lock:
+            delay = self.last + self.interval() - time.time()
+            if delay > 0:
+                logger.fdebug('[SEARCH-POOL] Pacing %s - waiting %.1fs before the next query.' % (self.provider, delay))
+                time.sleep(delay)
+            self.last = time.time()
+
+    def touch(self):
+        #a query that was run inline still counts against the provider, but doesn't wait for it.
+        with self.lock:
+            self.last = time.time()
+
+
+class ProviderPrefetch(object):
+    #while collecting is True, NZB_SEARCH hands its provider query to submit() and returns straight away.
+    #Once collecting is switched off, the normal (provider ordered) NZB_SEARCH calls pick the responses up
+    #through get() - any query that wasn't prefetched is just run inline as before.
+
+    series_level = False
+
+    def __init__(self):
+        self.collecting = True
+        self.futures = {}
+        self.pool = None
+
+    def submit(self, provider, key, func, *args, **kwargs):
+        if key in self.futures:
+            return
+        if self.pool is None:
+            self.pool = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix='SEARCH-POOL')
+        self.futures[key] = self.pool.submit(self._run, provider, func, *args, **kwargs)
+
+    def _run(self, provider, func, *args, **kwargs):
+        budget(provider).consume()
+        return func(*args, **kwargs)
+
+    def get(self, provider, key, func, *args, **kwargs):
+        #exceptions raised by the prefetched call are re-raised here, so the caller's error handling is unchanged.
+        future = self.futures.pop(key, None)
+        if future is not None:
+            return future.result()
+        budget(provider).touch()
+        return func(*args, **kwargs)
+
+    def close(self):
+        #anything still queued belongs to a pass that found a match already - let it finish in the background.
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+            self.pool = None
+        self.futures = {}
+
+
+class SeriesFeed(object):
+    #shared by all the wanted issues of one series during a batched backlog search (search.search_backlog).
+    #NZB_SEARCH queries the api providers for the series instead of the issue, so only the first issue
+    #actually reaches the provider - every other issue is matched against the same response.
+
+    series_level = True
+    collecting = False
+
+    def __init__(self):
+        self.results = {}
+        self.queries = 0
+        self.truncated = False
+
+    def get(self, provider, key, func, *args, **kwargs):
+        if key not in self.results:
+            budget(provider).touch()
+            self.queries += 1
+            try:
+                r = func(*args, **kwargs)
+            except Exception as e:
+                self.results[key] = (False, e)
+            else:
+                content = getattr(r, 'content', None)
+                if isinstance(content, bytes) and content.count(b'<item>') >= FEED_LIMIT:
+                    self.truncated = True
+                self.results[key] = (True, r)
+        ok, value = self.results[key]
+        if ok is False:
+            raise value
+        return value
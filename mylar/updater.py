@@ -22,11 +22,29 @@ import os
 import itertools
 import sys
 import calendar
+import pytz
 
 import mylar
-from mylar import db, logger, helpers, filechecker
-
-def dbUpdate(ComicIDList=None, calledfrom=None, sched=False):
+from mylar import db, logger, helpers, filechecker, cvclient, cv
+
+#the per-series lookups of a refresh / status update - also run through EXPLAIN QUERY PLAN by the queryplan
+#maintenance mode, so keep HOT_QUERIES in step with what's used below.
+SQL_COMIC = 'SELECT * FROM comics WHERE ComicID=?'
+SQL_SERIES_ISSUES = 'SELECT * FROM issues WHERE ComicID=?'
+SQL_SERIES_ANNUALS = 'SELECT * FROM annuals WHERE ComicID=? AND NOT Deleted'
+SQL_ISSUE_BY_NUMBER = 'SELECT * FROM issues WHERE ComicID=? AND Int_IssueNumber=?'
+SQL_ANNUAL_BY_NUMBER = 'SELECT * FROM annuals WHERE ComicID=? AND Int_IssueNumber=? AND NOT Deleted'
+SQL_NZBLOG = 'SELECT * FROM nzblog WHERE IssueID=? and Provider=?'
+SQL_WEEKLY_ISSUE = 'SELECT * FROM weekly WHERE ComicID=? AND IssueID=?'
+HOT_QUERIES = (SQL_COMIC, SQL_SERIES_ISSUES, SQL_SERIES_ANNUALS, SQL_ISSUE_BY_NUMBER, SQL_ANNUAL_BY_NUMBER, SQL_NZBLOG, SQL_WEEKLY_ISSUE)
+
+def dbUpdate(ComicIDList=None, calledfrom=None, sched=False, fresh=False):
+    #fresh: a refresh the user asked for - the series' cached CV responses are dropped first so it gets CV's current data.
+    #the issue data bulk-pulled for this run is only seen by this thread, and is dropped however the run ends.
+    with cv.IssuePrefetch() as prefetch:
+        return _dbUpdate(ComicIDList, calledfrom, sched, fresh, prefetch)
+
+def _dbUpdate(ComicIDList, calledfrom, sched, fresh, prefetch):
     if mylar.IMPORTLOCK:
         logger.info('Import is currently running - deferring this until the next scheduled run sequence.')
         return
@@ -83,7 +101,24 @@ def dbUpdate(ComicIDList=None, calledfrom=None, sched=False):
     if sched is True:
        logger.fdebug('Refresh sequence set to fire every %s minutes for %s day(s)' % (mylar.DBUPDATE_INTERVAL, mylar.CONFIG.REFRESH_CACHE))
 
-    for comic in sorted(comiclist, key=lambda x: x if isinstance(operator.itemgetter('LastUpdated'), str) else "", reverse=True):
+    comiclist = sorted(comiclist, key=lambda x: x if isinstance(operator.itemgetter('LastUpdated'), str) else "", reverse=True)
+
+    # bulk refresh - when working through a list of series, ask CV which have actually changed (100 volumes per hit)
+    # and pull the issues for the rest in batches of 100 volumes instead of one volume at a time.
+    bulk = all([mylar.CONFIG.CV_ONLY, sched is False, calledfrom not in ['refresh', 'weekly'], len(comiclist) > 1])
+    unchanged = []
+    pending = []
+    prefetched = set()
+    if bulk is True:
+        pending = [str(c['ComicID']) for c in comiclist if all([str(c['ComicID'])[:1] != 'G', any([ComicIDList is not None, refresh_due(c['LastUpdated'])])])]
+        if ComicIDList is None:
+            # series handed in explicitly (ie. from the CV change feed) are already known to have changed.
+            unchanged = unchanged_series(pending)
+            if len(unchanged) > 0:
+                logger.info('[BULK-REFRESH] %s of %s series have not changed on CV since their last refresh - skipping them.' % (len(unchanged), len(pending)))
+            pending = [x for x in pending if x not in unchanged]
+
+    for comic in comiclist:
         dspyear = comic['ComicYear']
         csyear = None
         fixed_type = None
@@ -103,16 +138,14 @@ def dbUpdate(ComicIDList=None, calledfrom=None, sched=False):
             c_date = comic['LastUpdated']
             if c_date is None:
                 logger.error(ComicName + ' failed during a previous add /refresh as it has no Last Update timestamp. Forcing refresh now.')
-            else:
-                c_obj_date = datetime.datetime.strptime(c_date, "%Y-%m-%d %H:%M:%S")
-                n_date = datetime.datetime.now()
-                absdiff = abs(n_date - c_obj_date)
-                hours = (absdiff.days * 24 * 60 * 60 + absdiff.seconds) / 3600.0
-                cache_hours = mylar.CONFIG.REFRESH_CACHE * 24
-                if hours < cache_hours:
-                    #logger.fdebug('%s [%s] Was refreshed less than %s hours ago. Skipping Refresh at this time.' % (ComicName, ComicID, cache_hours))
-                    cnt +=1
-                    continue
+            elif not refresh_due(c_date):
+                #logger.fdebug('%s [%s] Was refreshed less than %s hours ago. Skipping Refresh at this time.' % (ComicName, ComicID, mylar.CONFIG.REFRESH_CACHE * 24))
+                cnt +=1
+                continue
+            elif ComicID in unchanged:
+                myDB.upsert('comics', {'LastUpdated': helpers.now()}, {'ComicID': ComicID})
+                cnt +=1
+                continue
             logger.info('[%s/%s] Refreshing :%s (%s) [%s]' % (cnt, len(comiclist), ComicName, dspyear, ComicID))
         else:
             ComicID = comic['ComicID']
@@ -120,6 +153,15 @@ def dbUpdate(ComicIDList=None, calledfrom=None, sched=False):
 
             logger.info('Refreshing/Updating: %s (%s) [%s]' % (ComicName, dspyear, ComicID))
 
+        if fresh is True:
+            cvclient.invalidate(ComicID)
+
+        if all([bulk is True, ComicID in pending, ComicID not in prefetched]):
+            batch = pending[pending.index(ComicID):][:100]
+            logger.fdebug('[BULK-REFRESH] Retrieving issue data for the next %s series' % len(batch))
+            prefetch.load(batch)
+            prefetched.update(batch)
+
         mismatch = "no"
         if not mylar.CONFIG.CV_ONLY or ComicID[:1] == "G":
 
@@ -140,7 +182,7 @@ def dbUpdate(ComicIDList=None, calledfrom=None, sched=False):
                 logger.fdebug("CV_OneTimer option enabled...")
                 #in order to update to JUST CV_ONLY, we need to delete the issues for a given series so it's a clea$
                 logger.fdebug("Gathering the status of all issues for the series.")
-                issues = myDB.select('SELECT * FROM issues WHERE ComicID=?', [ComicID])
+                issues = myDB.select(SQL_SERIES_ISSUES, [ComicID])
 
                 if not issues:
                     #if issues are None it's probably a bad refresh/maxed out API that resulted in the issue data
@@ -164,7 +206,7 @@ def dbUpdate(ComicIDList=None, calledfrom=None, sched=False):
                 if mylar.CONFIG.ANNUALS_ON:
                     #now we load the annuals into memory to pass through to importer when refreshing so that it can
                     #refresh even the manually added annuals.
-                    annual_load = myDB.select('SELECT * FROM annuals WHERE ComicID=? AND NOT Deleted', [ComicID])
+                    annual_load = myDB.select(SQL_SERIES_ANNUALS, [ComicID])
                     logger.fdebug('checking annual db')
                     for annthis in annual_load:
                         if not any(d['ReleaseComicID'] == annthis['ReleaseComicID'] for d in annload):
@@ -207,7 +249,7 @@ def dbUpdate(ComicIDList=None, calledfrom=None, sched=False):
                         logger.warn('There was an error when refreshing this series - Make sure directories are writable/exist, etc')
                         return
 
-                    issues_new = myDB.select('SELECT * FROM issues WHERE ComicID=?', [ComicID])
+                    issues_new = myDB.select(SQL_SERIES_ISSUES, [ComicID])
                     annuals = []
                     ann_list = []
                     #reload the annuals here.
@@ -365,7 +407,8 @@ def dbUpdate(ComicIDList=None, calledfrom=None, sched=False):
 
         cnt += 1
         if all([sched is False, calledfrom != 'refresh', len(comiclist) > 1]):
-            time.sleep(15) #pause for 15 secs so dont hammer CV and get 500 error
+            if bulk is False:
+                time.sleep(15) #pause for 15 secs so dont hammer CV and get 500 error
         else:
             break
 
@@ -373,6 +416,41 @@ def dbUpdate(ComicIDList=None, calledfrom=None, sched=False):
     #mylar.UPDATER_STATUS = 'Waiting'
     logger.fdebug('Update complete')
 
+def refresh_due(c_date):
+    # True if the series was last refreshed longer ago than the refresh cache window.
+    if c_date is None:
+        return True
+    c_obj_date = datetime.datetime.strptime(c_date, "%Y-%m-%d %H:%M:%S")
+    n_date = datetime.datetime.now()
+    absdiff = abs(n_date - c_obj_date)
+    hours = (absdiff.days * 24 * 60 * 60 + absdiff.seconds) / 3600.0
+    return hours >= mylar.CONFIG.REFRESH_CACHE * 24
+
+def unchanged_series(comicidlist):
+    # returns the ComicIDs whose CV volume hasn't been touched since we last refreshed it, and whose issue count
+    # still matches what we have - there's nothing to pull for those. Anything CV doesn't answer for is treated as changed.
+    myDB = db.DBConnection()
+    volumes = cv.getComic(None, 'volume_updates', comicidlist=comicidlist)
+    if not volumes:
+        return []
+    p_zone = pytz.timezone('US/Pacific')
+    issuecounts = dict((str(x['ComicID']), x['cnt']) for x in myDB.select('SELECT ComicID, COUNT(*) AS cnt FROM issues GROUP BY ComicID'))
+    unchanged = []
+    for comic in myDB.select('SELECT ComicID, Status, LastUpdated FROM comics'):
+        comicid = str(comic['ComicID'])
+        if any([comicid not in volumes, comic['LastUpdated'] is None, comic['Status'] == 'Loading']):
+            continue
+        vol = volumes[comicid]
+        try:
+            # CV dates are US/Pacific, LastUpdated is local time.
+            cv_updated = p_zone.localize(datetime.datetime.strptime(vol['date_last_updated'], '%Y-%m-%d %H:%M:%S')).timestamp()
+            last_refresh = time.mktime(datetime.datetime.strptime(comic['LastUpdated'], '%Y-%m-%d %H:%M:%S').timetuple())
+        except (TypeError, ValueError):
+            continue
+        if all([cv_updated < last_refresh, vol['count_of_issues'] == issuecounts.get(comicid, 0)]):
+            unchanged.append(comicid)
+    return unchanged
+
 def latest_update(ComicID, LatestIssue, LatestDate, ReleaseComicID=None):
     # here we add to comics.latest
     logger.fdebug(str(ComicID) + ' - updating latest_date to : ' + str(LatestDate))
@@ -415,7 +493,7 @@ def upcoming_update(ComicID, ComicName, IssueNumber, IssueDate, forcecheck=None,
     mismatch = "no"
 
     if mylar.CONFIG.ALT_PULL != 2 or mylar.PULLBYFILE is True:
-        lastupdatechk = myDB.selectone("SELECT * FROM comics WHERE ComicID=?", [ComicID]).fetchone()
+        lastupdatechk = myDB.selectone(SQL_COMIC, [ComicID]).fetchone()
         if lastupdatechk is None:
             pullupd = "yes"
         else:
@@ -454,7 +532,7 @@ def upcoming_update(ComicID, ComicName, IssueNumber, IssueDate, forcecheck=None,
         issuechk = myDB.selectone("SELECT * FROM issues WHERE ComicID=? AND Issue_Number=?", [ComicID, IssueNumber]).fetchone()
     if issuechk is None and altissuenumber is not None:
         logger.info('altissuenumber is : ' + str(altissuenumber))
-        issuechk = myDB.selectone("SELECT * FROM issues WHERE ComicID=? AND Int_IssueNumber=?", [ComicID, helpers.issuedigits(altissuenumber)]).fetchone()
+        issuechk = myDB.selectone(SQL_ISSUE_BY_NUMBER, [ComicID, helpers.issuedigits(altissuenumber)]).fetchone()
 
     if issuechk is not None:
         if issuechk['Issue_Number'] == IssueNumber or issuechk['Issue_Number'] == altissuenumber:
@@ -501,7 +579,7 @@ def upcoming_update(ComicID, ComicName, IssueNumber, IssueDate, forcecheck=None,
                         logger.fdebug('Forcibly maintaining status of : ' + og_status + ' for #' + issuechk['Issue_Number'] + ' to ensure integrity.')
                     logger.fdebug('Comic series has an incorrect total count. Forcily refreshing series to ensure data is current.')
                     dbUpdate([ComicID])
-                    issuechk = myDB.selectone("SELECT * FROM issues WHERE ComicID=? AND Int_IssueNumber=?", [ComicID, helpers.issuedigits(IssueNumber)]).fetchone()
+                    issuechk = myDB.selectone(SQL_ISSUE_BY_NUMBER, [ComicID, helpers.issuedigits(IssueNumber)]).fetchone()
                     if issuechk['Status'] != og_status and (issuechk['Status'] != 'Downloaded' or issuechk['Status'] != 'Archived' or issuechk['Status'] != 'Snatched'):
                         logger.fdebug('Forcibly changing status of %s back to %s for #%s to stop repeated downloads.' % (issuechk['Status'], og_status, issuechk['Issue_Number']))
                     else:
@@ -760,7 +838,7 @@ def nzblog(IssueID, NZBName, ComicName, SARC=None, IssueArcID=None, id=None, pro
         newValue['AltNZBName'] = alt_nzbname
 
     #check if it exists already in the log.
-    chkd = myDB.selectone('SELECT * FROM nzblog WHERE IssueID=? and Provider=?', [IssueID, prov]).fetchone()
+    chkd = myDB.selectone(SQL_NZBLOG, [IssueID, prov]).fetchone()
     if chkd is None:
         pass
     else:
@@ -785,13 +863,15 @@ def foundsearch(ComicID, IssueID, mode=None, down=None, provider=None, SARC=None
     module += '[UPDATER]'
 
     myDB = db.DBConnection()
+    #status writes go through the write-behind queue and are committed together before returning.
+    batch = db.WriteBatch()
     modcomicname = False
 
     logger.fdebug(module + ' comicid: ' + str(ComicID))
     logger.fdebug(module + ' issueid: ' + str(IssueID))
     if mode != 'pullwant':
         if mode != 'story_arc':
-            comic = myDB.selectone('SELECT * FROM comics WHERE ComicID=?', [ComicID]).fetchone()
+            comic = myDB.selectone(SQL_COMIC, [ComicID]).fetchone()
             ComicName = comic['ComicName']
             if mode == 'want_ann':
                 issue = myDB.selectone('SELECT * FROM annuals WHERE IssueID=?', [IssueID]).fetchone()
@@ -829,7 +909,7 @@ def foundsearch(ComicID, IssueID, mode=None, down=None, provider=None, SARC=None
         if mode == 'story_arc':
             cValue = {"IssueArcID": IssueArcID}
             snatchedupdate = {"IssueArcID": IssueArcID}
-            myDB.upsert("storyarcs", newValue, cValue)
+            batch.upsert("storyarcs", newValue, cValue)
             # update the snatched DB
             snatchedupdate = {"IssueID":     IssueArcID,
                               "Status":      "Snatched",
@@ -839,11 +919,11 @@ def foundsearch(ComicID, IssueID, mode=None, down=None, provider=None, SARC=None
         else:
             if mode == 'want_ann':
                 controlValue = {"IssueID":   IssueID}
-                myDB.upsert("annuals", newValue, controlValue)
+                batch.upsert("annuals", newValue, controlValue)
             else:
                 controlValue = {"IssueID":   IssueID}
                 if mode != 'pullwant':
-                    myDB.upsert("issues", newValue, controlValue)
+                    batch.upsert("issues", newValue, controlValue)
 
             # update the snatched DB
             snatchedupdate = {"IssueID":     IssueID,
@@ -861,7 +941,7 @@ def foundsearch(ComicID, IssueID, mode=None, down=None, provider=None, SARC=None
                                "Hash":            hash
                                }
 
-            myDB.upsert("snatched", newsnatchValues, snatchedupdate)
+            batch.upsert("snatched", newsnatchValues, snatchedupdate)
 
         elif mode != 'pullwant':
             if modcomicname:
@@ -880,7 +960,7 @@ def foundsearch(ComicID, IssueID, mode=None, down=None, provider=None, SARC=None
                                "Hash":            hash
                                }
 
-            myDB.upsert("snatched", newsnatchValues, snatchedupdate)
+            batch.upsert("snatched", newsnatchValues, snatchedupdate)
 
         else:
              #updating snatched table with one-off is abit difficult due to lack of complete information in some instances
@@ -895,11 +975,11 @@ def foundsearch(ComicID, IssueID, mode=None, down=None, provider=None, SARC=None
                                "Hash":            hash
                                }
 
-            myDB.upsert("snatched", newsnatchValues, snatchedupdate)
+            batch.upsert("snatched", newsnatchValues, snatchedupdate)
 
         #this will update the weeklypull list immediately after snatching to reflect the new status.
         #-is ugly, should be linked directly to other table (IssueID should be populated in weekly pull at this point hopefully).
-        chkit = myDB.selectone("SELECT * FROM weekly WHERE ComicID=? AND IssueID=?", [ComicID, IssueID]).fetchone()
+        chkit = myDB.selectone(SQL_WEEKLY_ISSUE, [ComicID, IssueID]).fetchone()
 
         if chkit is not None:
             comicname = chkit['COMIC']
@@ -907,7 +987,7 @@ def foundsearch(ComicID, IssueID, mode=None, down=None, provider=None, SARC=None
 
             ctlVal = {"ComicID":  ComicID,
                       "IssueID":  IssueID}
-            myDB.upsert("weekly", newValue, ctlVal)
+            batch.upsert("weekly", newValue, ctlVal)
 
             newValue['IssueNumber'] =  issue
             newValue['ComicName'] = comicname
@@ -922,7 +1002,7 @@ def foundsearch(ComicID, IssueID, mode=None, down=None, provider=None, SARC=None
                 except:
                     pass
 
-            myDB.upsert("oneoffhistory", newValue, ctlVal)
+            batch.upsert("oneoffhistory", newValue, ctlVal)
         logger.info('%s Updated the status (Snatched) complete for %s Issue: %s' % (module, ComicName, IssueNum))
     else:
         if down == 'PP':
@@ -948,20 +1028,20 @@ def foundsearch(ComicID, IssueID, mode=None, down=None, provider=None, SARC=None
                            "Status":          downstatus,
                            "crc":             crc
                            }
-        myDB.upsert("snatched", newsnatchValues, snatchedupdate)
+        batch.upsert("snatched", newsnatchValues, snatchedupdate)
 
         if mode == 'story_arc':
             cValue = {"IssueArcID":   IssueArcID}
             nValue = {"Status":       "Downloaded"}
-            myDB.upsert("storyarcs", nValue, cValue)
+            batch.upsert("storyarcs", nValue, cValue)
 
         elif mode != 'pullwant':
             controlValue = {"IssueID":   IssueID}
             newValue = {"Status":    "Downloaded"}
             if mode == 'want_ann':
-                myDB.upsert("annuals", newValue, controlValue)
+                batch.upsert("annuals", newValue, controlValue)
             else:
-                myDB.upsert("issues", newValue, controlValue)
+                batch.upsert("issues", newValue, controlValue)
 
         #this will update the weeklypull list immediately after post-processing to reflect the new status.
         chkit = myDB.selectone("SELECT * FROM weekly WHERE ComicID=? AND IssueID=? AND Status='Snatched'", [ComicID, IssueID]).fetchone()
@@ -973,7 +1053,7 @@ def foundsearch(ComicID, IssueID, mode=None, down=None, provider=None, SARC=None
             ctlVal = {"ComicID":  ComicID,
                       "IssueID":  IssueID}
             newVal = {"Status":   "Downloaded"}
-            myDB.upsert("weekly", newVal, ctlVal)
+            batch.upsert("weekly", newVal, ctlVal)
 
             newVal['IssueNumber'] =  issue
             newVal['ComicName'] = comicname
@@ -981,9 +1061,12 @@ def foundsearch(ComicID, IssueID, mode=None, down=None, provider=None, SARC=None
             if pullinfo is not None:
                 newVal['weeknumber'] = pullinfo['weeknumber']
                 newVal['year'] = pullinfo['year']
-            myDB.upsert("oneoffhistory", newVal, ctlVal)
+            batch.upsert("oneoffhistory", newVal, ctlVal)
 
         logger.info('%s Updating Status (%s) now completed for %s issue: %s' % (module, downstatus, ComicName, IssueNum))
+    batch.wait()
+    if mode not in ('pullwant', 'story_arc'):
+        helpers.series_summary_sync(ComicID)
     return
 
 def forceRescan(ComicID, archive=None, module=None, recheck=False):
@@ -992,7 +1075,7 @@ def forceRescan(ComicID, archive=None, module=None, recheck=False):
     module += '[FILE-RESCAN]'
     myDB = db.DBConnection()
     # file check to see if issue exists
-    rescan = myDB.selectone('SELECT * FROM comics WHERE ComicID=?', [ComicID]).fetchone()
+    rescan = myDB.selectone(SQL_COMIC, [ComicID]).fetchone()
     if rescan['AlternateSearch'] is not None:
         altnames = rescan['AlternateSearch'] + '##'
     else:
@@ -1011,7 +1094,7 @@ def forceRescan(ComicID, archive=None, module=None, recheck=False):
     else:
         booktype = None
 
-    annscan = myDB.select('SELECT * FROM annuals WHERE ComicID=? AND NOT Deleted', [ComicID])
+    annscan = myDB.select(SQL_SERIES_ANNUALS, [ComicID])
     if annscan is None:
         pass
     else:
@@ -1117,7 +1200,7 @@ def forceRescan(ComicID, archive=None, module=None, recheck=False):
 
     if not mc_issuenumber is None:
         for mciss in mc_issuenumber:
-           mchk = myDB.select('SELECT * FROM issues WHERE ComicID=? AND Int_IssueNumber=?', [ComicID, mciss['Int_IssueNumber']])
+           mchk = myDB.select(SQL_ISSUE_BY_NUMBER, [ComicID, mciss['Int_IssueNumber']])
            for mck in mchk:
               mc_issue.append({"Int_IssueNumber":   mck['Int_IssueNumber'],
                                "IssueYear":         mck['IssueDate'][:4],
@@ -1139,7 +1222,7 @@ def forceRescan(ComicID, archive=None, module=None, recheck=False):
 
         if not mc_annualnumber is None:
             for mcann in mc_annualnumber:
-                achk = myDB.select('SELECT * FROM annuals WHERE ComicID=? AND Int_IssueNumber=? AND NOT Deleted', [ComicID, mcann['Int_IssueNumber']])
+                achk = myDB.select(SQL_ANNUAL_BY_NUMBER, [ComicID, mcann['Int_IssueNumber']])
                 for ack in achk:
                     mc_annual.append({"Int_IssueNumber":   ack['Int_IssueNumber'],
                                       "IssueYear":         ack['IssueDate'][:4],
@@ -1158,7 +1241,7 @@ def forceRescan(ComicID, archive=None, module=None, recheck=False):
     d_annuals = []
     d_issues = []
 
-    reissues = myDB.select('SELECT * FROM issues WHERE ComicID=?', [ComicID])
+    reissues = myDB.select(SQL_SERIES_ISSUES, [ComicID])
 
     a_start = datetime.datetime.now()
     while (fn < fccnt):
@@ -1342,13 +1425,13 @@ def forceRescan(ComicID, archive=None, module=None, recheck=False):
                 logger.fdebug(module + ' Forcing ComicID to ' + str(ANNComicID) + ' in case of duplicate numbering across volumes.')
                 reannuals = myDB.select('SELECT * FROM annuals WHERE ComicID=? AND ReleaseComicID=? AND NOT Deleted', [ComicID, ANNComicID])
             else:
-                reannuals = myDB.select('SELECT * FROM annuals WHERE ComicID=? AND NOT Deleted', [ComicID])
+                reannuals = myDB.select(SQL_SERIES_ANNUALS, [ComicID])
                 ANNComicID = ComicID
 
             if len(reannuals) == 0:
                 #it's possible if annual integration is enabled, and an annual series is added directly to the wachlist,
                 #not as part of a series, that the above won't work since it's looking in the wrong table.
-                reannuals = myDB.select('SELECT * FROM issues WHERE ComicID=?', [ComicID])
+                reannuals = myDB.select(SQL_SERIES_ISSUES, [ComicID])
                 ANNComicID = None #need to set this to None so we write to the issues table and not the annuals
 
 
@@ -1827,6 +1910,9 @@ def totals(ComicID, havefiles=None, totalfiles=None, module=None, issueid=None,
         newValueStat = {"ComicSize":       os.path.getsize(file)}
         myDB.upsert(filetable, newValueStat, controlValueStat)
 
+    #keep the home page summary current with the new counts.
+    helpers.series_summary_sync(ComicID)
+
 
 def watchlist_updater(calledfrom=None, sched=False):
     # this will retrieve the 'rss' from CV showing the last updated comicids
@@ -2010,6 +2096,8 @@ def watchlist_updater(calledfrom=None, sched=False):
             ):
                 if x['comicid']['id'] not in to_check:
                     to_check.append(x['comicid']['id'])
+                    # CV says it changed, so any cached volume/issue responses are stale now.
+                    cvclient.invalidate(x['comicid']['id'])
         cntr_chk += 1
 
     if len(to_check) > 0:
@@ -0,0 +1,137 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the
+#  implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General Public
+#  License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+# Watchlist lookups for post-processing (PostProcessor.Process).
+# The series names / alternate names on the watchlist are held in memory, so matching a file to its series
+# no longer means re-reading every alternate-named series and re-parsing its alternates on each run.
+# Triggers on comics bump watchindex.Version whenever a series is added, removed, renamed or has its
+# alternate names edited - the index is rebuilt the next time it's asked for after that.
+# IssueRows holds the issue / annual rows of the series a single run looks at.
+
+import re
+import time
+import threading
+
+from mylar import db, logger, filechecker
+
+_index = None
+_lock = threading.Lock()
+
+def key(name):
+    #same form as comics.DynamicComicName - no spaces or | separators, lowercase.
+    return re.sub(r'[\|\s]', '', name).lower()
+
+def version():
+    row = db.DBConnection().selectone('SELECT Version FROM watchindex').fetchone()
+    if row is None:
+        return None
+    return row[0]
+
+
+class WatchIndex(object):
+
+    def __init__(self, version):
+        self.version = version
+        self.names = {}
+        self.alternates = {}
+        self.alt_names = {}
+        self.count = 0
+        myDB = db.DBConnection()
+        for row in myDB.select('SELECT ComicID, DynamicComicName, AlternateSearch FROM comics'):
+            if row['DynamicComicName'] is None:
+                continue
+            self.count += 1
+            dynamic = key(row['DynamicComicName'])
+            self.names.setdefault(dynamic, []).append(row['ComicID'])
+            if row['AlternateSearch'] is None or row['AlternateSearch'] == 'None':
+                continue
+            as_dinfo = filechecker.FileChecker(AlternateSearch=row['AlternateSearch']).altcheck()
+            self.alt_names[row['DynamicComicName']] = as_dinfo['AS_Alt']
+            for alt in as_dinfo['AS_Alt']:
+                names = self.alternates.setdefault(key(alt), [])
+                if dynamic not in names:
+                    names.append(dynamic)
+
+    def alternate_names(self, seriesname):
+        #DynamicComicNames of the series that list seriesname as one of their alternate names.
+        return list(self.alternates.get(key(seriesname), []))
+
+    def alternates_of(self, dynamicname):
+        #the parsed alternate names (FileChecker.altcheck AS_Alt) of the series with this DynamicComicName.
+        return self.alt_names.get(dynamicname, [])
+
+    def series(self, names):
+        #comics rows for the given DynamicComicNames. Only the names are indexed - the rows themselves are read
+        #fresh, as their status / counts change with every post-process.
+        comicids = []
+        for name in names:
+            for comicid in self.names.get(key(name), []):
+                if comicid not in comicids:
+                    comicids.append(comicid)
+        if not comicids:
+            return []
+        tmpsql = "SELECT * FROM comics WHERE ComicID IN ({seq})".format(seq=','.join('?' * len(comicids)))
+        return db.DBConnection().select(tmpsql, comicids)
+
+
+class IssueRows(object):
+    #issues / annuals rows for the series a post-processing run matches against, loaded one series at a time
+    #rather than one query per file.
+
+    def __init__(self):
+        self._issues = {}
+        self._annuals = {}
+        self._latest = {}
+
+    def _load(self, cache, sql, comicid):
+        if comicid not in cache:
+            rows = {}
+            for row in db.DBConnection().select(sql, [comicid]):
+                rows.setdefault(row['Int_IssueNumber'], []).append(row)
+            cache[comicid] = rows
+        return cache[comicid]
+
+    def issues(self, comicid, int_issuenumber=None):
+        rows = self._load(self._issues, 'SELECT * from issues WHERE ComicID=?', comicid)
+        if int_issuenumber is None:
+            return [row for matches in rows.values() for row in matches]
+        return rows.get(int_issuenumber, [])
+
+    def annuals(self, comicid, int_issuenumber):
+        rows = self._load(self._annuals, 'SELECT * from annuals WHERE ComicID=? AND NOT Deleted', comicid)
+        return rows.get(int_issuenumber, [])
+
+    def latest(self, comicid, table='issues'):
+        #ReleaseDate, Issue_Number, Int_IssueNumber of the most recent issue (or annual) of the series.
+        if (table, comicid) not in self._latest:
+            self._latest[(table, comicid)] = db.DBConnection().selectone('SELECT ReleaseDate, Issue_Number, Int_IssueNumber from %s WHERE ComicID=? order by ReleaseDate DESC' % table, [comicid]).fetchone()
+        return self._latest[(table, comicid)]
+
+    def forget(self, comicid):
+        #after a series refresh.
+        self._issues.pop(comicid, None)
+        self._annuals.pop(comicid, None)
+        self._latest.pop(('issues', comicid), None)
+        self._latest.pop(('annuals', comicid), None)
+
+
+def get():
+    global _index
+    current = version()
+    with _lock:
+        if _index is None or _index.version != current:
+            start = time.time()
+            _index = WatchIndex(current)
+            logger.fdebug('[WATCH-INDEX] Indexed %s series (%s alternate names) in %ss' % (_index.count, len(_index.alternates), round(time.time() - start, 2)))
+        return _index
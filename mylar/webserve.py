@@ -33,6 +33,7 @@ from mako import exceptions
 
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import csv
 import platform
 import urllib.request, urllib.parse, urllib.error
@@ -40,13 +41,26 @@ import shutil
 
 import mylar
 
-from mylar import logger, db, importer, mb, search, filechecker, helpers, updater, parseit, weeklypull, PostProcessor, librarysync, moveit, Failed, readinglist, notifiers, sabparse, config, series_metadata
+from mylar import logger, db, importer, mb, search, filechecker, helpers, updater, parseit, weeklypull, PostProcessor, librarysync, moveit, Failed, readinglist, notifiers, sabparse, config, series_metadata, httpclient, ddltransfer, cbrconvert, cvclient
 from mylar.auth import AuthController, require
 
 import simplejson as simplejson
 
 from operator import itemgetter
 
+#the hot queries of the series / wanted / weekly / arc pages - also run through EXPLAIN QUERY PLAN by the
+#queryplan maintenance mode, so keep HOT_QUERIES in step with what's used below.
+SQL_COMIC = 'SELECT * FROM comics WHERE ComicID=?'
+SQL_SERIES_ISSUES = 'SELECT * FROM issues WHERE ComicID=? order by Int_IssueNumber DESC'
+SQL_SERIES_ANNUALS = 'SELECT * FROM annuals WHERE ComicID=? AND NOT Deleted ORDER BY ComicID, Int_IssueNumber DESC'
+SQL_WANTED_ISSUES = "SELECT * from issues WHERE Status='Wanted'"
+SQL_WANTED_ANNUALS = "SELECT * FROM annuals WHERE Status='Wanted' AND NOT Deleted"
+SQL_WEEKLY = 'SELECT * from weekly WHERE weeknumber=? AND year=?'
+SQL_ARC = 'SELECT * FROM storyarcs WHERE StoryArcID=?'
+SQL_CV_ARC = 'SELECT * FROM storyarcs WHERE CV_ArcID=?'
+SQL_SNATCHED = 'SELECT * FROM snatched WHERE IssueID=?'
+HOT_QUERIES = (SQL_COMIC, SQL_SERIES_ISSUES, SQL_SERIES_ANNUALS, SQL_WANTED_ISSUES, SQL_WANTED_ANNUALS, SQL_WEEKLY, SQL_ARC, SQL_CV_ARC, SQL_SNATCHED)
+
 def serve_template(templatename, **kwargs):
     interface_dir = os.path.join(str(mylar.PROG_DIR), 'data/interfaces/')
     if any([mylar.CONFIG.INTERFACE == 'default', mylar.CONFIG.INTERFACE is None]):
@@ -123,24 +137,20 @@ class WebInterface(object):
     home.exposed = True
 
     def loadhome(self, iDisplayStart=0, iDisplayLength=100, iSortCol_0=5, sSortDir_0="desc", sSearch="", **kwargs):
-        resultlist = helpers.havetotals()
+        #filtering, sorting & paging all happen against the materialized seriessummary table.
+        helpers.series_summary_sync()
+        myDB = db.DBConnection()
         iDisplayStart = int(iDisplayStart)
         iDisplayLength = int(iDisplayLength)
-        filtered = []
-        if sSearch == "" or sSearch == None:
-            filtered = resultlist[::]
-        else:
-            for row in resultlist:
-                try:
-                    lat_iss = row['LatestIssue']
-                    if lat_iss is None:
-                        lat_iss = ''
-                    if any([sSearch.lower() in row['ComicPublisher'].lower(), sSearch.lower() in row['ComicName'].lower(), sSearch.lower() in row['ComicYear'], sSearch.lower() in lat_iss, sSearch.lower() in row['recentstatus'].lower()]):
-                        filtered.append(row)
-                    elif row['displaytype'] is not None and sSearch.lower() in row['displaytype'].lower():
-                        filtered.append(row)
-                except Exception as e:
-                    pass
+
+        totalcount = myDB.selectone('SELECT COUNT(*) FROM seriessummary').fetchone()[0]
+
+        where = ''
+        args = []
+        if sSearch != "" and sSearch is not None:
+            where = " WHERE instr(lower(ComicPublisher), ?) OR instr(lower(ComicName), ?) OR instr(ComicYear, ?) OR instr(COALESCE(LatestIssue, ''), ?) OR instr(lower(recentstatus), ?) OR instr(lower(COALESCE(displaytype, '')), ?)"
+            args = [sSearch.lower()] * 6
+        filteredcount = myDB.selectone('SELECT COUNT(*) FROM seriessummary' + where, args).fetchone()[0]
 
         sortcolumn = 'ComicPublisher'
         if iSortCol_0 == '0':
@@ -158,27 +168,31 @@ class WebInterface(object):
         elif iSortCol_0 == '6':
             sortcolumn = 'Status'
 
-        #below sort is for multi-sort columns, maybe make them user configurable - not sure how to pass mutli-sort thru otherwise
-        #filtered.sort(key= itemgetter(sortcolumn2, sortcolumn), reverse=sSortDir_0 == "desc")
+        #NULLs & blanks sort together at one end, same as the old in-memory (is None, == '', value) sort keys.
+        if sSortDir_0 == "desc":
+            direction = 'DESC'
+            opposite = 'ASC'
+        else:
+            direction = 'ASC'
+            opposite = 'DESC'
+        sortkey = lambda x, d: '%s IS NULL %s, %s = \'\' %s, %s %s' % (x, d, x, d, x, d)
         if sortcolumn == 'percent':
-            filtered.sort(key=lambda x: (x['totalissues'] is None, x['totalissues'] == '', x['totalissues']), reverse=sSortDir_0 == "asc")
-            filtered.sort(key=lambda x: (x['percent'] is None, x['percent'] == '', x['percent']), reverse=sSortDir_0 == "desc")
-            filtered.sort(key=lambda x: (x['haveissues'] is None, x['haveissues'] == '', x['haveissues']), reverse=sSortDir_0 == "desc")
-            filtered.sort(key=lambda x: (x['percent'] is None, x['percent'] == '', x['percent']), reverse=sSortDir_0 == "desc")
+            orderby = ', '.join([sortkey('percent', direction), sortkey('haveissues', direction), sortkey('totalissues', opposite)])
         else:
-            filtered.sort(key=lambda x: (x[sortcolumn] is None, x[sortcolumn] == '', x[sortcolumn]), reverse=sSortDir_0 == "desc")
-        rows = filtered[iDisplayStart:(iDisplayStart + iDisplayLength)]
-        rows = [[row['ComicPublisher'], row['ComicName'], row['ComicYear'], row['LatestIssue'], row['LatestDate'], row['recentstatus'], row['Status'], row['percent'], row['haveissues'], row['totalissues'], row['ComicID'], row['displaytype'], row['ComicVolume']] for row in rows]
+            orderby = sortkey(sortcolumn, direction)
+
+        rows = myDB.select('SELECT ComicPublisher, ComicName, ComicYear, LatestIssue, LatestDate, recentstatus, Status, percent, haveissues, totalissues, ComicID, displaytype, ComicVolume FROM seriessummary' + where + ' ORDER BY ' + orderby + ' LIMIT ? OFFSET ?', args + [iDisplayLength, iDisplayStart])
+        rows = [list(row) for row in rows]
         return json.dumps({
-            'iTotalDisplayRecords': len(filtered),
-            'iTotalRecords': len(resultlist),
+            'iTotalDisplayRecords': filteredcount,
+            'iTotalRecords': totalcount,
             'aaData': rows,
         })
     loadhome.exposed = True
 
     def comicDetails(self, ComicID):
         myDB = db.DBConnection()
-        comic = myDB.selectone('SELECT * FROM comics WHERE ComicID=?', [ComicID]).fetchone()
+        comic = myDB.selectone(SQL_COMIC, [ComicID]).fetchone()
         if comic is None:
             raise cherrypy.HTTPRedirect("home")
 
@@ -219,7 +233,7 @@ class WebInterface(object):
 
             if run_them_down is True:
                 updater.forceRescan(ComicID)
-                comic = myDB.selectone('SELECT * FROM comics WHERE ComicID=?', [ComicID]).fetchone()
+                comic = myDB.selectone(SQL_COMIC, [ComicID]).fetchone()
 
         totalissues = comic['Total']
         haveissues = comic['Have']
@@ -267,7 +281,7 @@ class WebInterface(object):
                 break
             i+=1
 
-        issues = myDB.select('SELECT * FROM issues WHERE ComicID=? order by Int_IssueNumber DESC', [ComicID])
+        issues = myDB.select(SQL_SERIES_ISSUES, [ComicID])
         isCounts = {}
         isCounts[1] = 0   #1 skipped
         isCounts[2] = 0   #2 wanted
@@ -419,7 +433,7 @@ class WebInterface(object):
                }
 
         if mylar.CONFIG.ANNUALS_ON:
-            annuals = myDB.select("SELECT * FROM annuals WHERE ComicID=? AND NOT Deleted ORDER BY ComicID, Int_IssueNumber DESC", [ComicID])
+            annuals = myDB.select(SQL_SERIES_ANNUALS, [ComicID])
             #we need to load in the annual['ReleaseComicName'] and annual['ReleaseComicID']
             #then group by ReleaseComicID, in an attempt to create seperate tables for each different annual series.
             #this should allow for annuals, specials, one-shots, etc all to be included if desired.
@@ -626,6 +640,7 @@ class WebInterface(object):
                         #searchfix-2.html is for comics that span multiple volumes.
                         return serve_template(templatename="searchfix-2.html", title="In-Depth Results", sresults=sresults)
         #print ("imported is: " + str(imported))
+        cvclient.invalidate(comicid)
         threading.Thread(target=importer.addComictoDB, args=[comicid, mismatch, None, imported, ogcname]).start()
         time.sleep(5) #wait 5s so the db can be populated enough to display the page - otherwise will return to home page if not enough info is loaded.
         raise cherrypy.HTTPRedirect("comicDetails?ComicID=%s" % comicid)
@@ -635,6 +650,7 @@ class WebInterface(object):
         mismatch = "no"
         logger.info('Attempting to add directly by ComicVineID: ' + str(comicid))
         if comicid.startswith('4050-'): comicid = re.sub('4050-', '', comicid)
+        cvclient.invalidate(comicid)
         if nothread is False:
             threading.Thread(target=importer.addComictoDB, args=[comicid, mismatch, None, imported, ogcname]).start()
         else:
@@ -659,9 +675,9 @@ class WebInterface(object):
         myDB = db.DBConnection()
         #check if it already exists.
         if cvarcid is None:
-            arc_chk = myDB.select('SELECT * FROM storyarcs WHERE StoryArcID=?', [arcid])
+            arc_chk = myDB.select(SQL_ARC, [arcid])
         else:
-            arc_chk = myDB.select('SELECT * FROM storyarcs WHERE CV_ArcID=?', [cvarcid])
+            arc_chk = myDB.select(SQL_CV_ARC, [cvarcid])
         if arc_chk is None:
             if arcrefresh:
                 logger.warn(module + ' Unable to retrieve Story Arc ComicVine ID from the db. Unable to refresh Story Arc at this time. You probably have to delete/readd the story arc this one time for Refreshing to work properly.')
@@ -1202,7 +1218,7 @@ class WebInterface(object):
         #myDB = db.DBConnection()
         #myDB.upsert('comics', {'Status': 'Loading'}, {'ComicID': ComicID})
         #threading.Thread(target=updater.dbUpdate, args=[comicsToAdd,'refresh']).start()
-        updater.dbUpdate(comicsToAdd, 'refresh')
+        updater.dbUpdate(comicsToAdd, 'refresh', fresh=True)
     refreshSeries.exposed = True
 
     def description_edit(self, id, value):
@@ -1425,7 +1441,7 @@ class WebInterface(object):
         #  - if it's a torrent - we redownload the torrent and flip it to the watchdir on the local / seedbox.
         #4 - Change status to Snatched.
         myDB = db.DBConnection()
-        chk_snatch = myDB.select('SELECT * FROM snatched WHERE IssueID=?', [IssueID])
+        chk_snatch = myDB.select(SQL_SNATCHED, [IssueID])
         if chk_snatch is None:
             logger.info('Unable to locate how issue was downloaded (name, provider). Cannot continue.')
             return json.dumps({'status': 'failure', 'message': 'Unable to locate how issue was downloaded. Cannot retry.'})
@@ -1982,19 +1998,19 @@ class WebInterface(object):
 
         popit = myDB.select("SELECT * FROM sqlite_master WHERE name='weekly' and type='table'")
         if popit:
-            w_results = myDB.select("SELECT * from weekly WHERE weeknumber=? AND year=?", [int(weekinfo['weeknumber']),weekinfo['year']])
+            w_results = myDB.select(SQL_WEEKLY, [int(weekinfo['weeknumber']),weekinfo['year']])
             if len(w_results) == 0:
                 logger.info('trying to repopulate to week: ' + str(weekinfo['weeknumber']) + '-' + str(weekinfo['year']))
                 repoll = self.pullrecreate(weeknumber=weekinfo['weeknumber'],year=weekinfo['year'])
                 if repoll['status'] == 'success':
-                    w_results = myDB.select("SELECT * from weekly WHERE weeknumber=? AND year=?", [int(weekinfo['weeknumber']),weekinfo['year']])
+                    w_results = myDB.select(SQL_WEEKLY, [int(weekinfo['weeknumber']),weekinfo['year']])
                 else:
                     logger.warn('Problem repopulating the pullist for week ' + str(weekinfo['weeknumber']) + ', ' + str(weekinfo['year']))
                     if mylar.CONFIG.ALT_PULL == 2:
                         logger.warn('Attempting to repoll against legacy pullist in order to have some kind of updated listing for the week.')
                         repoll = self.manualpull()
                         if repoll['status'] == 'success':
-                            w_results = myDB.select("SELECT * from weekly WHERE weeknumber=? AND year=?", [int(weekinfo['weeknumber']),weekinfo['year']])
+                            w_results = myDB.select(SQL_WEEKLY, [int(weekinfo['weeknumber']),weekinfo['year']])
                         else:
                             logger.warn('Unable to populate the pull-list. Not continuing at this time (will try again in abit)')
 
@@ -2421,7 +2437,7 @@ class WebInterface(object):
         #fix None DateAdded points here
         helpers.DateAddedFix()
 
-        issues = myDB.select("SELECT * from issues WHERE Status='Wanted'")
+        issues = myDB.select(SQL_WANTED_ISSUES)
         if mylar.CONFIG.UPCOMING_STORYARCS is True:
             arcs = myDB.select("SELECT * from storyarcs WHERE Status='Wanted'")
         else:
@@ -2452,7 +2468,7 @@ class WebInterface(object):
         if mylar.CONFIG.ANNUALS_ON:
             #let's add the annuals to the wanted table so people can see them
             #ComicName wasn't present in db initially - added on startup chk now.
-            annuals_list = myDB.select("SELECT * FROM annuals WHERE Status='Wanted' AND NOT Deleted")
+            annuals_list = myDB.select(SQL_WANTED_ANNUALS)
             if mylar.CONFIG.UPCOMING_SNATCHED:
                 annuals_list += myDB.select("SELECT * FROM annuals WHERE Status='Snatched' AND NOT Deleted")
             if mylar.CONFIG.FAILED_DOWNLOAD_HANDLING:
@@ -3085,6 +3101,7 @@ class WebInterface(object):
                         mylar.WEEKLY_STATUS = 'Running'
                     elif jobid == 'search':
                         mylar.SEARCH_STATUS = 'Running'
+                        mylar.searchit.force()
                     elif jobid == 'version':
                         mylar.VERSION_STATUS = 'Running'
                     elif jobid == 'updater':
@@ -3282,12 +3299,12 @@ class WebInterface(object):
                 threading.Thread(target=self.manualRename, args=[comicsToAdd]).start()
             else:
                 logger.info('[MANAGE COMICS][REFRESH] Refreshing ' + str(len(comicsToAdd)) + ' series')
-                threading.Thread(target=updater.dbUpdate, args=[comicsToAdd]).start()
+                threading.Thread(target=updater.dbUpdate, args=[comicsToAdd], kwargs={'fresh': True}).start()
     markComics.exposed = True
 
     def forceUpdate(self):
         from mylar import updater
-        threading.Thread(target=updater.dbUpdate).start()
+        threading.Thread(target=updater.dbUpdate, kwargs={'fresh': True}).start()
         raise cherrypy.HTTPRedirect("home")
     forceUpdate.exposed = True
 
@@ -5411,7 +5428,8 @@ class WebInterface(object):
                       "COUNT_HAVES": COUNT_HAVES,
                       "COUNT_ISSUES": COUNT_ISSUES,
                       "COUNT_SIZE": COUNT_SIZE,
-                      "CCONTCOUNT": CCONTCOUNT}
+                      "CCONTCOUNT": CCONTCOUNT,
+                      "PARSE_STATS": filechecker.parse_stats()}
         DLPROVSTATS = myDB.select("SELECT Provider, COUNT(Provider) AS Frequency FROM Snatched WHERE Status = 'Snatched' AND Provider is NOT NULL GROUP BY Provider ORDER BY Frequency DESC")
         freq = dict()
         freq_tot = 0
@@ -6086,6 +6104,10 @@ class WebInterface(object):
         logger.info('Now saving config...')
         mylar.CONFIG.writeconfig()
 
+        #pooled connections are set up with the old retry settings (and maybe old hosts).
+        httpclient.reset()
+        ddltransfer.reset()
+
     configUpdate.exposed = True
 
     def SABtest(self, sabhost=None, sabusername=None, sabpassword=None, sabapikey=None):
@@ -6584,9 +6606,17 @@ class WebInterface(object):
             meta_dir = cinfo['ComicLocation']
         else:
             meta_dir = dirName
-        for ginfo in groupinfo:
+        #issues are tagged side by side so any cbr's among them keep every conversion slot busy - each one has
+        #its own temp copy, so no more than this many are in the cache at once.
+        with ThreadPoolExecutor(max_workers=cbrconvert.workers(), thread_name_prefix='SERIES-METATAGGER') as executor:
             #if multiple_dest_dirs is in effect, metadir will be pointing to the wrong location and cause a 'Unable to create temporary cache location' error message
-            self.manual_metatag(meta_dir, ginfo['IssueID'], os.path.join(meta_dir, ginfo['Location']), ComicID, comversion=cinfo['ComicVersion'], seriesyear=cinfo['ComicYear'], group=True, agerating=cinfo['AgeRating'])
+            jobs = [executor.submit(self.manual_metatag, meta_dir, ginfo['IssueID'], os.path.join(meta_dir, ginfo['Location']), ComicID, comversion=cinfo['ComicVersion'], seriesyear=cinfo['ComicYear'], group=True, agerating=cinfo['AgeRating']) for ginfo in groupinfo]
+            for cnt, job in enumerate(as_completed(jobs), 1):
+                try:
+                    job.result()
+                except Exception as e:
+                    logger.warn('[SERIES-METATAGGER][%s] Error while tagging: %s' % (cinfo['ComicName'], e))
+                logger.fdebug('[SERIES-METATAGGER][%s] %s/%s issues done' % (cinfo['ComicName'], cnt, len(jobs)))
         updater.forceRescan(ComicID)
         logger.info('[SERIES-METATAGGER][' + cinfo['ComicName'] + ' (' + cinfo['ComicYear'] + ')] Finished doing a complete series (re)tagging of metadata.')
     group_metatag.exposed = True
@@ -7044,6 +7074,22 @@ class WebInterface(object):
                                 'a_id':  None})
          else:
              if active['filename'] is not None:
+                 transfers = ddltransfer.active()
+                 live = [x for x in transfers if x['id'] == active['id']]
+                 if live:
+                     speed = ddltransfer.human_rate(live[0]['rate'])
+                     if live[0]['segments'] > 1:
+                         speed = '%s (%s segments)' % (speed, live[0]['segments'])
+                     if len(transfers) > 1:
+                         speed = '%s - %s other download(s) running' % (speed, len(transfers) - 1)
+                     return json.dumps({'status':      'Downloading',
+                                        'percent':     "%s%s" % (live[0]['percent'], '%'),
+                                        'a_series':    active['series'],
+                                        'a_year':      active['year'],
+                                        'a_filename':  active['filename'],
+                                        'a_size':      active['size'],
+                                        'a_speed':     speed,
+                                        'a_id':        active['id']})
                  filelocation = os.path.join(mylar.CONFIG.DDL_LOCATION, active['filename'])
                  #logger.fdebug('checking file existance: %s' % filelocation)
                  if os.path.exists(filelocation) is True:
@@ -7083,7 +7129,7 @@ class WebInterface(object):
         weeklyresults = []
         if weeknumber is not None:
             myDB = db.DBConnection()
-            w_results = myDB.select("SELECT * from weekly WHERE weeknumber=? AND year=?", [int(weeknumber),int(year)])
+            w_results = myDB.select(SQL_WEEKLY, [int(weeknumber),int(year)])
             watchlibrary = helpers.listLibrary()
             issueLibrary = helpers.listIssues(weeknumber, year)
             oneofflist = helpers.listoneoffs(weeknumber, year)
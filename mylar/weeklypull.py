@@ -31,7 +31,7 @@ import traceback
 import json
 
 import mylar
-from mylar import db, updater, helpers, logger, newpull, importer, mb, locg, webserve
+from mylar import db, updater, helpers, logger, newpull, importer, mb, locg, webserve, httpclient
 
 def pullit(forcecheck=None, weeknumber=None, year=None):
     myDB = db.DBConnection()
@@ -1447,7 +1447,7 @@ def pull_the_file(newrl):
     PULLURL = 'https://www.previewsworld.com/shipping/newreleases.txt'
     PULL_AGENT = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/42.0.2311.135 Safari/537.36 Edge/12.246'}
     try:
-        r = requests.get(PULLURL, verify=True, headers=PULL_AGENT, stream=True)
+        r = httpclient.get(PULLURL, verify=True, headers=PULL_AGENT, stream=True)
     except requests.exceptions.RequestException as e:
         logger.warn(e)
         return False
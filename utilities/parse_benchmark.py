@@ -0,0 +1,151 @@
+#  This file is part of Mylar.
+#
+#  Mylar is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  Mylar is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Mylar.  If not, see <http://www.gnu.org/licenses/>.
+
+# Filename parser throughput check. Runs FileChecker.parse_filename (the un-memoized parser) over a set of
+# real-world release names, both as a bare parse (post-processing / import) and matched against a watched
+# series (rescans / rss), and prints files/sec for each.
+#
+#   python utilities/parse_benchmark.py [-n ROUNDS] [-f FILE_OF_FILENAMES] [--profile]
+
+import os
+import sys
+import time
+import logging
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mylar
+from mylar import config
+
+#(filename, watched series it should be matched against)
+FILENAMES = [
+    ('Batman 001 (2016) (Digital) (Zone-Empire).cbr', 'Batman'),
+    ('Batman 050 (2018) (Webrip) (The Last Kryptonian-DCP).cbz', 'Batman'),
+    ('Batman - The Long Halloween 01 (1996) (c2c) (GreenGiant-DCP).cbz', 'Batman - The Long Halloween'),
+    ('Amazing Spider-Man 001 (2018) (Digital) (Zone-Empire).cbr', 'Amazing Spider-Man'),
+    ('The Amazing Spider-Man 800 (2018) (2 covers) (digital) (Minutemen-Midas).cbr', 'The Amazing Spider-Man'),
+    ('Amazing Spider-Man v5 #25 (2019).cbz', 'Amazing Spider-Man'),
+    ('Saga 054 (2018) (Digital) (Zone-Empire).cbr', 'Saga'),
+    ('Saga Vol. 01 (2012) (digital-Empire).cbr', 'Saga'),
+    ('Saga TPB Vol. 9 (2018) (Digital) (Zone-Empire).cbz', 'Saga'),
+    ('Injustice - Gods Among Us - Year Three 012 (2015) (digital) (Son of Ultron-Empire).cbz', 'Injustice: Gods Among Us: Year Three'),
+    ('X-Men - Red Annual 001 (2018) (Digital) (Zone-Empire).cbr', 'X-Men: Red'),
+    ('Avengers 2018 Annual 001 (2018) (Digital) (Zone-Empire).cbr', 'Avengers'),
+    ('Detective Comics 1000 (2019) (8 covers) (Digital) (Zone-Empire).cbr', 'Detective Comics'),
+    ('Detective Comics #1000 (Variant Edition) (2019).cbz', 'Detective Comics'),
+    ('Wonder Woman 750 (2020) (Webrip) (The Last Kryptonian-DCP).cbr', 'Wonder Woman'),
+    ('Justice League 1.5 (2018) (digital) (Son of Ultron-Empire).cbz', 'Justice League'),
+    ('Uncanny X-Men 001.NOW (2013) (Digital) (Zone-Empire).cbr', 'Uncanny X-Men'),
+    ('Deadpool 000.AU (2013) (Digital).cbz', 'Deadpool'),
+    ('Invincible 144 (2018) (Digital) (Zone-Empire).cbr', 'Invincible'),
+    ('Invincible Compendium v03 (2018) (Digital) (Zone-Empire).cbz', 'Invincible'),
+    ('2000 AD 2100 (2018) (digital) (Minutemen-juvecube).cbr', '2000 AD'),
+    ('100 Bullets 001 (1999) (c2c) (Cypher 2.0-Novus-HD).cbz', '100 Bullets'),
+    ('Star Wars - Darth Vader 025 (2016) (Digital) (Kileko-Empire).cbr', 'Star Wars: Darth Vader'),
+    ('Star Wars Adventures 2018 Annual (2018) (digital) (Knight Ripper-Empire).cbr', 'Star Wars Adventures'),
+    ('Mister Miracle 012 (of 012) (2018) (Digital) (Zone-Empire).cbr', 'Mister Miracle'),
+    ('Doomsday Clock 01 (of 12) (2018) (Webrip) (The Last Kryptonian-DCP).cbz', 'Doomsday Clock'),
+    ('Paper Girls #25 (2019) (digital) (Son of Ultron-Empire).cbz', 'Paper Girls'),
+    ('Monstress 020 (2019) (Digital) (Zone-Empire).cbr', 'Monstress'),
+    ('Hellboy and the B.P.R.D. - 1955 - Occult Intelligence 03 (2017) (digital) (Son of Ultron-Empire).cbr', 'Hellboy and the B.P.R.D.: 1955 - Occult Intelligence'),
+    ('B.P.R.D. - The Devil You Know 015 (2019) (digital) (Son of Ultron-Empire).cbr', 'B.P.R.D.: The Devil You Know'),
+    ('Teenage Mutant Ninja Turtles 100 (2019) (digital) (Son of Ultron-Empire).cbz', 'Teenage Mutant Ninja Turtles'),
+    ('TMNT 100 (2019).cbz', 'Teenage Mutant Ninja Turtles'),
+    ('The Walking Dead 193 (2019) (Digital) (Zone-Empire).cbr', 'The Walking Dead'),
+    ('Walking Dead, The 193 (2019).cbz', 'The Walking Dead'),
+    ('Batman & Robin 001 (2011) (Digital).cbz', 'Batman & Robin'),
+    ('Batman and Robin 001 (2011).cbr', 'Batman & Robin'),
+    ('Captain America - Steve Rogers 001 (2016) (Digital) (Zone-Empire).cbr', 'Captain America: Steve Rogers'),
+    ('Superman - Action Comics 1050 (2023) (Webrip) (The Last Kryptonian-DCP).cbz', 'Action Comics'),
+    ('Action Comics 1000 (2018) (13 covers) (Digital) (Zone-Empire).cbr', 'Action Comics'),
+    ('Ms. Marvel 031 (2018) (Digital) (Zone-Empire).cbr', 'Ms. Marvel'),
+    ('Ms Marvel 031 (2018).cbz', 'Ms. Marvel'),
+    ('Venom 001 (2018) (Digital) (Zone-Empire).cbr', 'Venom'),
+    ('Venom Vol. 1 - Rex (2018) (Digital) (Zone-Empire).cbr', 'Venom'),
+    ('Black Hammer - Age of Doom 008 (2019) (digital) (Son of Ultron-Empire).cbz', 'Black Hammer: Age of Doom'),
+    ('Die!Die!Die! 008 (2019) (digital) (Son of Ultron-Empire).cbr', 'Die!Die!Die!'),
+    ('Y - The Last Man 060 (2008) (digital) (Minutemen-Slayer).cbr', 'Y: The Last Man'),
+    ('Sandman 075 (1996) (digital) (Glorith-HD).cbz', 'The Sandman'),
+    ('Spawn 300 (2019) (8 covers) (digital) (Son of Ultron-Empire).cbr', 'Spawn'),
+    ('Immortal Hulk 0.1 (2019).cbz', 'Immortal Hulk'),
+    ('Immortal Hulk 012 (2019) (Digital) (Zone-Empire).cbr', 'Immortal Hulk'),
+    ('Conan the Barbarian 001 (2019) (Digital) (Zone-Empire).cbr', 'Conan the Barbarian'),
+    ('Something is Killing the Children 001 (2019) (Digital) (Zone-Empire).cbz', 'Something is Killing the Children'),
+    ('Lazarus Risen 001 (2019) (Digital) (Zone-Empire).cbr', 'Lazarus: Risen'),
+    ('Fables 150 (2015) (Digital) (Zone-Empire).cbr', 'Fables'),
+    ('Old Man Logan 050 (2018) (Digital) (Zone-Empire).cbr', 'Old Man Logan'),
+    ('Hawkeye 022 (2015) (Digital) (Zone-Empire).cbr', 'Hawkeye'),
+    ('East of West 045 (2019) (digital) (Son of Ultron-Empire).cbr', 'East of West'),
+    ('Descender 032 (2018) (Digital) (Zone-Empire).cbr', 'Descender'),
+    ('Ice Cream Man 012 (2019) (digital) (Son of Ultron-Empire).cbz', 'Ice Cream Man'),
+    ('Transformers vs. G.I. Joe 013 (2016) (digital) (Son of Ultron-Empire).cbz', 'Transformers vs. G.I. Joe'),
+]
+
+def setup():
+    #just enough of a config for the parser - nothing is read from / written to disk.
+    mylar.CONFIG = config.Config(os.devnull)
+    for k, v in config._CONFIG_DEFINITIONS.items():
+        setattr(mylar.CONFIG, k, v[2])
+    mylar.OS_DETECT = 'Linux'
+    mylar.ISSUE_EXCEPTIONS = ['AU', 'AI', 'INH', 'NOW', 'BEY', 'MU', 'HU', 'LR', 'A', 'B', 'C', 'X', 'O']
+    mylar.LOG_LEVEL = 0
+    logging.getLogger('mylar').setLevel(logging.CRITICAL)
+
+def run(filenames, rounds):
+    from mylar import filechecker
+    results = {}
+    for mode in ('parse', 'match'):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for filename, series in filenames:
+                if mode == 'parse':
+                    fc = filechecker.FileChecker(justparse=True)
+                else:
+                    fc = filechecker.FileChecker(watchcomic=series)
+                fc.parse_filename('/comics', filename)
+        elapsed = time.perf_counter() - start
+        results[mode] = (len(filenames) * rounds) / elapsed
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Mylar filename parser benchmark')
+    parser.add_argument('-n', '--rounds', type=int, default=20, help='passes over the filename set')
+    parser.add_argument('-f', '--file', help='file of release names (one per line) to use instead of the built-in set')
+    parser.add_argument('--profile', action='store_true', help='print the top 25 functions by cumulative time')
+    args = parser.parse_args()
+
+    setup()
+    filenames = FILENAMES
+    if args.file:
+        with open(args.file) as f:
+            filenames = [(x.strip(), os.path.splitext(x.strip())[0].split(' 0')[0]) for x in f if x.strip()]
+
+    if args.profile:
+        import cProfile, pstats
+        prof = cProfile.Profile()
+        prof.runcall(run, filenames, args.rounds)
+        pstats.Stats(prof).sort_stats('cumulative').print_stats(25)
+        return
+
+    run(filenames, 1)  #warm up
+    results = run(filenames, args.rounds)
+    print('%s filenames x %s rounds' % (len(filenames), args.rounds))
+    print('  parse only      : %8.1f files/sec' % results['parse'])
+    print('  parse + match   : %8.1f files/sec' % results['match'])
+
+if __name__ == '__main__':
+    main()